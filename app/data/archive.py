@@ -0,0 +1,226 @@
+import json
+import sys
+import zlib
+from datetime import date, timedelta
+from pathlib import Path
+
+from app.data.changes import install_change_counters
+from app.data.db import DB_PATH
+from app.data.shards import SHARDED_TABLES, ShardRouter
+from app.data.writer import get_writer
+
+try:
+    import zstandard
+except ImportError:  # zlib is always available
+    zstandard = None
+
+# ---------------- Constants -----------------
+ARCHIVE_PATH = Path("DATA") / "archive.db"
+ARCHIVE_AFTER_DAYS = 90
+
+# table -> (key column, date column, finished statuses, summary columns kept in the hot DB)
+ARCHIVE_POLICIES = {
+    "cyber_incidents": (
+        "id", "date", ("Resolved", "Closed"),
+        ["date", "incident_type", "severity", "status", "reported_by"],
+    ),
+    "it_tickets": (
+        "ticket_id", "created_on", ("Resolved", "Closed"),
+        ["created_on", "status", "priority", "assigned_to"],
+    ),
+}
+
+
+# ---------------- Compression -----------------
+def compress(payload):
+    """Compress a bytes payload and return (codec, blob)."""
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(payload)
+    return "zlib", zlib.compress(payload, 9)
+
+
+def decompress(codec, blob):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This archive row is zstd-compressed; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return zlib.decompress(blob)
+
+
+# ---------------- Schema -----------------
+def summary_table(table):
+    return f"{table}_archived"
+
+
+def create_archive_tables(conn):
+    """Create the thin summary tables in the hot DB and the payload tables in the archive.
+
+    Expects the archive database to be attached as `archive`. Doesn't
+    commit, so it can run inside a caller's transaction.
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM main.sqlite_master WHERE type = 'table'")}
+    for table, (key, _, _, summary_columns) in ARCHIVE_POLICIES.items():
+        columns = ", ".join(f"{c} TEXT" for c in summary_columns)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS main.{summary_table(table)} (
+                {key} INTEGER PRIMARY KEY,
+                {columns},
+                archived_on TEXT NOT NULL
+            )
+        """)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS archive.{table} (
+                {key} INTEGER PRIMARY KEY,
+                codec TEXT NOT NULL,
+                payload BLOB NOT NULL
+            )
+        """)
+        if summary_table(table) not in existing:
+            # Archiving moves rows out of a stream; the summary's counter records it
+            install_change_counters(conn, [summary_table(table)])
+
+
+def attach_archive(conn, archive_path=ARCHIVE_PATH):
+    """ATTACH the archive database as `archive` (idempotent) and make sure its tables exist."""
+    attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+    if "archive" not in attached:
+        Path(archive_path).parent.mkdir(parents=True, exist_ok=True)
+        conn.execute("ATTACH DATABASE ? AS archive", (str(archive_path),))
+    create_archive_tables(conn)
+
+
+def detach_archive(conn):
+    """DETACH the archive if it is attached, e.g. before handing a shared connection back."""
+    if "archive" in {row[1] for row in conn.execute("PRAGMA database_list")}:
+        conn.execute("DETACH DATABASE archive")
+
+
+# ---------------- Archiving -----------------
+def archive_rows(conn, table, older_than_days=ARCHIVE_AFTER_DAYS, batch_size=500, today=None):
+    """Move finished rows older than `older_than_days` out of the hot table and its shards.
+
+    The full row goes to the archive DB as compressed JSON and a summary row
+    (everything but the free text) stays in <table>_archived. The tables have
+    no resolved-at column, so the row's own date is used as its age.
+    Shards are read one month at a time, only those old enough to hold such
+    rows; frozen (read-only) shards are left as they are. Each batch is one
+    transaction covering the databases involved. Returns the number of rows
+    archived.
+    """
+    attach_archive(conn)
+    today = today or date.today()
+    cutoff = (today - timedelta(days=older_than_days)).isoformat()
+    archived = _archive_from(conn, table, "main", cutoff, batch_size, today)
+    if table not in SHARDED_TABLES:
+        return archived
+    router = ShardRouter(conn)
+    try:
+        for month in router.prune(table, end=cutoff):
+            if not router.is_frozen(table, month):
+                archived += _archive_from(conn, table, router.attach(table, month), cutoff, batch_size, today)
+    finally:
+        router.detach_all()
+    return archived
+
+
+def _archive_from(conn, table, schema, cutoff, batch_size, today):
+    """Archive the qualifying rows of `schema`.`table`; returns how many."""
+    key, date_column, finished, summary_columns = ARCHIVE_POLICIES[table]
+    placeholders = ", ".join("?" * len(finished))
+    select_sql = f"""
+        SELECT * FROM {schema}.{table}
+        WHERE status COLLATE NOCASE IN ({placeholders}) AND {date_column} < ?
+        ORDER BY {key}
+        LIMIT ?
+    """
+    summary_sql = f"""
+        INSERT OR REPLACE INTO main.{summary_table(table)}
+        ({key}, {', '.join(summary_columns)}, archived_on)
+        VALUES ({', '.join('?' * (len(summary_columns) + 2))})
+    """
+
+    archived = 0
+    while True:
+        if not conn.in_transaction:  # one transaction per batch, on autocommit connections too
+            conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(select_sql, (*finished, cutoff, batch_size))
+            names = [d[0] for d in cursor.description]
+            rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+            for row in rows:
+                codec, blob = compress(json.dumps(row, separators=(",", ":")).encode("utf-8"))
+                conn.execute(
+                    f"INSERT OR REPLACE INTO archive.{table} ({key}, codec, payload) VALUES (?, ?, ?)",
+                    (row[key], codec, blob),
+                )
+                conn.execute(summary_sql, (row[key], *[row.get(c) for c in summary_columns], today.isoformat()))
+            conn.executemany(f"DELETE FROM {schema}.{table} WHERE {key} = ?", [(row[key],) for row in rows])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        if not rows:
+            break
+        archived += len(rows)
+    return archived
+
+
+def archive_all(older_than_days=ARCHIVE_AFTER_DAYS, db_path=DB_PATH):
+    """Archive every table in ARCHIVE_POLICIES and return {table: rows archived}.
+
+    Runs on the single writer's connection, one table per lease, so writes
+    queued by the app go in between tables instead of hitting a lock.
+    """
+    archived = {}
+    for table in ARCHIVE_POLICIES:
+        with get_writer(db_path).connection() as conn:
+            try:
+                archived[table] = archive_rows(conn, table, older_than_days)
+            finally:
+                detach_archive(conn)
+    return archived
+
+
+# ---------------- Reading -----------------
+def get_archived_rows(conn, table, where="", params=()):
+    """Return full archived rows (as dicts) whose summary row matches `where`.
+
+    `where` is filtered against the summary columns, so only matching
+    payloads are read from the archive and decompressed. Rows are stored as
+    they were, *_code columns included; see lookups.label_rows().
+    """
+    key = ARCHIVE_POLICIES[table][0]
+    attach_archive(conn)
+    clause = f" WHERE {where}" if where else ""
+    cursor = conn.execute(f"""
+        SELECT a.codec, a.payload
+        FROM main.{summary_table(table)} s
+        JOIN archive.{table} a ON a.{key} = s.{key}
+        {clause}
+        ORDER BY s.{key}
+    """, tuple(params))
+    return [json.loads(decompress(codec, blob)) for codec, blob in cursor]
+
+
+def archived_keys(conn, table):
+    """Return the set of keys already moved to the archive, e.g. to skip them on re-import."""
+    key = ARCHIVE_POLICIES[table][0]
+    attach_archive(conn)
+    return {row[0] for row in conn.execute(f"SELECT {key} FROM main.{summary_table(table)}")}
+
+
+def archive_stats(conn):
+    """Return {table: archived row count} from the summary tables."""
+    attach_archive(conn)
+    return {
+        table: conn.execute(f"SELECT COUNT(*) FROM main.{summary_table(table)}").fetchone()[0]
+        for table in ARCHIVE_POLICIES
+    }
+
+
+# ---------------- Main -----------------
+if __name__ == "__main__":
+    # python -m app.data.archive [days]
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else ARCHIVE_AFTER_DAYS
+    for table, count in archive_all(days).items():
+        print(f"✓ Archived {count} rows from {table}")
@@ -0,0 +1,47 @@
+import sqlite3
+
+# ---------------- Change Counters -----------------
+# Each database file (main, a shard, ...) keeps the counters of its own tables:
+# a trigger can only write to the database its table lives in.
+VERSIONS_TABLE = "table_versions"
+
+
+def install_change_counters(conn, tables, schema="main"):
+    """Bump `schema`.table_versions on every INSERT/UPDATE/DELETE of `tables`; doesn't commit.
+
+    Tables that don't exist yet are skipped; install again once they do.
+    The triggers are dropped and recreated, so a changed body replaces the
+    old one.
+    """
+    existing = {
+        row[0] for row in conn.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table'")
+    }
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {schema}.{VERSIONS_TABLE} (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    for table in tables:
+        if table not in existing:
+            continue
+        conn.execute(f"INSERT OR IGNORE INTO {schema}.{VERSIONS_TABLE} (name) VALUES (?)", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            trigger = f"{table}_version_{event.lower()}"
+            conn.execute(f"DROP TRIGGER IF EXISTS {schema}.{trigger}")
+            conn.execute(f"""
+                CREATE TRIGGER {schema}.{trigger}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE {VERSIONS_TABLE} SET version = version + 1 WHERE name = '{table}';
+                END
+            """)
+
+
+def table_versions(conn, tables, schema="main"):
+    """{table: version} for `tables`; None for a table without a counter."""
+    try:
+        found = dict(conn.execute(f"SELECT name, version FROM {schema}.{VERSIONS_TABLE}"))
+    except sqlite3.OperationalError:  # counters never installed here
+        found = {}
+    return {table: found.get(table) for table in tables}
@@ -0,0 +1,319 @@
+import heapq
+import sqlite3
+import sys
+from collections import Counter, deque, namedtuple
+from datetime import datetime
+
+from app.data.archive import ARCHIVE_POLICIES, summary_table
+from app.data.changes import install_change_counters, table_versions
+from app.data.db import DB_PATH
+from app.data.shards import SHARDED_TABLES, ShardRouter
+
+# ---------------- Constants -----------------
+# stream -> (table, key column, time column, attribute columns)
+EVENT_STREAMS = {
+    "incidents": ("cyber_incidents", "id", "date", ["incident_type", "severity", "status", "reported_by"]),
+    "threats": ("security_threats", "id", "detected_on", ["threat_name", "severity"]),
+    "tickets": ("it_tickets", "ticket_id", "created_on", ["title", "status", "priority", "assigned_to"]),
+}
+
+# join key -> the column that carries it on each stream; events only pair when their values match
+CORRELATION_KEYS = {
+    "person": {"incidents": "reported_by", "tickets": "assigned_to"},
+    "severity": {"incidents": "severity", "threats": "severity", "tickets": "priority"},
+    "type": {"incidents": "incident_type", "threats": "threat_name", "tickets": "title"},
+}
+
+# stream -> attribute whose distribution is compared between correlated and all events
+BREAKDOWN_COLUMNS = {"incidents": "severity", "threats": "severity", "tickets": "priority"}
+
+MAX_PAIRS = 500      # pairs kept for display; every pair is still counted
+TOP_ANCHORS = 20
+SPIKE_FACTOR = 2.0   # an anchor "spikes" when its window holds this many times the baseline
+
+Event = namedtuple("Event", ["hours", "stamp", "id", "fields"])
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+# ---------------- Schema -----------------
+def create_time_indexes(conn):
+    """Index every stream's time column so ORDER BY streams rows instead of sorting them.
+
+    Doesn't commit, so it can run inside the single writer's transaction.
+    """
+    for table, _, time_column, _ in EVENT_STREAMS.values():
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{time_column} ON {table} ({time_column})")
+
+
+# ---------------- Streams -----------------
+def to_hours(stamp):
+    """Hours since the epoch for an ISO date/datetime string, or None if it doesn't parse."""
+    try:
+        moment = datetime.fromisoformat(str(stamp).strip()[:19])
+    except ValueError:
+        return None
+    return (moment.replace(tzinfo=None) - _EPOCH).total_seconds() / 3600
+
+
+def _filter_clause(columns, filters):
+    """WHERE conditions for {column: allowed values}; a column this partition lacks matches nothing."""
+    conditions, params = [], []
+    for column, values in (filters or {}).items():
+        if column not in columns:
+            return ["0"], []
+        conditions.append(f"{column} COLLATE NOCASE IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    return conditions, params
+
+
+def _partition_rows(conn, relation, stream, filters):
+    """Rows of one partition (main table, shard or archive summary) in time order."""
+    _, key, time_column, attributes = EVENT_STREAMS[stream]
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({relation})")}
+    if not existing:
+        return
+    selected = [c if c in existing else f"NULL AS {c}" for c in attributes]
+    conditions, params = _filter_clause(existing, filters)
+    conditions.insert(0, f"{time_column} IS NOT NULL")
+    cursor = conn.execute(
+        f"SELECT {key}, {time_column}, {', '.join(selected)} FROM {relation} "
+        f"WHERE {' AND '.join(conditions)} ORDER BY {time_column}",
+        params,
+    )
+    for row in cursor:
+        hours = to_hours(row[1])
+        if hours is not None:
+            yield Event(hours, row[1], row[0], dict(zip(attributes, row[2:])))
+
+
+def _shard_rows(table, stream, filters):
+    """Every shard of `table`, oldest month first. Months don't overlap, so the chain stays sorted."""
+    router = ShardRouter(None)
+    for month in router.months(table):
+        shard = sqlite3.connect(f"file:{router.shard_path(table, month).resolve()}?mode=ro", uri=True)
+        try:
+            yield from _partition_rows(shard, table, stream, filters)
+        finally:
+            shard.close()
+
+
+def iter_events(conn, stream, filters=None):
+    """Yield a stream's events in time order across main, shards and archived summaries.
+
+    Each partition is read with an index-ordered SELECT and the partitions
+    are merged lazily, so memory stays flat however many rows there are.
+    `filters` is {column: [values]} (case-insensitive).
+    """
+    table = EVENT_STREAMS[stream][0]
+    partitions = [_partition_rows(conn, table, stream, filters)]
+    if table in SHARDED_TABLES:
+        partitions.append(_shard_rows(table, stream, filters))
+    if table in ARCHIVE_POLICIES:
+        partitions.append(_partition_rows(conn, summary_table(table), stream, filters))
+    return heapq.merge(*partitions, key=lambda event: event.hours)
+
+
+# ---------------- Interval Join -----------------
+def _key_value(event, column):
+    value = event.fields.get(column) if column else ""
+    return str(value).strip().lower() if value is not None else None
+
+
+def window_join(anchors, targets, before_hours=0, after_hours=24, anchor_key=None, target_key=None,
+                on_close=None, same_stream=False):
+    """Sort-merge interval join of two time-ordered event streams.
+
+    Yields (anchor, target) for every target dated within
+    [anchor - before_hours, anchor + after_hours] whose key value equals the
+    anchor's (when keys are given). One pass over each stream: anchors
+    enter a window queue when the sweep reaches their window start and
+    leave it once the sweep passes their window end, so the work is
+    O(anchors + targets + pairs) and memory is bounded by the anchors
+    open at one moment. `on_close(anchor, count)` is called once per
+    anchor with the number of targets it paired with. With `same_stream`
+    (a stream joined with itself) an event is never paired with itself.
+    """
+    anchors = iter(anchors)
+    pending = next(anchors, None)
+    open_windows = deque()   # [anchor, key, count], ordered by window end
+    by_key = {}              # key -> deque of the same entries, same order
+
+    def close(entry):
+        by_key[entry[1]].popleft()
+        if not by_key[entry[1]]:
+            del by_key[entry[1]]
+        if on_close is not None:
+            on_close(entry[0], entry[2])
+
+    for target in targets:
+        while pending is not None and pending.hours - before_hours <= target.hours:
+            key = _key_value(pending, anchor_key)
+            if key is not None:
+                entry = [pending, key, 0]
+                open_windows.append(entry)
+                by_key.setdefault(key, deque()).append(entry)
+            elif on_close is not None:
+                on_close(pending, 0)
+            pending = next(anchors, None)
+        while open_windows and open_windows[0][0].hours + after_hours < target.hours:
+            close(open_windows.popleft())
+        if not open_windows:
+            if pending is None:
+                break
+            continue
+
+        for entry in by_key.get(_key_value(target, target_key), ()):
+            if same_stream and entry[0].id == target.id:
+                continue
+            entry[2] += 1
+            yield entry[0], target
+
+    while open_windows:
+        close(open_windows.popleft())
+    if on_close is not None:
+        while pending is not None:
+            on_close(pending, 0)
+            pending = next(anchors, None)
+
+
+def correlate(conn, anchor="incidents", target="tickets", before_hours=0, after_hours=24,
+              anchor_filter=None, target_filter=None, key=None, max_pairs=MAX_PAIRS, top=TOP_ANCHORS):
+    """Correlate two streams and summarise which anchors saw a spike of targets.
+
+    `key` names an entry of CORRELATION_KEYS (or None to pair on time alone).
+    The baseline is how many targets an average window of the same width
+    would hold; anchors with SPIKE_FACTOR times that count as spikes.
+    """
+    anchor_key = target_key = None
+    if key:
+        anchor_key, target_key = CORRELATION_KEYS[key].get(anchor), CORRELATION_KEYS[key].get(target)
+        if anchor_key is None or target_key is None:
+            raise ValueError(f"Key {key!r} is not defined for {anchor} and {target}")
+
+    breakdown_column = BREAKDOWN_COLUMNS[target]
+    totals = {"anchors": 0, "targets": 0, "pairs": 0, "first": None, "last": None}
+    overall, correlated = Counter(), Counter()
+    anchor_counts = []
+
+    def count_targets(events):
+        for event in events:
+            totals["targets"] += 1
+            if totals["first"] is None:
+                totals["first"] = event.hours
+            totals["last"] = event.hours
+            overall[event.fields.get(breakdown_column)] += 1
+            yield event
+
+    def closed(event, count):
+        totals["anchors"] += 1
+        anchor_counts.append((count, event.stamp, event.id, event.fields))
+
+    pairs = []
+    targets = count_targets(iter_events(conn, target, target_filter))
+    last = None
+    for a, t in window_join(
+        iter_events(conn, anchor, anchor_filter), targets,
+        before_hours, after_hours, anchor_key, target_key, on_close=closed, same_stream=anchor == target,
+    ):
+        totals["pairs"] += 1
+        if t is not last:  # a target inside several windows is counted once
+            correlated[t.fields.get(breakdown_column)] += 1
+            last = t
+        if len(pairs) < max_pairs:
+            pairs.append({
+                f"{anchor}_id": a.id, f"{anchor}_time": a.stamp,
+                f"{target}_id": t.id, f"{target}_time": t.stamp,
+                "lag_hours": round(t.hours - a.hours, 2),
+                **{f"{anchor}.{k}": v for k, v in a.fields.items()},
+                **{f"{target}.{k}": v for k, v in t.fields.items()},
+            })
+    # Drain the target stream so the baseline covers every target, not just those before the last window
+    for _ in targets:
+        pass
+
+    span = (totals["last"] - totals["first"]) if totals["targets"] > 1 else 0
+    window = before_hours + after_hours
+    baseline = totals["targets"] * window / span if span else float(totals["targets"])
+    threshold = max(1, SPIKE_FACTOR * baseline)
+    return {
+        "anchors": totals["anchors"],
+        "targets": totals["targets"],
+        "pairs": totals["pairs"],
+        "baseline": baseline,
+        "spikes": sum(1 for count, *_ in anchor_counts if count >= threshold),
+        "top_anchors": [
+            {"id": event_id, "time": stamp, "targets": count, **fields}
+            for count, stamp, event_id, fields in heapq.nlargest(top, anchor_counts, key=lambda item: item[0])
+        ],
+        "sample_pairs": pairs,
+        "breakdown": {
+            str(label): (correlated[label], overall[label]) for label in overall
+        },
+    }
+
+
+def _stream_tables(table):
+    """The tables in the main database that hold a stream's rows: the table and its archive summary."""
+    return [table, summary_table(table)] if table in ARCHIVE_POLICIES else [table]
+
+
+def install_stream_counters(conn):
+    """Change counters behind stream_versions() on every stream's tables, shards included.
+
+    Runs at setup; the main database's part joins the caller's transaction,
+    each writable shard is updated on its own connection.
+    """
+    for table, _, _, _ in EVENT_STREAMS.values():
+        install_change_counters(conn, _stream_tables(table))
+        if table not in SHARDED_TABLES:
+            continue
+        router = ShardRouter(None)
+        for month in router.months(table):
+            if router.is_frozen(table, month):
+                continue  # read-only, so it never changes
+            shard = sqlite3.connect(router.shard_path(table, month), timeout=30)
+            try:
+                with shard:
+                    install_change_counters(shard, [table])
+            finally:
+                shard.close()
+
+
+def stream_versions(conn):
+    """Change token for cached results: every stream's change counters.
+
+    The counters move on every insert, update and delete of the main
+    table, its archive summary and each shard, so edits, archival and
+    shard writes all invalidate the token. Each shard keeps its own
+    counter; a new or removed shard changes the token too.
+    """
+    versions = []
+    for table, _, _, _ in EVENT_STREAMS.values():
+        stamp = list(table_versions(conn, _stream_tables(table)).values())
+        if table in SHARDED_TABLES:
+            router = ShardRouter(None)
+            for month in router.months(table):
+                shard = sqlite3.connect(f"file:{router.shard_path(table, month).resolve()}?mode=ro", uri=True)
+                try:
+                    stamp.append((month, table_versions(shard, [table])[table]))
+                finally:
+                    shard.close()
+        versions.append(tuple(stamp))
+    return tuple(versions)
+
+
+# ---------------- Main -----------------
+if __name__ == "__main__":
+    # python -m app.data.correlations [window hours] [key]
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 24
+    key = sys.argv[2] if len(sys.argv) > 2 else None
+    conn = sqlite3.connect(DB_PATH)
+    create_time_indexes(conn)
+    result = correlate(conn, "incidents", "tickets", after_hours=hours,
+                       anchor_filter={"severity": ["Critical"]}, key=key)
+    conn.close()
+    print(f"{result['anchors']} Critical incidents, {result['targets']} tickets, "
+          f"{result['pairs']} pairs within {hours:g}h, {result['spikes']} spikes "
+          f"(baseline {result['baseline']:.2f} tickets per window)")
@@ -1,12 +1,14 @@
 import sqlite3
 from pathlib import Path
 
+from app.data.query_stats import TimedConnection
+
 # Path to your database
 DB_PATH = Path("DATA") / "intelligence_platform.db"
 
 def connect_database():
     """Connect to the SQLite database and return the connection."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, factory=TimedConnection)
     conn.row_factory = sqlite3.Row  # Allows you to access columns by name
     return conn
 
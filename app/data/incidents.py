@@ -1,13 +1,73 @@
-def insert_incidents(conn, date, incident_type, severity, status, description, reported_by=None):
-    cursor = conn.cursor()
+from concurrent.futures import Future
 
-    query = """
-       INSERT INTO cyber_incidents
-       (date, incident_type, severity, status, description, reported_by)
-       VALUES (?, ?, ?, ?, ?, ?)
+from app.data.db import DB_PATH
+from app.data.near_duplicates import record_row
+from app.data.shards import ShardRouter, shard_month_for
+from app.data.writer import get_writer
+
+INCIDENT_COLUMNS = ("date", "incident_type", "severity", "status", "description", "reported_by")
+
+INSERT_INCIDENT_SQL = """
+   INSERT INTO cyber_incidents
+   (date, incident_type, severity, status, description, reported_by)
+   VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def insert_incidents(conn, date, incident_type, severity, status, description, reported_by=None, staged=None):
+    """Insert one incident and return its id.
+
+    Pass conn=None to go through the shared single writer, which
+    group-commits concurrent inserts instead of committing each row.
+    With a connection nothing is committed, so a caller inserting many
+    incidents commits them once. Incidents dated in a month that already
+    has a shard go to that shard, in the same transaction: the shard stays
+    attached to `conn` (a database touched by an open transaction can't be
+    detached). Every incident is also clustered with its near-duplicates;
+    with a connection, pass a StagedClusters as `staged` and apply() it
+    after committing so new clusters become matchable (see record_row).
     """
+    params = (date, incident_type, severity, status, description, reported_by)
+    if shard_month_for("cyber_incidents", date):
+        incident_id = _insert_into_shard(params, conn)
+    elif conn is None:
+        incident_id = get_writer(DB_PATH).submit(INSERT_INCIDENT_SQL, params).result()
+    else:
+        cursor = conn.cursor()
+        cursor.execute(INSERT_INCIDENT_SQL, params)
+        incident_id = cursor.lastrowid
+
+    record_row(conn, "incidents", incident_id, dict(zip(INCIDENT_COLUMNS, params)), staged)
+    return incident_id
+
+
+def submit_incident(date, incident_type, severity, status, description, reported_by=None):
+    """Queue an incident insert without waiting; returns a Future resolving to its id."""
+    params = (date, incident_type, severity, status, description, reported_by)
+    if shard_month_for("cyber_incidents", date):
+        future = Future()
+        future.set_result(_insert_into_shard(params))
+    else:
+        future = get_writer(DB_PATH).submit(INSERT_INCIDENT_SQL, params)
+
+    def cluster(done):
+        if done.exception() is None:
+            record_row(None, "incidents", done.result(), dict(zip(INCIDENT_COLUMNS, params)))
+
+    future.add_done_callback(cluster)
+    return future
 
-    cursor.execute(query, (date, incident_type, severity, status, description, reported_by))
-    conn.commit()
 
-    return cursor.lastrowid
+def _insert_into_shard(params, conn=None):
+    """Insert into the row's month shard, in `conn`'s transaction or on the single writer's connection."""
+    row = dict(zip(INCIDENT_COLUMNS, params))
+    if conn is not None:
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")  # left open: the caller commits, as for main-month rows
+        return ShardRouter(conn).insert("cyber_incidents", row)
+    with get_writer(DB_PATH).connection() as writer_conn:
+        router = ShardRouter(writer_conn)
+        try:
+            return router.insert("cyber_incidents", row)
+        finally:
+            router.detach_all()
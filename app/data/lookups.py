@@ -0,0 +1,204 @@
+import sqlite3
+
+from app.data.db import DB_PATH
+from platform_common.schema_versions import applied_version, mark_applied
+
+# ---------------- Lookup Tables -----------------
+# Bump when the migration below changes; each table is migrated once per version
+LOOKUPS_VERSION = 2
+
+# lookup table -> seeded (name, rank) pairs; unseen labels are added with rank 0
+LOOKUP_SEEDS = {
+    "severity_levels": [("Low", 1), ("Medium", 2), ("High", 3), ("Critical", 4)],
+    "statuses": [("Open", 1), ("In Progress", 2), ("Investigating", 3), ("Resolved", 4), ("Closed", 5)],
+    "priorities": [("Low", 1), ("Medium", 2), ("High", 3), ("Critical", 4)],
+    "incident_types": [],
+}
+
+# table -> (key column, [(text column, lookup table)])
+ENCODED_COLUMNS = {
+    "cyber_incidents": ("id", [
+        ("severity", "severity_levels"),
+        ("status", "statuses"),
+        ("incident_type", "incident_types"),
+    ]),
+    "security_threats": ("id", [("severity", "severity_levels")]),
+    "it_tickets": ("ticket_id", [("status", "statuses"), ("priority", "priorities")]),
+}
+
+
+def create_lookup_tables(conn):
+    """Create and seed the lookup tables. Names compare case-insensitively."""
+    for lookup, seeds in LOOKUP_SEEDS.items():
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {lookup} (
+                code INTEGER PRIMARY KEY,
+                name TEXT UNIQUE NOT NULL COLLATE NOCASE,
+                rank INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.executemany(
+            f"INSERT OR IGNORE INTO {lookup} (name, rank) VALUES (?, ?)", seeds
+        )
+
+
+def _table_columns(conn, table, schema="main"):
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def _encoded_columns(conn, table, schema="main"):
+    """Return the (text column, lookup) pairs that exist on this table."""
+    existing = _table_columns(conn, table, schema)
+    _, pairs = ENCODED_COLUMNS[table]
+    return [(column, lookup) for column, lookup in pairs if column in existing]
+
+
+# ---------------- Migration -----------------
+def _add_code_columns(conn, table, pairs):
+    existing = _table_columns(conn, table)
+    for column, _ in pairs:
+        if f"{column}_code" not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}_code INTEGER")
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_{column}_code ON {table} ({column}_code)"
+        )
+
+
+def _backfill_codes(conn, table, pairs):
+    """Register every label already in the table, then store its code on rows that lack one."""
+    for column, lookup in pairs:
+        conn.execute(f"""
+            INSERT OR IGNORE INTO {lookup} (name)
+            SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL
+        """)
+        conn.execute(f"""
+            UPDATE {table}
+            SET {column}_code = (SELECT code FROM {lookup} WHERE name = {table}.{column})
+            WHERE {column}_code IS NULL AND {column} IS NOT NULL
+        """)
+
+
+def _create_triggers(conn, table, key, pairs):
+    """Keep the code columns in sync for writers that still insert text labels."""
+    register = "\n".join(
+        f"INSERT OR IGNORE INTO {lookup} (name) VALUES (NEW.{column});"
+        for column, lookup in pairs
+    )
+    assign = ",\n".join(
+        f"{column}_code = (SELECT code FROM {lookup} WHERE name = NEW.{column})"
+        for column, lookup in pairs
+    )
+    watched = ", ".join(column for column, _ in pairs)
+
+    for event, name in (("INSERT", "insert"), (f"UPDATE OF {watched}", "update")):
+        # Replaced, not kept: a new LOOKUPS_VERSION may change the body or the watched columns
+        conn.execute(f"DROP TRIGGER IF EXISTS {table}_encode_{name}")
+        conn.execute(f"""
+            CREATE TRIGGER {table}_encode_{name}
+            AFTER {event} ON {table}
+            BEGIN
+                {register}
+                UPDATE {table} SET {assign} WHERE {key} = NEW.{key};
+            END
+        """)
+
+
+def labeled_select(conn, table, source=None, schema="main"):
+    """SELECT over `source` (default: the table itself) with canonical labels in place of the codes.
+
+    `source` can be any relation with the columns of `schema`.`table`, e.g.
+    a union view or the same table in an attached shard. The source is
+    aliased `t`, so callers can append conditions on t.<column>.
+    """
+    return _labeled_select(conn, table, _encoded_columns(conn, table, schema), source or table, schema)
+
+
+def _labeled_select(conn, table, pairs, source, schema="main"):
+    encoded = {column: lookup for column, lookup in pairs}
+    code_columns = {f"{column}_code" for column in encoded}
+    select, joins = [], []
+    for column in _table_columns(conn, table, schema):
+        if column in code_columns:
+            continue
+        if column in encoded:
+            alias = f"l_{column}"
+            select.append(f"COALESCE({alias}.name, t.{column}) AS {column}")
+            joins.append(
+                f"LEFT JOIN main.{encoded[column]} {alias} ON {alias}.code = t.{column}_code"
+            )
+        else:
+            select.append(f"t.{column}")
+    return f"SELECT {', '.join(select)} FROM {source} t {' '.join(joins)}"
+
+
+def _create_labeled_view(conn, table, pairs):
+    """{table}_labeled shows canonical labels in place of the codes."""
+    conn.execute(f"DROP VIEW IF EXISTS {table}_labeled")
+    conn.execute(f"CREATE VIEW {table}_labeled AS {_labeled_select(conn, table, pairs, table)}")
+
+
+def encode_categorical_columns(conn):
+    """Migrate severity/status/priority/type text to integer codes on every domain table.
+
+    Run it once at startup: each table is migrated once per LOOKUPS_VERSION
+    (recorded in schema_versions), so later calls only read the versions.
+    The backfill scans the table, which is why it must not run per rerun.
+    The text columns stay in place for existing writers; the triggers keep
+    the codes in sync and the *_labeled views expose canonical labels.
+    Nothing is committed; run it in the caller's transaction.
+    """
+    pending = [
+        table for table in ENCODED_COLUMNS
+        if _table_columns(conn, table)  # table created already
+        and applied_version(conn, f"lookups:{table}") < LOOKUPS_VERSION
+    ]
+    if not pending:
+        return
+    create_lookup_tables(conn)
+    for table in pending:
+        key, _ = ENCODED_COLUMNS[table]
+        pairs = _encoded_columns(conn, table)
+        if pairs:
+            _add_code_columns(conn, table, pairs)
+            _backfill_codes(conn, table, pairs)
+            _create_triggers(conn, table, key, pairs)
+            _create_labeled_view(conn, table, pairs)
+        mark_applied(conn, f"lookups:{table}", LOOKUPS_VERSION)
+
+
+def lookup_codes(conn, lookup):
+    """Return {lowercase name: code} for one lookup table."""
+    return {name.lower(): code for code, name in conn.execute(f"SELECT code, name FROM {lookup}")}
+
+
+def label_rows(conn, table, rows):
+    """Give row dicts (e.g. archived rows) the labels {table}_labeled would show.
+
+    Each code is replaced by its canonical name, falling back to the stored
+    text like the view does, and the *_code keys are dropped.
+    """
+    _, pairs = ENCODED_COLUMNS.get(table, (None, []))
+    names = {}
+    for column, lookup in pairs:
+        try:
+            names[column] = dict(conn.execute(f"SELECT code, name FROM main.{lookup}"))
+        except sqlite3.OperationalError:  # lookups not created yet
+            names[column] = {}
+    labeled = []
+    for row in rows:
+        row = dict(row)
+        for column, by_code in names.items():
+            code = row.pop(f"{column}_code", None)
+            if column in row:
+                row[column] = by_code.get(code, row[column])
+        labeled.append(row)
+    return labeled
+
+
+# ---------------- Main -----------------
+if __name__ == "__main__":
+    conn = sqlite3.connect(DB_PATH)
+    encode_categorical_columns(conn)
+    conn.commit()
+    conn.close()
+    print("Categorical columns encoded.")
@@ -0,0 +1,144 @@
+import sqlite3
+import threading
+
+from app.data.db import DB_PATH
+from app.data.shards import ShardRouter
+from app.data.writer import get_writer
+from platform_common.near_duplicates import (
+    BANDS, DUPLICATE_THRESHOLD, NUM_PERM, ROWS, SHINGLE, DuplicateMatch, LshIndex, StagedClusters,
+    backfill_change_log, create_tables, install_change_log, join_text, minhash, shingles, similarity, sync,
+)
+
+# ---------------- Constants -----------------
+# domain -> (table, key column, text columns)
+NEAR_DUP_DOMAINS = {
+    "incidents": ("cyber_incidents", "id", ["incident_type", "description"]),
+    "tickets": ("it_tickets", "ticket_id", ["title"]),
+}
+
+
+def row_text(domain, values):
+    _, _, columns = NEAR_DUP_DOMAINS[domain]
+    return join_text(values.get(c) for c in columns)
+
+
+# ---------------- Schema -----------------
+def install_near_duplicates(db_path=DB_PATH):
+    """Create the cluster tables and the change logs that feed sync_near_duplicates().
+
+    Runs once at startup, on the single writer. Rows already in shards that
+    were never clustered are logged too, so the first sync covers them.
+    """
+    with get_writer(db_path).connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            create_tables(conn)
+            for domain, (table, key, columns) in NEAR_DUP_DOMAINS.items():
+                install_change_log(conn, domain, table, key, columns)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        # Shards take new rows only through record_row(); ATTACH must happen outside a transaction
+        router = ShardRouter(conn)
+        try:
+            for domain, (table, key, columns) in NEAR_DUP_DOMAINS.items():
+                for month in router.months(table):
+                    backfill_change_log(conn, domain, table, key, columns, schema=router.attach(table, month))
+        finally:
+            router.detach_all()
+
+
+# ---------------- Index -----------------
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _database_file(conn):
+    return next((row[2] for row in conn.execute("PRAGMA database_list") if row[1] == "main"), "")
+
+
+def get_near_duplicate_index(conn, domain):
+    """The process-wide LshIndex for `domain` in `conn`'s database, loaded on first use."""
+    key = (_database_file(conn), domain)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = LshIndex(domain).load(conn)
+    return index
+
+
+def record_row(conn, domain, row_id, values, staged=None):
+    """Cluster a freshly inserted row ({column: value}); returns (cluster id, similarity).
+
+    Writes go on `conn` without committing, so callers can fold them into
+    their own transaction; a cluster the row starts is collected in
+    `staged` (a StagedClusters) and becomes matchable once the caller
+    commits and calls staged.apply(). Without `staged` it is only picked
+    up when the index is next loaded. With conn=None the writes are queued
+    on the shared single writer, the cluster joins the index when they
+    commit, and the index is loaded (on first use only) through a
+    short-lived connection.
+    """
+    if conn is None:
+        loader = sqlite3.connect(DB_PATH, timeout=30)
+        try:
+            index = get_near_duplicate_index(loader, domain)
+        finally:
+            loader.close()
+    else:
+        index = get_near_duplicate_index(conn, domain)
+    if staged is None:
+        staged = StagedClusters()
+    match, writes = index.record_writes(row_id, row_text(domain, values), staged)
+    if conn is not None:
+        for sql, params in writes:
+            conn.execute(sql, params)
+        return match
+    writer = get_writer(DB_PATH)
+    for sql, params in writes[:-1]:
+        writer.submit(sql, params)
+
+    def apply(done):
+        # One writer queue: once the last write commits, the cluster queued before it has too
+        if done.exception() is None:
+            staged.apply()
+
+    writer.submit(*writes[-1]).add_done_callback(apply)
+    return match
+
+
+def sync_near_duplicates(db_path=DB_PATH):
+    """Cluster every logged row not clustered yet; returns {domain: rows clustered}."""
+    loader = sqlite3.connect(db_path, timeout=30)
+    try:
+        indexes = {domain: get_near_duplicate_index(loader, domain) for domain in NEAR_DUP_DOMAINS}
+    finally:
+        loader.close()
+    return {domain: sync(db_path, index) for domain, index in indexes.items()}
+
+
+# ---------------- Queries -----------------
+def cluster_map(conn, domain):
+    """{row id: cluster id} for every recorded row of `domain`."""
+    try:
+        return dict(conn.execute("SELECT row_id, cluster_id FROM near_dup_rows WHERE domain = ?", (domain,)))
+    except sqlite3.OperationalError:  # tables not created yet
+        return {}
+
+
+def distinct_count(ids, clusters):
+    """How many distinct events the row ids stand for; rows not yet clustered count once each."""
+    return len({clusters.get(row_id, ("row", row_id)) for row_id in ids})
+
+
+# ---------------- Main -----------------
+if __name__ == "__main__":
+    # python -m app.data.near_duplicates    — cluster every row not clustered yet
+    install_near_duplicates()
+    added = sync_near_duplicates()
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    for domain in NEAR_DUP_DOMAINS:
+        clusters = cluster_map(conn, domain)
+        print(f"{domain}: {added[domain]} new rows, {len(clusters)} rows in {len(set(clusters.values()))} clusters")
+    conn.close()
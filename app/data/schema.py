@@ -3,13 +3,16 @@ import os
 import csv
 import bcrypt
 
+from app.data.lookups import encode_categorical_columns
+from app.data.query_stats import TimedConnection
+
 # Path to the main DB file
 DB_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "DATA", "intelligence_platform.db")
 DB_FILE = os.path.abspath(DB_FILE)
 
 def connect():
     """Connect to SQLite database."""
-    return sqlite3.connect(DB_FILE)
+    return sqlite3.connect(DB_FILE, factory=TimedConnection)
 
 def create_tables():
     """Create all required tables."""
@@ -147,6 +150,10 @@ def run_all_migrations():
     create_tables()
     load_users_from_csv()
     load_it_tickets_csv()
+    conn = connect()
+    encode_categorical_columns(conn)
+    conn.commit()
+    conn.close()
     print("All migrations completed.")
 
 if __name__ == "__main__":
@@ -0,0 +1,366 @@
+import os
+import re
+import sqlite3
+import stat
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+from app.data.changes import install_change_counters
+from app.data.db import DB_PATH
+from app.data.lookups import ENCODED_COLUMNS
+
+# ---------------- Constants -----------------
+SHARD_DIR = Path("DATA") / "shards"
+UNKNOWN_MONTH = "unknown"
+
+# table -> (date column used for routing, key column)
+SHARDED_TABLES = {
+    "cyber_incidents": ("date", "id"),
+    "it_tickets": ("created_on", "ticket_id"),
+}
+
+_MONTH_RE = re.compile(r"^(\d{4})-(\d{2})")
+_SHARD_RE = re.compile(r"^(?P<table>.+)_(?P<month>\d{4}_\d{2}|unknown)\.db$")
+_ALIAS_RE = re.compile(r"^s_(?P<table>.+)_(?P<month>\d{4}_\d{2}|unknown)$")
+
+
+def month_of(value):
+    """Return the YYYY-MM shard key for a date string (UNKNOWN_MONTH if unparseable)."""
+    match = _MONTH_RE.match(str(value or ""))
+    return f"{match.group(1)}-{match.group(2)}" if match else UNKNOWN_MONTH
+
+
+def _next_month(month):
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}"
+
+
+class ShardRouter:
+    """Routes cyber_incidents / it_tickets rows to one SQLite file per month.
+
+    Shards live in DATA/shards/<table>_<YYYY_MM>.db and are ATTACHed on demand,
+    least recently used first out when SQLite's attach limit is reached.
+    Date-bounded reads only attach the months that overlap the range.
+    The main table keeps working as a "not yet sharded" partition, so every
+    read covers main + shards.
+    """
+
+    def __init__(self, conn, shard_dir=SHARD_DIR):
+        self.conn = conn
+        self.shard_dir = Path(shard_dir)
+        self._attached = OrderedDict()  # alias -> month, least recently used first
+        # Shards an earlier router left attached to this connection (e.g. inside a caller's transaction)
+        for row in conn.execute("PRAGMA database_list") if conn is not None else ():
+            match = _ALIAS_RE.match(row[1])
+            if match:
+                self._attached[row[1]] = match.group("month").replace("_", "-")
+
+    # ---- attachment ----
+    def shard_path(self, table, month):
+        return self.shard_dir / f"{table}_{month.replace('-', '_')}.db"
+
+    def months(self, table):
+        """Return the months that have a shard file for `table`, oldest first."""
+        if not self.shard_dir.exists():
+            return []
+        found = []
+        for name in os.listdir(self.shard_dir):
+            match = _SHARD_RE.match(name)
+            if match and match.group("table") == table:
+                found.append(match.group("month").replace("_", "-"))
+        return sorted(found)
+
+    def prune(self, table, start=None, end=None):
+        """Return the shard months that can hold rows dated within [start, end)."""
+        months = self.months(table)
+        lo = month_of(start) if start else None
+        hi = month_of(end) if end else None
+        kept = []
+        for month in months:
+            if month == UNKNOWN_MONTH:
+                if lo is None and hi is None:
+                    kept.append(month)
+                continue
+            if lo is not None and month < lo:
+                continue
+            if hi is not None and month > hi:
+                continue
+            kept.append(month)
+        return kept
+
+    def is_frozen(self, table, month):
+        path = self.shard_path(table, month)
+        return path.exists() and not path.stat().st_mode & stat.S_IWUSR
+
+    def _attach_limit(self):
+        try:
+            return self.conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        except AttributeError:  # Python < 3.11
+            return 10
+
+    def attach(self, table, month, create=False):
+        """ATTACH one month's shard and return its schema alias."""
+        alias = f"s_{table}_{month.replace('-', '_')}"
+        if alias in self._attached:
+            self._attached.move_to_end(alias)
+            return alias
+
+        path = self.shard_path(table, month)
+        if not path.exists():
+            if not create:
+                raise FileNotFoundError(path)
+            self._create_shard(table, path)
+
+        # Databases attached by others (e.g. the archive) share the limit
+        others = sum(
+            1 for row in self.conn.execute("PRAGMA database_list")
+            if row[1] not in ("main", "temp") and row[1] not in self._attached
+        )
+        while self._attached and len(self._attached) + others >= self._attach_limit():
+            oldest, _ = self._attached.popitem(last=False)
+            self.conn.execute(f"DETACH DATABASE {oldest}")
+
+        # A frozen (chmod read-only) shard is opened read-only by SQLite itself
+        self.conn.execute(f"ATTACH DATABASE ? AS {alias}", (str(path.resolve()),))
+        self._attached[alias] = month
+        return alias
+
+    def detach_all(self):
+        while self._attached:
+            alias, _ = self._attached.popitem()
+            self.conn.execute(f"DETACH DATABASE {alias}")
+
+    def _create_shard(self, table, path):
+        """Create a shard file whose table mirrors the main table's columns."""
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        ddl = self.conn.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()[0]
+        date_column, _ = SHARDED_TABLES[table]
+        shard = sqlite3.connect(path)
+        shard.execute(ddl.replace("AUTOINCREMENT", ""))
+        shard.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{date_column} ON {table} ({date_column})")
+        install_change_counters(shard, [table])
+        shard.commit()
+        shard.close()
+
+    # ---- writes ----
+    def _max_key(self, table):
+        """The largest key in the main table and every shard."""
+        _, key = SHARDED_TABLES[table]
+        seed = self.conn.execute(f"SELECT COALESCE(MAX({key}), 0) FROM main.{table}").fetchone()[0]
+        for month in self.months(table):
+            alias = self.attach(table, month)
+            seed = max(seed, self.conn.execute(f"SELECT COALESCE(MAX({key}), 0) FROM {alias}.{table}").fetchone()[0])
+        return seed
+
+    def _next_id(self, table):
+        """Allocate a key that cannot collide with the main table or other shards."""
+        ddl = self.conn.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()[0]
+        if "AUTOINCREMENT" in ddl.upper():
+            # Share the table's counter with inserts that still go to main; it has
+            # no row until main's first insert, so seed it from every partition
+            row = self.conn.execute("SELECT seq FROM main.sqlite_sequence WHERE name = ?", (table,)).fetchone()
+            if row is None:
+                row = (self._max_key(table),)
+                self.conn.execute("INSERT INTO main.sqlite_sequence (name, seq) VALUES (?, ?)", (table, row[0]))
+            self.conn.execute("UPDATE main.sqlite_sequence SET seq = seq + 1 WHERE name = ?", (table,))
+            return row[0] + 1
+
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS main.shard_sequences (
+                name TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL
+            )
+        """)
+        current = self.conn.execute("SELECT seq FROM main.shard_sequences WHERE name = ?", (table,)).fetchone()
+        if current is None:
+            current = (self._max_key(table),)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO main.shard_sequences (name, seq) VALUES (?, ?)", (table, current[0] + 1)
+        )
+        return current[0] + 1
+
+    def _code_values(self, table, row):
+        """Resolve *_code columns from the main database's lookup tables."""
+        codes = {}
+        _, pairs = ENCODED_COLUMNS.get(table, (None, []))
+        for column, lookup in pairs:
+            if row.get(column) is None:
+                continue
+            self.conn.execute(f"INSERT OR IGNORE INTO main.{lookup} (name) VALUES (?)", (row[column],))
+            codes[f"{column}_code"] = self.conn.execute(
+                f"SELECT code FROM main.{lookup} WHERE name = ?", (row[column],)
+            ).fetchone()[0]
+        return codes
+
+    def insert(self, table, row):
+        """Insert a row dict into the shard for its date and return its key.
+
+        Allocating the key, registering lookup labels and inserting the row
+        are one transaction: the caller's if one is open on the connection
+        (then nothing is committed), otherwise a BEGIN IMMEDIATE of its own.
+        """
+        date_column, key = SHARDED_TABLES[table]
+        month = month_of(row.get(date_column))
+        if self.is_frozen(table, month):
+            raise PermissionError(f"Shard {table} {month} is read-only")
+
+        alias = self.attach(table, month, create=True)
+        shard_columns = [r[1] for r in self.conn.execute(f"PRAGMA {alias}.table_info({table})")]
+        own_transaction = not self.conn.in_transaction
+        if own_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            values = dict(row)
+            if values.get(key) is None:
+                values[key] = self._next_id(table)
+            if any(c.endswith("_code") for c in shard_columns):
+                values.update(self._code_values(table, values))
+
+            columns = [c for c in shard_columns if c in values]
+            self.conn.execute(
+                f"INSERT INTO {alias}.{table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [values[c] for c in columns],
+            )
+            if own_transaction:
+                self.conn.commit()
+        except BaseException:
+            if own_transaction and self.conn.in_transaction:
+                self.conn.rollback()
+            raise
+        return values[key]
+
+    # ---- reads ----
+    def date_clause(self, table, start=None, end=None):
+        """(SQL condition or "", params) restricting `table`'s date column to [start, end)."""
+        date_column, _ = SHARDED_TABLES[table]
+        conditions, bounds = [], []
+        if start:
+            conditions.append(f"{date_column} >= ?")
+            bounds.append(start)
+        if end:
+            conditions.append(f"{date_column} < ?")
+            bounds.append(end)
+        return " AND ".join(conditions), bounds
+
+    def sources(self, table, start=None, end=None):
+        """Yield "<schema>.<table>" for main and every pruned shard, attaching each in turn.
+
+        A shard stays attached until the next one is requested, and is
+        detached once the attach limit is reached, so any number of months
+        can be read. Consume each source before asking for the next.
+        """
+        yield f"main.{table}"
+        for month in self.prune(table, start, end):
+            yield f"{self.attach(table, month)}.{table}"
+
+    def query(self, table, columns="*", start=None, end=None, where="", params=()):
+        """Yield rows of `table` dated within [start, end) from main and the pruned shards.
+
+        `where` is an extra SQL condition (without WHERE) applied to every partition.
+        Shards are attached one at a time, so any number of months can be scanned.
+        """
+        bounds_clause, bounds = self.date_clause(table, start, end)
+        conditions = [c for c in (bounds_clause, f"({where})" if where else "") if c]
+        clause = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        args = [*bounds, *params]
+        for source in self.sources(table, start, end):
+            yield from self.conn.execute(f"SELECT {columns} FROM {source}{clause}", args)
+
+    def create_union_view(self, table, start=None, end=None):
+        """Create TEMP VIEW <table>_all over main + the pruned shards and return its name.
+
+        Limited by how many databases SQLite can attach at once; use query()
+        for scans across more months than that.
+        """
+        months = self.prune(table, start, end)
+        if len(months) > self._attach_limit():
+            raise RuntimeError(
+                f"{len(months)} shards exceed the attach limit; use ShardRouter.query() instead"
+            )
+        aliases = [self.attach(table, month) for month in months]
+        parts = [f"SELECT * FROM main.{table}"] + [f"SELECT * FROM {a}.{table}" for a in aliases]
+        view = f"{table}_all"
+        self.conn.execute(f"DROP VIEW IF EXISTS temp.{view}")
+        self.conn.execute(f"CREATE TEMP VIEW {view} AS {' UNION ALL '.join(parts)}")
+        return view
+
+    # ---- maintenance ----
+    def migrate(self, table, before_month=None):
+        """Move rows from the main table into their month shards, one month per commit."""
+        date_column, _ = SHARDED_TABLES[table]
+        columns = [r[1] for r in self.conn.execute(f"PRAGMA main.table_info({table})")]
+        months = [
+            row[0] for row in self.conn.execute(
+                f"SELECT DISTINCT CASE WHEN {date_column} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*' "
+                f"THEN substr({date_column}, 1, 7) ELSE '{UNKNOWN_MONTH}' END FROM main.{table}"
+            )
+        ]
+        moved = 0
+        for month in sorted(months):
+            if before_month and (month == UNKNOWN_MONTH or month >= before_month):
+                continue
+            if self.is_frozen(table, month):
+                continue
+            if month == UNKNOWN_MONTH:
+                match = f"NOT ({date_column} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*') OR {date_column} IS NULL"
+                args = ()
+            else:
+                match = f"{date_column} >= ? AND {date_column} < ?"
+                args = (month, _next_month(month))
+            alias = self.attach(table, month, create=True)
+            col_list = ", ".join(columns)
+            if not self.conn.in_transaction:  # copy and delete together, on autocommit connections too
+                self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    f"INSERT OR REPLACE INTO {alias}.{table} ({col_list}) "
+                    f"SELECT {col_list} FROM main.{table} WHERE {match}",
+                    args,
+                )
+                moved += self.conn.execute(f"DELETE FROM main.{table} WHERE {match}", args).rowcount
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        return moved
+
+    def freeze(self, table, month):
+        """Compact an old month's shard and make the file read-only; inserts into it are refused."""
+        path = self.shard_path(table, month)
+        conn = sqlite3.connect(path)
+        conn.execute("VACUUM")
+        conn.close()
+        os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+
+def shard_month_for(table, date, shard_dir=SHARD_DIR):
+    """Return the month whose shard should receive a row dated `date`, or None for main."""
+    month = month_of(date)
+    return month if ShardRouter(None, shard_dir).shard_path(table, month).exists() else None
+
+
+def has_shards(table, shard_dir=SHARD_DIR):
+    """True once any month of `table` has been moved out into a shard."""
+    return bool(ShardRouter(None, shard_dir).months(table))
+
+
+# ---------------- Main -----------------
+if __name__ == "__main__":
+    # python -m app.data.shards migrate [YYYY-MM]   — move rows older than YYYY-MM into shards
+    # python -m app.data.shards freeze <table> YYYY-MM
+    command = sys.argv[1] if len(sys.argv) > 1 else "migrate"
+    if command == "migrate":
+        before = sys.argv[2] if len(sys.argv) > 2 else None
+        router = ShardRouter(sqlite3.connect(DB_PATH))
+        for table in SHARDED_TABLES:
+            print(f"✓ Moved {router.migrate(table, before)} rows from {table} into shards")
+        router.detach_all()
+        router.conn.close()
+    elif command == "freeze":
+        ShardRouter(None).freeze(sys.argv[2], sys.argv[3])
+        print(f"✓ {sys.argv[2]} {sys.argv[3]} is now read-only")
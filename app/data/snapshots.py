@@ -0,0 +1,326 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from pyarrow import fs
+except ImportError:  # pyarrow is optional; callers fall back to SQL / CSV reads
+    pa = None
+
+from app.data.db import DB_PATH
+from app.data.shards import SHARDED_TABLES, ShardRouter
+
+# ---------------- Constants -----------------
+# Next to the database under the project root, whatever the working directory
+SNAPSHOT_DIR = Path(__file__).resolve().parents[2] / "DATA" / "snapshots"
+MANIFEST_NAME = "manifest.json"
+SNAPSHOT_MAX_AGE = 15 * 60  # seconds before a snapshot is rebuilt
+BATCH_SIZE = 50_000
+UNKNOWN_MONTH = "unknown"
+
+# Builds in this process run one at a time (the job worker, the CLI, a page asking for a
+# missing snapshot); staging and temp names are per builder, so other processes don't collide.
+_build_lock = threading.RLock()
+
+# table -> (date column used for month partitions, dictionary-encoded columns)
+SNAPSHOT_TABLES = {
+    "cyber_incidents": ("date", ["incident_type", "severity", "status", "reported_by"]),
+    "intelligence_reports": ("date", []),
+    "security_threats": ("detected_on", ["threat_name", "severity"]),
+    "it_tickets": ("created_on", ["status", "priority", "assigned_to"]),
+}
+
+
+def snapshots_available():
+    """Return True when pyarrow is installed and snapshots can be used."""
+    return pa is not None
+
+
+# ---------------- Manifest -----------------
+def _builder_tag():
+    """Suffix naming this builder's temporary files, unique per process and thread."""
+    return f"{os.getpid()}-{threading.get_ident()}"
+
+
+def _read_manifest():
+    manifest_file = SNAPSHOT_DIR / MANIFEST_NAME
+    if not manifest_file.exists():
+        return {}
+    try:
+        return json.loads(manifest_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(manifest):
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = SNAPSHOT_DIR / f"{MANIFEST_NAME}.{_builder_tag()}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp, SNAPSHOT_DIR / MANIFEST_NAME)
+
+
+def snapshot_info(name):
+    """Return the manifest entry (built_at, rows, source) for a snapshot, or None."""
+    return _read_manifest().get(name)
+
+
+# ---------------- Writing -----------------
+def _month_array(values):
+    """Derive the YYYY-MM partition key from a string date column."""
+    values = pc.cast(values, pa.string())
+    month = pc.utf8_slice_codeunits(values, 0, 7)
+    valid = pc.match_substring_regex(month, r"^\d{4}-\d{2}$")
+    return pc.if_else(pc.fill_null(valid, False), month, UNKNOWN_MONTH)
+
+
+def _encode_table(table, date_column, categorical_columns):
+    """Dictionary-encode categorical columns and append the month partition column."""
+    for name in categorical_columns:
+        if name in table.column_names:
+            idx = table.column_names.index(name)
+            column = pc.cast(table.column(name), pa.string())
+            table = table.set_column(idx, name, pc.dictionary_encode(column))
+    return table.append_column("month", _month_array(table.column(date_column)))
+
+
+class _PartitionedWriter:
+    """Streams batches into <staging>/month=YYYY-MM/part-0.parquet, one open ParquetWriter per month.
+
+    Every file gets the same schema, so memory stays at one batch however
+    large the table is. close() swaps the finished snapshot into place.
+    """
+
+    def __init__(self, name, schema):
+        self.name = name
+        self.schema = schema
+        self.rows = 0
+        self.staging = SNAPSHOT_DIR / f".{name}.building.{_builder_tag()}"
+        shutil.rmtree(self.staging, ignore_errors=True)
+        self._writers = {}
+
+    def _writer(self, month):
+        writer = self._writers.get(month)
+        if writer is None:
+            folder = self.staging / f"month={month}"
+            folder.mkdir(parents=True, exist_ok=True)
+            writer = self._writers[month] = pq.ParquetWriter(folder / "part-0.parquet", self.schema)
+        return writer
+
+    def write(self, table):
+        """Write one encoded batch (with its month column) to its month partitions."""
+        months = table.column("month")
+        data = table.drop_columns(["month"]).cast(self.schema)
+        for month in pc.unique(months).to_pylist():
+            self._writer(month).write_table(data.filter(pc.equal(months, month)))
+        self.rows += table.num_rows
+
+    def close(self):
+        if not self._writers:
+            self._writer(UNKNOWN_MONTH)  # an empty file, so readers still see the schema
+        for writer in self._writers.values():
+            writer.close()
+        _swap_into_place(self.staging, self.name)
+        return self.rows
+
+
+def _swap_into_place(staging, name):
+    """Replace the snapshot `name` with the finished staging directory."""
+    target = SNAPSHOT_DIR / name
+    # Readers holding memory maps of the old files keep them until they close.
+    old = SNAPSHOT_DIR / f".{name}.old.{_builder_tag()}"
+    shutil.rmtree(old, ignore_errors=True)
+    if target.exists():
+        os.replace(target, old)
+    os.replace(staging, target)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def _record_built(name, rows, source):
+    with _build_lock:
+        manifest = _read_manifest()
+        manifest[name] = {"built_at": time.time(), "rows": rows, "source": str(source)}
+        _write_manifest(manifest)
+
+
+def _arrow_type(declared, categorical):
+    """Arrow type for a SQLite column, from its declared type."""
+    declared = (declared or "").upper()
+    if categorical:
+        return pa.dictionary(pa.int32(), pa.string())
+    if "INT" in declared:
+        return pa.int64()
+    if any(t in declared for t in ("REAL", "FLOA", "DOUB")):
+        return pa.float64()
+    return pa.string()
+
+
+def _table_schema(conn, table, categorical_columns):
+    return pa.schema([
+        (name, _arrow_type(declared, name in categorical_columns))
+        for _, name, declared, *_ in conn.execute(f"PRAGMA main.table_info({table})")
+    ])
+
+
+def _batch_table(rows, schema):
+    """Build one Arrow batch from SQLite rows, keeping text columns as text."""
+    arrays = {}
+    for field, values in zip(schema, zip(*rows)):
+        if pa.types.is_string(field.type) or pa.types.is_dictionary(field.type):
+            values = [None if v is None else str(v) for v in values]
+            arrays[field.name] = pa.array(values, pa.string())
+        else:
+            arrays[field.name] = pa.array(values, field.type)
+    return pa.table(arrays)
+
+
+def build_table_snapshot(conn, table):
+    """Snapshot one SQLite table (main plus its month shards) to Parquet, one batch at a time."""
+    with _build_lock:
+        return _build_table_snapshot(conn, table)
+
+
+def _build_table_snapshot(conn, table):
+    date_column, categorical_columns = SNAPSHOT_TABLES[table]
+    schema = _table_schema(conn, table, categorical_columns)
+    writer = _PartitionedWriter(table, schema)
+
+    router = ShardRouter(conn) if table in SHARDED_TABLES else None
+    sources = router.sources(table) if router else [f"main.{table}"]
+    try:
+        for source in sources:
+            # Shards created before a column was added to main lack it
+            present = {row[1] for row in conn.execute(f"PRAGMA {source.split('.')[0]}.table_info({table})")}
+            selected = ", ".join(n if n in present else f"NULL AS {n}" for n in schema.names)
+            cursor = conn.execute(f"SELECT {selected} FROM {source}")
+            while True:
+                rows = cursor.fetchmany(BATCH_SIZE)
+                if not rows:
+                    break
+                batch = _encode_table(_batch_table(rows, schema), date_column, categorical_columns)
+                writer.write(batch)
+    finally:
+        if router:
+            router.detach_all()
+
+    rows = writer.close()
+    _record_built(table, rows, DB_PATH)
+    return rows
+
+
+def build_snapshots(db_path=DB_PATH):
+    """Snapshot every domain table. Returns {table: row_count}."""
+    if not snapshots_available():
+        print("⚠ pyarrow not installed — skipping snapshots")
+        return {}
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        with _build_lock:
+            return {table: build_table_snapshot(conn, table) for table in SNAPSHOT_TABLES}
+    finally:
+        conn.close()
+
+
+def snapshots_stale(max_age=SNAPSHOT_MAX_AGE):
+    """Return True if any domain table snapshot is missing or older than max_age."""
+    manifest = _read_manifest()
+    now = time.time()
+    for table in SNAPSHOT_TABLES:
+        entry = manifest.get(table)
+        if entry is None or now - entry["built_at"] > max_age:
+            return True
+        if not (SNAPSHOT_DIR / table).exists():
+            return True
+    return False
+
+
+def refresh_snapshots(max_age=SNAPSHOT_MAX_AGE, db_path=DB_PATH):
+    """Rebuild the snapshots only when they are stale. Cheap to call on every rerun."""
+    if not snapshots_available() or not snapshots_stale(max_age):
+        return {}
+    with _build_lock:
+        if snapshots_stale(max_age):
+            return build_snapshots(db_path)
+    return {}
+
+
+def snapshot_csv(csv_path, name, date_column, categorical_columns=()):
+    """Snapshot a CSV file to Parquet if the file changed since the last build."""
+    if not snapshots_available():
+        return False
+    with _build_lock:
+        return _snapshot_csv(csv_path, name, date_column, categorical_columns)
+
+
+def _snapshot_csv(csv_path, name, date_column, categorical_columns):
+    entry = snapshot_info(name)
+    mtime = os.path.getmtime(csv_path)
+    if entry is not None and entry["built_at"] >= mtime and (SNAPSHOT_DIR / name).exists():
+        return False
+
+    table = pacsv.read_csv(
+        csv_path,
+        convert_options=pacsv.ConvertOptions(column_types={date_column: pa.string()}),
+    )
+    table = table.rename_columns([c.strip() for c in table.column_names])
+    table = _encode_table(table, date_column, categorical_columns)
+    writer = _PartitionedWriter(name, table.schema.remove(table.schema.get_field_index("month")))
+    for batch in table.to_batches(BATCH_SIZE):
+        writer.write(pa.Table.from_batches([batch]))
+    _record_built(name, writer.close(), csv_path)
+    return True
+
+
+# ---------------- Reading -----------------
+def _open_dataset(name):
+    local = fs.LocalFileSystem(use_mmap=True)
+    path = os.path.abspath(SNAPSHOT_DIR / name)
+    return ds.dataset(path, format="parquet", partitioning="hive", filesystem=local)
+
+
+def read_snapshot(name, columns=None, start_month=None, end_month=None, where=None):
+    """Read a snapshot as a pyarrow Table through memory-mapped files.
+
+    Only the requested columns are decoded and month partitions outside
+    [start_month, end_month] (inclusive, "YYYY-MM") are never opened; with
+    either bound set, the partition of undated rows is skipped too.
+    """
+    dataset = _open_dataset(name)
+    if columns is None:
+        columns = [c for c in dataset.schema.names if c != "month"]
+
+    expr = where
+    if start_month is not None or end_month is not None:
+        # Undated rows can't be placed in any range
+        cond = ds.field("month") != UNKNOWN_MONTH
+        expr = cond if expr is None else expr & cond
+    if start_month is not None:
+        cond = ds.field("month") >= start_month
+        expr = cond if expr is None else expr & cond
+    if end_month is not None:
+        cond = ds.field("month") <= end_month
+        expr = cond if expr is None else expr & cond
+
+    return dataset.to_table(columns=list(columns), filter=expr)
+
+
+def read_snapshot_df(name, columns=None, start_month=None, end_month=None, where=None):
+    """Same as read_snapshot but returns a pandas DataFrame (categoricals stay categorical)."""
+    return read_snapshot(name, columns, start_month, end_month, where).to_pandas()
+
+
+# ---------------- Main -----------------
+if __name__ == "__main__":
+    # Run periodically (cron / scheduler) to keep analytics snapshots fresh.
+    counts = build_snapshots()
+    for table, rows in counts.items():
+        print(f"✓ Snapshot {table}: {rows} rows")
@@ -0,0 +1,308 @@
+import re
+import sqlite3
+import sys
+from collections import Counter
+
+from app.data.db import DB_PATH
+from app.data.shards import ShardRouter
+
+# ---------------- Constants -----------------
+MIN_SCORE = 0.5            # links below this are not stored
+CANDIDATE_FRACTION = 0.25  # a candidate pair shares at least this fraction of the threat's trigrams
+WORD_MATCH = 0.4           # trigram similarity at which two words count as the same word
+
+# Words that say how something was seen rather than what it was; they match everything
+GENERIC_WORDS = {
+    "a", "an", "and", "at", "for", "in", "of", "on", "the", "to", "new",
+    "activity", "alert", "attack", "attempt", "attempted", "blocked", "campaign", "cluster",
+    "confirmed", "contained", "detected", "executed", "found", "mitigated", "mitigation",
+    "observed", "quarantined", "registered", "reported", "required", "risk", "spike", "successful",
+    "updated",
+}
+
+THREAT, TEXT = "threat", "text"
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+# ---------------- Text -----------------
+def keywords(text):
+    """Lowercase words of `text` without the generic ones, in first-seen order."""
+    seen = dict.fromkeys(w for w in _WORD_RE.findall((text or "").lower()) if w not in GENERIC_WORDS)
+    return list(seen)
+
+
+def word_trigrams(word):
+    """Trigrams of one word, padded like pg_trgm so short words and word starts count."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def text_trigrams(words):
+    grams = set()
+    for word in words:
+        grams |= word_trigrams(word)
+    return grams
+
+
+def word_similarity(a, b):
+    if a == b:
+        return 1.0
+    ga, gb = word_trigrams(a), word_trigrams(b)
+    return len(ga & gb) / len(ga | gb)
+
+
+def match_score(threat_words, text_words):
+    """Mean over the threat's words of their best fuzzy match in the text (0..1)."""
+    if not threat_words or not text_words:
+        return 0.0
+    total = 0.0
+    for word in threat_words:
+        best = max(word_similarity(word, other) for other in text_words)
+        total += best if best >= WORD_MATCH else 0.0
+    return total / len(threat_words)
+
+
+def incident_text(incident_type, description):
+    return " ".join(keywords(f"{incident_type or ''} {description or ''}"))
+
+
+# ---------------- Schema -----------------
+def create_threat_link_tables(conn):
+    """Trigram postings, distinct incident texts, and the persisted threat links.
+
+    Incidents are matched through their distinct (type, description) text,
+    so a million incidents with a few hundred wordings cost a few hundred
+    scorings; threat_incident_links expands the text links to incidents.
+    """
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS match_trigrams (
+            side TEXT NOT NULL,
+            trigram TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            PRIMARY KEY (side, trigram, item_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS match_texts (
+            text_id INTEGER PRIMARY KEY,
+            text TEXT UNIQUE NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS match_incidents (
+            incident_id INTEGER PRIMARY KEY,
+            text_id INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_match_incidents_text ON match_incidents (text_id);
+        CREATE TABLE IF NOT EXISTS threat_text_links (
+            threat_id INTEGER NOT NULL,
+            text_id INTEGER NOT NULL,
+            score REAL NOT NULL,
+            PRIMARY KEY (threat_id, text_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_threat_text_links_text ON threat_text_links (text_id);
+        CREATE TABLE IF NOT EXISTS match_watermarks (
+            source TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL
+        );
+        CREATE VIEW IF NOT EXISTS threat_incident_links AS
+            SELECT l.threat_id, m.incident_id, l.score
+            FROM threat_text_links l JOIN match_incidents m ON m.text_id = l.text_id;
+    """)
+    conn.commit()
+
+
+def _watermark(conn, source):
+    row = conn.execute("SELECT last_id FROM match_watermarks WHERE source = ?", (source,)).fetchone()
+    return row[0] if row else 0
+
+
+def _begin(conn):
+    """Open a write transaction unless one is already open; works on autocommit connections too."""
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+
+
+def _set_watermark(conn, source, last_id):
+    conn.execute("INSERT OR REPLACE INTO match_watermarks (source, last_id) VALUES (?, ?)", (source, last_id))
+
+
+# ---------------- Matching -----------------
+def _index(conn, side, item_id, grams):
+    conn.executemany(
+        "INSERT OR IGNORE INTO match_trigrams (side, trigram, item_id) VALUES (?, ?, ?)",
+        [(side, gram, item_id) for gram in grams],
+    )
+
+
+def shared_trigrams(conn, side, grams):
+    """Counter of item_id -> trigrams shared with `grams`, for items on `side`, from the postings."""
+    grams = list(grams)
+    shared = Counter()
+    for i in range(0, len(grams), 500):  # stay under SQLite's variable limit
+        batch = grams[i:i + 500]
+        shared.update(dict(conn.execute(
+            f"SELECT item_id, COUNT(*) FROM match_trigrams "
+            f"WHERE side = ? AND trigram IN ({', '.join('?' * len(batch))}) GROUP BY item_id",
+            [side, *batch],
+        )))
+    return shared
+
+
+def _enough(shared, threat_grams):
+    """Candidate test: the pair shares CANDIDATE_FRACTION of the threat's trigrams."""
+    return shared >= max(1, CANDIDATE_FRACTION * len(threat_grams))
+
+
+def _words_of(conn, side, item_ids):
+    if side == THREAT:
+        sql = "SELECT id, threat_name FROM security_threats WHERE id = ?"
+    else:
+        sql = "SELECT text_id, text FROM match_texts WHERE text_id = ?"
+    for item_id in item_ids:
+        row = conn.execute(sql, (item_id,)).fetchone()
+        if row:
+            yield row[0], keywords(row[1])
+
+
+def _link(conn, threat_id, text_id, score):
+    if score >= MIN_SCORE:
+        conn.execute(
+            "INSERT OR REPLACE INTO threat_text_links (threat_id, text_id, score) VALUES (?, ?, ?)",
+            (threat_id, text_id, round(score, 3)),
+        )
+        return 1
+    return 0
+
+
+def add_threat(conn, threat_id, threat_name):
+    """Index one threat and link it to every matching incident text; returns links stored."""
+    words = keywords(threat_name)
+    grams = text_trigrams(words)
+    _index(conn, THREAT, threat_id, grams)
+    shared = shared_trigrams(conn, TEXT, grams)
+    matched = [text_id for text_id, count in shared.items() if _enough(count, grams)]
+    return sum(
+        _link(conn, threat_id, text_id, match_score(words, text_words))
+        for text_id, text_words in _words_of(conn, TEXT, matched)
+    )
+
+
+def add_incident(conn, incident_id, incident_type, description):
+    """Map one incident to its text; a text seen for the first time is indexed and linked."""
+    text = incident_text(incident_type, description)
+    if not text:
+        return 0
+    cursor = conn.execute("INSERT OR IGNORE INTO match_texts (text) VALUES (?)", (text,))
+    links = 0
+    if cursor.rowcount:
+        text_id = cursor.lastrowid
+        words = text.split()
+        grams = text_trigrams(words)
+        _index(conn, TEXT, text_id, grams)
+        shared = shared_trigrams(conn, THREAT, grams)
+        for threat_id, threat_words in _words_of(conn, THREAT, shared):
+            # Same test as add_threat: measured against the threat's trigrams, not the text's
+            if _enough(shared[threat_id], text_trigrams(threat_words)):
+                links += _link(conn, threat_id, text_id, match_score(threat_words, words))
+    else:
+        text_id = conn.execute("SELECT text_id FROM match_texts WHERE text = ?", (text,)).fetchone()[0]
+    conn.execute(
+        "INSERT OR REPLACE INTO match_incidents (incident_id, text_id) VALUES (?, ?)", (incident_id, text_id)
+    )
+    return links
+
+
+def refresh_threat_links(conn):
+    """Link threats and incidents added since the last run; returns {"threats", "incidents", "links"}.
+
+    Each source keeps a high-water mark of the ids it has processed (per
+    shard for sharded incidents), so a run with nothing new is a handful of
+    indexed lookups. Threats are matched first against the texts known so
+    far, then new incident texts against every threat, so no pair is
+    scored twice. Each source is one transaction, so `conn` may be the
+    single writer's (autocommit) connection.
+    """
+    create_threat_link_tables(conn)
+    counts = {"threats": 0, "incidents": 0, "links": 0}
+
+    _begin(conn)
+    last = _watermark(conn, "security_threats")
+    rows = conn.execute(
+        "SELECT id, threat_name FROM security_threats WHERE id > ? ORDER BY id", (last,)
+    ).fetchall()
+    for threat_id, name in rows:
+        counts["links"] += add_threat(conn, threat_id, name)
+    if rows:
+        counts["threats"] = len(rows)
+        _set_watermark(conn, "security_threats", rows[-1][0])
+    conn.commit()
+
+    router = ShardRouter(conn)
+    months = [None] + router.months("cyber_incidents")
+    try:
+        for month in months:
+            source = f"cyber_incidents@{month}" if month else "cyber_incidents"
+            schema = router.attach("cyber_incidents", month) if month else "main"
+            _begin(conn)
+            last = _watermark(conn, source)
+            rows = conn.execute(
+                f"SELECT id, incident_type, description FROM {schema}.cyber_incidents WHERE id > ? ORDER BY id",
+                (last,),
+            ).fetchall()
+            for incident_id, incident_type, description in rows:
+                counts["links"] += add_incident(conn, incident_id, incident_type, description)
+            if rows:
+                counts["incidents"] += len(rows)
+                _set_watermark(conn, source, rows[-1][0])
+            conn.commit()
+    finally:
+        if conn.in_transaction:  # a failed month; its shard can't be detached mid-transaction
+            conn.rollback()
+        router.detach_all()
+    return counts
+
+
+def rebuild_threat_links(conn):
+    """Drop every match and link, then match all threats and incidents from scratch."""
+    for table in ("match_trigrams", "match_texts", "match_incidents", "threat_text_links", "match_watermarks"):
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.execute("DROP VIEW IF EXISTS threat_incident_links")
+    conn.commit()
+    return refresh_threat_links(conn)
+
+
+# ---------------- Queries -----------------
+def threat_match_counts(conn):
+    """[(threat_id, threat_name, linked incidents)] for every threat, most linked first."""
+    return conn.execute("""
+        SELECT t.id, t.threat_name, COUNT(m.incident_id)
+        FROM security_threats t
+        LEFT JOIN threat_text_links l ON l.threat_id = t.id
+        LEFT JOIN match_incidents m ON m.text_id = l.text_id
+        GROUP BY t.id
+        ORDER BY COUNT(m.incident_id) DESC, t.id
+    """).fetchall()
+
+
+def incidents_for_threat(conn, threat_id, limit=500):
+    """Incident ids linked to a threat with their match score and matched text, best first."""
+    return conn.execute("""
+        SELECT m.incident_id, l.score, x.text
+        FROM threat_text_links l
+        JOIN match_texts x ON x.text_id = l.text_id
+        JOIN match_incidents m ON m.text_id = l.text_id
+        WHERE l.threat_id = ?
+        ORDER BY l.score DESC, m.incident_id
+        LIMIT ?
+    """, (threat_id, limit)).fetchall()
+
+
+# ---------------- Main -----------------
+if __name__ == "__main__":
+    # python -m app.data.threat_links [rebuild]
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    if sys.argv[1:2] == ["rebuild"]:
+        counts = rebuild_threat_links(conn)
+    else:
+        counts = refresh_threat_links(conn)
+    conn.close()
+    print(f"Matched {counts['threats']} new threats and {counts['incidents']} new incidents "
+          f"({counts['links']} new links).")
@@ -1,13 +1,15 @@
 import os
 import sqlite3
 
+from app.data.query_stats import TimedConnection
+
 # ---------------- Database -----------------
 # Database path relative to this script
 DB_FILE = os.path.join(os.path.dirname(__file__), "..", "intelligence_platform.db")
 
 def connect_database():
     """Connect to the SQLite database."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = sqlite3.connect(DB_FILE, factory=TimedConnection)
     return conn
 
 def fetch_all_users():
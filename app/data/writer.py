@@ -0,0 +1 @@
+from platform_common.writer import SingleWriter, get_writer
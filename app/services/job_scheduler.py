@@ -0,0 +1,349 @@
+import inspect
+import json
+import sqlite3
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from app.data.db import DB_PATH
+from app.data.writer import get_writer
+
+# ---------------- Constants -----------------
+QUEUED, RUNNING, RETRYING, SUCCEEDED, FAILED = "queued", "running", "retrying", "succeeded", "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING, RETRYING)
+RETRY_BASE_SECONDS = 5
+LEASE_SECONDS = 60  # a running job whose lease lapses this long is presumed dead and requeued
+
+# name -> callable; filled by register_job()
+JOB_FUNCTIONS = {}
+
+
+def register_job(name):
+    """Decorator registering a function as a job.
+
+    Jobs receive their stored params as keyword arguments. A job that
+    declares a `progress` parameter gets a callable progress(fraction, message)
+    that records how far it is in the jobs table.
+    """
+    def decorator(func):
+        JOB_FUNCTIONS[name] = func
+        return func
+    return decorator
+
+
+# ---------------- Cron -----------------
+_CRON_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]  # minute hour day month weekday
+
+
+def _cron_field(field, low, high):
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/")
+            step = int(step)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-"))
+        else:
+            start = end = int(part)
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def parse_cron(expr):
+    """Parse a 5-field cron expression (*, */n, a-b, a,b) into sets of allowed values."""
+    fields = expr.split()
+    if len(fields) != 5:
+        raise ValueError(f"Cron expression needs 5 fields: {expr!r}")
+    return [_cron_field(f, low, high) for f, (low, high) in zip(fields, _CRON_RANGES)]
+
+
+def cron_matches(expr, moment):
+    minute, hour, day, month, weekday = parse_cron(expr)
+    _, _, day_field, _, weekday_field = expr.split()
+    day_ok = moment.day in day
+    # cron counts Sunday as 0, Python's weekday() counts Monday as 0
+    weekday_ok = (moment.weekday() + 1) % 7 in weekday
+    if day_field.startswith("*") or weekday_field.startswith("*"):
+        days_ok = day_ok and weekday_ok
+    else:
+        days_ok = day_ok or weekday_ok  # like cron: both restricted means either one matches
+    return moment.minute in minute and moment.hour in hour and moment.month in month and days_ok
+
+
+# ---------------- Scheduler -----------------
+class JobScheduler:
+    """In-process background jobs backed by a `jobs` table in SQLite.
+
+    enqueue() only inserts a row, so callers return immediately. Worker
+    threads claim the oldest due job in a write transaction, run it, and
+    record the outcome; failures are retried with exponential backoff up to
+    max_attempts. A running job holds a lease that a heartbeat keeps
+    extending; a job whose lease lapsed (its process died) is requeued, so
+    several processes can share the table. A clock thread enqueues cron-scheduled jobs once per
+    matching minute. Because state lives in the table, queued jobs survive
+    a restart and any page can show their progress. Every write to the
+    tables goes through the database's single writer, so the scheduler
+    never competes with page writes for the write lock.
+    """
+
+    def __init__(self, db_path=DB_PATH, workers=2, poll_interval=1.0):
+        self._db_path = db_path
+        self._workers = workers
+        self._poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads = []
+        self.create_tables()
+
+    def _connect(self):
+        """Read-only use: writes go through self._writer()."""
+        return sqlite3.connect(self._db_path, timeout=30, isolation_level=None)
+
+    def _writer(self):
+        return get_writer(self._db_path)
+
+    def create_tables(self):
+        with self._writer().transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    params TEXT NOT NULL DEFAULT '{}',
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 3,
+                    run_after REAL NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    message TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    lease_until REAL
+                )
+            """)
+            if "lease_until" not in {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}:
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease_until REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs (status, run_after)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_schedules (
+                    name TEXT PRIMARY KEY,
+                    cron TEXT NOT NULL,
+                    params TEXT NOT NULL DEFAULT '{}',
+                    last_minute TEXT
+                )
+            """)
+
+    # ---- public API ----
+    def start(self):
+        """Start the worker and clock threads. Jobs left running by a dead process are requeued."""
+        if self._threads:
+            return self
+        self.requeue_expired()
+        for i in range(self._workers):
+            self._threads.append(threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True))
+        self._threads.append(threading.Thread(target=self._clock, name="job-clock", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def enqueue(self, name, params=None, max_attempts=3, delay=0, unique=False):
+        """Queue a job and return its id.
+
+        With unique=True nothing is added while a job of the same name is
+        still queued or running; that job's id is returned instead.
+        """
+        if name not in JOB_FUNCTIONS:
+            raise KeyError(f"Unknown job: {name}")
+        now = time.time()
+        with self._writer().transaction() as conn:
+            if unique:
+                row = conn.execute(
+                    f"SELECT id FROM jobs WHERE name = ? AND status IN ({', '.join('?' * len(ACTIVE_STATUSES))})",
+                    (name, *ACTIVE_STATUSES),
+                ).fetchone()
+                if row:
+                    return row[0]
+            job_id = conn.execute(
+                "INSERT INTO jobs (name, params, status, max_attempts, run_after, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (name, json.dumps(params or {}), QUEUED, max_attempts, now + delay, now),
+            ).lastrowid
+        self._wake.set()
+        return job_id
+
+    def schedule(self, name, cron, params=None):
+        """Run `name` whenever the cron expression matches (checked once a minute)."""
+        parse_cron(cron)
+        self._writer().submit(
+            "INSERT INTO job_schedules (name, cron, params) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET cron = excluded.cron, params = excluded.params",
+            (name, cron, json.dumps(params or {})),
+        ).result()
+
+    def jobs(self, limit=50):
+        """Return the most recent jobs as dicts, newest first."""
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def schedules(self):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT name, cron, last_minute FROM job_schedules ORDER BY name").fetchall()
+        finally:
+            conn.close()
+
+    def requeue_expired(self):
+        """Requeue running jobs whose lease lapsed; ones out of attempts fail. Returns how many."""
+        now = time.time()
+        with self._writer().transaction() as conn:
+            return conn.execute(
+                "UPDATE jobs SET "
+                "status = CASE WHEN attempts < max_attempts THEN ? ELSE ? END, "
+                "finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE ? END, "
+                "error = 'Lease expired: the process running the job stopped', "
+                "started_at = NULL, lease_until = NULL "
+                "WHERE status = ? AND (lease_until IS NULL OR lease_until < ?)",
+                (QUEUED, FAILED, now, RUNNING, now),
+            ).rowcount
+
+    # ---- worker threads ----
+    def _claim(self, conn):
+        """Atomically mark the oldest due job as running and return it (or None).
+
+        `conn` is the worker's read connection: idle polls only read, and the
+        writer is asked for the connection once a due job exists.
+        """
+        due = "status IN (?, ?) AND run_after <= ?"
+        if conn.execute(f"SELECT 1 FROM jobs WHERE {due} LIMIT 1", (QUEUED, RETRYING, time.time())).fetchone() is None:
+            return None
+        with self._writer().transaction() as write_conn:
+            return write_conn.execute(
+                f"""
+                UPDATE jobs
+                SET status = ?, attempts = attempts + 1, started_at = ?, lease_until = ?,
+                    progress = 0, message = NULL
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE {due}
+                    ORDER BY run_after, id
+                    LIMIT 1
+                )
+                RETURNING id, name, params, attempts, max_attempts
+                """,
+                (RUNNING, time.time(), time.time() + LEASE_SECONDS, QUEUED, RETRYING, time.time()),
+            ).fetchone()
+
+    def _progress_callback(self, job_id):
+        def progress(fraction, message=None):
+            # Not waited on: the writer applies updates in order, before the job's final status
+            self._writer().submit(
+                "UPDATE jobs SET progress = ?, message = ?, lease_until = ? WHERE id = ?",
+                (max(0.0, min(1.0, fraction)), message, time.time() + LEASE_SECONDS, job_id),
+            )
+        return progress
+
+    def _heartbeat(self, job_id, done):
+        """Extend the job's lease until `done` is set, for jobs that report no progress."""
+        while not done.wait(LEASE_SECONDS / 3):
+            self._writer().submit(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = ?",
+                (time.time() + LEASE_SECONDS, job_id, RUNNING),
+            )
+
+    def _run_job(self, job_id, name, params):
+        func = JOB_FUNCTIONS[name]
+        kwargs = json.loads(params)
+        if "progress" in inspect.signature(func).parameters:
+            kwargs["progress"] = self._progress_callback(job_id)
+        return func(**kwargs)
+
+    def _work(self):
+        conn = self._connect()
+        try:
+            while not self._stop.is_set():
+                job = self._claim(conn)
+                if job is None:
+                    self._wake.wait(self._poll_interval)
+                    self._wake.clear()
+                    continue
+                job_id, name, params, attempts, max_attempts = job
+                done = threading.Event()
+                threading.Thread(
+                    target=self._heartbeat, args=(job_id, done), name=f"job-heartbeat-{job_id}", daemon=True
+                ).start()
+                try:
+                    result = self._run_job(job_id, name, params)
+                except Exception:
+                    error = traceback.format_exc(limit=5)
+                    if attempts < max_attempts:
+                        backoff = RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+                        update = (
+                            "UPDATE jobs SET status = ?, error = ?, run_after = ? WHERE id = ?",
+                            (RETRYING, error, time.time() + backoff, job_id),
+                        )
+                    else:
+                        update = (
+                            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                            (FAILED, error, time.time(), job_id),
+                        )
+                else:
+                    update = (
+                        "UPDATE jobs SET status = ?, progress = 1, message = ?, error = NULL, finished_at = ? "
+                        "WHERE id = ?",
+                        (SUCCEEDED, None if result is None else str(result)[:500], time.time(), job_id),
+                    )
+                done.set()
+                self._writer().submit(*update).result()
+        finally:
+            conn.close()
+
+    # ---- clock thread ----
+    def _clock(self):
+        conn = self._connect()
+        try:
+            while not self._stop.is_set():
+                minute = datetime.now().replace(second=0, microsecond=0)
+                stamp = minute.isoformat(timespec="minutes")
+                self.requeue_expired()  # jobs of processes that died after this one started
+                for name, cron, params in conn.execute(
+                    "SELECT name, cron, params FROM job_schedules "
+                    "WHERE last_minute IS NULL OR last_minute < ?", (stamp,)
+                ).fetchall():
+                    if name in JOB_FUNCTIONS and cron_matches(cron, minute):
+                        self._writer().submit(
+                            "UPDATE job_schedules SET last_minute = ? WHERE name = ?", (stamp, name)
+                        ).result()
+                        self.enqueue(name, json.loads(params), unique=True)
+                next_minute = minute + timedelta(minutes=1)
+                self._stop.wait(max(0.0, (next_minute - datetime.now()).total_seconds()))
+        finally:
+            conn.close()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(db_path=DB_PATH, workers=2):
+    """Return the process-wide scheduler, starting it on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler(db_path, workers).start()
+        return _scheduler
@@ -0,0 +1,155 @@
+import csv
+import time
+
+from app.data.archive import ARCHIVE_AFTER_DAYS, ARCHIVE_POLICIES, archive_all, archived_keys, detach_archive
+from app.data.db import DB_PATH
+from app.data.near_duplicates import NEAR_DUP_DOMAINS, StagedClusters, record_row, sync_near_duplicates
+from app.data.schema import run_all_migrations
+from app.data.shards import SHARDED_TABLES, ShardRouter
+from app.data.snapshots import refresh_snapshots, snapshots_available
+from app.data.threat_links import refresh_threat_links
+from app.data.users import export_users_to_file
+from app.data.writer import get_writer
+from app.services.job_scheduler import get_scheduler, register_job
+from app.services.metrics import CSV_ROWS, CSV_ROWS_PER_SECOND, CSV_SECONDS
+
+# name -> cron expression for jobs that run on their own
+DEFAULT_SCHEDULES = {
+    "refresh_snapshots": "*/15 * * * *",
+    "archive_resolved": "30 2 * * *",
+    "refresh_threat_links": "*/5 * * * *",
+    "sync_near_duplicates": "*/5 * * * *",
+}
+
+# CSV file -> (table, columns) imported by load_all_csvs, from the DATA folder
+CSV_FOLDER = DB_PATH.parent
+CSV_IMPORTS = [
+    ('cyber_incidents.csv', 'cyber_incidents',
+     ['date', 'incident_type', 'severity', 'status', 'description', 'reported_by']),
+    ('intelligence_reports.csv', 'intelligence_reports', ['title', 'description', 'date']),
+    ('security_threats.csv', 'security_threats', ['threat_name', 'severity', 'detected_on']),
+    ('it_tickets.csv', 'it_tickets', ['ticket_id', 'title', 'status', 'priority', 'assigned_to', 'created_on']),
+]
+
+# table -> near-duplicate domain for imported rows
+NEAR_DUP_TABLES = {table: domain for domain, (table, _, _) in NEAR_DUP_DOMAINS.items()}
+
+
+# ---------------- CSV import -----------------
+def record_csv_import(table, rows, seconds):
+    CSV_ROWS.inc(rows, table=table)
+    CSV_SECONDS.observe(seconds, table=table)
+    CSV_ROWS_PER_SECOND.set(rows / seconds if seconds > 0 else 0, table=table)
+
+
+def load_csv_to_table(conn, filename, table, columns, folder=CSV_FOLDER):
+    """Insert the rows of one CSV file that aren't in `table` yet, as one transaction; returns how many."""
+    filepath = folder / filename
+    if not filepath.exists():
+        print(f"⚠ {filename} not found — skipping import")
+        return 0
+    # Rows already archived must not come back into the hot table
+    key = ARCHIVE_POLICIES[table][0] if table in ARCHIVE_POLICIES else None
+    skip = archived_keys(conn, table) if key in columns else set()
+    start, imported = time.perf_counter(), 0
+    staged = StagedClusters()  # new near-duplicate clusters, matchable once the file commits
+    if not conn.in_transaction:  # works on the single writer's autocommit connection too
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        with open(filepath, mode='r', encoding='utf-8') as file:
+            reader = csv.DictReader(file)
+            for row in reader:
+                if skip and int(row.get(key) or 0) in skip:
+                    continue
+                values = tuple(row.get(col) for col in columns)
+                placeholders = ','.join('?' * len(columns))
+                cursor = conn.execute(
+                    f"INSERT OR IGNORE INTO {table} ({','.join(columns)}) VALUES ({placeholders})",
+                    values
+                )
+                if cursor.rowcount and table in NEAR_DUP_TABLES:
+                    record_row(conn, NEAR_DUP_TABLES[table], cursor.lastrowid, row, staged)
+                imported += cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    staged.apply()
+    record_csv_import(table, imported, time.perf_counter() - start)
+    return imported
+
+
+# ---------------- Jobs -----------------
+@register_job("run_all_migrations")
+def run_migrations_job():
+    run_all_migrations()
+
+
+@register_job("export_users")
+def export_users_job(output_path=None):
+    export_users_to_file(output_path)
+
+
+@register_job("refresh_snapshots")
+def refresh_snapshots_job():
+    if not snapshots_available():
+        return "pyarrow not installed — skipped"
+    refresh_snapshots()
+
+
+@register_job("archive_resolved")
+def archive_resolved_job(older_than_days=ARCHIVE_AFTER_DAYS):
+    return archive_all(older_than_days)
+
+
+@register_job("refresh_threat_links")
+def refresh_threat_links_job():
+    with get_writer(DB_PATH).connection() as conn:
+        return refresh_threat_links(conn)
+
+
+@register_job("sync_near_duplicates")
+def sync_near_duplicates_job():
+    return sync_near_duplicates()
+
+
+@register_job("load_all_csvs")
+def load_all_csvs(progress=None, db_path=DB_PATH, folder=CSV_FOLDER):
+    # One file per lease of the single writer's connection, so queued writes go in between files
+    writer = get_writer(db_path)
+    imported = {}
+    for i, (filename, table, columns) in enumerate(CSV_IMPORTS):
+        if progress:
+            progress(i / len(CSV_IMPORTS), filename)
+        with writer.connection() as conn:
+            try:
+                imported[table] = load_csv_to_table(conn, filename, table, columns, folder)
+            finally:
+                detach_archive(conn)
+    with writer.connection() as conn:
+        refresh_threat_links(conn)
+    return imported
+
+
+@register_job("migrate_shards")
+def migrate_shards_job(before_month=None, progress=None):
+    # One table per lease of the single writer's connection; each month is its own transaction
+    moved = {}
+    for i, table in enumerate(SHARDED_TABLES):
+        if progress:
+            progress(i / len(SHARDED_TABLES), f"Sharding {table}")
+        with get_writer(DB_PATH).connection() as conn:
+            router = ShardRouter(conn)
+            try:
+                moved[table] = router.migrate(table, before_month)
+            finally:
+                router.detach_all()
+    return moved
+
+
+def start_scheduler():
+    """Start the shared scheduler with the default schedules installed."""
+    scheduler = get_scheduler()
+    for name, cron in DEFAULT_SCHEDULES.items():
+        scheduler.schedule(name, cron)
+    return scheduler
@@ -0,0 +1,21 @@
+import os
+
+from platform_common.metrics import (
+    ACTIVE_SESSIONS, CACHE_REQUESTS, CSV_ROWS, CSV_ROWS_PER_SECOND, CSV_SECONDS, LOGINS, METRICS_HOST,
+    METRICS_TEXTFILE, PAGE_SECONDS, REGISTRATIONS, REGISTRY, Counter, Gauge, Histogram, MetricsRegistry, PageTimer,
+    record_cache, start_page, touch_session, write_textfile,
+)
+from platform_common.metrics import start_exporter as _start_exporter
+
+# ---------------- Constants -----------------
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9464"))
+
+# ---------------- Application metrics -----------------
+BCRYPT_SECONDS = REGISTRY.histogram(
+    "app_bcrypt_seconds", "Time spent hashing or verifying passwords.", ["operation"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0),
+)
+
+
+def start_exporter(port=METRICS_PORT, host=METRICS_HOST, textfile=METRICS_TEXTFILE):
+    return _start_exporter(port, host, textfile)
@@ -0,0 +1,27 @@
+from concurrent.futures import as_completed
+
+# ---------------- Concurrent Sections -----------------
+def _load_on_own_connection(connect, load):
+    conn = connect()
+    try:
+        return load(conn)
+    finally:
+        conn.close()
+
+
+def load_sections(executor, connect, loaders):
+    """Run every loader on `executor`; yield (key, result, error) in completion order.
+
+    `loaders` maps a section key to a function of one connection. Each call
+    gets its own connection from `connect()` (SQLite connections can't be
+    shared across threads), closed once it returns. A failing section
+    yields its exception as `error` and doesn't stop the others, so the
+    caller can render the fastest sections first and report the rest.
+    """
+    futures = {
+        executor.submit(_load_on_own_connection, connect, load): key
+        for key, load in loaders.items()
+    }
+    for future in as_completed(futures):
+        error = future.exception()
+        yield futures[future], None if error else future.result(), error
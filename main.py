@@ -1,21 +1,53 @@
 import os
 import csv
+import json
 import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import bcrypt
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 
+from app.data.lookups import encode_categorical_columns, label_rows, labeled_select
+from app.data.query_stats import COLLECTOR, TimedConnection
+from app.data.writer import get_writer
+from app.data.snapshots import snapshots_available, snapshots_stale, snapshot_info, read_snapshot_df
+from app.data.shards import ShardRouter, has_shards
+from app.data.archive import get_archived_rows
+from app.data.correlations import CORRELATION_KEYS, EVENT_STREAMS, correlate, create_time_indexes, install_stream_counters, stream_versions
+from app.data.near_duplicates import cluster_map, distinct_count, install_near_duplicates
+from app.data.threat_links import incidents_for_threat, refresh_threat_links, threat_match_counts
+from app.services.job_scheduler import JOB_FUNCTIONS, get_scheduler
+from app.services.jobs import record_csv_import, start_scheduler
+from app.services.sections import load_sections
+from app.services.metrics import (
+    BCRYPT_SECONDS, LOGINS, REGISTRATIONS,
+    start_exporter, start_page,
+)
+from app.services.memory import (
+    SESSION_BUDGET_BYTES, format_bytes, page_traces, session_report, set_tracing, tracing_enabled,
+)
+from platform_common.login_throttle import LoginThrottle
+
 # ---------------- Constants -----------------
 DATA_FOLDER = 'DATA'
 DB_FILE = os.path.join(DATA_FOLDER, 'intelligence_platform.db')
+LOGIN_MAX_FAILURES = 5
+LOGIN_LOCKOUT_SECONDS = 300
 
 if not os.path.exists(DATA_FOLDER):
     os.makedirs(DATA_FOLDER)
 
 # ---------------- Database -----------------
 def connect_database():
-    return sqlite3.connect(DB_FILE)
+    return sqlite3.connect(DB_FILE, factory=TimedConnection)
+
+def connect_database_readonly():
+    """Read-only connection that is safe to open from worker threads."""
+    return sqlite3.connect(f"file:{os.path.abspath(DB_FILE)}?mode=ro", uri=True, factory=TimedConnection)
 
 def create_users_table():
     conn = connect_database()
@@ -92,14 +124,24 @@ def create_it_tickets_table():
     conn.commit()
     conn.close()
 
+def create_lookup_tables():
+    # Versioned one-time migration, on the single writer like every other write
+    with get_writer(DB_FILE).transaction() as conn:
+        encode_categorical_columns(conn)
+
+def create_correlation_indexes():
+    with get_writer(DB_FILE).transaction() as conn:
+        create_time_indexes(conn)
+        install_stream_counters(conn)
+
 # ---------------- CSV Loading -----------------
-def load_users_csv(conn):
+def load_users_csv():
+    """Replace the users table with users.csv; part of setup, so logins never see it half loaded."""
     filepath = os.path.join(DATA_FOLDER, "users.csv")
     if not os.path.exists(filepath):
         print("⚠ users.csv not found — skipping import")
         return
-    conn.execute("DELETE FROM users")
-    conn.commit()
+    start, users = time.perf_counter(), []
     with open(filepath, mode="r", encoding="utf-8") as file:
         reader = csv.DictReader(file)
         for row in reader:
@@ -108,69 +150,65 @@ def load_users_csv(conn):
             role = row.get("role", "user")
             if not username or not password:
                 continue
-            hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-            conn.execute(
-                "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-                (username, hashed, role)
-            )
-    conn.commit()
-
-def load_csv_to_table(conn, filename, table, columns):
-    filepath = os.path.join(DATA_FOLDER, filename)
-    if not os.path.exists(filepath):
-        print(f"⚠ {filename} not found — skipping import")
-        return
-    with open(filepath, mode='r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            values = tuple(row.get(col) for col in columns)
-            placeholders = ','.join('?' * len(columns))
-            conn.execute(
-                f"INSERT OR IGNORE INTO {table} ({','.join(columns)}) VALUES ({placeholders})",
-                values
-            )
-        conn.commit()
-
-def load_all_csvs():
-    conn = connect_database()
-    load_users_csv(conn)
-    load_csv_to_table(conn, 'cyber_incidents.csv', 'cyber_incidents',
-                      ['date', 'incident_type', 'severity', 'status', 'description', 'reported_by'])
-    load_csv_to_table(conn, 'intelligence_reports.csv', 'intelligence_reports',
-                      ['title', 'description', 'date'])
-    load_csv_to_table(conn, 'security_threats.csv', 'security_threats',
-                      ['threat_name', 'severity', 'detected_on'])
-    load_csv_to_table(conn, 'it_tickets.csv', 'it_tickets',
-                      ['ticket_id','title','status','priority','assigned_to','created_on'])
-    conn.close()
+            with BCRYPT_SECONDS.time(operation="hash"):
+                hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+            users.append((username, hashed, role))
+    # Hash first, then swap the rows in one transaction on the single writer
+    with get_writer(DB_FILE).transaction() as conn:
+        conn.execute("DELETE FROM users")
+        conn.executemany("INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)", users)
+    record_csv_import("users", len(users), time.perf_counter() - start)
 
 # ---------------- User Functions -----------------
 def register_user(username, password, role='user'):
     conn = connect_database()
     cursor = conn.cursor()
     cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
-    if cursor.fetchone():
-        conn.close()
-        return False, f"Username '{username}' already exists."
-    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-    cursor.execute('INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)',
-                   (username, hashed.decode('utf-8'), role))
-    conn.commit()
+    exists = cursor.fetchone()
     conn.close()
+    if exists:
+        REGISTRATIONS.inc(outcome="exists")
+        return False, f"Username '{username}' already exists."
+    with BCRYPT_SECONDS.time(operation="hash"):
+        hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    try:
+        # Shared single writer: group-committed with other sessions' writes
+        get_writer(DB_FILE).submit('INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)',
+                                   (username, hashed.decode('utf-8'), role)).result()
+    except sqlite3.IntegrityError:
+        REGISTRATIONS.inc(outcome="exists")
+        return False, f"Username '{username}' already exists."
+    REGISTRATIONS.inc(outcome="created")
     return True, f"User '{username}' registered successfully!"
 
+@st.cache_resource
+def get_login_throttle():
+    """One throttle per process; this script's own globals are reset on every rerun."""
+    return LoginThrottle(LOGIN_MAX_FAILURES, LOGIN_LOCKOUT_SECONDS)
+
 def login_user(username, password):
+    throttle = get_login_throttle()
+    if throttle.throttled(username):
+        LOGINS.inc(outcome="throttled")
+        return False, 'Too many failed attempts. Try again in a few minutes.'
     conn = connect_database()
     cursor = conn.cursor()
     cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
     user = cursor.fetchone()
     conn.close()
     if not user:
+        LOGINS.inc(outcome="fail")
         return False, 'Username not found.'
     stored_hash = user[2]
-    if bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8')):
+    with BCRYPT_SECONDS.time(operation="verify"):
+        valid = bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
+    if valid:
+        throttle.succeeded(username)
+        LOGINS.inc(outcome="success")
         return True, f'Welcome, {username}!'
     else:
+        throttle.failed(username)
+        LOGINS.inc(outcome="fail")
         return False, 'Invalid password.'
 
 # ---------------- Fetch Data -----------------
@@ -178,23 +216,324 @@ def get_intelligence_reports(conn):
     return pd.read_sql_query("SELECT * FROM intelligence_reports", conn)
 
 def get_security_threats(conn):
-    return pd.read_sql_query("SELECT * FROM security_threats", conn)
-
-def get_cyber_incidents(conn):
-    return pd.read_sql_query("SELECT * FROM cyber_incidents", conn)
+    return pd.read_sql_query("SELECT * FROM security_threats_labeled", conn)
+
+def read_sharded_table(conn, table, columns=None, start=None, end=None):
+    """Read a month-sharded table, covering main plus the shards within [start, end).
+
+    Partitions are read one after another, attaching one shard at a time,
+    so this works for any number of months.
+    """
+    router = ShardRouter(conn)
+    clause, bounds = router.date_clause(table, start, end)
+    where = f" WHERE {clause}" if clause else ""
+    frames = []
+    try:
+        for source in router.sources(table, start, end):
+            schema = source.split(".")[0]
+            if columns is None:
+                sql = labeled_select(conn, table, source=source, schema=schema)
+            else:
+                sql = f"SELECT {', '.join(columns)} FROM {source} t"
+            frames.append(pd.read_sql_query(sql + where, conn, params=bounds))
+    finally:
+        router.detach_all()
+    return pd.concat(frames, ignore_index=True)
+
+def with_archive(conn, frame, table, where="", params=()):
+    """Append archived rows of `table` (matching `where` on its summary) to `frame`, labeled like the live rows."""
+    archived = pd.DataFrame(label_rows(conn, table, get_archived_rows(conn, table, where, params)))
+    if archived.empty:
+        return frame
+    return pd.concat([frame, archived], ignore_index=True)
+
+def get_cyber_incidents(conn, include_archive=False, reported_by=None):
+    if has_shards("cyber_incidents"):
+        incidents = read_sharded_table(conn, "cyber_incidents")
+    else:
+        incidents = pd.read_sql_query("SELECT * FROM cyber_incidents_labeled", conn)
+    if include_archive:
+        where, params = ("reported_by = ?", (reported_by,)) if reported_by else ("", ())
+        incidents = with_archive(conn, incidents, "cyber_incidents", where, params)
+    return incidents
 
 def get_users(conn):
     return pd.read_sql_query("SELECT * FROM users", conn)
 
-def get_it_tickets(conn):
-    return pd.read_sql_query("SELECT * FROM it_tickets", conn)
+def get_it_tickets(conn, include_archive=False):
+    if has_shards("it_tickets"):
+        tickets = read_sharded_table(conn, "it_tickets")
+    else:
+        tickets = pd.read_sql_query("SELECT * FROM it_tickets_labeled", conn)
+    if include_archive:
+        tickets = with_archive(conn, tickets, "it_tickets")
+    return tickets
+
+def get_analytics_frame(conn, table, columns=None):
+    """Read a table for analytics from its Parquet snapshot, falling back to SQL."""
+    if snapshots_available():
+        # Builds happen only on a job worker; page threads never build, they read SQL until it's done
+        built = snapshot_info(table) is not None
+        if not built or snapshots_stale():
+            get_scheduler().enqueue("refresh_snapshots", unique=True)
+        if built:
+            return read_snapshot_df(table, columns=columns)
+    if has_shards(table):
+        return read_sharded_table(conn, table, columns=columns or ["*"])
+    selected = ", ".join(columns) if columns else "*"
+    return pd.read_sql_query(f"SELECT {selected} FROM {table}", conn)
+
+# ---------------- Analyst Sections -----------------
+# (key, title, table, columns) — each section loads on its own read-only connection
+ANALYST_SECTIONS = [
+    ("incidents", "incidents", "cyber_incidents", ["date", "severity"]),
+    ("reports", "intelligence reports", "intelligence_reports", None),
+    ("threats", "security threats", "security_threats", None),
+    ("tickets", "IT tickets", "it_tickets", ["created_on", "status", "priority"]),
+]
+
+@st.cache_resource
+def get_analyst_executor():
+    """One worker pool per process, shared by every session and rerun."""
+    return ThreadPoolExecutor(max_workers=len(ANALYST_SECTIONS), thread_name_prefix="analyst")
+
+def render_incidents_section(incidents):
+    if not incidents.empty:
+        incidents['date'] = pd.to_datetime(incidents['date'], errors='coerce')
+        incidents = incidents.dropna(subset=['date'])
+        if not incidents.empty:
+            incidents['date_only'] = incidents['date'].dt.date
+            incidents_over_time = incidents.groupby('date_only').size().reset_index(name='count')
+            fig1 = px.line(
+                incidents_over_time, 
+                x='date_only', y='count', 
+                markers=True, 
+                title='All Incidents Over Time'
+            )
+            st.plotly_chart(fig1)
+            st.subheader("Incident Severity Distribution")
+            st.bar_chart(incidents['severity'].value_counts())
+    else:
+        st.info("No incidents yet.")
+
+def render_reports_section(reports):
+    st.subheader("Intelligence Reports")
+    if reports.empty:
+        st.info("No intelligence reports yet.")
+    else:
+        st.dataframe(reports)
+
+def render_threats_section(threats):
+    st.subheader("Security Threats")
+    if threats.empty:
+        st.info("No security threats recorded yet.")
+    else:
+        st.dataframe(threats)
+
+def render_tickets_section(tickets):
+    st.subheader("IT Tickets Overview")
+    if not tickets.empty:
+        tickets['created_on'] = pd.to_datetime(tickets['created_on'], errors='coerce')
+        tickets = tickets.dropna(subset=['created_on'])
+        if not tickets.empty:
+            tickets['date_only'] = tickets['created_on'].dt.date
+            tickets_over_time = tickets.groupby('date_only').size().reset_index(name='count')
+            fig2 = px.line(
+                tickets_over_time, 
+                x='date_only', y='count', 
+                markers=True, 
+                title='IT Tickets Over Time'
+            )
+            st.plotly_chart(fig2)
+            st.bar_chart(tickets['status'].value_counts())
+            st.bar_chart(tickets['priority'].value_counts())
+    else:
+        st.info("No IT tickets recorded yet.")
+
+SECTION_RENDERERS = {
+    "incidents": render_incidents_section,
+    "reports": render_reports_section,
+    "threats": render_threats_section,
+    "tickets": render_tickets_section,
+}
+
+# ---------------- Correlations -----------------
+# label -> (anchor stream, anchor filter)
+CORRELATION_ANCHORS = {
+    "Critical incidents": ("incidents", {"severity": ["Critical"]}),
+    "All incidents": ("incidents", None),
+    "Newly detected threats": ("threats", None),
+    "Critical threats": ("threats", {"severity": ["Critical"]}),
+}
+
+@st.cache_data(ttl=300, max_entries=32, show_spinner="Correlating events...")
+def get_correlations(anchor_label, target, before_hours, after_hours, key, versions):
+    """Cached sort-merge correlation; `versions` changes whenever a stream gains rows."""
+    anchor, anchor_filter = CORRELATION_ANCHORS[anchor_label]
+    conn = connect_database_readonly()
+    try:
+        return correlate(conn, anchor, target, before_hours, after_hours, anchor_filter=anchor_filter, key=key)
+    finally:
+        conn.close()
+
+def render_correlations_section():
+    st.subheader("Correlations")
+    col1, col2, col3 = st.columns(3)
+    anchor_label = col1.selectbox("Anchor events", list(CORRELATION_ANCHORS))
+    anchor = CORRELATION_ANCHORS[anchor_label][0]
+    target = col2.selectbox("Correlated events", list(EVENT_STREAMS), index=list(EVENT_STREAMS).index("tickets"))
+    keys = [k for k, columns in CORRELATION_KEYS.items() if anchor in columns and target in columns]
+    key = col3.selectbox("Match on", [None] + keys, format_func=lambda k: "Time only" if k is None else k)
+    before_hours, after_hours = st.slider("Window (hours relative to the anchor)", -168, 168, (0, 24), step=6)
+
+    conn = connect_database_readonly()
+    try:
+        versions = stream_versions(conn)
+    finally:
+        conn.close()
+    result = get_correlations(anchor_label, target, -before_hours, after_hours, key, versions)
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric(f"Anchor {anchor}", result["anchors"])
+    c2.metric(f"{target.title()} in windows", result["pairs"])
+    c3.metric("Baseline per window", f"{result['baseline']:.2f}")
+    c4.metric("Spiking anchors", result["spikes"])
+    if result["breakdown"]:
+        breakdown = pd.DataFrame(
+            [(label, inside, total) for label, (inside, total) in result["breakdown"].items()],
+            columns=["value", "in windows", "all"],
+        ).set_index("value")
+        st.bar_chart(breakdown)
+    if result["top_anchors"]:
+        st.write(f"{anchor.title()} followed by the most {target}")
+        st.dataframe(pd.DataFrame(result["top_anchors"]))
+    if result["sample_pairs"]:
+        with st.expander(f"Correlated pairs (first {len(result['sample_pairs'])})"):
+            st.dataframe(pd.DataFrame(result["sample_pairs"]))
+
+# ---------------- Threat Links -----------------
+def render_threat_links_section(conn):
+    st.subheader("Incidents for This Threat")
+    # Only threats and incidents added since the last run are matched, on the single writer;
+    # links are read from the table
+    with get_writer(DB_FILE).connection() as writer_conn:
+        refresh_threat_links(writer_conn)
+    threats = threat_match_counts(conn)
+    if not threats:
+        st.info("No security threats recorded yet.")
+        return
+    threat_id, name, linked = st.selectbox(
+        "Threat", threats, format_func=lambda t: f"{t[1]} (#{t[0]}) — {t[2]} incidents"
+    )
+    links = pd.DataFrame(incidents_for_threat(conn, threat_id), columns=["id", "match_score", "matched_text"])
+    if links.empty:
+        st.info(f"No incidents match '{name}'.")
+        return
+    ids = links["id"].tolist()
+    details = pd.read_sql_query(
+        f"SELECT * FROM cyber_incidents WHERE id IN ({', '.join('?' * len(ids))})", conn, params=ids
+    )
+    st.caption(f"Showing {len(links)} of {linked} linked incidents, best match first.")
+    st.dataframe(links.merge(details, on="id", how="left"))
+
+# ---------------- Background Jobs -----------------
+@st.cache_resource
+def get_job_scheduler():
+    return start_scheduler()
+
+@st.fragment(run_every=5)
+def render_jobs_admin():
+    scheduler = get_job_scheduler()
+    st.subheader("Background Jobs")
+    col1, col2 = st.columns([3, 1])
+    job_name = col1.selectbox("Job", sorted(JOB_FUNCTIONS), key="job_name")
+    if col2.button("Run now", key="run_job"):
+        job_id = scheduler.enqueue(job_name, unique=True)
+        st.success(f"Queued job #{job_id}")
+
+    jobs = pd.DataFrame(scheduler.jobs())
+    if jobs.empty:
+        st.info("No jobs have run yet.")
+    else:
+        for column in ("created_at", "started_at", "finished_at"):
+            jobs[column] = pd.to_datetime(jobs[column], unit="s")
+        st.dataframe(
+            jobs[["id", "name", "status", "attempts", "progress", "message", "created_at", "finished_at", "error"]],
+            column_config={"progress": st.column_config.ProgressColumn("progress", min_value=0, max_value=1)},
+            hide_index=True,
+        )
+
+    schedules = scheduler.schedules()
+    if schedules:
+        st.caption("Schedules")
+        st.dataframe(pd.DataFrame(schedules, columns=["job", "cron", "last run (minute)"]), hide_index=True)
+
+# ---------------- Query Statistics -----------------
+def render_query_stats_admin():
+    st.subheader("Query Statistics")
+    stats = pd.DataFrame(COLLECTOR.stats())
+    if stats.empty:
+        st.info("No queries recorded yet.")
+        return
+    scans = stats[stats["full_scan"]]
+    if not scans.empty:
+        st.warning(f"{len(scans)} slow statement(s) do a full table scan — check their indexes.")
+    st.dataframe(
+        stats[["sql", "count", "total_ms", "p50_ms", "p95_ms", "max_ms", "rows", "full_scan"]],
+        hide_index=True,
+    )
+    slow = COLLECTOR.slow_queries()
+    if slow:
+        st.caption(f"Slow queries (over {COLLECTOR.slow_ms:.0f} ms)")
+        for entry in slow[:20]:
+            with st.expander(f"{entry['ms']} ms — {entry['sql'][:80]}"):
+                st.code(entry["sql"], language="sql")
+                st.write(entry["plan"] or "No plan available")
+    col1, col2 = st.columns(2)
+    col1.download_button(
+        "Download JSON",
+        json.dumps({"queries": COLLECTOR.stats(), "slow_log": slow}, indent=2),
+        file_name="query_stats.json",
+        mime="application/json",
+    )
+    if col2.button("Reset statistics"):
+        COLLECTOR.reset()
+        st.rerun()
+
+# ---------------- Memory -----------------
+def render_memory_admin():
+    st.subheader("Memory")
+    sessions = session_report()
+    if sessions:
+        report = pd.DataFrame(sessions)
+        st.metric("Session state across active sessions", format_bytes(report["bytes"].sum()))
+        report["size"] = report["bytes"].map(format_bytes)
+        st.dataframe(
+            report[["session", "page", "size", "largest_key", "evictions"]],
+            hide_index=True,
+        )
+        st.caption(f"Per-session budget: {format_bytes(SESSION_BUDGET_BYTES)}")
+    else:
+        st.info("No sessions measured yet.")
+
+    tracing = st.toggle("Trace allocations per page render (slows the app)", value=tracing_enabled())
+    if tracing != tracing_enabled():
+        set_tracing(tracing)
+    for page, traces in page_traces().items():
+        latest = traces[-1]
+        with st.expander(f"{page} — peak {format_bytes(latest['peak'])}"):
+            st.dataframe(
+                pd.DataFrame(latest["top"], columns=["allocated at", "size diff", "count diff"]),
+                hide_index=True,
+            )
 
 # ---------------- Streamlit UI -----------------
 def run_streamlit_ui():
     st.set_page_config(page_title="Week-9 Dashboard", layout="wide")
 
+    # Domain CSV import runs on a worker thread so the first page render is not blocked by it
     if "csv_loaded" not in st.session_state:
-        load_all_csvs()
+        get_job_scheduler().enqueue("load_all_csvs", unique=True)
         st.session_state["csv_loaded"] = True
 
     if "logged_in" not in st.session_state:
@@ -259,9 +598,11 @@ def run_streamlit_ui():
             # Cyber Incidents
             incidents = get_cyber_incidents(conn)
             my_incidents = incidents[incidents["reported_by"] == st.session_state.username]
-            col1, col2 = st.columns(2)
+            incident_clusters = cluster_map(conn, "incidents")
+            col1, col2, col3 = st.columns(3)
             col1.metric("Total Incidents Reported", len(my_incidents))
-            col2.metric("Open Incidents", len(my_incidents[my_incidents["status"] == "Open"]))
+            col2.metric("Distinct (near-duplicates merged)", distinct_count(my_incidents["id"], incident_clusters))
+            col3.metric("Open Incidents", len(my_incidents[my_incidents["status"] == "Open"]))
 
             if not my_incidents.empty:
                 my_incidents['date'] = pd.to_datetime(my_incidents['date'], errors='coerce')
@@ -294,9 +635,11 @@ def run_streamlit_ui():
                 if not tickets.empty:
                     tickets['date_only'] = tickets['created_on'].dt.date
                     tickets_over_time = tickets.groupby('date_only').size().reset_index(name='count')
-                    col3, col4 = st.columns(2)
-                    col3.metric("Total Tickets", len(tickets))
-                    col4.metric("Open Tickets", len(tickets[tickets["status"]=="Open"]))
+                    ticket_clusters = cluster_map(conn, "tickets")
+                    col4, col5, col6 = st.columns(3)
+                    col4.metric("Total Tickets", len(tickets))
+                    col5.metric("Distinct (near-duplicates merged)", distinct_count(tickets["ticket_id"], ticket_clusters))
+                    col6.metric("Open Tickets", len(tickets[tickets["status"]=="Open"]))
                     st.subheader("Ticket Trend Over Time")
                     fig_tickets = px.line(
                         tickets_over_time, 
@@ -323,7 +666,10 @@ def run_streamlit_ui():
         # ---------------- My Incidents -----------------
         elif page == "My Incidents":
             st.header("My Incidents")
-            incidents = get_cyber_incidents(conn)
+            include_archive = st.checkbox("Include archived (resolved) incidents", value=False)
+            incidents = get_cyber_incidents(
+                conn, include_archive=include_archive, reported_by=st.session_state.username
+            )
             my_incidents = incidents[incidents["reported_by"] == st.session_state.username]
             st.dataframe(my_incidents)
 
@@ -332,73 +678,72 @@ def run_streamlit_ui():
             st.header("Admin Panel (Admins Only)")
             users_df = get_users(conn)
             st.dataframe(users_df)
+            render_jobs_admin()
+            render_query_stats_admin()
+            render_memory_admin()
+            exporter = get_metrics_exporter()
+            st.caption(f"Prometheus metrics: {exporter}" if exporter else "Metrics exporter is not running.")
 
         # ---------------- Analyst Tools -----------------
         elif page == "Analyst Tools":
             st.header("Analyst Tools")
-            incidents = get_cyber_incidents(conn)
-            if not incidents.empty:
-                incidents['date'] = pd.to_datetime(incidents['date'], errors='coerce')
-                incidents = incidents.dropna(subset=['date'])
-                if not incidents.empty:
-                    incidents['date_only'] = incidents['date'].dt.date
-                    incidents_over_time = incidents.groupby('date_only').size().reset_index(name='count')
-                    fig1 = px.line(
-                        incidents_over_time, 
-                        x='date_only', y='count', 
-                        markers=True, 
-                        title='All Incidents Over Time'
-                    )
-                    st.plotly_chart(fig1)
-                    st.subheader("Incident Severity Distribution")
-                    st.bar_chart(incidents['severity'].value_counts())
-            else:
-                st.info("No incidents yet.")
-
-            reports = get_intelligence_reports(conn)
-            st.subheader("Intelligence Reports")
-            if reports.empty:
-                st.info("No intelligence reports yet.")
-            else:
-                st.dataframe(reports)
 
-            threats = get_security_threats(conn)
-            st.subheader("Security Threats")
-            if threats.empty:
-                st.info("No security threats recorded yet.")
-            else:
-                st.dataframe(threats)
+            # Draw every section's placeholder first, then fill each one as its data arrives
+            placeholders = {}
+            for key, title, _, _ in ANALYST_SECTIONS:
+                placeholders[key] = st.empty()
+                placeholders[key].info(f"Loading {title}...")
+
+            # Each section reads on its own read-only connection in a worker thread
+            loaders = {
+                key: partial(get_analytics_frame, table=table, columns=columns)
+                for key, _, table, columns in ANALYST_SECTIONS
+            }
+            for key, frame, error in load_sections(get_analyst_executor(), connect_database_readonly, loaders):
+                with placeholders[key].container():
+                    try:
+                        if error is not None:
+                            raise error
+                        SECTION_RENDERERS[key](frame)
+                    except Exception as e:
+                        st.error(f"Could not load this section: {e}")
 
-            tickets = get_it_tickets(conn)
-            st.subheader("IT Tickets Overview")
-            if not tickets.empty:
-                tickets['created_on'] = pd.to_datetime(tickets['created_on'], errors='coerce')
-                tickets = tickets.dropna(subset=['created_on'])
-                if not tickets.empty:
-                    tickets['date_only'] = tickets['created_on'].dt.date
-                    tickets_over_time = tickets.groupby('date_only').size().reset_index(name='count')
-                    fig2 = px.line(
-                        tickets_over_time, 
-                        x='date_only', y='count', 
-                        markers=True, 
-                        title='IT Tickets Over Time'
-                    )
-                    st.plotly_chart(fig2)
-                    st.bar_chart(tickets['status'].value_counts())
-                    st.bar_chart(tickets['priority'].value_counts())
-            else:
-                st.info("No IT tickets recorded yet.")
+            st.write("---")
+            render_threat_links_section(conn)
+            st.write("---")
+            render_correlations_section()
 
         conn.close()
-
-# ---------------- Main -----------------
-def main():
+        return page
+    return "Login"
+
+# ---------------- Metrics -----------------
+@st.cache_resource
+def get_metrics_exporter():
+    return start_exporter()
+
+# ---------------- Setup -----------------
+@st.cache_resource
+def setup_database():
+    """Create the tables and one-time structures once per process, not on every rerun."""
     create_users_table()
     create_cyber_incidents_table()
     create_intelligence_reports_table()
     create_security_threats_table()
     create_it_tickets_table()
-    run_streamlit_ui()
+    create_lookup_tables()
+    create_correlation_indexes()
+    install_near_duplicates(DB_FILE)
+    # Before any login is checked; the domain CSVs load later on a job worker
+    load_users_csv()
+
+# ---------------- Main -----------------
+def main():
+    get_metrics_exporter()
+    timer = start_page("main", st.session_state.setdefault("session_id", uuid.uuid4().hex), st.session_state)
+    setup_database()
+    timer.page = run_streamlit_ui()
+    timer.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
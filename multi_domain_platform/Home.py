@@ -1,10 +1,8 @@
 import streamlit as st
 
-from services.database_manager import DatabaseManager
-from database.setup import init_db
+from ui.resources import init_database
 
-db = DatabaseManager()
-init_db(db)
+init_database()
 
 st.set_page_config(page_title="Multi Domain Platform", layout="wide")
 st.title("Multi Domain Platform")
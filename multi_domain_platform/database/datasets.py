@@ -0,0 +1,59 @@
+import os
+import sqlite3
+from typing import List, Optional, Tuple
+
+from services.database_manager import DatabaseManager
+
+# Server-side dataset files are only read from (and indexed next to) this folder
+DATASET_ROOT = os.environ.get("DATASET_ROOT", os.path.join("database", "datasets"))
+
+# Columns added to `datasets` after the original (id, name, owner) schema
+DATASET_COLUMNS: List[Tuple[str, str]] = [
+    ("file_path", "TEXT"),
+    ("blob_path", "TEXT"),     # BlobStore manifest of an uploaded file
+    ("blob_size", "INTEGER"),
+]
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def install_dataset_columns(db: DatabaseManager) -> None:
+    """Add any missing DATASET_COLUMNS to the datasets table (safe to call on every run)."""
+    with db.transaction() as conn:
+        existing = _columns(conn, "datasets")
+        if not existing:
+            return
+        for column, sql_type in DATASET_COLUMNS:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE datasets ADD COLUMN {column} {sql_type}")
+
+
+def install_datasets(db: DatabaseManager) -> None:
+    """Add the DATASET_COLUMNS and the lookup indexes to an existing datasets table."""
+    install_dataset_columns(db)
+    db.execute_query("CREATE INDEX IF NOT EXISTS idx_datasets_name ON datasets (name)")
+    db.execute_query("CREATE INDEX IF NOT EXISTS idx_datasets_owner ON datasets (owner)")
+
+
+def resolve_dataset_path(path: str, root: str = DATASET_ROOT) -> str:
+    """The real path of a dataset file, relative paths taken from `root`.
+
+    Raises ValueError if it resolves outside `root` (through "..", an
+    absolute path or a symlink), so users can't read arbitrary server files.
+    """
+    base = os.path.realpath(root)
+    real = os.path.realpath(os.path.join(base, path))
+    if os.path.commonpath([base, real]) != base:
+        raise ValueError(f"Dataset files must be under {root}.")
+    return real
+
+
+def dataset_file(path: str, root: str = DATASET_ROOT) -> Optional[str]:
+    """resolve_dataset_path() for a registered path, or None if it's outside `root` or not a file."""
+    try:
+        real = resolve_dataset_path(path, root)
+    except ValueError:
+        return None
+    return real if os.path.isfile(real) else None
@@ -0,0 +1,143 @@
+import sqlite3
+from contextlib import closing
+from typing import Dict, List, Tuple
+
+from services.database_manager import DatabaseManager  # first: puts platform_common on sys.path
+from platform_common.schema_versions import applied_version, mark_applied
+
+# lookup table -> seeded (name, rank) pairs; unseen labels are added with rank 0
+LOOKUP_SEEDS: Dict[str, List[Tuple[str, int]]] = {
+    "severity_levels": [("Low", 1), ("Medium", 2), ("High", 3), ("Critical", 4)],
+    "statuses": [("Open", 1), ("In Progress", 2), ("Investigating", 3), ("Closed", 4)],
+}
+
+# table -> [(text column, lookup table)]
+ENCODED_COLUMNS: Dict[str, List[Tuple[str, str]]] = {
+    "incidents": [("severity", "severity_levels"), ("status", "statuses")],
+    "tickets": [("status", "statuses")],
+}
+
+# Bump when _install_table() changes; each table is migrated once per version
+LOOKUPS_VERSION = 2
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def install_lookups(db: DatabaseManager) -> None:
+    """Store severity/status as integer codes backed by small lookup tables.
+
+    A one-time migration: each table is migrated once per LOOKUPS_VERSION,
+    recorded in schema_versions, so later calls cost one read per table
+    and take no write lock. Call it from setup (init_db, setup_tables()),
+    not from every rerun. Text columns are kept so existing inserts keep
+    working; triggers fill in the codes and ranks.
+    """
+    with closing(sqlite3.connect(db.db_path)) as conn:
+        pending = [
+            table for table in ENCODED_COLUMNS
+            if _columns(conn, table) and applied_version(conn, f"lookups:{table}") < LOOKUPS_VERSION
+        ]
+    if not pending:
+        return
+    with db.transaction() as conn:
+        _create_lookup_tables(conn)
+        for table in pending:
+            # Re-checked under the write lock: another process may have just migrated it
+            if applied_version(conn, f"lookups:{table}") < LOOKUPS_VERSION:
+                _install_table(conn, table)
+                mark_applied(conn, f"lookups:{table}", LOOKUPS_VERSION)
+
+
+def _create_lookup_tables(conn: sqlite3.Connection) -> None:
+    for lookup, seeds in LOOKUP_SEEDS.items():
+        conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {lookup} (
+            code INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL COLLATE NOCASE,
+            rank INTEGER NOT NULL DEFAULT 0
+        )
+        """)
+        conn.executemany(f"INSERT OR IGNORE INTO {lookup} (name, rank) VALUES (?, ?)", seeds)
+
+
+def _install_table(conn: sqlite3.Connection, table: str) -> None:
+    """Code and rank columns, their triggers and the labeled view for one table.
+
+    {column}_rank copies the lookup's rank onto the row, so sorting by
+    rank is an index range scan; codes only record first-seen order.
+    """
+    existing = _columns(conn, table)
+    pairs = [(column, lookup) for column, lookup in ENCODED_COLUMNS[table] if column in existing]
+    if not pairs:
+        return
+
+    for column, lookup in pairs:
+        for suffix in ("code", "rank"):
+            if f"{column}_{suffix}" not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}_{suffix} INTEGER")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column}_code ON {table} ({column}_code)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column}_rank ON {table} ({column}_rank, id)")
+        conn.execute(f"""
+        INSERT OR IGNORE INTO {lookup} (name)
+        SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL
+        """)
+        conn.execute(f"""
+        UPDATE {table}
+        SET {column}_code = (SELECT code FROM {lookup} WHERE name = {table}.{column})
+        WHERE {column}_code IS NULL AND {column} IS NOT NULL
+        """)
+        conn.execute(f"""
+        UPDATE {table}
+        SET {column}_rank = (SELECT rank FROM {lookup} WHERE code = {table}.{column}_code)
+        """)
+        # A label's rank can be set after rows use it
+        conn.execute(f"DROP TRIGGER IF EXISTS {lookup}_rank_{table}_{column}")
+        conn.execute(f"""
+        CREATE TRIGGER {lookup}_rank_{table}_{column}
+        AFTER UPDATE OF rank ON {lookup}
+        BEGIN
+            UPDATE {table} SET {column}_rank = NEW.rank WHERE {column}_code = NEW.code;
+        END
+        """)
+
+    register = "\n".join(
+        f"INSERT OR IGNORE INTO {lookup} (name) VALUES (NEW.{column});"
+        for column, lookup in pairs
+    )
+    assign = ", ".join(
+        f"{column}_code = (SELECT code FROM {lookup} WHERE name = NEW.{column}), "
+        f"{column}_rank = (SELECT rank FROM {lookup} WHERE name = NEW.{column})"
+        for column, lookup in pairs
+    )
+    watched = ", ".join(column for column, _ in pairs)
+    for event, name in (("INSERT", "insert"), (f"UPDATE OF {watched}", "update")):
+        conn.execute(f"DROP TRIGGER IF EXISTS {table}_encode_{name}")
+        conn.execute(f"""
+        CREATE TRIGGER {table}_encode_{name}
+        AFTER {event} ON {table}
+        BEGIN
+            {register}
+            UPDATE {table} SET {assign} WHERE id = NEW.id;
+        END
+        """)
+
+    # {table}_labeled keeps the old text columns readable with canonical casing
+    select, joins = [], []
+    for column in _columns(conn, table):
+        lookup = dict(pairs).get(column)
+        if column.endswith(("_code", "_rank")):
+            continue
+        if lookup is None:
+            select.append(f"t.{column}")
+        else:
+            select.append(f"COALESCE(l_{column}.name, t.{column}) AS {column}")
+            joins.append(f"LEFT JOIN {lookup} l_{column} ON l_{column}.code = t.{column}_code")
+    conn.execute(f"DROP VIEW IF EXISTS {table}_labeled")
+    conn.execute(f"""
+    CREATE VIEW {table}_labeled AS
+    SELECT {', '.join(select)}
+    FROM {table} t
+    {' '.join(joins)}
+    """)
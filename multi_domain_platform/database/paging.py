@@ -0,0 +1,33 @@
+from typing import Any, List, Optional, Tuple
+
+from services.database_manager import DatabaseManager
+
+# (last sort value, last id) of the previous page; None for the first page
+Cursor = Optional[Tuple[Any, int]]
+
+
+def fetch_page(
+    db: DatabaseManager,
+    table: str,
+    columns: List[str],
+    sort_column: str,
+    direction: str,
+    cursor: Cursor,
+    page_size: int
+) -> List[tuple]:
+    """Keyset query: one index range scan of page_size + 1 rows, however deep the page.
+
+    Rows are (sort value, *columns), ordered by the sort column and then id
+    so ties are broken consistently. The extra row only tells the caller
+    whether another page follows.
+    """
+    where, params = "", []
+    if cursor is not None:
+        op = "<" if direction == "DESC" else ">"
+        where = f"WHERE ({sort_column}, id) {op} (?, ?)"
+        params = list(cursor)
+    sql = (
+        f"SELECT {sort_column}, {', '.join(columns)} FROM {table} {where} "
+        f"ORDER BY {sort_column} {direction}, id {direction} LIMIT ?"
+    )
+    return db.fetch_all(sql, (*params, page_size + 1))
@@ -1,4 +1,10 @@
 from services.database_manager import DatabaseManager
+from database.datasets import install_datasets
+from database.lookups import install_lookups
+from services.change_tracker import ChangeTracker
+from services.dataset_profiler import DatasetProfiler
+from services.near_duplicates import NearDuplicateDetector
+from services.search_index import SearchIndex
 
 def init_db(db: DatabaseManager) -> None:
     # users
@@ -37,3 +43,19 @@ def init_db(db: DatabaseManager) -> None:
         status TEXT NOT NULL
     )
     """)
+
+    # file-backed dataset columns (file_path, ...), indexes and stored profiles
+    install_datasets(db)
+    DatasetProfiler(db).install()
+
+    # severity/status lookup tables and integer code columns
+    install_lookups(db)
+
+    # per-table change counters for live dashboards
+    ChangeTracker(db).install()
+
+    # change log feeding the assistant's retrieval index
+    SearchIndex(db).install()
+
+    # near-duplicate clusters behind the dashboards' distinct counts
+    NearDuplicateDetector(db).install()
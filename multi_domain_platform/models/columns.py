@@ -0,0 +1,60 @@
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+
+class CategoricalColumn:
+    """Dictionary-encoded string column.
+
+    Each distinct label is stored once; rows only hold a small integer code,
+    so counting and filtering work on an array of ints instead of strings.
+    """
+
+    __slots__ = ("codes", "labels", "_index")
+
+    def __init__(self, values: Iterable[Optional[str]] = ()):
+        self.codes = array("I")
+        self.labels: List[Optional[str]] = []
+        self._index: Dict[Optional[str], int] = {}
+        for value in values:
+            self.append(value)
+
+    def append(self, value: Optional[str]) -> None:
+        code = self._index.get(value)
+        if code is None:
+            code = len(self.labels)
+            self._index[value] = code
+            self.labels.append(value)
+        self.codes.append(code)
+
+    def code_of(self, value: Optional[str]) -> Optional[int]:
+        return self._index.get(value)
+
+    def counts(self) -> Dict[Optional[str], int]:
+        """Return {label: number of rows} for labels that occur at least once."""
+        tally = [0] * len(self.labels)
+        for code in self.codes:
+            tally[code] += 1
+        return {label: n for label, n in zip(self.labels, tally) if n}
+
+    def positions_of(self, *values: Optional[str]) -> List[int]:
+        """Return the row positions whose label is one of `values`."""
+        wanted = {self._index[v] for v in values if v in self._index}
+        return [i for i, code in enumerate(self.codes) if code in wanted]
+
+    def take(self, positions: Iterable[int]) -> "CategoricalColumn":
+        """Return a new column holding only the given rows (labels are shared by value)."""
+        column = CategoricalColumn()
+        column.labels = list(self.labels)
+        column._index = dict(self._index)
+        column.codes = array("I", (self.codes[i] for i in positions))
+        return column
+
+    def to_list(self) -> List[Optional[str]]:
+        labels = self.labels
+        return [labels[code] for code in self.codes]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        return self.labels[self.codes[i]]
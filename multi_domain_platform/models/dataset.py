@@ -1,10 +1,27 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from models.columns import CategoricalColumn
+
+
 class Dataset:
-    """Represents a dataset in the platform."""
+    """Represents a dataset in the platform, optionally backed by a stored file."""
 
-    def __init__(self, dataset_id: int, name: str, owner: str):
+    __slots__ = ("__id", "__name", "__owner", "__blob_path", "__blob_size")
+
+    def __init__(
+        self,
+        dataset_id: int,
+        name: str,
+        owner: str,
+        blob_path: Optional[str] = None,
+        blob_size: Optional[int] = None
+    ):
         self.__id = dataset_id
         self.__name = name
         self.__owner = owner
+        self.__blob_path = blob_path
+        self.__blob_size = blob_size
 
     def get_id(self) -> int:
         return self.__id
@@ -15,10 +32,79 @@ class Dataset:
     def get_owner(self) -> str:
         return self.__owner
 
+    def get_blob_path(self) -> Optional[str]:
+        """BlobStore manifest of the uploaded file, if any."""
+        return self.__blob_path
+
+    def get_blob_size(self) -> Optional[int]:
+        return self.__blob_size
+
+    def has_file(self) -> bool:
+        return self.__blob_path is not None
+
     def __str__(self) -> str:
         return f"Dataset {self.__id} - {self.__name} (Owner: {self.__owner})"
 
     @staticmethod
     def from_row(row: tuple) -> "Dataset":
-        dataset_id, name, owner = row
-        return Dataset(dataset_id, name, owner)
+        """Build from (id, name, owner) or (id, name, owner, blob_path, blob_size)."""
+        return Dataset(*row)
+
+
+class DatasetBatch:
+    """A whole dataset result set stored column by column (owner is dictionary-encoded)."""
+
+    __slots__ = ("_ids", "_names", "_owners")
+
+    def __init__(self, ids: array, names: List[str], owners: CategoricalColumn):
+        self._ids = ids
+        self._names = names
+        self._owners = owners
+
+    @staticmethod
+    def from_rows(rows: Iterable[tuple]) -> "DatasetBatch":
+        """Build a batch from (id, name, owner) rows."""
+        ids = array("q")
+        names: List[str] = []
+        owners = CategoricalColumn()
+        for dataset_id, name, owner in rows:
+            ids.append(dataset_id)
+            names.append(name)
+            owners.append(owner)
+        return DatasetBatch(ids, names, owners)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, i: int) -> Dataset:
+        return Dataset(self._ids[i], self._names[i], self._owners[i])
+
+    def __iter__(self) -> Iterator[Dataset]:
+        for i in range(len(self._ids)):
+            yield self[i]
+
+    def ids(self) -> array:
+        return self._ids
+
+    def count_by_owner(self) -> Dict[str, int]:
+        return self._owners.counts()
+
+    def take(self, positions: Iterable[int]) -> "DatasetBatch":
+        positions = list(positions)
+        return DatasetBatch(
+            array("q", (self._ids[i] for i in positions)),
+            [self._names[i] for i in positions],
+            self._owners.take(positions),
+        )
+
+    def filter(self, owner: Optional[str] = None) -> "DatasetBatch":
+        if owner is None:
+            return self
+        return self.take(self._owners.positions_of(owner))
+
+    def to_columns(self) -> Dict[str, list]:
+        return {
+            "id": list(self._ids),
+            "name": list(self._names),
+            "owner": self._owners.to_list(),
+        }
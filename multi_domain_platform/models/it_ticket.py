@@ -1,6 +1,14 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from models.columns import CategoricalColumn
+
+
 class ITTicket:
     """Represents an IT operations ticket in the platform."""
 
+    __slots__ = ("__id", "__subject", "__status")
+
     def __init__(self, ticket_id: int, subject: str, status: str):
         self.__id = ticket_id
         self.__subject = subject
@@ -25,3 +33,62 @@ class ITTicket:
     def from_row(row: tuple) -> "ITTicket":
         ticket_id, subject, status = row
         return ITTicket(ticket_id, subject, status)
+
+
+class TicketBatch:
+    """A whole ticket result set stored column by column (status is dictionary-encoded)."""
+
+    __slots__ = ("_ids", "_subjects", "_statuses")
+
+    def __init__(self, ids: array, subjects: List[str], statuses: CategoricalColumn):
+        self._ids = ids
+        self._subjects = subjects
+        self._statuses = statuses
+
+    @staticmethod
+    def from_rows(rows: Iterable[tuple]) -> "TicketBatch":
+        """Build a batch from (id, subject, status) rows."""
+        ids = array("q")
+        subjects: List[str] = []
+        statuses = CategoricalColumn()
+        for ticket_id, subject, status in rows:
+            ids.append(ticket_id)
+            subjects.append(subject)
+            statuses.append(status)
+        return TicketBatch(ids, subjects, statuses)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, i: int) -> ITTicket:
+        return ITTicket(self._ids[i], self._subjects[i], self._statuses[i])
+
+    def __iter__(self) -> Iterator[ITTicket]:
+        for i in range(len(self._ids)):
+            yield self[i]
+
+    def ids(self) -> array:
+        return self._ids
+
+    def count_by_status(self) -> Dict[str, int]:
+        return self._statuses.counts()
+
+    def take(self, positions: Iterable[int]) -> "TicketBatch":
+        positions = list(positions)
+        return TicketBatch(
+            array("q", (self._ids[i] for i in positions)),
+            [self._subjects[i] for i in positions],
+            self._statuses.take(positions),
+        )
+
+    def filter(self, status: Optional[str] = None) -> "TicketBatch":
+        if status is None:
+            return self
+        return self.take(self._statuses.positions_of(status))
+
+    def to_columns(self) -> Dict[str, list]:
+        return {
+            "id": list(self._ids),
+            "subject": list(self._subjects),
+            "status": self._statuses.to_list(),
+        }
@@ -1,6 +1,21 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from models.columns import CategoricalColumn
+
+SEVERITY_LEVELS = {
+    "low": 1,
+    "medium": 2,
+    "high": 3,
+    "critical": 4,
+}
+
+
 class SecurityIncident:
     """Represents a cybersecurity incident in the platform."""
 
+    __slots__ = ("__id", "__incident_type", "__severity", "__status", "__description")
+
     def __init__(
         self,
         incident_id: int,
@@ -32,13 +47,7 @@ class SecurityIncident:
 
     def get_severity_level(self) -> int:
         """Return an integer severity level (simple example)."""
-        mapping = {
-            "low": 1,
-            "medium": 2,
-            "high": 3,
-            "critical": 4,
-        }
-        return mapping.get(self.__severity.lower(), 0)
+        return SEVERITY_LEVELS.get(self.__severity.lower(), 0)
 
     def __str__(self) -> str:
         return (
@@ -52,3 +61,111 @@ class SecurityIncident:
         incident_id, incident_type, severity, status, description = row
         return SecurityIncident(incident_id, incident_type, severity, status, description)
 
+
+class IncidentBatch:
+    """A whole incident result set stored column by column.
+
+    Severity, status and type are dictionary-encoded, so counting and
+    filtering never build SecurityIncident objects. Single incidents are
+    only created when the batch is indexed or iterated.
+    """
+
+    __slots__ = ("_ids", "_types", "_severities", "_statuses", "_descriptions")
+
+    def __init__(
+        self,
+        ids: array,
+        types: CategoricalColumn,
+        severities: CategoricalColumn,
+        statuses: CategoricalColumn,
+        descriptions: List[str]
+    ):
+        self._ids = ids
+        self._types = types
+        self._severities = severities
+        self._statuses = statuses
+        self._descriptions = descriptions
+
+    @staticmethod
+    def from_rows(rows: Iterable[tuple]) -> "IncidentBatch":
+        """Build a batch from (id, incident_type, severity, status, description) rows."""
+        ids = array("q")
+        types = CategoricalColumn()
+        severities = CategoricalColumn()
+        statuses = CategoricalColumn()
+        descriptions: List[str] = []
+        for incident_id, incident_type, severity, status, description in rows:
+            ids.append(incident_id)
+            types.append(incident_type)
+            severities.append(severity)
+            statuses.append(status)
+            descriptions.append(description)
+        return IncidentBatch(ids, types, severities, statuses, descriptions)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, i: int) -> SecurityIncident:
+        return SecurityIncident(
+            self._ids[i], self._types[i], self._severities[i], self._statuses[i], self._descriptions[i]
+        )
+
+    def __iter__(self) -> Iterator[SecurityIncident]:
+        for i in range(len(self._ids)):
+            yield self[i]
+
+    def ids(self) -> array:
+        return self._ids
+
+    def severity_levels(self) -> array:
+        """Return the integer severity level of every row (0 for unknown labels)."""
+        level_of_code = [SEVERITY_LEVELS.get((label or "").lower(), 0) for label in self._severities.labels]
+        return array("b", (level_of_code[code] for code in self._severities.codes))
+
+    def count_by_status(self) -> Dict[str, int]:
+        return self._statuses.counts()
+
+    def count_by_severity(self) -> Dict[str, int]:
+        return self._severities.counts()
+
+    def count_by_type(self) -> Dict[str, int]:
+        return self._types.counts()
+
+    def take(self, positions: Iterable[int]) -> "IncidentBatch":
+        """Return a new batch with only the rows at `positions`."""
+        positions = list(positions)
+        return IncidentBatch(
+            array("q", (self._ids[i] for i in positions)),
+            self._types.take(positions),
+            self._severities.take(positions),
+            self._statuses.take(positions),
+            [self._descriptions[i] for i in positions],
+        )
+
+    def filter(
+        self,
+        status: Optional[str] = None,
+        severity: Optional[str] = None,
+        min_level: Optional[int] = None
+    ) -> "IncidentBatch":
+        """Return the rows matching every given condition."""
+        keep = range(len(self))
+        if status is not None:
+            keep = self._statuses.positions_of(status)
+        if severity is not None:
+            wanted = set(self._severities.positions_of(severity))
+            keep = [i for i in keep if i in wanted]
+        if min_level is not None:
+            levels = self.severity_levels()
+            keep = [i for i in keep if levels[i] >= min_level]
+        return self.take(keep)
+
+    def to_columns(self) -> Dict[str, list]:
+        """Return plain column lists, e.g. for st.dataframe."""
+        return {
+            "id": list(self._ids),
+            "incident_type": self._types.to_list(),
+            "severity": self._severities.to_list(),
+            "status": self._statuses.to_list(),
+            "description": list(self._descriptions),
+        }
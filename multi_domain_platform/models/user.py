@@ -1,6 +1,8 @@
 class User:
     """Represents a user in the Multi-Domain Intelligence Platform."""
 
+    __slots__ = ("__username", "__password_hash", "__role")
+
     def __init__(self, username: str, password_hash: str, role: str):
         self.__username = username
         self.__password_hash = password_hash
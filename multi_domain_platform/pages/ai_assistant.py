@@ -1,42 +1,60 @@
 import streamlit as st
+from services.ai_assistant import AIAssistant
+from services.inference_gateway import GatewayOverloaded
+from ui.resources import get_change_tracker, get_inference_gateway, get_response_cache, get_search_index, setup_tables, start_page_metrics
 
 st.set_page_config(page_title="AI Assistant")
+page_timer = start_page_metrics("ai_assistant")
 
 # Login protection
 if "user" not in st.session_state:
     st.warning("Please login first.")
     st.stop()
 
+setup_tables()
+
 st.title("AI Assistant")
 st.write("Ask questions about the platform features.")
 
-# Chat history
-if "chat" not in st.session_state:
-    st.session_state["chat"] = []
-
-user_input = st.text_input("Ask a question")
-
-if st.button("Send"):
-    if user_input.strip():
-        st.session_state["chat"].append(("User", user_input))
-
-        msg = user_input.lower()
-        if "incident" in msg:
-            reply = "Cybersecurity incidents can be viewed and added on the Cybersecurity page."
-        elif "ticket" in msg:
-            reply = "IT tickets are managed in the IT Operations page."
-        elif "dataset" in msg:
-            reply = "Datasets can be added and viewed in the Data Science page."
-        elif "login" in msg:
-            reply = "Users must log in before accessing platform features."
-        else:
-            reply = "I can help with incidents, tickets, datasets, or login."
-
-        st.session_state["chat"].append(("Assistant", reply))
-        st.rerun()
-
-st.divider()
+# One assistant per session; it keeps the model context bounded by summarizing old turns
+if "assistant" not in st.session_state:
+    st.session_state["assistant"] = AIAssistant(
+        system_prompt="You answer questions about the Multi-Domain Intelligence Platform.",
+        backend=get_inference_gateway().client(st.session_state["user"].get_username()),
+        cache=get_response_cache(),
+        table_versions=get_change_tracker().versions,
+        retriever=get_search_index().context_for
+    )
+assistant: AIAssistant = st.session_state["assistant"]
+
+if assistant.summary:
+    with st.expander("Earlier conversation (summarized)"):
+        st.write(assistant.summary)
 
 # Display conversation
-for role, message in st.session_state["chat"]:
-    st.write(f"**{role}:** {message}")
+for message in assistant.history:
+    with st.chat_message(message["role"]):
+        st.write(message["content"])
+
+user_input = st.chat_input("Ask a question")
+
+if user_input and user_input.strip():
+    with st.chat_message("user"):
+        st.write(user_input)
+    with st.chat_message("assistant"):
+        try:
+            st.write_stream(assistant.send_message_stream(user_input))
+        except GatewayOverloaded:
+            st.warning("You have several questions waiting already; please wait for them to finish.")
+
+cache_stats = get_response_cache().stats()
+col1, col2 = st.columns(2)
+col1.caption(
+    f"Context: {assistant.context_tokens()} tokens · "
+    f"Cache hit rate: {cache_stats['hit_rate']:.0%} of {cache_stats['hits'] + cache_stats['misses']}"
+)
+if col2.button("Clear conversation"):
+    assistant.clear_history()
+    st.rerun()
+
+page_timer.stop()
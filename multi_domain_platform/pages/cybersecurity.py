@@ -1,8 +1,13 @@
 import streamlit as st
 from services.database_manager import DatabaseManager
-from models.security_incident import SecurityIncident
+from models.security_incident import IncidentBatch
+from ui.paged_table import render_paged_table
+from services.async_database_manager import QueryCancelled
+from services.near_duplicates import distinct_count_query
+from ui.resources import get_async_db, get_near_duplicates, load_when_changed, setup_tables, start_page_metrics, watch_tables
 
 st.set_page_config(page_title="Cyber Security")
+page_timer = start_page_metrics("cybersecurity")
 
 if "user" not in st.session_state:
     st.warning("Please login first.")
@@ -22,6 +27,8 @@ CREATE TABLE IF NOT EXISTS incidents (
     description TEXT NOT NULL
 )
 """)
+setup_tables(("incidents",))
+near_duplicates = get_near_duplicates()
 
 # ---- Add New Incident (do this BEFORE fetching so rerun shows new row immediately) ----
 st.subheader("Add New Incident")
@@ -33,42 +40,114 @@ status = st.selectbox("Status", ["Open", "Investigating", "Closed"])
 
 if st.button("Add Incident"):
     if incident_type.strip() and description.strip():
-        db.execute_query(
+        incident_id = db.execute_query(
             "INSERT INTO incidents (incident_type, severity, status, description) VALUES (?, ?, ?, ?)",
             (incident_type.strip(), severity, status, description.strip()),
         )
+        match = near_duplicates.record(
+            "incidents", incident_id, near_duplicates.text_of("incidents", {
+                "incident_type": incident_type.strip(), "description": description.strip(),
+            }),
+        )
         st.success("Incident added ✅")
-        st.rerun()  # ✅ forces page refresh so the new incident appears
+        if match.cluster_id != incident_id:
+            st.info(f"Looks like a repeat of incident #{match.cluster_id} "
+                    f"({match.similarity:.0%} similar); it is grouped with it in the distinct count.")
     else:
         st.error("Incident Type and Description cannot be empty.")
 
 st.divider()
 
 # ---- Existing Incidents ----
-rows = db.fetch_all("SELECT id, incident_type, severity, status, description FROM incidents")
-incidents = [SecurityIncident.from_row(r) for r in rows]
-
-st.subheader("Existing Incidents")
-if not incidents:
-    st.info("No incidents yet.")
-else:
-    for inc in incidents:
-        st.write(str(inc))
-
+# Codes only record first-seen order; the *_rank columns carry the lookup's rank
+INCIDENT_SORTS = {
+    "Newest": ("id", "DESC"),
+    "Oldest": ("id", "ASC"),
+    "Severity (highest first)": ("severity_rank", "DESC"),
+    "Status": ("status_rank", "ASC"),
+}
+
+# Live sections: redrawn only when incidents changed (see watch_tables below);
+# paging and sort controls rerun just their fragment
+@st.fragment
+def existing_incidents():
+    st.subheader("Existing Incidents")
+    render_paged_table(
+        db,
+        "incidents",
+        "incidents",
+        ["id", "incident_type", "severity", "status", "description"],
+        INCIDENT_SORTS,
+        IncidentBatch.from_rows,
+        empty_message="No incidents yet.",
+        tables=["incidents"],
+    )
+
+
+SUMMARY_QUERIES = {
+    "total": ("SELECT COUNT(*) FROM incidents", ()),
+    "distinct": distinct_count_query("incidents"),
+    "open": ("""
+SELECT COUNT(*) FROM incidents i
+JOIN statuses s ON s.code = i.status_code
+WHERE s.name = 'Open'
+""", ()),
+    "critical": ("""
+SELECT COUNT(*) FROM incidents i
+JOIN severity_levels s ON s.code = i.severity_code
+WHERE s.name = 'Critical'
+""", ()),
+    "by_severity": ("""
+SELECT s.name, COUNT(*)
+FROM incidents i
+JOIN severity_levels s ON s.code = i.severity_code
+GROUP BY i.severity_code
+ORDER BY s.rank
+""", ()),
+}
+
+
+def load_summary():
+    # Rows added without record() (e.g. by imports) are clustered only when incidents changed
+    near_duplicates.sync("incidents")
+    return get_async_db().load(SUMMARY_QUERIES)
+
+
+@st.fragment
+def incident_summary():
+    # Independent aggregates run concurrently; a load that runs too long is interrupted
+    try:
+        summary = load_when_changed(
+            "incident_summary",
+            ["incidents"],
+            load_summary,
+        )
+    except QueryCancelled:
+        st.warning("The incident summary took too long to load; retrying on the next refresh.")
+        st.session_state.pop("incidents_version", None)  # the next poll reruns the page even if nothing changed
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total Incidents", summary["total"][0][0])
+    col2.metric("Distinct (near-duplicates merged)", summary["distinct"][0][0])
+    col3.metric("Open", summary["open"][0][0])
+    col4.metric("Critical", summary["critical"][0][0])
+
+    st.subheader("Incidents by Severity")
+    severity_rows = summary["by_severity"]
+
+    if severity_rows:
+        labels = [r[0] for r in severity_rows]
+        counts = [r[1] for r in severity_rows]
+        st.bar_chart({"severity": counts}, x_label="Severity", y_label="Count")
+    else:
+        st.info("No data for chart yet.")
 
 
+# Polls the change counters; an idle poll returns early instead of rebuilding the tables and charts
+watch_tables("incidents_version", ["incidents"])
+existing_incidents()
 st.divider()
-st.subheader("Incidents by Severity")
-
-severity_rows = db.fetch_all("""
-SELECT severity, COUNT(*) 
-FROM incidents 
-GROUP BY severity
-""")
+incident_summary()
 
-if severity_rows:
-    labels = [r[0] for r in severity_rows]
-    counts = [r[1] for r in severity_rows]
-    st.bar_chart({"severity": counts}, x_label="Severity", y_label="Count")
-else:
-    st.info("No data for chart yet.")
+page_timer.stop()
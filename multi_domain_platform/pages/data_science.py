@@ -1,8 +1,15 @@
 import streamlit as st
+import os
+
+from database.datasets import DATASET_ROOT, dataset_file, resolve_dataset_path
 from services.database_manager import DatabaseManager
-from models.dataset import Dataset
+from services.csv_index import CsvOffsetIndex
+from models.dataset import Dataset, DatasetBatch
+from ui.paged_table import render_paged_table
+from ui.resources import get_blob_store, get_dataset_profiler, setup_tables, start_page_metrics, watch_tables
 
 st.set_page_config(page_title="Data Science")
+page_timer = start_page_metrics("data_science")
 
 if "user" not in st.session_state:
     st.warning("Please login first.")
@@ -20,32 +27,208 @@ CREATE TABLE IF NOT EXISTS datasets (
     owner TEXT NOT NULL
 )
 """)
+profiler = get_dataset_profiler()
+setup_tables(("datasets",))
 
 # Add Dataset
 st.subheader("Add New Dataset")
 name = st.text_input("Dataset Name")
 owner = st.text_input("Owner")
+file_path = st.text_input(f"File path (optional CSV, on the server under {DATASET_ROOT})")
+upload = st.file_uploader("...or upload the file", type=None)
 
 if st.button("Add Dataset"):
-    if name.strip() and owner.strip():
+    stored_path, path_error = None, None
+    if file_path.strip():
+        try:
+            stored_path = resolve_dataset_path(file_path.strip())
+        except ValueError as e:
+            path_error = str(e)
+        else:
+            if not os.path.isfile(stored_path):
+                path_error = "File not found on the server."
+    if not (name.strip() and owner.strip()):
+        st.error("Dataset Name and Owner cannot be empty.")
+    elif path_error:
+        st.error(path_error)
+    else:
+        blob = None
+        if upload is not None:
+            # Chunked, content-addressed: re-uploading the same or an overlapping file writes little or nothing
+            with st.spinner("Storing upload..."):
+                blob = get_blob_store().put(upload)
         db.execute_query(
-            "INSERT INTO datasets (name, owner) VALUES (?, ?)",
-            (name.strip(), owner.strip()),
+            "INSERT INTO datasets (name, owner, file_path, blob_path, blob_size) VALUES (?, ?, ?, ?, ?)",
+            (name.strip(), owner.strip(), stored_path,
+             blob.manifest_path if blob else None, blob.size if blob else None),
         )
-        st.success("Dataset added ✅")
-        st.rerun()
-    else:
-        st.error("Dataset Name and Owner cannot be empty.")
+        if blob is not None and blob.new_bytes < blob.size:
+            st.success(f"Dataset added ✅ ({blob.size - blob.new_bytes:,} of {blob.size:,} bytes were already stored)")
+        else:
+            st.success("Dataset added ✅")
 
 st.divider()
 
 # Existing Datasets
-rows = db.fetch_all("SELECT id, name, owner FROM datasets")
-datasets = [Dataset.from_row(r) for r in rows]
+DATASET_SORTS = {
+    "Newest": ("id", "DESC"),
+    "Oldest": ("id", "ASC"),
+    "Name": ("name", "ASC"),
+    "Owner": ("owner", "ASC"),
+}
+
+# Live section: redrawn only when datasets changed (see watch_tables below);
+# paging and sort controls rerun just the fragment
+@st.fragment
+def existing_datasets():
+    st.subheader("Existing Datasets")
+    render_paged_table(
+        db,
+        "datasets",
+        "datasets",
+        ["id", "name", "owner"],
+        DATASET_SORTS,
+        DatasetBatch.from_rows,
+        empty_message="No datasets yet.",
+        tables=["datasets"],
+    )
+
+
+# Polls the change counters; an idle poll returns early instead of rebuilding the tables and charts
+watch_tables("datasets_version", ["datasets"])
+existing_datasets()
+
+st.divider()
+
+# Previews of uploaded files: mmap reads of the first chunk only, whatever the file size
+st.subheader("File Preview")
+stored = [
+    Dataset.from_row(row)
+    for row in db.fetch_all(
+        "SELECT id, name, owner, blob_path, blob_size FROM datasets WHERE blob_path IS NOT NULL ORDER BY name"
+    )
+]
+if not stored:
+    st.info("Upload a file with a dataset to preview it here.")
+else:
+    by_label = {f"{d.get_name()} (#{d.get_id()})": d for d in stored}
+    dataset = by_label[st.selectbox("Uploaded dataset", list(by_label))]
+    if os.path.exists(dataset.get_blob_path()):
+        st.caption(f"{dataset.get_blob_size():,} bytes")
+        st.code("\n".join(get_blob_store().preview(dataset.get_blob_path())), language=None)
+    else:
+        st.warning("The stored file is missing from the blob store.")
+    usage = get_blob_store().stats()
+    if usage["logical_bytes"]:
+        st.caption(
+            f"Blob store: {usage['files']} files, {usage['logical_bytes'] / 1024 / 1024:.1f} MB stored in "
+            f"{usage['physical_bytes'] / 1024 / 1024:.1f} MB after deduplication"
+        )
+
+st.divider()
 
-st.subheader("Existing Datasets")
-if not datasets:
-    st.info("No datasets yet.")
+# Profiles: computed in one streaming pass and reused until the file changes
+st.subheader("Dataset Profile")
+files = db.fetch_all(
+    "SELECT id, name, file_path FROM datasets WHERE file_path IS NOT NULL ORDER BY name"
+)
+if not files:
+    st.info("Register a dataset with a file path to profile it.")
 else:
-    for d in datasets:
-        st.write(str(d))
+    labels = {f"{name} (#{dataset_id})": path for dataset_id, name, path in files}
+    choice = st.selectbox("Dataset", list(labels))
+    path = dataset_file(labels[choice])
+    col1, col2 = st.columns(2)
+    refresh = col1.button("Re-profile")
+    if col2.button("Profile all registered files"):
+        existing = [p for p in (dataset_file(p) for _, _, p in files) if p]
+        with st.spinner(f"Profiling {len(existing)} files..."):
+            profiler.profile_many(existing)
+
+    if path is None:
+        st.warning(f"File not found under {DATASET_ROOT}: {labels[choice]}")
+    else:
+        profile = profiler.cached(path)
+        if profile is None or refresh:
+            with st.spinner("Profiling (streaming pass over the file)..."):
+                profile = profiler.profile(path, refresh=refresh)
+        st.caption(
+            f"{profile['rows']:,} rows · {len(profile['columns'])} columns · "
+            f"{profile['size'] / 1024 / 1024:.1f} MB · profiled in {profile['seconds']}s"
+        )
+        st.dataframe(
+            [
+                {
+                    "column": c["name"],
+                    "type": c["type"],
+                    "null rate": f"{c['null_rate']:.1%}",
+                    "distinct (est.)": c["distinct_estimate"],
+                    "min": c["min"],
+                    "max": c["max"],
+                    "mean": c["mean"],
+                }
+                for c in profile["columns"]
+            ],
+            use_container_width=True,
+        )
+        numeric = [c for c in profile["columns"] if c["histogram"]]
+        if numeric:
+            column = st.selectbox("Histogram", [c["name"] for c in numeric])
+            bins = next(c["histogram"] for c in numeric if c["name"] == column)
+            # Numbered labels keep the bins in order on the chart's axis
+            labels = [f"{i:02d}: {b['low']:.4g} – {b['high']:.4g}" for i, b in enumerate(bins)]
+            st.bar_chart({"count": dict(zip(labels, (b["count"] for b in bins)))})
+
+st.divider()
+
+# Paging and sampling through a sidecar row-offset index: bounded reads however big the file
+st.subheader("Browse & Sample Rows")
+sources = {}
+for dataset_id, ds_name, ds_path, ds_blob, ds_size in db.fetch_all(
+    "SELECT id, name, file_path, blob_path, blob_size FROM datasets "
+    "WHERE file_path IS NOT NULL OR blob_path IS NOT NULL ORDER BY name"
+):
+    ds_file = dataset_file(ds_path) if ds_path else None
+    if ds_file:
+        sources[f"{ds_name} (#{dataset_id})"] = ("file", ds_file, None)
+    elif ds_blob and os.path.exists(ds_blob):
+        sources[f"{ds_name} (#{dataset_id})"] = ("blob", ds_blob, ds_size)
+
+if not sources:
+    st.info("Register a dataset with a file to browse it.")
+else:
+    kind, location, size = sources[st.selectbox("Dataset to browse", list(sources))]
+    with st.spinner("Indexing rows (first time only)..."):
+        if kind == "file":
+            row_index = CsvOffsetIndex.for_file(location)
+        else:
+            row_index = CsvOffsetIndex.for_stream(
+                lambda: get_blob_store().open(location), location + ".rowidx", size
+            )
+    st.caption(f"{row_index.rows:,} rows · offset index {row_index.index_bytes:,} bytes")
+
+    def as_records(rows):
+        return [dict(zip(row_index.header, row)) for row in rows]
+
+    page_size = 50
+    start = st.number_input(
+        "Start row", min_value=0, max_value=max(row_index.rows - 1, 0), value=0, step=page_size
+    )
+    st.dataframe(as_records(row_index.read_rows(int(start), page_size)), use_container_width=True)
+
+    col1, col2, col3 = st.columns(3)
+    mode = col1.radio("Sampling", ["Uniform", "Stratified (even coverage)", "Stratified by column"])
+    sample_size = col2.number_input("Sample size", min_value=1, max_value=1000, value=20)
+    strata = col3.selectbox("Column", row_index.header) if mode == "Stratified by column" else None
+    if st.button("Draw sample"):
+        try:
+            if mode == "Uniform":
+                sample = row_index.sample(int(sample_size))
+            else:
+                sample = row_index.stratified_sample(int(sample_size), column=strata)
+        except ValueError as e:  # the file changed under a column picked from its old header
+            st.error(str(e))
+        else:
+            st.dataframe(as_records(sample), use_container_width=True)
+
+page_timer.stop()
@@ -1,8 +1,13 @@
 import streamlit as st
 from services.database_manager import DatabaseManager
-from models.it_ticket import ITTicket
+from models.it_ticket import TicketBatch
+from ui.paged_table import render_paged_table
+from services.async_database_manager import QueryCancelled
+from services.near_duplicates import distinct_count_query
+from ui.resources import get_async_db, get_near_duplicates, load_when_changed, setup_tables, start_page_metrics, watch_tables
 
 st.set_page_config(page_title="IT Operations")
+page_timer = start_page_metrics("it_operations")
 
 if "user" not in st.session_state:
     st.warning("Please login first.")
@@ -20,6 +25,8 @@ CREATE TABLE IF NOT EXISTS tickets (
     status TEXT NOT NULL
 )
 """)
+setup_tables(("tickets",))
+near_duplicates = get_near_duplicates()
 
 # Add Ticket
 st.subheader("Add New Ticket")
@@ -28,40 +35,96 @@ status = st.selectbox("Status", ["Open", "In Progress", "Closed"])
 
 if st.button("Add Ticket"):
     if subject.strip():
-        db.execute_query(
+        ticket_id = db.execute_query(
             "INSERT INTO tickets (subject, status) VALUES (?, ?)",
             (subject.strip(), status),
         )
+        match = near_duplicates.record("tickets", ticket_id, subject.strip())
         st.success("Ticket added ✅")
-        st.rerun()
+        if match.cluster_id != ticket_id:
+            st.info(f"Looks like a repeat of ticket #{match.cluster_id} "
+                    f"({match.similarity:.0%} similar); it is grouped with it in the distinct count.")
     else:
         st.error("Subject cannot be empty.")
 
 st.divider()
 
 # Existing Tickets
-rows = db.fetch_all("SELECT id, subject, status FROM tickets")
-tickets = [ITTicket.from_row(r) for r in rows]
+TICKET_SORTS = {
+    "Newest": ("id", "DESC"),
+    "Oldest": ("id", "ASC"),
+    "Status": ("status_rank", "ASC"),
+}
 
-st.subheader("Existing Tickets")
-if not tickets:
-    st.info("No tickets yet.")
-else:
-    for t in tickets:
-        st.write(str(t))
+SUMMARY_QUERIES = {
+    "total": ("SELECT COUNT(*) FROM tickets", ()),
+    "distinct": distinct_count_query("tickets"),
+    "by_status": ("""
+SELECT s.name, COUNT(*)
+FROM tickets t
+JOIN statuses s ON s.code = t.status_code
+GROUP BY t.status_code
+ORDER BY s.rank
+""", ()),
+}
 
-# Chart: Tickets by Status
-st.divider()
-st.subheader("Tickets by Status")
 
-status_rows = db.fetch_all("""
-SELECT status, COUNT(*)
-FROM tickets
-GROUP BY status
-""")
+# Live sections: redrawn only when tickets changed (see watch_tables below);
+# paging and sort controls rerun just their fragment
+@st.fragment
+def existing_tickets():
+    st.subheader("Existing Tickets")
+    render_paged_table(
+        db,
+        "tickets",
+        "tickets",
+        ["id", "subject", "status"],
+        TICKET_SORTS,
+        TicketBatch.from_rows,
+        empty_message="No tickets yet.",
+        tables=["tickets"],
+    )
+
+
+def load_summary():
+    # Rows added without record() (e.g. by imports) are clustered only when tickets changed
+    near_duplicates.sync("tickets")
+    return get_async_db().load(SUMMARY_QUERIES)
+
+
+@st.fragment
+def ticket_summary():
+    # Independent aggregates run concurrently; a load that runs too long is interrupted
+    try:
+        summary = load_when_changed(
+            "ticket_summary",
+            ["tickets"],
+            load_summary,
+        )
+    except QueryCancelled:
+        st.warning("The ticket summary took too long to load; retrying on the next refresh.")
+        st.session_state.pop("tickets_version", None)  # the next poll reruns the page even if nothing changed
+        return
+
+    col1, col2 = st.columns(2)
+    col1.metric("Total Tickets", summary["total"][0][0])
+    col2.metric("Distinct (near-duplicates merged)", summary["distinct"][0][0])
+
+    # Chart: Tickets by Status
+    st.subheader("Tickets by Status")
+    status_rows = summary["by_status"]
+
+    if status_rows:
+        chart_data = {r[0]: r[1] for r in status_rows}
+        st.bar_chart(chart_data)
+    else:
+        st.info("No data for chart yet.")
+
+
+# Polls the change counters; an idle poll returns early instead of rebuilding the tables and charts
+watch_tables("tickets_version", ["tickets"])
+existing_tickets()
+st.divider()
+ticket_summary()
 
-if status_rows:
-    chart_data = {r[0]: r[1] for r in status_rows}
-    st.bar_chart(chart_data)
-else:
-    st.info("No data for chart yet.")
+page_timer.stop()
@@ -2,8 +2,10 @@ import streamlit as st
 
 from services.database_manager import DatabaseManager
 from services.auth_manager import AuthManager
+from ui.resources import start_page_metrics
 
 st.set_page_config(page_title="Login")
+page_timer = start_page_metrics("login")
 st.title("Login")
 
 # Create DB + Auth
@@ -29,6 +31,8 @@ if st.button("Login"):
         st.session_state["user"] = user
         st.success("Logged in ✅")
         st.info("Now open other pages from the sidebar.")
+    elif auth.is_throttled(username):
+        st.error("Too many failed attempts. Try again in a few minutes.")
     else:
         st.error("Invalid username or password.")
 
@@ -46,3 +50,5 @@ if st.button("Create user"):
         st.success("User created ✅ Now login using the same username/password.")
     else:
         st.error("Please enter a username and password.")
+
+page_timer.stop()
@@ -0,0 +1,57 @@
+import pandas as pd
+import streamlit as st
+
+from services.memory import (
+    SESSION_BUDGET_BYTES, format_bytes, page_traces, session_report, set_tracing, tracing_enabled,
+)
+
+st.set_page_config(page_title="Memory", layout="wide")
+
+if "user" not in st.session_state:
+    st.warning("Please login first.")
+    st.stop()
+
+if st.session_state["user"].get_role() != "admin":
+    st.error("Admins only.")
+    st.stop()
+
+st.title("Memory")
+st.caption(
+    f"Each session reports its own state at the end of every rerun. "
+    f"Over {format_bytes(SESSION_BUDGET_BYTES)} its reloadable caches are evicted."
+)
+
+# Session state per session
+sessions = session_report()
+if sessions:
+    report = pd.DataFrame(sessions)
+    st.metric("Session state across active sessions", format_bytes(report["bytes"].sum()))
+    report["size"] = report["bytes"].map(format_bytes)
+    st.dataframe(
+        report[["session", "page", "size", "largest_key", "evictions"]],
+        hide_index=True,
+        use_container_width=True,
+    )
+    selected = st.selectbox("Inspect session", report["session"])
+    keys = next(r["keys"] for r in sessions if r["session"] == selected)
+    st.bar_chart({key: size for key, size in sorted(keys.items(), key=lambda kv: -kv[1])[:15]})
+else:
+    st.info("No sessions measured yet.")
+
+# Allocation tracing
+st.subheader("Allocations per page render")
+tracing = st.toggle("Trace allocations (slows every session while on)", value=tracing_enabled())
+if tracing != tracing_enabled():
+    set_tracing(tracing)
+
+traces = page_traces()
+if not traces:
+    st.info("Turn tracing on and open a page to record its top allocators.")
+for page, page_runs in traces.items():
+    latest = page_runs[-1]
+    with st.expander(f"{page} — peak {format_bytes(latest['peak'])}"):
+        st.dataframe(
+            pd.DataFrame(latest["top"], columns=["allocated at", "size diff", "count diff"]),
+            hide_index=True,
+            use_container_width=True,
+        )
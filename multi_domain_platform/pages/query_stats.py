@@ -0,0 +1,54 @@
+import json
+
+import pandas as pd
+import streamlit as st
+
+from services.query_stats import COLLECTOR
+
+st.set_page_config(page_title="Query Statistics", layout="wide")
+
+if "user" not in st.session_state:
+    st.warning("Please login first.")
+    st.stop()
+
+if st.session_state["user"].get_role() != "admin":
+    st.error("Admins only.")
+    st.stop()
+
+st.title("Query Statistics")
+st.caption(f"Statements slower than {COLLECTOR.slow_ms:.0f} ms are logged with their query plan.")
+
+stats = pd.DataFrame(COLLECTOR.stats())
+if stats.empty:
+    st.info("No queries recorded yet.")
+    st.stop()
+
+scans = stats[stats["full_scan"]]
+if not scans.empty:
+    st.warning(f"{len(scans)} slow statement(s) do a full table scan — they probably need an index.")
+
+st.dataframe(
+    stats[["sql", "count", "total_ms", "p50_ms", "p95_ms", "max_ms", "rows", "full_scan"]],
+    hide_index=True,
+    use_container_width=True,
+)
+
+st.subheader("Slow Queries")
+slow = COLLECTOR.slow_queries()
+if not slow:
+    st.info("No slow queries.")
+for entry in slow[:20]:
+    with st.expander(f"{entry['ms']} ms — {entry['sql'][:80]}"):
+        st.code(entry["sql"], language="sql")
+        st.write(entry["plan"] or "No plan available")
+
+col1, col2 = st.columns(2)
+col1.download_button(
+    "Download JSON",
+    json.dumps({"queries": COLLECTOR.stats(), "slow_log": slow}, indent=2),
+    file_name="query_stats.json",
+    mime="application/json",
+)
+if col2.button("Reset statistics"):
+    COLLECTOR.reset()
+    st.rerun()
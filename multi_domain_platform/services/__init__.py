@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# platform_common/ sits at the repository root, one level above this app.
+# Appended, not prepended, so this app's own packages always win.
+_REPO_ROOT = str(Path(__file__).resolve().parents[2])
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
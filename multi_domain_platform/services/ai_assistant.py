@@ -1,28 +1,175 @@
-from typing import List, Dict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from services.ai_backends import GROUNDING_PREFIX, ChatBackend, RuleBasedBackend
+from services.change_tracker import TRACKED_TABLES
+from services.response_cache import ResponseCache, referenced_tables
+
 
 class AIAssistant:
-    """Simple wrapper around an AI/chat model.
-    In your real project, connect this to OpenAI or another provider.
+    """Chat wrapper with a bounded context window.
+
+    Every prompt is built to fit `max_context_tokens`: the system prompt, a
+    rolling summary of old turns, as many recent turns as fit, and the new
+    message, with `reply_tokens` kept free for the answer. When the history
+    no longer fits, the oldest turns are folded into the summary by the
+    backend, so prompt size and latency stay flat over a long session.
+
+    With a `cache`, replies are looked up by normalized prompt, system
+    prompt and the `table_versions` of the tables the prompt mentions
+    (e.g. ChangeTracker.versions), and repeated questions skip the backend.
+
+    With a `retriever` (e.g. SearchIndex.context_for), each prompt is
+    grounded in the platform records most relevant to the question, up to
+    `retrieval_tokens` of the context window.
     """
 
-    def __init__(self, system_prompt: str = "You are a helpful assistant."):
+    def __init__(
+        self,
+        system_prompt: str = "You are a helpful assistant.",
+        backend: Optional[ChatBackend] = None,
+        max_context_tokens: int = 2048,
+        reply_tokens: int = 512,
+        summary_tokens: int = 200,
+        keep_recent_turns: int = 2,
+        cache: Optional[ResponseCache] = None,
+        table_versions: Optional[Callable[[Iterable[str]], Dict[str, int]]] = None,
+        retriever: Optional[Callable[[str, int], str]] = None,
+        retrieval_tokens: int = 300
+    ):
         self._system_prompt = system_prompt
+        self._backend = backend or RuleBasedBackend()
+        self._max_context_tokens = max_context_tokens
+        self._reply_tokens = reply_tokens
+        self._summary_tokens = summary_tokens
+        self._keep_recent_messages = keep_recent_turns * 2
         self._history: List[Dict[str, str]] = []
+        self._summary = ""
+        self._cache = cache
+        self._table_versions = table_versions
+        self._retriever = retriever
+        self._retrieval_tokens = retrieval_tokens
+        self._grounding = ""
 
     def set_system_prompt(self, prompt: str):
         self._system_prompt = prompt
 
-    def send_message(self, user_message: str) -> str:
-        """Send a message and get a (fake) response.
-        Replace this body with your real API call.
+    @property
+    def history(self) -> List[Dict[str, str]]:
+        """Recent messages still held verbatim (older ones live in the summary)."""
+        return list(self._history)
+
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    # ---- context window ----
+    def _tokens(self, messages: List[Dict[str, str]]) -> int:
+        return sum(self._backend.count_tokens(m["content"]) + 4 for m in messages)  # +4: role framing
+
+    def _system_messages(self) -> List[Dict[str, str]]:
+        messages = [{"role": "system", "content": self._system_prompt}]
+        if self._summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation: {self._summary}"})
+        if self._grounding:
+            messages.append({"role": "system", "content": f"{GROUNDING_PREFIX}\n{self._grounding}"})
+        return messages
+
+    def _history_budget(self) -> int:
+        return self._max_context_tokens - self._reply_tokens - self._tokens(self._system_messages())
+
+    def _compact(self) -> None:
+        """Fold the oldest turns into the summary until the history fits its budget."""
+        old: List[Dict[str, str]] = []
+        while (
+            len(self._history) > self._keep_recent_messages
+            and self._tokens(self._history) > self._history_budget() - self._summary_tokens
+        ):
+            old.extend(self._history[:2])  # one user/assistant turn
+            del self._history[:2]
+        if old:
+            if self._summary:
+                old.insert(0, {"role": "system", "content": self._summary})
+            self._summary = self._backend.summarize(old, self._summary_tokens)
+
+    def build_context(self) -> List[Dict[str, str]]:
+        """The exact message list the backend receives for the next reply."""
+        self._compact()
+        return self._system_messages() + self._recent_messages()
+
+    def _recent_messages(self) -> List[Dict[str, str]]:
+        recent: List[Dict[str, str]] = []
+        budget = self._history_budget()
+        # A single oversized recent turn can still exceed the budget; drop from the oldest end
+        for message in reversed(self._history):
+            cost = self._tokens([message])
+            if recent and cost > budget:
+                break
+            recent.insert(0, message)
+            budget -= cost
+        return recent
+
+    def context_tokens(self) -> int:
+        """Size of the context as it stands; unlike build_context() it never summarizes (no model call)."""
+        return self._tokens(self._system_messages() + self._recent_messages())
+
+    # ---- chat ----
+    def send_message_stream(self, user_message: str) -> Iterator[str]:
+        """Yield the reply in chunks as the backend produces them.
+
+        The reply is added to the history when the stream ends, including a
+        partial reply if the consumer stops early. If the backend fails
+        before producing anything (e.g. GatewayOverloaded), the question is
+        taken back out of the history as well.
         """
         self._history.append({"role": "user", "content": user_message})
+        key = None
+        if self._cache is not None:
+            tables = referenced_tables(user_message)
+            if not tables and self._retriever is not None:
+                tables = list(TRACKED_TABLES)  # grounding may pull records from any table
+            versions = self._table_versions(tables) if self._table_versions and tables else {}
+            key = self._cache.key(user_message, self._system_prompt, versions)
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._history.append({"role": "assistant", "content": cached})
+                yield cached
+                return
+
+        if self._retriever is not None:
+            self._grounding = self._retriever(user_message, self._retrieval_tokens)
+        context = self.build_context()
+        self._grounding = ""
+        chunks: List[str] = []
+        completed = False
+        try:
+            for chunk in self._backend.stream(context):
+                chunks.append(chunk)
+                yield chunk
+            completed = True
+        finally:
+            reply = "".join(chunks)
+            if chunks or completed:
+                self._history.append({"role": "assistant", "content": reply})
+            else:
+                self._history.pop()  # keeps the history in user/assistant turns
+            if key is not None and completed:
+                self._cache.put(key, reply)  # partial replies are never cached
 
-        # Fake response for now
-        response = f"[AI reply to]: {user_message[:50]}"
-        self._history.append({"role": "assistant", "content": response})
+    def send_message(self, user_message: str) -> str:
+        """Send a message and return the whole reply."""
+        return "".join(self.send_message_stream(user_message))
 
-        return response
+    def shed_history(self) -> None:
+        """Drop verbatim turns older than the recent ones kept for context, e.g. under memory pressure.
+
+        Unlike _compact() this never calls the backend; the summary only
+        notes that turns were dropped.
+        """
+        dropped = len(self._history) - self._keep_recent_messages
+        if dropped > 0:
+            del self._history[:dropped]
+            self._summary = f"{self._summary} ({dropped} earlier messages were dropped to save memory.)".strip()
 
     def clear_history(self):
         self._history.clear()
+        self._summary = ""
@@ -0,0 +1,207 @@
+import json
+import os
+import re
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Tuple
+
+Message = Dict[str, str]
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+GROUNDING_PREFIX = "Relevant records:"
+
+SUMMARY_INSTRUCTION = (
+    "Summarize the conversation so far in a few sentences. Keep names, numbers, "
+    "decisions and open questions; drop greetings and repetition."
+)
+
+
+def count_tokens(text: str) -> int:
+    """Cheap token estimate (words and punctuation), close enough for budgeting."""
+    return len(_TOKEN_RE.findall(text))
+
+
+class ChatBackend(ABC):
+    """Where AIAssistant sends its prompts.
+
+    A backend only has to stream reply chunks; complete() and summarize()
+    are built on top of that and can be overridden when a backend has
+    something cheaper.
+    """
+
+    @abstractmethod
+    def stream(self, messages: List[Message]) -> Iterator[str]:
+        """Yield the reply to `messages` in chunks as they are produced."""
+
+    def complete(self, messages: List[Message]) -> str:
+        return "".join(self.stream(messages))
+
+    def stream_batch(self, batch: List[List[Message]]) -> Iterator[Tuple[int, str]]:
+        """Yield (position in batch, chunk) for several prompts at once.
+
+        The default interleaves the individual streams; backends that can
+        decode a batch in one pass (see InferenceGateway) override this.
+        """
+        streams = {i: iter(self.stream(messages)) for i, messages in enumerate(batch)}
+        while streams:
+            for i in list(streams):
+                chunk = next(streams[i], None)
+                if chunk is None:
+                    del streams[i]
+                else:
+                    yield i, chunk
+
+    def count_tokens(self, text: str) -> int:
+        return count_tokens(text)
+
+    def summarize(self, messages: List[Message], max_tokens: int) -> str:
+        """Condense `messages` (oldest first) into at most roughly max_tokens tokens."""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        summary = self.complete([
+            {"role": "system", "content": f"{SUMMARY_INSTRUCTION} Use at most {max_tokens} words."},
+            {"role": "user", "content": transcript},
+        ])
+        return truncate_tokens(summary, max_tokens)
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` after roughly max_tokens tokens."""
+    matches = list(_TOKEN_RE.finditer(text))
+    if len(matches) <= max_tokens:
+        return text
+    return text[:matches[max_tokens - 1].end()] + " …"
+
+
+class RuleBasedBackend(ChatBackend):
+    """Keyword replies about the platform's pages; no model needed.
+
+    Streams word by word (optionally with a delay) so the UI behaves like
+    it would against a real model.
+    """
+
+    RULES = [
+        ("incident", "Cybersecurity incidents can be viewed and added on the Cybersecurity page."),
+        ("ticket", "IT tickets are managed in the IT Operations page."),
+        ("dataset", "Datasets can be added and viewed in the Data Science page."),
+        ("login", "Users must log in before accessing platform features."),
+    ]
+    FALLBACK = "I can help with incidents, tickets, datasets, or login."
+
+    def __init__(self, delay: float = 0.0):
+        self._delay = delay
+
+    def reply_to(self, message: str) -> str:
+        lowered = message.lower()
+        for keyword, reply in self.RULES:
+            if keyword in lowered:
+                return reply
+        return self.FALLBACK
+
+    def _words(self, messages: List[Message]) -> List[str]:
+        last_user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        reply = self.reply_to(last_user)
+        grounding = next((m["content"] for m in messages
+                          if m["role"] == "system" and m["content"].startswith(GROUNDING_PREFIX)), None)
+        if grounding:
+            records = grounding[len(GROUNDING_PREFIX):].strip().splitlines()
+            reply += "\n\nMatching records:\n" + "\n".join(f"- {record}" for record in records)
+        return re.findall(r"\S+\s*", reply)
+
+    def stream(self, messages: List[Message]) -> Iterator[str]:
+        for word in self._words(messages):
+            if self._delay:
+                time.sleep(self._delay)
+            yield word
+
+    def stream_batch(self, batch: List[List[Message]]) -> Iterator[Tuple[int, str]]:
+        # Like a batched model: one decoding step (one delay) emits the next word of every reply
+        replies = [self._words(messages) for messages in batch]
+        for step in range(max((len(words) for words in replies), default=0)):
+            if self._delay:
+                time.sleep(self._delay)
+            for i, words in enumerate(replies):
+                if step < len(words):
+                    yield i, words[step]
+
+    def summarize(self, messages: List[Message], max_tokens: int) -> str:
+        # Extractive: keep what the user asked (the most recent questions if it
+        # doesn't all fit), which is what later turns refer back to
+        prefix = "Earlier the user asked: "
+        asked = [m["content"].strip() for m in messages if m["role"] == "user"]
+        previous = [m["content"] for m in messages if m["role"] == "system"]
+        if previous and previous[0].startswith(prefix):
+            asked = previous[0][len(prefix):].split(" | ") + asked
+        while len(asked) > 1 and count_tokens(prefix + " | ".join(asked)) > max_tokens:
+            asked.pop(0)
+        return truncate_tokens(prefix + " | ".join(asked), max_tokens)
+
+
+class HTTPBackend(ChatBackend):
+    """Streams from an OpenAI-style /v1/chat/completions endpoint (server-sent events).
+
+    Works with services/local_model_server.py and with real servers that
+    speak the same protocol.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str = "local",
+        api_key: Optional[str] = None,
+        timeout: float = 60,
+        batch_endpoint: bool = False
+    ):
+        self._base_url = base_url.rstrip("/")
+        self._model = model
+        self._api_key = api_key
+        self._timeout = timeout
+        self._batch_endpoint = batch_endpoint
+
+    def _events(self, path: str, payload: dict) -> Iterator[dict]:
+        body = json.dumps(dict(payload, model=self._model, stream=True)).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self._api_key:
+            headers["Authorization"] = f"Bearer {self._api_key}"
+        request = urllib.request.Request(self._base_url + path, data=body, headers=headers, method="POST")
+        with urllib.request.urlopen(request, timeout=self._timeout) as response:
+            for raw in response:
+                line = raw.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                yield json.loads(data)
+
+    def stream(self, messages: List[Message]) -> Iterator[str]:
+        for event in self._events("/v1/chat/completions", {"messages": messages}):
+            delta = event["choices"][0].get("delta", {})
+            if delta.get("content"):
+                yield delta["content"]
+
+    def stream_batch(self, batch: List[List[Message]]) -> Iterator[Tuple[int, str]]:
+        """One request for the whole batch when the server has the batch endpoint
+        (services/local_model_server.py does); interleaved single streams otherwise."""
+        if not self._batch_endpoint or len(batch) == 1:
+            yield from super().stream_batch(batch)
+            return
+        for event in self._events("/v1/batch/chat/completions", {"requests": [{"messages": m} for m in batch]}):
+            for choice in event["choices"]:
+                content = choice.get("delta", {}).get("content")
+                if content:
+                    yield choice["index"], content
+
+
+def backend_from_env() -> ChatBackend:
+    """HTTPBackend when AI_BACKEND_URL is set (e.g. the local stand-in server), else rules."""
+    url = os.environ.get("AI_BACKEND_URL")
+    if url:
+        return HTTPBackend(
+            url,
+            os.environ.get("AI_BACKEND_MODEL", "local"),
+            os.environ.get("AI_BACKEND_API_KEY"),
+            batch_endpoint=os.environ.get("AI_BACKEND_BATCH") == "1"
+        )
+    return RuleBasedBackend()
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from services.query_stats import TimedConnection
+
+# (sql, params)
+Query = Tuple[str, Iterable[Any]]
+
+# Page loads still running after this long are interrupted (seconds)
+LOAD_TIMEOUT_SECONDS = 10
+
+
+class QueryCancelled(Exception):
+    """Raised when a load's queries were interrupted (timed out, or a sibling query failed)."""
+
+
+class LoadToken:
+    """Tracks the connections a page load is using so it can be interrupted."""
+
+    def __init__(self):
+        self.cancelled = False
+        self._active: Set[sqlite3.Connection] = set()
+        self._lock = threading.Lock()
+
+    def attach(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if self.cancelled:
+                raise QueryCancelled()
+            self._active.add(conn)
+
+    def detach(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._active.discard(conn)
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            for conn in self._active:
+                conn.interrupt()  # safe from another thread; aborts the running statement
+
+
+class AsyncDatabaseManager:
+    """Asyncio facade that runs read queries on a dedicated thread pool.
+
+    Every worker thread keeps its own read-only connection, so independent
+    queries really run in parallel and a multi-query page waits for the
+    slowest query instead of the sum of all of them.
+    """
+
+    def __init__(self, db_path: str = "database/platform.db", max_workers: int = 4):
+        self._db_path = os.path.abspath(db_path)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-read")
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self._db_path}?mode=ro", uri=True, factory=TimedConnection)
+            self._local.conn = conn
+        return conn
+
+    def _run(self, sql: str, params: tuple, token: Optional[LoadToken], one: bool) -> Any:
+        conn = self._connection()
+        if token is not None:
+            token.attach(conn)
+        try:
+            cur = conn.execute(sql, params)
+            return cur.fetchone() if one else cur.fetchall()
+        except sqlite3.OperationalError as e:
+            if token is not None and token.cancelled:
+                raise QueryCancelled() from e
+            raise
+        finally:
+            if token is not None:
+                token.detach(conn)
+
+    async def fetch_all(
+        self, sql: str, params: Iterable[Any] = (), token: Optional[LoadToken] = None
+    ) -> List[tuple]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run, sql, tuple(params), token, False)
+
+    async def fetch_one(
+        self, sql: str, params: Iterable[Any] = (), token: Optional[LoadToken] = None
+    ) -> Optional[tuple]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run, sql, tuple(params), token, True)
+
+    async def gather(
+        self, queries: Dict[str, Query], token: Optional[LoadToken] = None
+    ) -> Dict[str, List[tuple]]:
+        """Run named queries concurrently and return {name: rows}.
+
+        If one query fails the others are interrupted instead of left running.
+        """
+        token = token or LoadToken()
+        names = list(queries)
+        try:
+            results = await asyncio.gather(
+                *(self.fetch_all(sql, params, token) for sql, params in queries.values())
+            )
+        except BaseException:
+            token.cancel()
+            raise
+        return dict(zip(names, results))
+
+    def load(
+        self, queries: Dict[str, Query], timeout: Optional[float] = LOAD_TIMEOUT_SECONDS
+    ) -> Dict[str, List[tuple]]:
+        """Blocking fan-out for page scripts.
+
+        A watchdog thread interrupts the queries still running after
+        `timeout` seconds, so a slow aggregate can't hold a page (or its
+        polling fragment) indefinitely; the caller then gets QueryCancelled.
+        """
+        token = LoadToken()
+        watchdog = threading.Timer(timeout, token.cancel) if timeout else None
+        if watchdog is not None:
+            watchdog.daemon = True
+            watchdog.start()
+        try:
+            return asyncio.run(self.gather(queries, token))
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,8 +1,17 @@
 from typing import Optional
 import hashlib
+import sqlite3
 
 from models.user import User
+from platform_common.login_throttle import LoginThrottle
 from services.database_manager import DatabaseManager
+from services.metrics import LOGINS, PASSWORD_SECONDS, REGISTRATIONS
+
+LOGIN_MAX_FAILURES = 5
+LOGIN_LOCKOUT_SECONDS = 300
+
+# Module global, so it outlives reruns and is shared by every AuthManager in the process
+LOGIN_THROTTLE = LoginThrottle(LOGIN_MAX_FAILURES, LOGIN_LOCKOUT_SECONDS)
 
 
 class SimpleHasher:
@@ -20,30 +29,53 @@ class SimpleHasher:
 class AuthManager:
     """Handles user registration and login."""
 
-    def __init__(self, db: DatabaseManager):
+    def __init__(self, db: DatabaseManager, throttle: LoginThrottle = LOGIN_THROTTLE):
         # Composition: AuthManager HAS a DatabaseManager
         self._db = db
+        self._throttle = throttle
+
+    def is_throttled(self, username: str) -> bool:
+        """True while `username` is locked out after too many failed logins."""
+        return self._throttle.throttled(username)
 
     def register_user(self, username: str, password: str, role: str = "user") -> None:
-        password_hash = SimpleHasher.hash_password(password)
+        with PASSWORD_SECONDS.time(operation="hash"):
+            password_hash = SimpleHasher.hash_password(password)
 
-        self._db.execute_query(
-            "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-            (username, password_hash, role),
-        )
+        try:
+            self._db.execute_query(
+                "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+                (username, password_hash, role),
+            )
+        except sqlite3.IntegrityError:
+            REGISTRATIONS.inc(outcome="exists")
+            raise
+        REGISTRATIONS.inc(outcome="created")
 
     def login_user(self, username: str, password: str) -> Optional[User]:
+        """The user, or None for a wrong password, unknown user or throttled username."""
+        if self._throttle.throttled(username):
+            LOGINS.inc(outcome="throttled")
+            return None
+
         row = self._db.fetch_one(
             "SELECT username, password_hash, role FROM users WHERE username = ?",
             (username,),
         )
 
         if row is None:
+            LOGINS.inc(outcome="fail")
             return None
 
         username_db, password_hash_db, role_db = row
 
-        if SimpleHasher.check_password(password, password_hash_db):
+        with PASSWORD_SECONDS.time(operation="verify"):
+            valid = SimpleHasher.check_password(password, password_hash_db)
+        if valid:
+            self._throttle.succeeded(username)
+            LOGINS.inc(outcome="success")
             return User(username_db, password_hash_db, role_db)
 
+        self._throttle.failed(username)
+        LOGINS.inc(outcome="fail")
         return None
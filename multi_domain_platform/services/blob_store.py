@@ -0,0 +1,244 @@
+import hashlib
+import io
+import json
+import mmap
+import os
+import tempfile
+import zlib
+from bisect import bisect_right
+from typing import Any, BinaryIO, Dict, Iterator, List, NamedTuple, Tuple
+
+# ---------------- Constants -----------------
+BLOB_ROOT = os.environ.get("BLOB_ROOT", os.path.join("database", "blobs"))
+MIN_CHUNK = 256 * 1024
+AVG_CHUNK = 1024 * 1024       # boundary probability tuned for ~1 MB chunks
+MAX_CHUNK = 4 * 1024 * 1024   # hard cut for data without line breaks
+READ_SIZE = 1024 * 1024
+PREVIEW_BYTES = 64 * 1024
+
+_BOUNDARY_MASK = (AVG_CHUNK // 128) - 1  # assumes ~128-byte lines; only needs to be roughly right
+
+
+class BlobRef(NamedTuple):
+    digest: str          # SHA-256 of the whole file
+    size: int
+    manifest_path: str   # what the datasets row stores as blob_path
+    new_bytes: int       # bytes actually written by this upload (0 for a duplicate)
+
+
+def _split_lines(stream: BinaryIO) -> Iterator[bytes]:
+    """Yield lines (keeping b"\\n"), cutting line-less data into MAX_CHUNK pieces."""
+    pending = b""
+    while True:
+        block = stream.read(READ_SIZE)
+        if not block:
+            break
+        pending += block
+        start = 0
+        while True:
+            end = pending.find(b"\n", start)
+            if end < 0:
+                break
+            yield pending[start:end + 1]
+            start = end + 1
+        pending = pending[start:]
+        while len(pending) >= MAX_CHUNK:
+            yield pending[:MAX_CHUNK]
+            pending = pending[MAX_CHUNK:]
+    if pending:
+        yield pending
+
+
+def content_defined_chunks(stream: BinaryIO) -> Iterator[bytes]:
+    """Split a stream into chunks whose boundaries depend on content, not offsets.
+
+    A chunk ends after a line whose CRC matches a mask (and the chunk is at
+    least MIN_CHUNK), so inserting or appending rows only changes the
+    chunks around the edit; everything else hashes the same as before and
+    is deduplicated. No chunk exceeds MAX_CHUNK; data without line breaks
+    is cut into MAX_CHUNK pieces.
+    """
+    parts: List[bytes] = []
+    size = 0
+    for line in _split_lines(stream):
+        if parts and size + len(line) > MAX_CHUNK:  # lines are at most MAX_CHUNK, so this keeps every chunk within it
+            yield b"".join(parts)
+            parts, size = [], 0
+        parts.append(line)
+        size += len(line)
+        if size >= MAX_CHUNK or (size >= MIN_CHUNK and zlib.crc32(line) & _BOUNDARY_MASK == 0):
+            yield b"".join(parts)
+            parts, size = [], 0
+    if parts:
+        yield b"".join(parts)
+
+
+class BlobStore:
+    """Content-addressed, chunk-deduplicated file storage.
+
+    Layout under `root`:
+      chunks/ab/<sha256>      one file per distinct chunk
+      manifests/<sha256>.json the chunk list of one whole file
+
+    Identical uploads cost one hashing pass and write nothing; overlapping
+    ones (e.g. the same CSV with rows appended) only write the changed
+    chunks. Reads go through mmap, so previews and range reads touch only
+    the pages they need.
+    """
+
+    def __init__(self, root: str = BLOB_ROOT):
+        self._root = root
+        os.makedirs(os.path.join(root, "chunks"), exist_ok=True)
+        os.makedirs(os.path.join(root, "manifests"), exist_ok=True)
+
+    def chunk_path(self, digest: str) -> str:
+        return os.path.join(self._root, "chunks", digest[:2], digest)
+
+    def _manifest_path(self, digest: str) -> str:
+        return os.path.join(self._root, "manifests", f"{digest}.json")
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    # ---- writing ----
+    def put(self, stream: BinaryIO) -> BlobRef:
+        """Store a binary stream (an open file or an uploaded file) and return its reference."""
+        whole = hashlib.sha256()
+        chunks: List[Tuple[str, int]] = []
+        written = 0
+        for chunk in content_defined_chunks(stream):
+            whole.update(chunk)
+            digest = hashlib.sha256(chunk).hexdigest()
+            path = self.chunk_path(digest)
+            if not os.path.exists(path):
+                self._write_atomic(path, chunk)
+                written += len(chunk)
+            chunks.append((digest, len(chunk)))
+
+        digest = whole.hexdigest()
+        size = sum(n for _, n in chunks)
+        manifest = self._manifest_path(digest)
+        if not os.path.exists(manifest):
+            payload = {"digest": digest, "size": size, "chunks": chunks}
+            self._write_atomic(manifest, json.dumps(payload).encode("utf-8"))
+        return BlobRef(digest, size, manifest, written)
+
+    def put_file(self, path: str) -> BlobRef:
+        with open(path, "rb") as f:
+            return self.put(f)
+
+    # ---- reading ----
+    def manifest(self, manifest_path: str) -> Dict[str, Any]:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def open(self, manifest_path: str) -> "BlobReader":
+        return BlobReader(self, self.manifest(manifest_path))
+
+    def preview(self, manifest_path: str, max_bytes: int = PREVIEW_BYTES, max_lines: int = 20) -> List[str]:
+        """First lines of a blob, read through mmap (only the first chunk's pages are touched)."""
+        with self.open(manifest_path) as reader:
+            head = reader.read_range(0, max_bytes)
+        lines = head.decode("utf-8", errors="replace").splitlines()
+        if len(head) == max_bytes and lines:
+            lines.pop()  # probably cut mid-line
+        return lines[:max_lines]
+
+    # ---- housekeeping ----
+    def stats(self) -> Dict[str, int]:
+        """Logical bytes (sum of stored files) vs physical bytes (distinct chunks on disk)."""
+        logical = files = 0
+        for name in os.listdir(os.path.join(self._root, "manifests")):
+            if name.endswith(".json"):
+                files += 1
+                logical += self.manifest(os.path.join(self._root, "manifests", name))["size"]
+        physical = chunks = 0
+        for path in self._all_chunks():
+            chunks += 1
+            physical += os.path.getsize(path)
+        return {"files": files, "chunks": chunks, "logical_bytes": logical, "physical_bytes": physical}
+
+    def _all_chunks(self) -> Iterator[str]:
+        chunk_root = os.path.join(self._root, "chunks")
+        for prefix in os.listdir(chunk_root):
+            folder = os.path.join(chunk_root, prefix)
+            for name in os.listdir(folder):
+                if not name.startswith(".tmp-"):
+                    yield os.path.join(folder, name)
+
+
+class BlobReader(io.RawIOBase):
+    """Read-only, seekable view of a stored blob, backed by per-chunk mmaps."""
+
+    def __init__(self, store: BlobStore, manifest: Dict[str, Any]):
+        super().__init__()
+        self._store = store
+        self._chunks: List[Tuple[str, int]] = [tuple(c) for c in manifest["chunks"]]
+        self._starts: List[int] = []
+        offset = 0
+        for _, size in self._chunks:
+            self._starts.append(offset)
+            offset += size
+        self._size = offset
+        self._pos = 0
+        self._maps: Dict[int, Tuple[Any, mmap.mmap]] = {}
+
+    def _map(self, index: int) -> mmap.mmap:
+        entry = self._maps.get(index)
+        if entry is None:
+            f = open(self._store.chunk_path(self._chunks[index][0]), "rb")
+            entry = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            self._maps[index] = entry
+        return entry[1]
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """Bytes [offset, offset + length), touching only the chunks that overlap it."""
+        end = min(offset + length, self._size)
+        parts = []
+        index = bisect_right(self._starts, offset) - 1
+        while offset < end and 0 <= index < len(self._chunks):
+            chunk_start = self._starts[index]
+            view = self._map(index)
+            take = min(end, chunk_start + self._chunks[index][1]) - offset
+            parts.append(view[offset - chunk_start:offset - chunk_start + take])
+            offset += take
+            index += 1
+        return b"".join(parts)
+
+    # ---- io.RawIOBase ----
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        data = self.read_range(self._pos, len(buffer))
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._size}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self) -> None:
+        for f, view in self._maps.values():
+            view.close()
+            f.close()
+        self._maps.clear()
+        super().close()
+
@@ -0,0 +1,81 @@
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional
+
+from services.database_manager import DatabaseManager
+
+TRACKED_TABLES = ("users", "incidents", "datasets", "tickets")
+
+
+class ChangeTracker:
+    """Per-table change counters so pages only reload data that changed.
+
+    Triggers bump table_versions.version on every INSERT/UPDATE/DELETE.
+    Polling is two-level: `PRAGMA data_version` on one long-lived
+    connection tells us whether *anything* was committed since the last
+    poll, and only then are the counters re-read.
+    """
+
+    def __init__(self, db: DatabaseManager, tables: Iterable[str] = TRACKED_TABLES):
+        self._db = db
+        self._tables = tuple(tables)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._data_version: Optional[int] = None
+        self._versions: Dict[str, int] = {}
+
+    def _installed(self) -> bool:
+        """True when every existing tracked table already has its triggers (read only)."""
+        existing = {row[0] for row in self._db.fetch_all("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        triggers = {row[0] for row in self._db.fetch_all("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        return "table_versions" in existing and all(
+            f"{table}_version_{event}" in triggers
+            for table in self._tables if table in existing
+            for event in ("insert", "update", "delete")
+        )
+
+    def install(self) -> None:
+        """Create the counter table and triggers for the tracked tables that exist.
+
+        Setup, not per rerun: call it once a page's tables exist (ui.resources.setup_tables).
+        When nothing is missing it only reads the schema and takes no write lock.
+        """
+        if self._installed():
+            return
+        with self._db.transaction() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS table_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+            """)
+            existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for table in self._tables:
+                if table not in existing:
+                    continue
+                conn.execute("INSERT OR IGNORE INTO table_versions (name) VALUES (?)", (table,))
+                for event in ("INSERT", "UPDATE", "DELETE"):
+                    conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+                    END
+                    """)
+
+    def _poll_connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self._db.db_path, check_same_thread=False)
+        return self._conn
+
+    def versions(self, tables: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Return {table: version}. Costs one PRAGMA when nothing has changed."""
+        with self._lock:
+            conn = self._poll_connection()
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                self._versions = dict(conn.execute("SELECT name, version FROM table_versions"))
+                self._data_version = data_version
+            versions = self._versions
+        wanted = self._tables if tables is None else tables
+        return {table: versions.get(table, 0) for table in wanted}
@@ -0,0 +1,184 @@
+import csv
+import io
+import os
+import random
+import struct
+from array import array
+from collections import Counter, defaultdict
+from itertools import islice
+from typing import BinaryIO, Callable, Dict, List, Optional, Sequence
+
+# ---------------- Constants -----------------
+INDEX_EVERY = 1024          # one offset per this many rows: 8 bytes per 1024 rows
+INDEX_SUFFIX = ".rowidx"
+SCAN_BUFFER = 1024 * 1024
+STRATIFY_OVERSAMPLE = 10    # candidates drawn per requested row when stratifying by a column
+
+_MAGIC = b"CSVIDX01"
+_HEADER = struct.Struct("<8sQQQQ")  # magic, every, rows, source size, source mtime_ns
+
+Opener = Callable[[], BinaryIO]
+
+
+class CsvOffsetIndex:
+    """Byte offsets of every Nth data row of a CSV, kept in a sidecar array file.
+
+    Built in one streaming pass (quoted fields spanning lines are handled
+    by tracking quote parity), after which any row range is one seek plus
+    at most `every - 1` skipped rows, and random samples read one small
+    window per sampled row instead of the whole file.
+    """
+
+    def __init__(self, opener: Opener, every: int, rows: int, offsets: array, header: List[str]):
+        self._opener = opener
+        self.every = every
+        self.rows = rows
+        self._offsets = offsets
+        self.header = header
+
+    # ---- building / loading ----
+    @staticmethod
+    def _scan(stream: BinaryIO, every: int) -> "tuple[int, array]":
+        offsets = array("Q")
+        position = 0
+        in_quotes = False
+        row = -2  # the first non-blank line is the header, row -1
+        for line in stream:
+            if not in_quotes and line.strip(b"\r\n"):
+                row += 1
+                if row >= 0 and row % every == 0:
+                    offsets.append(position)
+            position += len(line)
+            if line.count(b'"') % 2:  # "" escapes keep the parity, so this tracks open quotes
+                in_quotes = not in_quotes
+        return max(row + 1, 0), offsets
+
+    @classmethod
+    def build(cls, opener: Opener, index_path: Optional[str], every: int = INDEX_EVERY,
+              source_size: int = 0, source_mtime: int = 0) -> "CsvOffsetIndex":
+        with opener() as raw:
+            stream = io.BufferedReader(raw, SCAN_BUFFER) if not isinstance(raw, io.BufferedIOBase) else raw
+            rows, offsets = cls._scan(stream, every)
+        if index_path is not None:
+            tmp = index_path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, every, rows, source_size, source_mtime))
+                offsets.tofile(f)
+            os.replace(tmp, index_path)
+        return cls(opener, every, rows, offsets, cls._read_header(opener))
+
+    @classmethod
+    def load(cls, opener: Opener, index_path: str, source_size: int, source_mtime: int) -> Optional["CsvOffsetIndex"]:
+        """The sidecar index, or None if it is missing or was built for a different version of the file."""
+        try:
+            with open(index_path, "rb") as f:
+                magic, every, rows, size, mtime = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC or size != source_size or mtime != source_mtime:
+                    return None
+                offsets = array("Q")
+                offsets.frombytes(f.read())
+        except (OSError, struct.error):
+            return None
+        return cls(opener, every, rows, offsets, cls._read_header(opener))
+
+    @classmethod
+    def for_file(cls, path: str, every: int = INDEX_EVERY) -> "CsvOffsetIndex":
+        """Load `path`'s sidecar index, (re)building it if the file changed since."""
+        stat = os.stat(path)
+        opener = lambda: open(path, "rb")  # noqa: E731
+        index_path = path + INDEX_SUFFIX
+        return (cls.load(opener, index_path, stat.st_size, stat.st_mtime_ns)
+                or cls.build(opener, index_path, every, stat.st_size, stat.st_mtime_ns))
+
+    @classmethod
+    def for_stream(cls, opener: Opener, index_path: str, size: int, every: int = INDEX_EVERY) -> "CsvOffsetIndex":
+        """Index for immutable content (e.g. a BlobStore blob): keyed by size alone."""
+        return cls.load(opener, index_path, size, 0) or cls.build(opener, index_path, every, size, 0)
+
+    @staticmethod
+    def _text(raw: BinaryIO) -> io.TextIOWrapper:
+        if not isinstance(raw, io.BufferedIOBase):
+            raw = io.BufferedReader(raw)
+        return io.TextIOWrapper(raw, encoding="utf-8", errors="replace", newline="")
+
+    @classmethod
+    def _read_header(cls, opener: Opener) -> List[str]:
+        with opener() as raw:
+            return next(csv.reader(cls._text(raw)), [])
+
+    # ---- reading ----
+    def _rows_from(self, raw: BinaryIO, block: int, limit: int) -> List[List[str]]:
+        """The first `limit` rows of index block `block`: one seek and a short read."""
+        raw.seek(self._offsets[block])
+        text = self._text(raw)
+        try:
+            return list(islice((row for row in csv.reader(text) if row), limit))
+        finally:
+            # Detach rather than let the wrappers close `raw`, which the next block reuses
+            buffer = text.detach()
+            if buffer is not raw:
+                buffer.detach()
+
+    def read_rows(self, start: int, count: int) -> List[List[str]]:
+        """Data rows [start, start + count), 0-based, excluding the header."""
+        if start >= self.rows or count <= 0:
+            return []
+        block, skip = divmod(max(start, 0), self.every)
+        with self._opener() as raw:
+            return self._rows_from(raw, block, skip + min(count, self.rows - start))[skip:]
+
+    def _read_positions(self, positions: Sequence[int]) -> List[List[str]]:
+        """Rows at sorted positions; rows sharing an index block are read in one pass."""
+        by_block: Dict[int, Counter] = defaultdict(Counter)
+        for position in positions:
+            by_block[position // self.every][position % self.every] += 1
+        result: List[List[str]] = []
+        with self._opener() as raw:
+            for block in sorted(by_block):
+                wanted = by_block[block]
+                rows = self._rows_from(raw, block, max(wanted) + 1)
+                for i in sorted(wanted):
+                    if i < len(rows):
+                        result.extend([rows[i]] * wanted[i])
+        return result
+
+    def sample(self, n: int, seed: Optional[int] = None) -> List[List[str]]:
+        """Uniform random sample of n rows without replacement, in file order."""
+        rng = random.Random(seed)
+        return self._read_positions(sorted(rng.sample(range(self.rows), min(n, self.rows))))
+
+    def stratified_sample(self, n: int, column: Optional[str] = None, seed: Optional[int] = None) -> List[List[str]]:
+        """Stratified random sample of about n rows.
+
+        Without `column` the file is cut into n equal slices and one random
+        row is taken from each (even coverage of the whole file). With
+        `column`, a uniform oversample of STRATIFY_OVERSAMPLE * n rows is
+        grouped by that column's value and each value found gets a share
+        proportional to its frequency, but at least one row, so uncommon
+        categories are not drowned out. Raises ValueError if `column` is
+        not in the header.
+        """
+        if column is not None and column not in self.header:
+            raise ValueError(f"Column {column!r} is not in the file's header")
+        rng = random.Random(seed)
+        n = min(n, self.rows)
+        if n <= 0:
+            return []
+        if column is None:
+            bounds = [self.rows * i // n for i in range(n + 1)]
+            return self._read_positions([rng.randrange(lo, hi) for lo, hi in zip(bounds, bounds[1:]) if hi > lo])
+
+        key = self.header.index(column)
+        candidates = self.sample(n * STRATIFY_OVERSAMPLE, seed=rng.randrange(1 << 30))
+        groups: Dict[str, List[List[str]]] = defaultdict(list)
+        for row in candidates:
+            groups[row[key] if key < len(row) else ""].append(row)
+        picked: List[List[str]] = []
+        for rows in groups.values():
+            share = max(1, round(n * len(rows) / len(candidates)))
+            picked.extend(rng.sample(rows, min(share, len(rows))))
+        return picked
+
+    @property
+    def index_bytes(self) -> int:
+        return _HEADER.size + len(self._offsets) * self._offsets.itemsize
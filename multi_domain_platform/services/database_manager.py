@@ -1,5 +1,12 @@
 import sqlite3
-from typing import Any, Iterable, Optional
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, TypeVar
+
+from services.query_stats import TimedConnection
+from services.write_queue import get_writer
+
+T = TypeVar("T")
 
 
 class DatabaseManager:
@@ -9,16 +16,49 @@ class DatabaseManager:
         # Default path works when you run streamlit from multi_domain_platform/
         self._db_path = db_path
 
+    @property
+    def db_path(self) -> str:
+        return self._db_path
+
     def _connect(self) -> sqlite3.Connection:
         # Open a fresh connection per operation (simple + reliable for Streamlit)
-        return sqlite3.connect(self._db_path)
+        return sqlite3.connect(self._db_path, factory=TimedConnection)
 
-    def execute_query(self, sql: str, params: Iterable[Any] = ()) -> None:
-        """Execute a write query (INSERT, UPDATE, DELETE)."""
-        with self._connect() as conn:
-            cur = conn.cursor()
-            cur.execute(sql, tuple(params))
-            conn.commit()
+    def execute_query(self, sql: str, params: Iterable[Any] = ()) -> Optional[int]:
+        """Execute a write query (INSERT, UPDATE, DELETE) and return its lastrowid.
+
+        Goes through the shared single writer, so concurrent sessions are
+        group-committed instead of each paying its own commit.
+        """
+        return self.submit_write(sql, params).result()
+
+    def submit_write(self, sql: str, params: Iterable[Any] = ()) -> Future:
+        """Queue a write without waiting; the Future resolves to lastrowid after commit."""
+        return get_writer(self._db_path).submit(sql, params)
+
+    def execute_many(self, sql: str, seq_of_params: Iterable[Sequence[Any]]) -> int:
+        """Run one write statement for every parameter tuple in a single commit.
+
+        Returns the number of rows changed.
+        """
+        return get_writer(self._db_path).submit_many(sql, seq_of_params).result()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Group several writes into one transaction and one commit.
+
+        Usage:
+            with db.transaction() as conn:
+                conn.execute(...)
+                conn.executemany(...)
+
+        Everything is rolled back if the block raises. The block runs on the
+        shared writer's connection, queued behind other sessions' writes, so
+        it never competes with them for the write lock; don't call
+        execute_query() from inside it.
+        """
+        with get_writer(self._db_path).transaction() as conn:
+            yield conn
 
     def fetch_one(self, sql: str, params: Iterable[Any] = ()) -> Optional[tuple]:
         """Fetch a single row."""
@@ -33,3 +73,42 @@ class DatabaseManager:
             cur = conn.cursor()
             cur.execute(sql, tuple(params))
             return cur.fetchall()
+
+    def iter_rows(
+        self,
+        sql: str,
+        params: Iterable[Any] = (),
+        batch_size: int = 1000,
+        row_factory: Optional[Callable[[tuple], T]] = None
+    ) -> Iterator[Any]:
+        """Stream rows with fetchmany so at most batch_size rows are held at once.
+
+        If `row_factory` is given (e.g. SecurityIncident.from_row) each row is
+        mapped straight into it.
+        """
+        conn = self._connect()
+        if row_factory is not None:
+            conn.row_factory = lambda cursor, row: row_factory(row)
+        try:
+            cur = conn.execute(sql, tuple(params))
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def fetch_models(
+        self,
+        row_factory: Callable[[tuple], T],
+        sql: str,
+        params: Iterable[Any] = ()
+    ) -> List[T]:
+        """Fetch all rows mapped through `row_factory`, e.g. ITTicket.from_row."""
+        conn = self._connect()
+        conn.row_factory = lambda cursor, row: row_factory(row)
+        try:
+            return conn.execute(sql, tuple(params)).fetchall()
+        finally:
+            conn.close()
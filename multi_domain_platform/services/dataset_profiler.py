@@ -0,0 +1,348 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from services.database_manager import DatabaseManager
+
+# ---------------- Constants -----------------
+CHUNK_ROWS = 50000           # rows parsed per chunk; memory is bounded by this, not by file size
+HLL_PRECISION = 12           # 4096 registers, ~1.6% standard error
+HISTOGRAM_BINS = 20
+HISTOGRAM_WARMUP = 1024      # values buffered to pick the first bin width
+FINGERPRINT_BLOCK = 64 * 1024
+SNIFF_BYTES = 64 * 1024
+MAX_STRING_STAT = 200        # longer strings are truncated before min/max comparison
+NULL_TOKENS = frozenset(("", "na", "n/a", "nan", "null", "none", "-"))
+
+_INT_RE = re.compile(r"[+-]?\d+$")
+_FLOAT_RE = re.compile(r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$")
+_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?")
+_BOOL_TOKENS = frozenset(("true", "false", "yes", "no"))
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "big")
+
+
+# ---------------- Sketches -----------------
+class HyperLogLog:
+    """Distinct-count estimate in 2**precision bytes, whatever the number of values."""
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str) -> None:
+        h = _hash64(value)
+        index = h >> (64 - self.precision)
+        rest = (h << self.precision) & ((1 << 64) - 1)
+        rank = 64 - self.precision + 1 if rest == 0 else (64 - rest.bit_length()) + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))  # linear counting for small cardinalities
+        return round(raw)
+
+
+class StreamingHistogram:
+    """Equal-width histogram whose range doubles (merging bin pairs) as values arrive.
+
+    Counts stay exact; only the bin edges coarsen, so one pass over an
+    unknown range needs just `bins` counters.
+    """
+
+    __slots__ = ("bins", "counts", "low", "width", "_warmup")
+
+    def __init__(self, bins: int = HISTOGRAM_BINS):
+        self.bins = bins + (bins % 2)  # pairwise merging needs an even count
+        self.counts = [0] * self.bins
+        self.low: Optional[float] = None
+        self.width = 0.0
+        self._warmup: Optional[List[float]] = []
+
+    def add(self, value: float) -> None:
+        if self._warmup is not None:
+            self._warmup.append(value)
+            if len(self._warmup) >= HISTOGRAM_WARMUP:
+                self._start()
+            return
+        while value < self.low:
+            merged = [self.counts[i] + self.counts[i + 1] for i in range(0, self.bins, 2)]
+            self.low -= self.width * self.bins
+            self.width *= 2
+            self.counts = [0] * (self.bins // 2) + merged
+        while value >= self.low + self.width * self.bins:
+            merged = [self.counts[i] + self.counts[i + 1] for i in range(0, self.bins, 2)]
+            self.width *= 2
+            self.counts = merged + [0] * (self.bins // 2)
+        self.counts[min(int((value - self.low) / self.width), self.bins - 1)] += 1
+
+    def _start(self) -> None:
+        values, self._warmup = self._warmup or [], None
+        low, high = min(values), max(values)
+        self.low = low
+        self.width = (high - low) / self.bins * 1.0001 or 1.0
+        for value in values:
+            self.add(value)
+
+    def to_dict(self) -> List[Dict[str, float]]:
+        """Non-empty trailing/leading bins trimmed: [{"low", "high", "count"}, ...]."""
+        if self._warmup is not None:
+            if not self._warmup:
+                return []
+            self._start()
+        used = [i for i, c in enumerate(self.counts) if c]
+        return [
+            {"low": self.low + i * self.width, "high": self.low + (i + 1) * self.width, "count": self.counts[i]}
+            for i in range(used[0], used[-1] + 1)
+        ]
+
+
+class ColumnProfile:
+    """Running statistics for one column."""
+
+    __slots__ = ("name", "count", "nulls", "types", "min_num", "max_num", "total", "min_str", "max_str",
+                 "distinct", "histogram")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.nulls = 0
+        self.types = {"integer": 0, "float": 0, "boolean": 0, "date": 0, "string": 0}
+        self.min_num: Optional[float] = None
+        self.max_num: Optional[float] = None
+        self.total = 0.0
+        self.min_str: Optional[str] = None
+        self.max_str: Optional[str] = None
+        self.distinct = HyperLogLog()
+        self.histogram = StreamingHistogram()
+
+    def add(self, raw: str) -> None:
+        self.count += 1
+        value = raw.strip()
+        if value.lower() in NULL_TOKENS:
+            self.nulls += 1
+            return
+        self.distinct.add(value)
+        if _INT_RE.match(value):
+            kind, number = "integer", float(value)
+        elif _FLOAT_RE.match(value):
+            kind, number = "float", float(value)
+        else:
+            number = None
+            if value.lower() in _BOOL_TOKENS:
+                kind = "boolean"
+            elif _DATE_RE.match(value):
+                kind = "date"
+            else:
+                kind = "string"
+        self.types[kind] += 1
+        if number is not None and math.isfinite(number):
+            self.min_num = number if self.min_num is None else min(self.min_num, number)
+            self.max_num = number if self.max_num is None else max(self.max_num, number)
+            self.total += number
+            self.histogram.add(number)
+        else:
+            short = value[:MAX_STRING_STAT]
+            self.min_str = short if self.min_str is None else min(self.min_str, short)
+            self.max_str = short if self.max_str is None else max(self.max_str, short)
+
+    def inferred_type(self) -> str:
+        present = {kind for kind, n in self.types.items() if n}
+        if not present:
+            return "empty"
+        if present <= {"integer"}:
+            return "integer"
+        if present <= {"integer", "float"}:
+            return "float"
+        if len(present) == 1:
+            return present.pop()
+        return "string"
+
+    def to_dict(self) -> Dict[str, Any]:
+        numeric = self.types["integer"] + self.types["float"]
+        kind = self.inferred_type()
+        is_numeric = kind in ("integer", "float")
+        return {
+            "name": self.name,
+            "type": kind,
+            "count": self.count,
+            "nulls": self.nulls,
+            "null_rate": self.nulls / self.count if self.count else 0.0,
+            "distinct_estimate": min(self.distinct.estimate(), self.count - self.nulls),
+            "min": self.min_num if is_numeric else self.min_str,
+            "max": self.max_num if is_numeric else self.max_str,
+            "mean": self.total / numeric if is_numeric and numeric else None,
+            "type_counts": {k: n for k, n in self.types.items() if n},
+            "histogram": self.histogram.to_dict() if is_numeric else [],
+        }
+
+
+# ---------------- Files -----------------
+def open_text(path: str) -> TextIO:
+    """Open a CSV for streaming text reads; .gz files are decompressed on the fly."""
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", errors="replace", newline="")
+    return open(path, "r", encoding="utf-8", errors="replace", newline="")
+
+
+def file_fingerprint(path: str) -> str:
+    """Cheap change detector: size, mtime and hashes of the first and last 64 KB."""
+    stat = os.stat(path)
+    digest = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_BLOCK))
+        if stat.st_size > 2 * FINGERPRINT_BLOCK:
+            f.seek(-FINGERPRINT_BLOCK, os.SEEK_END)
+            digest.update(f.read(FINGERPRINT_BLOCK))
+    return digest.hexdigest()
+
+
+def _chunks(reader: Iterator[List[str]], size: int) -> Iterator[List[List[str]]]:
+    chunk: List[List[str]] = []
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def profile_file(path: str, chunk_rows: int = CHUNK_ROWS) -> Dict[str, Any]:
+    """Profile a CSV in one streaming pass. Top-level so it can run in a worker process."""
+    start = time.perf_counter()
+    with open_text(path) as f:
+        sample = f.read(SNIFF_BYTES)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+
+    with open_text(path) as f:
+        reader = csv.reader(f, dialect)
+        header = next(reader, [])
+        columns = [ColumnProfile(name or f"column_{i + 1}") for i, name in enumerate(header)]
+        rows = ragged = 0
+        for chunk in _chunks(reader, chunk_rows):
+            for row in chunk:
+                if len(row) != len(columns):
+                    ragged += 1
+                for column, value in zip(columns, row):
+                    column.add(value)
+            rows += len(chunk)
+    return {
+        "path": path,
+        "size": os.path.getsize(path),
+        "rows": rows,
+        "ragged_rows": ragged,
+        "delimiter": dialect.delimiter,
+        "columns": [column.to_dict() for column in columns],
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+# ---------------- Stored profiles -----------------
+class DatasetProfiler:
+    """Profiles dataset files and keeps the results in `dataset_profiles`.
+
+    Profiles are keyed by file fingerprint, so re-opening an unchanged
+    dataset reads one row instead of the file, and any edit to the file
+    (size, mtime or content at either end) triggers a fresh profile.
+    """
+
+    def __init__(self, db: DatabaseManager):
+        self._db = db
+
+    def install(self) -> None:
+        self._db.execute_query("""
+        CREATE TABLE IF NOT EXISTS dataset_profiles (
+            fingerprint TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            rows INTEGER NOT NULL,
+            profile TEXT NOT NULL,
+            seconds REAL NOT NULL,
+            profiled_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """)
+        self._db.execute_query("CREATE INDEX IF NOT EXISTS idx_dataset_profiles_path ON dataset_profiles (path)")
+
+    def _lookup(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        row = self._db.fetch_one("SELECT profile FROM dataset_profiles WHERE fingerprint = ?", (fingerprint,))
+        return json.loads(row[0]) if row else None
+
+    def cached(self, path: str) -> Optional[Dict[str, Any]]:
+        """The stored profile for the file as it is now, or None if it changed or was never profiled."""
+        return self._lookup(file_fingerprint(path))
+
+    def _store(self, fingerprint: str, profile: Dict[str, Any]) -> None:
+        with self._db.transaction() as conn:
+            # Older profiles of the same path are stale now
+            conn.execute("DELETE FROM dataset_profiles WHERE path = ? AND fingerprint != ?", (profile["path"], fingerprint))
+            conn.execute(
+                "INSERT OR REPLACE INTO dataset_profiles (fingerprint, path, size, rows, profile, seconds) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (fingerprint, profile["path"], profile["size"], profile["rows"], json.dumps(profile), profile["seconds"]),
+            )
+
+    def profile(self, path: str, refresh: bool = False) -> Dict[str, Any]:
+        """Return the profile of `path`, computing and storing it only if the file changed."""
+        fingerprint = file_fingerprint(path)
+        cached = None if refresh else self._lookup(fingerprint)
+        if cached is not None:
+            return cached
+        profile = profile_file(path)
+        self._store(fingerprint, profile)
+        return profile
+
+    def profile_many(self, paths: Iterable[str], workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Profile several files, the changed ones in parallel across a process pool."""
+        results: Dict[str, Dict[str, Any]] = {}
+        todo: Dict[str, str] = {}
+        for path in dict.fromkeys(paths):
+            fingerprint = file_fingerprint(path)
+            cached = self._lookup(fingerprint)
+            if cached is not None:
+                results[path] = cached
+            else:
+                todo[path] = fingerprint
+        if len(todo) == 1 or workers == 1:
+            fresh = {path: profile_file(path) for path in todo}
+        elif todo:
+            with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(todo))) as pool:
+                fresh = dict(zip(todo, pool.map(profile_file, todo)))
+        else:
+            fresh = {}
+        for path, profile in fresh.items():
+            self._store(todo[path], profile)
+            results[path] = profile
+        return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    profiler = DatasetProfiler(DatabaseManager())
+    profiler.install()
+    for path, result in profiler.profile_many(sys.argv[1:]).items():
+        print(f"{path}: {result['rows']} rows, {len(result['columns'])} columns ({result['seconds']}s)")
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from services.ai_backends import ChatBackend, Message
+from services.metrics import REGISTRY
+
+# ---------------- Constants -----------------
+DEFAULT_MAX_CONCURRENCY = 4     # batches decoding at once
+DEFAULT_MAX_BATCH = 8
+DEFAULT_MAX_LATENCY = 0.01      # seconds a batch waits to fill before it is sent
+DEFAULT_MAX_QUEUED_PER_USER = 4
+
+GATEWAY_REQUESTS = REGISTRY.counter(
+    "app_ai_gateway_requests_total", "Inference requests by outcome.", ["outcome"]
+)
+GATEWAY_QUEUE_SECONDS = REGISTRY.histogram("app_ai_gateway_queue_seconds", "Time requests wait before decoding starts.")
+GATEWAY_FIRST_CHUNK_SECONDS = REGISTRY.histogram(
+    "app_ai_gateway_first_chunk_seconds", "Time from submission to the first streamed chunk."
+)
+GATEWAY_SECONDS = REGISTRY.histogram("app_ai_gateway_request_seconds", "Time from submission to the last chunk.")
+GATEWAY_BATCH_SIZE = REGISTRY.histogram(
+    "app_ai_gateway_batch_size", "Requests decoded together per backend call.", buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+GATEWAY_QUEUE_DEPTH = REGISTRY.gauge("app_ai_gateway_queue_depth", "Requests waiting for a decoding slot.")
+
+
+class GatewayOverloaded(Exception):
+    """Raised when a user already has max_queued_per_user requests waiting."""
+
+
+def prompt_key(messages: List[Message]) -> str:
+    return hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class _Job:
+    """One distinct prompt in flight; every identical request subscribes to it."""
+
+    __slots__ = ("key", "user", "messages", "chunks", "done", "error", "cond", "submitted", "started", "subscribers")
+
+    def __init__(self, key: str, user: str, messages: List[Message]):
+        self.key = key
+        self.user = user
+        self.messages = messages
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.cond = threading.Condition()
+        self.submitted = time.perf_counter()
+        self.started: Optional[float] = None
+        self.subscribers = 1
+
+    def push(self, chunk: str) -> None:
+        with self.cond:
+            if not self.chunks:
+                GATEWAY_FIRST_CHUNK_SECONDS.observe(time.perf_counter() - self.submitted)
+            self.chunks.append(chunk)
+            self.cond.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        with self.cond:
+            self.done = True
+            self.error = error
+            self.cond.notify_all()
+        GATEWAY_SECONDS.observe(time.perf_counter() - self.submitted)
+
+    def chunks_from_start(self) -> Iterator[str]:
+        """Replay what was produced so far, then follow the stream until it ends."""
+        i = 0
+        while True:
+            with self.cond:
+                while i >= len(self.chunks) and not self.done:
+                    self.cond.wait()
+                if i < len(self.chunks):
+                    chunk = self.chunks[i]
+                elif self.error is not None:
+                    raise self.error
+                else:
+                    return
+            i += 1
+            yield chunk
+
+
+class InferenceGateway:
+    """Shared front door between every session's assistant and the model backend.
+
+    - Coalescing: a prompt identical to one already queued or decoding
+      subscribes to that request instead of costing another generation.
+    - Fair queueing: each user has their own queue and batches are filled
+      round-robin across users, so one user's burst can't starve the others;
+      a user may have at most `max_queued_per_user` requests waiting.
+    - Micro-batching: a worker takes up to `max_batch` requests, waiting at
+      most `max_latency` seconds for the batch to fill, and decodes them with
+      one backend.stream_batch() call. `max_concurrency` workers bound the
+      load the backend sees, so latency under load stays predictable.
+    """
+
+    def __init__(
+        self,
+        backend: ChatBackend,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_latency: float = DEFAULT_MAX_LATENCY,
+        max_queued_per_user: int = DEFAULT_MAX_QUEUED_PER_USER
+    ):
+        self._backend = backend
+        self._max_batch = max_batch
+        self._max_latency = max_latency
+        self._max_queued_per_user = max_queued_per_user
+        self._cond = threading.Condition()
+        self._queues: "OrderedDict[str, Deque[_Job]]" = OrderedDict()  # user -> waiting jobs, in turn order
+        self._queued = 0
+        self._inflight: Dict[str, _Job] = {}  # prompt key -> queued or decoding job
+        self._closed = False
+        self._stats = {"requests": 0, "coalesced": 0, "batches": 0, "batched_requests": 0, "rejected": 0}
+        GATEWAY_QUEUE_DEPTH.set_function(lambda: self._queued)
+        self._workers = [
+            threading.Thread(target=self._run, name=f"ai-gateway-{i}", daemon=True) for i in range(max_concurrency)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def backend(self) -> ChatBackend:
+        return self._backend
+
+    def client(self, user: str) -> "GatewayClient":
+        """A ChatBackend that sends through this gateway on behalf of `user`."""
+        return GatewayClient(self, user)
+
+    def submit(self, user: str, messages: List[Message]) -> _Job:
+        key = prompt_key(messages)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("InferenceGateway is closed")
+            self._stats["requests"] += 1
+            job = self._inflight.get(key)
+            if job is not None:
+                job.subscribers += 1
+                self._stats["coalesced"] += 1
+                GATEWAY_REQUESTS.inc(outcome="coalesced")
+                return job
+            queue = self._queues.get(user)
+            if queue is not None and len(queue) >= self._max_queued_per_user:
+                self._stats["rejected"] += 1
+                GATEWAY_REQUESTS.inc(outcome="rejected")
+                raise GatewayOverloaded(f"{user} already has {len(queue)} requests waiting")
+            job = _Job(key, user, messages)
+            self._inflight[key] = job
+            self._queues.setdefault(user, deque()).append(job)
+            self._queued += 1
+            self._cond.notify()
+            return job
+
+    def stream(self, user: str, messages: List[Message]) -> Iterator[str]:
+        return self.submit(user, messages).chunks_from_start()
+
+    # ---- workers ----
+    def _take(self, limit: int) -> List[_Job]:
+        """Pop up to `limit` jobs, one per user per round. Caller holds the lock."""
+        taken: List[_Job] = []
+        while self._queues and len(taken) < limit:
+            user, queue = next(iter(self._queues.items()))
+            taken.append(queue.popleft())
+            del self._queues[user]
+            if queue:
+                self._queues[user] = queue  # back of the line
+        self._queued -= len(taken)
+        return taken
+
+    def _next_batch(self) -> Optional[List[_Job]]:
+        with self._cond:
+            while not self._queues and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return None
+            batch = self._take(self._max_batch)
+            deadline = time.monotonic() + self._max_latency
+            while len(batch) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if not self._queues:
+                    self._cond.wait(remaining)
+                batch.extend(self._take(self._max_batch - len(batch)))
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            for job in batch:
+                job.started = started
+                GATEWAY_QUEUE_SECONDS.observe(started - job.submitted)
+            GATEWAY_BATCH_SIZE.observe(len(batch))
+            with self._cond:
+                self._stats["batches"] += 1
+                self._stats["batched_requests"] += len(batch)
+
+            error: Optional[BaseException] = None
+            try:
+                for i, chunk in self._backend.stream_batch([job.messages for job in batch]):
+                    batch[i].push(chunk)
+            except Exception as e:
+                error = e
+            with self._cond:
+                for job in batch:
+                    self._inflight.pop(job.key, None)
+            for job in batch:
+                job.finish(error)
+                GATEWAY_REQUESTS.inc(outcome="failed" if error else "completed")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["queued"] = self._queued
+            stats["in_flight"] = len(self._inflight)
+        stats["avg_batch"] = stats["batched_requests"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+    def close(self) -> None:
+        """Stop the workers; queued requests fail, decoding ones finish first."""
+        with self._cond:
+            self._closed = True
+            pending = [job for queue in self._queues.values() for job in queue]
+            self._queues.clear()
+            self._queued = 0
+            for job in pending:
+                self._inflight.pop(job.key, None)
+            self._cond.notify_all()
+        for job in pending:
+            job.finish(RuntimeError("InferenceGateway closed"))
+        for worker in self._workers:
+            worker.join()
+
+
+class GatewayClient(ChatBackend):
+    """Per-user handle on an InferenceGateway; pass it to AIAssistant as the backend."""
+
+    def __init__(self, gateway: InferenceGateway, user: str):
+        self._gateway = gateway
+        self._user = user
+
+    def stream(self, messages: List[Message]) -> Iterator[str]:
+        return self._gateway.stream(self._user, messages)
+
+    def count_tokens(self, text: str) -> int:
+        return self._gateway.backend.count_tokens(text)
+
+    def summarize(self, messages: List[Message], max_tokens: int) -> str:
+        backend = self._gateway.backend
+        if type(backend).summarize is not ChatBackend.summarize:
+            return backend.summarize(messages, max_tokens)  # backend has its own (e.g. extractive) summarizer
+        return super().summarize(messages, max_tokens)  # a model call, queued like any other
@@ -0,0 +1,101 @@
+# Local stand-in for a chat model server. Speaks the streaming subset of the
+# OpenAI /v1/chat/completions protocol that HTTPBackend uses and answers with
+# RuleBasedBackend, so the streaming path can be exercised without a model.
+# /v1/batch/chat/completions decodes several prompts in lock-step, the way a
+# batched model would, for the inference gateway (AI_BACKEND_BATCH=1):
+#
+#     python -m services.local_model_server --port 8808 --delay 0.05
+#     AI_BACKEND_URL=http://127.0.0.1:8808 AI_BACKEND_BATCH=1 streamlit run Home.py
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+from services.ai_backends import ChatBackend, RuleBasedBackend
+
+DEFAULT_PORT = 8808
+
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    backend: ChatBackend = RuleBasedBackend()
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        if path not in ("/v1/chat/completions", "/v1/batch/chat/completions"):
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if path == "/v1/chat/completions":
+                batch = [request["messages"]]
+            else:
+                batch = [item["messages"] for item in request["requests"]]
+        except (ValueError, KeyError, TypeError):
+            self.send_error(400, "Expected JSON with a 'messages' list (or 'requests' for the batch endpoint)")
+            return
+
+        if not request.get("stream"):
+            replies = [""] * len(batch)
+            for i, chunk in self.backend.stream_batch(batch):
+                replies[i] += chunk
+            body = json.dumps({
+                "object": "chat.completion",
+                "choices": [{"index": i, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}
+                            for i, reply in enumerate(replies)],
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            for i, chunk in self.backend.stream_batch(batch):
+                event = {"object": "chat.completion.chunk",
+                         "choices": [{"index": i, "delta": {"content": chunk}, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client stopped reading
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(
+    port: int = DEFAULT_PORT, host: str = "127.0.0.1", backend: Optional[ChatBackend] = None
+) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve `backend` on a background thread; returns (server, base_url). Port 0 picks a free port."""
+    handler = type("ChatHandler", (_ChatHandler,), {"backend": backend or RuleBasedBackend()})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="local-model-server", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in chat model server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds between streamed words")
+    args = parser.parse_args()
+
+    _, url = start_server(args.port, args.host, RuleBasedBackend(delay=args.delay))
+    print(f"Serving {url}/v1/chat/completions (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,4 @@
+from platform_common.memory import (
+    EVICTABLE_KEYS, SESSION_BUDGET_BYTES, PageTrace, account_session, deep_sizeof, enforce_budget, format_bytes,
+    measure_state, page_traces, register_evictable, session_report, set_tracing, tracing_enabled,
+)
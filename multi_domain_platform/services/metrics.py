@@ -0,0 +1,24 @@
+import os
+from typing import Optional
+
+from platform_common.metrics import (
+    ACTIVE_SESSIONS, CACHE_REQUESTS, CSV_ROWS, CSV_ROWS_PER_SECOND, CSV_SECONDS, LOGINS, METRICS_HOST,
+    METRICS_TEXTFILE, PAGE_SECONDS, REGISTRATIONS, REGISTRY, Counter, Gauge, Histogram, MetricsRegistry, PageTimer,
+    record_cache, start_page, touch_session, write_textfile,
+)
+from platform_common.metrics import start_exporter as _start_exporter
+
+# ---------------- Constants -----------------
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9465"))  # 9464 is the week-9 dashboard
+
+# ---------------- Application metrics -----------------
+PASSWORD_SECONDS = REGISTRY.histogram(
+    "app_password_hash_seconds", "Time spent hashing or verifying passwords.", ["operation"],
+    buckets=(0.0001, 0.001, 0.01, 0.05, 0.1, 0.5),
+)
+
+
+def start_exporter(
+    port: int = METRICS_PORT, host: str = METRICS_HOST, textfile: Optional[str] = METRICS_TEXTFILE
+) -> Optional[str]:
+    return _start_exporter(port, host, textfile)
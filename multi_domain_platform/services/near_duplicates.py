@@ -0,0 +1,101 @@
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from platform_common.near_duplicates import (
+    DuplicateMatch, LshIndex, StagedClusters, create_tables, install_change_log, join_text, sync,
+)
+from services.database_manager import DatabaseManager
+from services.write_queue import get_writer
+
+# ---------------- Constants -----------------
+# table -> columns whose text identifies "the same event"; missing ones are skipped
+DEDUP_SOURCES: Dict[str, Tuple[str, ...]] = {
+    "incidents": ("incident_type", "title", "description"),
+    "tickets": ("subject", "description"),
+}
+
+
+class NearDuplicateDetector:
+    """Groups incidents and tickets whose text is nearly identical.
+
+    Each row gets a MinHash signature, matched against one LSH index per
+    table (see platform_common.near_duplicates). Cluster membership lives
+    in near_dup_rows, which the dashboards use to show distinct counts
+    next to raw ones. Rows inserted elsewhere (imports) reach the index
+    through the near_dup_log change log and sync().
+    """
+
+    def __init__(self, db: DatabaseManager, sources: Dict[str, Tuple[str, ...]] = DEDUP_SOURCES):
+        self._db = db
+        self._sources = sources
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, LshIndex] = {}
+        self._columns: Dict[str, List[str]] = {}
+
+    def install(self) -> None:
+        """Create the cluster tables and the change-log triggers (setup, not per rerun)."""
+        with self._db.transaction() as conn:
+            create_tables(conn)
+            for table in self._sources:
+                present = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                columns = [c for c in self._sources[table] if c in present]
+                if columns:
+                    install_change_log(conn, table, table, "id", columns)
+
+    def _index(self, table: str) -> LshIndex:
+        """The table's index, loaded from near_dup_clusters on first use."""
+        with self._lock:
+            index = self._indexes.get(table)
+            if index is None:
+                conn = sqlite3.connect(self._db.db_path, timeout=30)
+                try:
+                    index = self._indexes[table] = LshIndex(table).load(conn)
+                finally:
+                    conn.close()
+            return index
+
+    def _existing_columns(self, table: str) -> List[str]:
+        if table not in self._columns:
+            present = {row[1] for row in self._db.fetch_all(f"PRAGMA table_info({table})")}
+            self._columns[table] = [c for c in self._sources[table] if c in present]
+        return self._columns[table]
+
+    def text_of(self, table: str, values: Dict[str, object]) -> str:
+        return join_text(values.get(column) for column in self._existing_columns(table))
+
+    def check(self, table: str, text: str) -> DuplicateMatch:
+        """Closest existing cluster for `text`, without recording anything."""
+        return self._index(table).check(text)
+
+    def record(self, table: str, row_id: int, text: str) -> DuplicateMatch:
+        """Assign a new row to a cluster; a row unlike any other starts its own (similarity 1.0)."""
+        staged = StagedClusters()
+        match, writes = self._index(table).record_writes(row_id, text, staged)
+        writer = get_writer(self._db.db_path)
+        for sql, params in writes[:-1]:
+            writer.submit(sql, params)
+        # One writer queue, so once the row commits the cluster queued before it has too;
+        # a failed write raises here and the new cluster never reaches the index
+        writer.submit(*writes[-1]).result()
+        staged.apply()
+        return match
+
+    def sync(self, table: str) -> int:
+        """Cluster rows inserted without record() (e.g. by CSV imports); returns how many."""
+        return sync(self._db.db_path, self._index(table))
+
+    def sync_all(self, tables: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        return {table: self.sync(table) for table in (tables or self._sources)}
+
+
+def distinct_count_query(table: str) -> Tuple[str, tuple]:
+    """SUMMARY_QUERIES entry counting a table's rows with near-duplicates merged.
+
+    Rows not clustered yet count once each, so the number never exceeds the raw count.
+    """
+    return (f"""
+SELECT COUNT(DISTINCT n.cluster_id) + COALESCE(SUM(n.cluster_id IS NULL), 0)
+FROM {table} t
+LEFT JOIN near_dup_rows n ON n.domain = ? AND n.row_id = t.id
+""", (table,))
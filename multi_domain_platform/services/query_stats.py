@@ -0,0 +1,9 @@
+from pathlib import Path
+
+from platform_common.query_stats import (
+    COLLECTOR, SLOW_QUERY_MS, QueryStatsCollector, TimedConnection, TimedCursor, connect, explain, fingerprint,
+    is_full_scan,
+)
+
+# ---------------- Constants -----------------
+STATS_FILE = Path("database") / "query_stats.json"
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from services.metrics import REGISTRY, record_cache
+from services.query_stats import connect
+
+# ---------------- Constants -----------------
+CACHE_NAME = "ai_response"
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 3600
+PRUNE_INTERVAL = 60
+AI_CACHE_DB = os.environ.get("AI_CACHE_DB")  # e.g. database/ai_cache.db; unset keeps the cache in memory only
+
+# Keyword -> ChangeTracker table whose data an answer may depend on
+TABLE_KEYWORDS = {
+    "incident": "incidents",
+    "threat": "incidents",
+    "ticket": "tickets",
+    "dataset": "datasets",
+    "user": "users",
+    "login": "users",
+}
+
+_SPACE_RE = re.compile(r"\s+")
+_TRAILING_RE = re.compile(r"[\s?!.]+$")
+
+CACHE_ENTRIES = REGISTRY.gauge("app_ai_cache_entries", "AI responses held in memory.")
+CACHE_BYTES = REGISTRY.gauge("app_ai_cache_bytes", "Approximate size of cached AI responses.")
+
+
+def normalize_prompt(text: str) -> str:
+    """Fold case, width and whitespace so trivially different phrasings share a key."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _SPACE_RE.sub(" ", text).strip()
+    return _TRAILING_RE.sub("", text)
+
+
+def referenced_tables(text: str) -> List[str]:
+    """Tables a prompt is about, judged by keyword; their versions go into the cache key."""
+    lowered = text.lower()
+    return sorted({table for keyword, table in TABLE_KEYWORDS.items() if keyword in lowered})
+
+
+def cache_key(prompt: str, system_prompt: str, versions: Mapping[str, int]) -> str:
+    payload = json.dumps([normalize_prompt(prompt), system_prompt, sorted(versions.items())])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Process-wide cache of assistant replies.
+
+    Entries are evicted least-recently-used first once `max_entries` or
+    `max_bytes` is exceeded, and expire after `ttl` seconds. Keys include
+    the versions of the tables a prompt mentions, so an answer about
+    incidents stops matching as soon as the incidents table changes.
+    With `db_path` set, entries are also written through to SQLite and
+    read back on a memory miss, so they survive restarts.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        db_path: Optional[str] = AI_CACHE_DB
+    ):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()  # key -> (reply, stored_at, size)
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._last_prune = 0.0
+        if db_path:
+            self._conn = connect(db_path, check_same_thread=False)
+            self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS ai_response_cache (
+                key TEXT PRIMARY KEY,
+                reply TEXT NOT NULL,
+                stored_at REAL NOT NULL
+            )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_response_cache_stored ON ai_response_cache(stored_at)")
+            self._conn.commit()
+        CACHE_ENTRIES.set_function(lambda: len(self._entries))
+        CACHE_BYTES.set_function(lambda: self._bytes)
+
+    @staticmethod
+    def key(prompt: str, system_prompt: str, versions: Mapping[str, int]) -> str:
+        return cache_key(prompt, system_prompt, versions)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] > self._ttl:
+                self._drop(key)
+                entry = None
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT reply, stored_at FROM ai_response_cache WHERE key = ? AND stored_at >= ?",
+                    (key, now - self._ttl)
+                ).fetchone()
+                if row is not None:
+                    entry = self._insert(key, row[0], row[1])
+            if entry is None:
+                self._misses += 1
+            else:
+                if key in self._entries:  # an oversized persisted entry may not stay in memory
+                    self._entries.move_to_end(key)
+                self._hits += 1
+        record_cache(CACHE_NAME, entry is not None)
+        return None if entry is None else entry[0]
+
+    def put(self, key: str, reply: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._insert(key, reply, now)
+            if self._conn is not None:
+                self._conn.execute("INSERT OR REPLACE INTO ai_response_cache (key, reply, stored_at) VALUES (?, ?, ?)",
+                                   (key, reply, now))
+                if now - self._last_prune > PRUNE_INTERVAL:
+                    self._conn.execute("DELETE FROM ai_response_cache WHERE stored_at < ?", (now - self._ttl,))
+                    self._last_prune = now
+                self._conn.commit()
+
+    def _insert(self, key: str, reply: str, stored_at: float) -> Tuple[str, float, int]:
+        if key in self._entries:
+            self._drop(key)
+        entry = (reply, stored_at, len(key) + len(reply.encode("utf-8")))
+        self._entries[key] = entry
+        self._bytes += entry[2]
+        while self._entries and (len(self._entries) > self._max_entries or self._bytes > self._max_bytes):
+            self._drop(next(iter(self._entries)))
+            self._evictions += 1
+        return entry
+
+    def _drop(self, key: str) -> None:
+        self._bytes -= self._entries.pop(key)[2]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM ai_response_cache")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "persistent": self._conn is not None,
+            }
@@ -0,0 +1,373 @@
+import hashlib
+import heapq
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import closing
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from services.ai_backends import count_tokens
+from services.database_manager import DatabaseManager
+from services.query_stats import connect
+
+try:
+    import numpy as np
+except ImportError:  # embeddings are optional; BM25 works without NumPy
+    np = None
+
+# ---------------- Constants -----------------
+# table -> columns worth searching, in display order. Tables or columns
+# missing from the database are skipped, so threats/reports are picked up
+# once those tables exist.
+SEARCH_SOURCES: Dict[str, Tuple[str, ...]] = {
+    "incidents": ("title", "incident_type", "description", "severity", "status"),
+    "threats": ("name", "threat_type", "description", "severity", "status"),
+    "tickets": ("subject", "description", "priority", "status", "assigned_to"),
+    "reports": ("title", "summary", "author"),
+    "datasets": ("name", "owner", "description"),
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+EMBEDDING_DIM = 256
+EMBEDDING_WEIGHT = 0.3      # share of the hybrid score coming from cosine similarity
+MIN_SIMILARITY = 0.3        # cosine needed for a record with no matching term to rank at all
+MAX_DF_FRACTION = 0.2       # terms in more records than this are skipped when rarer terms exist
+MAX_POSTINGS_WALK = 100000  # above this many postings, only records with the rarest term are scored
+CHANGE_LOG_PRUNE_AT = 10000  # consumed change-log rows kept before pruning
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how i in is it me of on or show that the this to was what which with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def hashed_embeddings(texts: Sequence[str], dim: int = EMBEDDING_DIM) -> "np.ndarray":
+    """Local embeddings via the hashing trick over words and character trigrams.
+
+    No model to download; catches spelling variants ("phish" / "phishing")
+    that exact-term BM25 misses. Swap in a real encoder with the `embed`
+    argument of SearchIndex.
+    """
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in tokenize(text):
+            padded = f"#{token}#"
+            for feature in [token] + [padded[i:i + 3] for i in range(len(padded) - 2)]:
+                digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+                matrix[row, digest % dim] += 1.0 if digest >> 63 else -1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class SearchHit(NamedTuple):
+    table: str
+    row_id: int
+    score: float
+    text: str
+
+
+class SearchIndex:
+    """In-memory BM25 inverted index over platform records, with optional embeddings.
+
+    Triggers append every insert/update/delete on the indexed tables to a
+    `search_changes` log; refresh() applies only the log entries since the
+    last refresh, so keeping the index current costs one indexed query
+    while nothing changed. With NumPy installed (and `embed` not None) each
+    record also gets a vector in a preallocated matrix and search() blends
+    BM25 with cosine similarity.
+    """
+
+    def __init__(
+        self,
+        db: DatabaseManager,
+        sources: Optional[Dict[str, Tuple[str, ...]]] = None,
+        embed: Optional[Callable[[Sequence[str]], "np.ndarray"]] = hashed_embeddings if np is not None else None
+    ):
+        self._db = db
+        self._wanted = SEARCH_SOURCES if sources is None else sources
+        self._sources: Dict[str, List[str]] = {}
+        self._embed = embed if np is not None else None
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._last_seq = 0
+        self._built = False
+        self._reset()
+
+    def _reset(self) -> None:
+        self._postings: Dict[str, Dict[int, int]] = {}   # term -> {doc: term frequency}
+        self._doc_terms: List[Optional[Tuple[str, ...]]] = []
+        self._doc_keys: List[Optional[Tuple[str, int]]] = []
+        self._doc_text: List[str] = []
+        self._doc_len: List[int] = []
+        self._key_to_doc: Dict[Tuple[str, int], int] = {}
+        self._free: List[int] = []
+        self._total_len = 0
+        self._count = 0
+        self._vectors = None
+
+    # ---- schema ----
+    def _installed(self, sources: Dict[str, List[str]]) -> bool:
+        """True when the change log and every source table's triggers already exist (read only)."""
+        names = {row[0] for row in self._db.fetch_all("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")}
+        return "search_changes" in names and all(
+            f"{table}_search_{event}" in names for table in sources for event in ("insert", "update", "delete")
+        )
+
+    def install(self) -> None:
+        """Create the change log and its triggers for the searchable tables that exist.
+
+        Setup, not per rerun: ui.resources runs it when the index is created
+        and again from setup_tables() once a page's tables exist. When nothing
+        is missing it only reads the schema and takes no write lock.
+        """
+        with closing(connect(self._db.db_path)) as conn:
+            sources = self._resolve_sources(conn)
+        if self._installed(sources):
+            self._use_sources(sources)
+            return
+        with self._db.transaction() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS search_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                tbl TEXT NOT NULL,
+                row_id INTEGER NOT NULL,
+                op TEXT NOT NULL
+            )
+            """)
+            sources = self._resolve_sources(conn)
+            for table in sources:
+                for event, ref in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+                    conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_search_{event.lower()}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        INSERT INTO search_changes (tbl, row_id, op) VALUES ('{table}', {ref}.rowid, '{event[0]}');
+                    END
+                    """)
+        self._use_sources(sources)
+
+    def _use_sources(self, sources: Dict[str, List[str]]) -> None:
+        with self._lock:
+            if sources != self._sources:  # a searchable table appeared; the next refresh rebuilds
+                self._sources = sources
+                self._built = False
+
+    def _resolve_sources(self, conn: sqlite3.Connection) -> Dict[str, List[str]]:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        sources = {}
+        for table, columns in self._wanted.items():
+            if table not in existing:
+                continue
+            present = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            found = [c for c in columns if c in present]
+            if found:
+                sources[table] = found
+        return sources
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect(self._db.db_path, check_same_thread=False)
+        return self._conn
+
+    # ---- building ----
+    def build(self) -> int:
+        """Index every row from scratch; returns the number of records indexed."""
+        with self._lock:
+            conn = self._connection()
+            if not self._sources:
+                self._sources = self._resolve_sources(conn)
+            self._reset()
+            # Read the log position first: changes racing the scan are replayed by refresh()
+            self._last_seq = self._max_seq(conn)
+            for table, columns in self._sources.items():
+                cursor = conn.execute(f"SELECT rowid, {', '.join(columns)} FROM {table}")
+                while True:
+                    rows = cursor.fetchmany(5000)
+                    if not rows:
+                        break
+                    self._add_many(table, columns, rows)
+            self._built = True
+            return self._count
+
+    def _max_seq(self, conn: sqlite3.Connection) -> int:
+        try:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM search_changes").fetchone()[0]
+        except sqlite3.OperationalError:  # install() not run yet
+            return 0
+
+    def refresh(self) -> int:
+        """Apply changes logged since the last build/refresh; returns how many were applied.
+
+        Builds the index on first use.
+        """
+        with self._lock:
+            if not self._built:
+                return self.build()
+            conn = self._connection()
+            try:
+                oldest = conn.execute("SELECT MIN(seq) FROM search_changes").fetchone()[0]
+                changes = conn.execute(
+                    "SELECT seq, tbl, row_id, op FROM search_changes WHERE seq > ? ORDER BY seq", (self._last_seq,)
+                ).fetchall()
+            except sqlite3.OperationalError:
+                return 0
+            if oldest is not None and oldest > self._last_seq + 1 and self._last_seq:
+                self.build()  # another process pruned entries we never saw
+                return len(changes)
+            if not changes:
+                return 0
+
+            latest: Dict[Tuple[str, int], str] = {}
+            for _, table, row_id, op in changes:
+                latest[(table, row_id)] = op
+            for (table, row_id), op in latest.items():
+                if table not in self._sources:
+                    continue
+                self._remove((table, row_id))
+                if op != "D":
+                    columns = self._sources[table]
+                    row = conn.execute(
+                        f"SELECT rowid, {', '.join(columns)} FROM {table} WHERE rowid = ?", (row_id,)
+                    ).fetchone()
+                    if row is not None:
+                        self._add_many(table, columns, [row])
+            self._last_seq = changes[-1][0]
+            if oldest is not None and self._last_seq - oldest > 2 * CHANGE_LOG_PRUNE_AT:
+                conn.execute("DELETE FROM search_changes WHERE seq <= ?", (self._last_seq - CHANGE_LOG_PRUNE_AT,))
+                conn.commit()
+            return len(changes)
+
+    def _add_many(self, table: str, columns: List[str], rows: Iterable[tuple]) -> None:
+        added: List[int] = []
+        for row in rows:
+            text = " | ".join(f"{col}: {value}" for col, value in zip(columns, row[1:]) if value not in (None, ""))
+            terms = Counter(tokenize(text))
+            doc = self._free.pop() if self._free else len(self._doc_keys)
+            if doc == len(self._doc_keys):
+                self._doc_keys.append(None)
+                self._doc_terms.append(None)
+                self._doc_text.append("")
+                self._doc_len.append(0)
+            length = sum(terms.values())
+            self._doc_keys[doc] = (table, row[0])
+            self._doc_terms[doc] = tuple(terms)
+            self._doc_text[doc] = text
+            self._doc_len[doc] = length
+            self._key_to_doc[(table, row[0])] = doc
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[doc] = tf
+            self._total_len += length
+            self._count += 1
+            added.append(doc)
+        if self._embed is not None and added:
+            self._store_vectors(added)
+
+    def _store_vectors(self, docs: List[int]) -> None:
+        vectors = self._embed([self._doc_text[d] for d in docs])
+        needed = max(docs) + 1
+        if self._vectors is None or self._vectors.shape[0] < needed:
+            capacity = max(needed, 1024, 0 if self._vectors is None else self._vectors.shape[0] * 2)
+            grown = np.zeros((capacity, vectors.shape[1]), dtype=np.float32)
+            if self._vectors is not None:
+                grown[:self._vectors.shape[0]] = self._vectors
+            self._vectors = grown
+        self._vectors[docs] = vectors
+
+    def _remove(self, key: Tuple[str, int]) -> None:
+        doc = self._key_to_doc.pop(key, None)
+        if doc is None:
+            return
+        for term in self._doc_terms[doc] or ():
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_len -= self._doc_len[doc]
+        self._count -= 1
+        self._doc_keys[doc] = None
+        self._doc_terms[doc] = None
+        self._doc_text[doc] = ""
+        self._doc_len[doc] = 0
+        if self._vectors is not None and doc < self._vectors.shape[0]:
+            self._vectors[doc] = 0
+        self._free.append(doc)
+
+    # ---- querying ----
+    def __len__(self) -> int:
+        return self._count
+
+    def search(self, query: str, k: int = 5, tables: Optional[Iterable[str]] = None) -> List[SearchHit]:
+        """Top-k records for `query`, best first."""
+        wanted = set(tables) if tables is not None else None
+        with self._lock:
+            if not self._count:
+                return []
+            scores: Dict[int, float] = {}
+            avg_len = self._total_len / self._count
+            terms = [t for t in set(tokenize(query)) if t in self._postings]
+            # Very common terms ("open", "high") have huge posting lists and add
+            # little to the ranking; walking them dominates latency on big indexes
+            rare = [t for t in terms if len(self._postings[t]) <= MAX_DF_FRACTION * self._count]
+            terms = sorted(rare or terms, key=lambda t: len(self._postings[t]))
+            candidates: Optional[Iterable[int]] = None
+            if sum(len(self._postings[t]) for t in terms) > MAX_POSTINGS_WALK:
+                # Only score records holding the rarest term; the others are looked up, not walked
+                candidates = list(self._postings[terms[0]])
+            doc_len = self._doc_len
+            for term in terms:
+                postings = self._postings[term]
+                idf = math.log(1 + (self._count - len(postings) + 0.5) / (len(postings) + 0.5))
+                if candidates is None:
+                    matches: Iterable[Tuple[int, int]] = postings.items()
+                else:
+                    matches = ((doc, postings[doc]) for doc in candidates if doc in postings)
+                for doc, tf in matches:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len[doc] / avg_len)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+            if self._vectors is not None:
+                scores = self._blend(query, scores, k)
+
+            candidates = scores.items()
+            if wanted is not None:
+                candidates = [(d, s) for d, s in candidates if self._doc_keys[d][0] in wanted]
+            best = heapq.nlargest(k, candidates, key=lambda item: item[1])
+            return [SearchHit(*self._doc_keys[d], s, self._doc_text[d]) for d, s in best if s > 0]
+
+    def _blend(self, query: str, bm25: Dict[int, float], k: int) -> Dict[int, float]:
+        query_vec = self._embed([query])[0]
+        similarity = self._vectors @ query_vec
+        top_bm25 = max(bm25.values(), default=0.0) or 1.0
+        # Dense candidates: the best few by cosine, so records with no shared term can still rank
+        limit = min(len(similarity), k * 4)
+        dense = np.argpartition(-similarity, limit - 1)[:limit] if limit else []
+        blended = {}
+        for doc in set(bm25) | {int(d) for d in dense}:
+            if self._doc_keys[doc] is None or (doc not in bm25 and similarity[doc] < MIN_SIMILARITY):
+                continue
+            blended[doc] = ((1 - EMBEDDING_WEIGHT) * bm25.get(doc, 0.0) / top_bm25
+                            + EMBEDDING_WEIGHT * max(float(similarity[doc]), 0.0))
+        return blended
+
+    def context_for(self, query: str, token_budget: int, k: int = 20) -> str:
+        """The best records for `query` as prompt lines, stopping before `token_budget` is exceeded."""
+        self.refresh()
+        lines: List[str] = []
+        used = 0
+        for hit in self.search(query, k):
+            line = f"[{hit.table} #{hit.row_id}] {hit.text}"
+            cost = count_tokens(line)
+            if used + cost > token_budget:
+                break
+            lines.append(line)
+            used += cost
+        return "\n".join(lines)
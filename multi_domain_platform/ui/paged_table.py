@@ -0,0 +1,75 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import streamlit as st
+
+from database.paging import fetch_page
+from services.database_manager import DatabaseManager
+from ui.resources import load_when_changed
+
+PAGE_SIZE = 50
+
+# sort label -> (indexed sort column, "ASC" | "DESC")
+SortOptions = Dict[str, Tuple[str, str]]
+
+
+def render_paged_table(
+    db: DatabaseManager,
+    key: str,
+    table: str,
+    columns: List[str],
+    sort_options: SortOptions,
+    to_batch: Callable[[Iterable[tuple]], Any],
+    empty_message: str = "No rows yet.",
+    page_size: int = PAGE_SIZE,
+    tables: Optional[List[str]] = None
+) -> None:
+    """Render one page of `table` as a single st.dataframe with a "Load more" cursor.
+
+    Each rerun sends one table element of at most page_size rows, so message
+    count and payload stay constant no matter how large the table grows.
+    `columns` must include "id"; `to_batch` turns rows into a model batch.
+    If `tables` is given the page is only re-queried when one of them changes.
+    """
+    state = st.session_state.setdefault(f"{key}_pager", {"sort": None, "cursors": [None]})
+
+    sort_label = st.selectbox("Sort by", list(sort_options), key=f"{key}_sort")
+    if state["sort"] != sort_label:
+        state["sort"] = sort_label
+        state["cursors"] = [None]
+    sort_column, direction = sort_options[sort_label]
+
+    cursor = state["cursors"][-1]
+    fetch = lambda: fetch_page(db, table, columns, sort_column, direction, cursor, page_size)
+    if tables:
+        rows = load_when_changed(f"{key}_page", tables, fetch, params=(sort_label, cursor, page_size))
+    else:
+        rows = fetch()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if not rows and len(state["cursors"]) == 1:
+        st.info(empty_message)
+        return
+
+    batch = to_batch(row[1:] for row in rows)
+    st.dataframe(batch.to_columns(), use_container_width=True, hide_index=True)
+
+    start = (len(state["cursors"]) - 1) * page_size
+    st.caption(f"Rows {start + 1}–{start + len(rows)}")
+
+    id_index = columns.index("id") + 1
+    next_cursor = (rows[-1][0], rows[-1][id_index]) if rows else None
+
+    col1, col2 = st.columns(2)
+    col1.button(
+        "Previous",
+        key=f"{key}_prev",
+        disabled=len(state["cursors"]) == 1,
+        on_click=lambda: state["cursors"].pop(),
+    )
+    col2.button(
+        "Load more",
+        key=f"{key}_more",
+        disabled=not has_more,
+        on_click=lambda: state["cursors"].append(next_cursor),
+    )
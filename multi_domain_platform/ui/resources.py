@@ -0,0 +1,161 @@
+import uuid
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+import streamlit as st
+
+from database.datasets import install_datasets
+from database.lookups import install_lookups
+from database.setup import init_db
+from services.async_database_manager import AsyncDatabaseManager
+from services.ai_backends import backend_from_env
+from services.blob_store import BlobStore
+from services.change_tracker import ChangeTracker
+from services.database_manager import DatabaseManager
+from services.dataset_profiler import DatasetProfiler
+from services.inference_gateway import InferenceGateway
+from services.memory import register_evictable
+from services.metrics import PageTimer, record_cache, start_exporter, start_page
+from services.near_duplicates import NearDuplicateDetector
+from services.response_cache import ResponseCache
+from services.search_index import SearchIndex
+
+# How often live sections poll for changes (seconds)
+LIVE_REFRESH_SECONDS = 5
+
+# Session state the memory budget may reclaim: load_when_changed() results
+# reload on the next rerun; a chat keeps its recent turns and summary.
+register_evictable("_live_cache")
+register_evictable("assistant", shrink=lambda assistant: assistant.shed_history())
+
+
+@st.cache_resource
+def init_database() -> None:
+    """init_db() once per process, not on every rerun of Home."""
+    init_db(DatabaseManager())
+
+
+@st.cache_resource
+def setup_tables(tables: Tuple[str, ...] = ()) -> None:
+    """Run the one-time migrations once per process for the tables a page uses.
+
+    The page creates `tables` first. Each migration records its version in
+    schema_versions, so a new process only reads the stamps.
+    """
+    install_lookups(DatabaseManager())
+    get_change_tracker().install()
+    get_search_index().install()
+
+
+@st.cache_resource
+def get_async_db() -> AsyncDatabaseManager:
+    """One read pool per process, shared by every session."""
+    return AsyncDatabaseManager()
+
+
+@st.cache_resource
+def get_change_tracker() -> ChangeTracker:
+    """One change tracker per process, shared by every session."""
+    return ChangeTracker(DatabaseManager())
+
+
+@st.cache_resource
+def get_response_cache() -> ResponseCache:
+    """One AI response cache per process, shared by every session."""
+    return ResponseCache()
+
+
+@st.cache_resource
+def get_blob_store() -> BlobStore:
+    """One dataset blob store per process."""
+    return BlobStore()
+
+
+@st.cache_resource
+def get_dataset_profiler() -> DatasetProfiler:
+    """One profiler per process; installs the datasets columns, indexes and profile table once.
+
+    The page creates the datasets table first.
+    """
+    db = DatabaseManager()
+    install_datasets(db)
+    profiler = DatasetProfiler(db)
+    profiler.install()
+    return profiler
+
+
+@st.cache_resource
+def get_inference_gateway() -> InferenceGateway:
+    """One gateway per process, so every session's model calls share its batching and fair queue."""
+    return InferenceGateway(backend_from_env())
+
+
+@st.cache_resource
+def get_search_index() -> SearchIndex:
+    """One retrieval index per process; built on first search, then kept current from the change log."""
+    index = SearchIndex(DatabaseManager())
+    index.install()
+    return index
+
+
+@st.cache_resource
+def get_near_duplicates() -> NearDuplicateDetector:
+    """One near-duplicate detector per process; its LSH index is loaded once and updated on insert."""
+    detector = NearDuplicateDetector(DatabaseManager())
+    detector.install()
+    return detector
+
+
+@st.cache_resource
+def get_metrics_exporter() -> Optional[str]:
+    """Start the Prometheus exporter once per process; returns its URL or file."""
+    return start_exporter()
+
+
+def start_page_metrics(page: str) -> PageTimer:
+    """Begin timing this rerun of `page`; .stop() at the end of the script also does memory accounting."""
+    get_metrics_exporter()
+    return start_page(page, page_load_key(), st.session_state)
+
+
+def page_load_key() -> str:
+    """Per-session key, used to attribute page metrics to a session."""
+    return st.session_state.setdefault("page_load_key", uuid.uuid4().hex)
+
+
+def load_when_changed(
+    key: str, tables: Iterable[str], loader: Callable[[], Any], params: Any = None
+) -> Any:
+    """Return loader(), re-running it only when `params` or one of `tables` changed.
+
+    The result is kept in this session's state next to the table versions
+    it was loaded at, so a polling fragment costs one PRAGMA while idle.
+    """
+    stamp = (params, tuple(get_change_tracker().versions(tables).items()))
+    cache = st.session_state.setdefault("_live_cache", {})
+    hit = cache.get(key)
+    record_cache(key, hit is not None and hit[0] == stamp)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    value = loader()
+    cache[key] = (stamp, value)
+    return value
+
+
+def watch_tables(key: str, tables: Iterable[str]) -> None:
+    """Rerun the page when one of `tables` changes; an idle poll draws and sends nothing.
+
+    Call it before drawing the live sections: the versions seen now are
+    kept under `key`, and the polling fragment compares against them
+    every LIVE_REFRESH_SECONDS. Popping `key` makes the next poll rerun
+    the page regardless, e.g. to retry a cancelled load.
+    """
+    tables = tuple(tables)
+    st.session_state[key] = get_change_tracker().versions(tables)
+    _poll_tables(key, tables)
+
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def _poll_tables(key: str, tables: Tuple[str, ...]) -> None:
+    if get_change_tracker().versions(tables) == st.session_state.get(key):
+        return
+    st.rerun()
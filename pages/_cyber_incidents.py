@@ -4,6 +4,14 @@ import os
 import plotly.express as px
 from datetime import datetime, timedelta
 import random
+import uuid
+
+from app.services.metrics import record_cache, start_page
+
+# Rerun duration, active-session and memory accounting
+page_timer = start_page(
+    "cyber_incidents", st.session_state.setdefault("session_id", uuid.uuid4().hex), st.session_state
+)
 
 # -----------------------------
 # File Path
@@ -13,6 +21,21 @@ FILE_PATH = r"C:\Users\Huzi\OneDrive\Documents\M01088971_LABFILES\DATA\cyber_inc
 # Ensure folder exists
 os.makedirs(os.path.dirname(FILE_PATH), exist_ok=True)
 
+# How often open dashboards check the CSV for changes (seconds)
+LIVE_REFRESH_SECONDS = 5
+
+@st.cache_resource(max_entries=1)
+def read_incidents_csv(version):
+    """One parsed copy per file version, shared by every session instead of one per session"""
+    return pd.read_csv(FILE_PATH)
+
+def load_incidents_csv():
+    """Re-read the CSV only when its modification time changed"""
+    version = os.stat(FILE_PATH).st_mtime_ns
+    record_cache("incidents_csv", st.session_state.get("incidents_csv_version") == version)
+    st.session_state["incidents_csv_version"] = version
+    return read_incidents_csv(version).copy()
+
 # -----------------------------
 # Generate sample data if CSV missing
 # -----------------------------
@@ -37,7 +60,7 @@ if not os.path.exists(FILE_PATH):
     df = pd.DataFrame(sample_data, columns=["date","incident_type","severity","status","description","reported_by"])
     df.to_csv(FILE_PATH, index=False)
 else:
-    df = pd.read_csv(FILE_PATH)
+    df = load_incidents_csv()
 
 # -----------------------------
 # Streamlit App
@@ -114,30 +137,47 @@ with st.expander("🤖 AI Assistant"):
         else:
             st.write("No matching incidents found.")
 
-# --- Graphs ---
-if not df.empty:
-    df['date'] = pd.to_datetime(df['date'], errors='coerce')
-
-    # Incidents Over Time
-    st.subheader("📈 Incidents Over Time")
-    timeline = df.groupby('date').size().reset_index(name='Count')
-    fig_time = px.line(timeline, x='date', y='Count', markers=True, title="Incidents Over Time")
-    st.plotly_chart(fig_time, use_container_width=True)
-
-    # Incidents by Severity
-    st.subheader("🛑 Incidents by Severity")
-    severity_count = df['severity'].value_counts().reset_index()
-    severity_count.columns = ['Severity','Count']
-    fig_sev = px.bar(severity_count, x='Severity', y='Count', color='Severity', text='Count', title="Incidents by Severity")
-    st.plotly_chart(fig_sev, use_container_width=True)
-
-    # Incidents by Type
-    st.subheader("🔹 Incidents by Type")
-    type_count = df['incident_type'].value_counts().reset_index()
-    type_count.columns = ['Type','Count']
-    fig_type = px.pie(type_count, names='Type', values='Count', title="Incidents by Type")
-    st.plotly_chart(fig_type, use_container_width=True)
-
-# --- Show Data Table ---
-st.header("📊 All Cyber Incidents")
-st.dataframe(df, use_container_width=True)
+# --- Graphs & Table (redrawn only when the CSV changes) ---
+def incident_charts(df):
+    if not df.empty:
+        df['date'] = pd.to_datetime(df['date'], errors='coerce')
+
+        # Incidents Over Time
+        st.subheader("📈 Incidents Over Time")
+        timeline = df.groupby('date').size().reset_index(name='Count')
+        fig_time = px.line(timeline, x='date', y='Count', markers=True, title="Incidents Over Time")
+        st.plotly_chart(fig_time, use_container_width=True)
+
+        # Incidents by Severity
+        st.subheader("🛑 Incidents by Severity")
+        severity_count = df['severity'].value_counts().reset_index()
+        severity_count.columns = ['Severity','Count']
+        fig_sev = px.bar(severity_count, x='Severity', y='Count', color='Severity', text='Count', title="Incidents by Severity")
+        st.plotly_chart(fig_sev, use_container_width=True)
+
+        # Incidents by Type
+        st.subheader("🔹 Incidents by Type")
+        type_count = df['incident_type'].value_counts().reset_index()
+        type_count.columns = ['Type','Count']
+        fig_type = px.pie(type_count, names='Type', values='Count', title="Incidents by Type")
+        st.plotly_chart(fig_type, use_container_width=True)
+
+    # --- Show Data Table ---
+    st.header("📊 All Cyber Incidents")
+    st.dataframe(df, use_container_width=True)
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def watch_incidents_csv():
+    """Poll the CSV's version; an idle session draws and sends nothing.
+
+    Only when the file changed does the page rerun, once, to redraw the
+    charts and table from the new version.
+    """
+    if os.stat(FILE_PATH).st_mtime_ns == st.session_state.get("incidents_csv_version"):
+        return
+    st.rerun()
+
+incident_charts(df)
+watch_incidents_csv()
+
+page_timer.stop()
@@ -1,6 +1,14 @@
 import streamlit as st
 import pandas as pd
 import os
+import uuid
+
+from app.services.metrics import start_page
+
+# Rerun duration, active-session and memory accounting
+page_timer = start_page(
+    "security_threats", st.session_state.setdefault("session_id", uuid.uuid4().hex), st.session_state
+)
 
 # ----------------------------------------
 # FIXED: Correct file path for YOUR system
@@ -84,3 +92,5 @@ with st.expander("🤖 AI Assistant"):
 # --- SHOW DATA TABLE ---
 st.header("📊 All Security Threats")
 st.dataframe(df, use_container_width=True)
+
+page_timer.stop()
@@ -1,10 +1,20 @@
 import streamlit as st
 import pandas as pd
+import csv
 import os
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import numpy as np
+import uuid
+
+from app.data.snapshots import snapshots_available, snapshot_csv, read_snapshot_df
+from app.services.metrics import start_page
+
+# Rerun duration, active-session and memory accounting
+page_timer = start_page(
+    "it_tickets", st.session_state.setdefault("session_id", uuid.uuid4().hex), st.session_state
+)
 
 # ----------------------------------------
 # File path for CSV
@@ -20,19 +30,17 @@ if not os.path.exists(FILE_PATH):
     empty_df = pd.DataFrame(columns=default_columns)
     empty_df.to_csv(FILE_PATH, index=False)
 
-# Load CSV
-df = pd.read_csv(FILE_PATH)
-
-# Strip whitespace from columns
-df.columns = df.columns.str.strip()
+# Read only the header here; the rows are parsed when a tab needs them
+with open(FILE_PATH, newline="") as f:
+    reader = csv.reader(f)
+    header = [c.strip() for c in next(reader, [])]
+    has_rows = next(reader, None) is not None
 
-# Add missing columns if necessary
-for col in default_columns:
-    if col not in df.columns:
-        df[col] = ""
+# Snapshots need every column present in the file itself
+csv_complete = all(col in header for col in default_columns)
 
 # If CSV is empty, add realistic sample data for better visualization
-if df.empty:
+if not has_rows:
     np.random.seed(42)
     dates = pd.date_range(end=pd.Timestamp.now(), periods=30, freq='D')
     sample_data = []
@@ -67,8 +75,8 @@ if df.empty:
             "Assigned To": np.random.choice(assigned_to_list)
         })
     
-    df = pd.DataFrame(sample_data)
-    df.to_csv(FILE_PATH, index=False)
+    pd.DataFrame(sample_data).to_csv(FILE_PATH, index=False)
+    csv_complete = True
 
 # ----------------------------------------
 # Helper Functions
@@ -107,6 +115,27 @@ def calculate_system_load(df):
     load = load.sort_values('Date')
     return load
 
+@st.cache_data(max_entries=1)
+def _parse_tickets_csv(mtime):
+    df = pd.read_csv(FILE_PATH)
+    df.columns = df.columns.str.strip()
+    # Add missing columns if necessary
+    for col in default_columns:
+        if col not in df.columns:
+            df[col] = ""
+    return df
+
+def read_tickets_csv():
+    """Parse the CSV in file order; cached until the file changes"""
+    return _parse_tickets_csv(os.path.getmtime(FILE_PATH))
+
+def load_overview_frame():
+    """Read overview analytics from the Parquet snapshot of the CSV (rebuilt only when the file changes)"""
+    if not snapshots_available() or not csv_complete:
+        return read_tickets_csv()
+    snapshot_csv(FILE_PATH, "it_tickets_csv", "Created On", ["Priority", "Status", "Created By", "Assigned To"])
+    return read_snapshot_df("it_tickets_csv", columns=default_columns)
+
 # ----------------------------------------
 # Main Dashboard
 # ----------------------------------------
@@ -120,14 +149,16 @@ tab1, tab2 = st.tabs(["📊 Overview", "🎫 Manage Tickets"])
 # TAB 1: OVERVIEW
 # ----------------------------------------
 with tab1:
+    overview_df = load_overview_frame()
+
     # Convert Created On to datetime
-    if 'Created On' in df.columns:
-        df['Created On'] = pd.to_datetime(df['Created On'], errors='coerce')
+    if 'Created On' in overview_df.columns:
+        overview_df['Created On'] = pd.to_datetime(overview_df['Created On'], errors='coerce')
     
     # Calculate metrics
-    total_tickets = len(df)
-    avg_response_time = calculate_avg_response_time(df)
-    servers_online = df['Assigned To'].nunique() if 'Assigned To' in df.columns else 0
+    total_tickets = len(overview_df)
+    avg_response_time = calculate_avg_response_time(overview_df)
+    servers_online = overview_df['Assigned To'].nunique() if 'Assigned To' in overview_df.columns else 0
     
     st.header("💻 IT Overview")
     
@@ -143,24 +174,24 @@ with tab1:
     # Additional metrics
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        open_tickets = len(df[df['Status'] == 'Open'])
+        open_tickets = len(overview_df[overview_df['Status'] == 'Open'])
         st.metric("Open Tickets", open_tickets)
     with col2:
-        in_progress = len(df[df['Status'] == 'In Progress'])
+        in_progress = len(overview_df[overview_df['Status'] == 'In Progress'])
         st.metric("In Progress", in_progress)
     with col3:
-        if not df.empty:
-            critical_tickets = len(df[df['Priority'] == 'Critical'])
+        if not overview_df.empty:
+            critical_tickets = len(overview_df[overview_df['Priority'] == 'Critical'])
             st.metric("Critical", critical_tickets)
     with col4:
-        if 'Created On' in df.columns and not df['Created On'].isna().all():
+        if 'Created On' in overview_df.columns and not overview_df['Created On'].isna().all():
             today = pd.Timestamp.now().date()
-            today_tickets = len(df[df['Created On'].dt.date == today])
+            today_tickets = len(overview_df[overview_df['Created On'].dt.date == today])
             st.metric("Today", today_tickets)
     
     # System Load Line Chart
     st.subheader("System Load (Tickets per Day)")
-    system_load_df = calculate_system_load(df)
+    system_load_df = calculate_system_load(overview_df)
     if not system_load_df.empty:
         fig_load = px.line(
             system_load_df,
@@ -189,8 +220,8 @@ with tab1:
     
     with col1:
         # Status Distribution
-        if 'Status' in df.columns and not df.empty:
-            status_count = df['Status'].value_counts().reset_index()
+        if 'Status' in overview_df.columns and not overview_df.empty:
+            status_count = overview_df['Status'].value_counts().reset_index()
             status_count.columns = ['Status', 'Count']
             
             color_map = {
@@ -213,8 +244,8 @@ with tab1:
     
     with col2:
         # Priority Distribution
-        if 'Priority' in df.columns and not df.empty:
-            priority_count = df['Priority'].value_counts().reset_index()
+        if 'Priority' in overview_df.columns and not overview_df.empty:
+            priority_count = overview_df['Priority'].value_counts().reset_index()
             priority_count.columns = ['Priority', 'Count']
             
             priority_order = ['Low', 'Medium', 'High', 'Critical']
@@ -243,12 +274,15 @@ with tab1:
     
     # All Tickets Table
     st.subheader("📊 All IT Tickets")
-    st.dataframe(df, use_container_width=True)
+    st.dataframe(overview_df, use_container_width=True)
 
 # ----------------------------------------
 # TAB 2: MANAGE TICKETS
 # ----------------------------------------
 with tab2:
+    # Row numbers below follow the CSV's order, so edit the parsed file, not the snapshot
+    df = read_tickets_csv()
+
     # Add Ticket
     with st.expander("➕ Add New Ticket", expanded=True):
         with st.form("add_ticket"):
@@ -331,4 +365,6 @@ with tab2:
             if not filtered.empty:
                 st.dataframe(filtered, use_container_width=True)
             else:
-                st.write("No matching tickets found.")
\ No newline at end of file
+                st.write("No matching tickets found.")
+
+page_timer.stop()
@@ -0,0 +1,7 @@
+"""Code shared by the week-9 dashboard (app/) and multi_domain_platform/.
+
+Both apps import from here instead of keeping their own copies. Modules in
+this package only use the standard library and relative imports, so they
+work under either app's import layout; multi_domain_platform puts the
+repository root on sys.path in services/__init__.py.
+"""
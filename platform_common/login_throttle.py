@@ -0,0 +1,37 @@
+import threading
+import time
+from typing import Dict, List
+
+
+class LoginThrottle:
+    """Refuses logins for a username after too many recent failures.
+
+    Keep one instance per process (an imported module's global or an
+    st.cache_resource), not in a Streamlit script's own globals: the entry
+    script runs again on every rerun, which would forget every failure.
+    """
+
+    def __init__(self, max_failures: int = 5, lockout_seconds: float = 300):
+        self.max_failures = max_failures
+        self.lockout_seconds = lockout_seconds
+        self._lock = threading.Lock()
+        self._failures: Dict[str, List[float]] = {}  # username -> monotonic times of recent failures
+
+    def throttled(self, username: str) -> bool:
+        """True while `username` has max_failures failures within lockout_seconds."""
+        cutoff = time.monotonic() - self.lockout_seconds
+        with self._lock:
+            recent = [t for t in self._failures.get(username, ()) if t > cutoff]
+            if recent:
+                self._failures[username] = recent
+            else:
+                self._failures.pop(username, None)
+            return len(recent) >= self.max_failures
+
+    def failed(self, username: str) -> None:
+        with self._lock:
+            self._failures.setdefault(username, []).append(time.monotonic())
+
+    def succeeded(self, username: str) -> None:
+        with self._lock:
+            self._failures.pop(username, None)
@@ -0,0 +1,235 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, MutableMapping, Optional, Set, Tuple
+
+# ---------------- Constants -----------------
+SESSION_BUDGET_BYTES = int(os.environ.get("SESSION_BUDGET_MB", "64")) * 1024 * 1024
+TRACE_FRAMES = 5
+TRACES_PER_PAGE = 5
+TOP_ALLOCATORS = 10
+REMEASURE_EVERY = 10  # reruns between full re-measures of values that are still the same object
+
+# session_state key -> companion keys dropped with it. Only caches that a
+# rerun can rebuild belong here; evicting them costs a reload, not data.
+# Each app registers its own keys with register_evictable().
+EVICTABLE_KEYS: Dict[str, Tuple[str, ...]] = {}
+
+# key -> shrink(value) used instead of dropping the key, for state that is
+# not a pure cache (e.g. a chat) but can give most of its memory back
+SHRINKERS: Dict[str, Callable[[Any], None]] = {}
+
+
+def register_evictable(
+    key: str, companions: Iterable[str] = (), shrink: Optional[Callable[[Any], None]] = None
+) -> None:
+    """Allow enforce_budget() to drop session_state[key] (and its companions).
+
+    With `shrink`, the value is kept and shrink(value) is called instead.
+    """
+    EVICTABLE_KEYS[key] = tuple(companions)
+    if shrink is not None:
+        SHRINKERS[key] = shrink
+    else:
+        SHRINKERS.pop(key, None)
+
+
+# ---------------- Sizing -----------------
+def deep_sizeof(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """Approximate retained size of `obj` in bytes, following containers and attributes.
+
+    DataFrames, NumPy arrays and Arrow tables report their buffers directly
+    instead of being walked element by element.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    memory_usage = getattr(obj, "memory_usage", None)
+    if callable(memory_usage) and hasattr(obj, "columns"):  # pandas DataFrame
+        return int(memory_usage(index=True, deep=True).sum())
+    if callable(memory_usage) and hasattr(obj, "index"):  # pandas Series
+        return int(memory_usage(index=True, deep=True))
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):  # numpy array, pyarrow Table/Array
+        return nbytes + sys.getsizeof(obj)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    for slot in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, slot):
+            size += deep_sizeof(getattr(obj, slot), seen)
+    return size
+
+
+def measure_state(
+    state: MutableMapping[str, Any], known: Optional[Dict[str, Tuple[int, int]]] = None
+) -> Tuple[int, Dict[str, int], Dict[str, Tuple[int, int]]]:
+    """Return (total bytes, {key: bytes}, {key: (object id, bytes)}) for a session_state-like mapping.
+
+    `known` is the last call's third value: a key still holding the same
+    object reuses its size instead of being walked again.
+    """
+    sizes: Dict[str, int] = {}
+    measured: Dict[str, Tuple[int, int]] = {}
+    seen: Set[int] = set()
+    for key in list(state.keys()):
+        try:
+            value = state[key]
+        except Exception:  # widgets and other lazily-created values
+            sizes[key] = 0
+            continue
+        previous = known.get(key) if known else None
+        if previous is not None and previous[0] == id(value):
+            size = previous[1]
+        else:
+            try:
+                size = deep_sizeof(value, seen)
+            except Exception:
+                size = 0
+        sizes[key] = size
+        measured[key] = (id(value), size)
+    return sum(sizes.values()), sizes, measured
+
+
+def enforce_budget(
+    state: MutableMapping[str, Any], sizes: Dict[str, int], budget: int = SESSION_BUDGET_BYTES
+) -> List[str]:
+    """Evict (or shrink) the largest rebuildable caches until the session fits its budget.
+
+    Returns the evicted keys.
+    """
+    total = sum(sizes.values())
+    evicted = []
+    for key in sorted(EVICTABLE_KEYS, key=lambda k: sizes.get(k, 0), reverse=True):
+        if total <= budget:
+            break
+        if key not in state:
+            continue
+        total -= sizes.get(key, 0)
+        shrink = SHRINKERS.get(key)
+        if shrink is not None:
+            shrink(state[key])
+        else:
+            del state[key]
+        for companion in EVICTABLE_KEYS[key]:
+            state.pop(companion, None)
+        evicted.append(key)
+    return evicted
+
+
+# ---------------- Session report -----------------
+_sessions: Dict[str, Dict[str, Any]] = {}
+_sessions_lock = threading.Lock()
+
+
+def account_session(
+    session_id: str, state: MutableMapping[str, Any], page: str, budget: int = SESSION_BUDGET_BYTES
+) -> List[str]:
+    """Measure one session's state, enforce its budget and record it for the admin report.
+
+    Sessions can only see their own state, so each one reports itself at the
+    end of its reruns. Values still holding the object measured on the
+    previous rerun keep their size; everything is walked again every
+    REMEASURE_EVERY reruns, which catches containers grown in place.
+    """
+    with _sessions_lock:
+        previous = _sessions.get(session_id, {})
+    reruns = previous.get("reruns", 0) + 1
+    known = previous.get("_measured") if reruns % REMEASURE_EVERY else None
+    total, sizes, measured = measure_state(state, known)
+    evicted = enforce_budget(state, sizes, budget) if total > budget else []
+    if evicted:
+        total, sizes, measured = measure_state(state)
+    with _sessions_lock:
+        _sessions[session_id] = {
+            "session": session_id[:8],
+            "page": page,
+            "bytes": total,
+            "largest_key": max(sizes, key=sizes.get) if sizes else None,
+            "keys": sizes,
+            "evictions": previous.get("evictions", 0) + len(evicted),
+            "updated": time.time(),
+            "reruns": reruns,
+            "_measured": measured,
+        }
+    return evicted
+
+
+def session_report(max_age: float = 3600) -> List[Dict[str, Any]]:
+    """Per-session sizes (largest first), forgetting sessions idle longer than max_age."""
+    cutoff = time.time() - max_age
+    with _sessions_lock:
+        for session_id in [s for s, r in _sessions.items() if r["updated"] < cutoff]:
+            del _sessions[session_id]
+        report = [{k: v for k, v in r.items() if not k.startswith("_")} for r in _sessions.values()]
+    return sorted(report, key=lambda r: r["bytes"], reverse=True)
+
+
+# ---------------- Allocation tracing -----------------
+_traces: Dict[str, deque] = {}
+_traces_lock = threading.Lock()
+
+
+def set_tracing(enabled: bool) -> None:
+    """Turn tracemalloc on or off for the whole process (it slows every allocation)."""
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start(TRACE_FRAMES)
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def tracing_enabled() -> bool:
+    return tracemalloc.is_tracing()
+
+
+class PageTrace:
+    """Diff of tracemalloc snapshots around one page render.
+
+    The tracer is process-wide, so allocations from other sessions rendering
+    at the same time show up too; read the results as "what this page and
+    its neighbours allocated".
+    """
+
+    def __init__(self, page: str):
+        self.page = page
+        self._before = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+
+    def stop(self) -> None:
+        if self._before is None or not tracemalloc.is_tracing():
+            return
+        after = tracemalloc.take_snapshot()
+        top = after.compare_to(self._before, "lineno")[:TOP_ALLOCATORS]
+        current, peak = tracemalloc.get_traced_memory()
+        with _traces_lock:
+            _traces.setdefault(self.page, deque(maxlen=TRACES_PER_PAGE)).append({
+                "at": time.time(),
+                "current": current,
+                "peak": peak,
+                "top": [(str(stat.traceback[0]), stat.size_diff, stat.count_diff) for stat in top],
+            })
+
+
+def page_traces() -> Dict[str, List[Dict[str, Any]]]:
+    """Return {page: [trace, ...]} with the most recent trace last."""
+    with _traces_lock:
+        return {page: list(traces) for page, traces in _traces.items()}
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
@@ -0,0 +1,350 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, MutableMapping, Optional, Sequence, Tuple
+
+from .memory import PageTrace, account_session
+
+# ---------------- Constants -----------------
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_TEXTFILE = os.environ.get("METRICS_TEXTFILE")  # e.g. DATA/metrics.prom for node_exporter
+TEXTFILE_INTERVAL = 15
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SESSION_IDLE_SECONDS = 300
+
+
+def _label_key(labelnames: Sequence[str], labels: Dict[str, Any]) -> Tuple[str, ...]:
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(
+    labelnames: Sequence[str], key: Tuple[str, ...], extra: Iterable[Tuple[str, str]] = ()
+) -> str:
+    pairs = list(zip(labelnames, key)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ---------------- Metric types -----------------
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. logins_total{outcome="success"}."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items
+        ]
+
+
+class Gauge(_Metric):
+    """A value that goes up and down. set_function() makes it computed at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[_label_key(self.labelnames, labels)] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def render(self) -> List[str]:
+        if self._function is not None:
+            items = [((), self._function())]
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items
+        ]
+
+
+class Histogram(_Metric):
+    """Bucketed observations (seconds by default) with _bucket, _sum and _count series."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help_text: str, labelnames: Iterable[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def time(self, **labels: Any) -> "_Timer":
+        """Context manager observing the elapsed time of its block."""
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = self._header()
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> bool:
+        self.elapsed = time.perf_counter() - self._start
+        self._histogram.observe(self.elapsed, **self._labels)
+        return False
+
+
+# ---------------- Registry -----------------
+class MetricsRegistry:
+    """Process-wide metrics. Getters are idempotent, so Streamlit reruns reuse the same metric."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls: type, name: str, help_text: str, labelnames: Iterable[str], **kwargs: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._get(Gauge, name, help_text, labelnames)
+
+    def histogram(
+        self, name: str, help_text: str, labelnames: Iterable[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# ---------------- Application metrics -----------------
+LOGINS = REGISTRY.counter("app_logins_total", "Login attempts by outcome.", ["outcome"])
+REGISTRATIONS = REGISTRY.counter("app_registrations_total", "User registrations by outcome.", ["outcome"])
+CSV_ROWS = REGISTRY.counter("app_csv_import_rows_total", "Rows imported from CSV files.", ["table"])
+CSV_SECONDS = REGISTRY.histogram("app_csv_import_seconds", "Duration of CSV imports.", ["table"])
+CSV_ROWS_PER_SECOND = REGISTRY.gauge(
+    "app_csv_import_rows_per_second", "Throughput of the last CSV import.", ["table"]
+)
+CACHE_REQUESTS = REGISTRY.counter("app_cache_requests_total", "Cache lookups by cache and result.", ["cache", "result"])
+PAGE_SECONDS = REGISTRY.histogram("app_page_render_seconds", "Script rerun duration per page.", ["page"])
+ACTIVE_SESSIONS = REGISTRY.gauge(
+    "app_active_sessions", f"Sessions seen in the last {SESSION_IDLE_SECONDS} seconds."
+)
+
+_sessions: Dict[str, float] = {}
+_sessions_lock = threading.Lock()
+
+
+def touch_session(session_id: str) -> None:
+    """Mark a session as active; the gauge counts sessions seen within SESSION_IDLE_SECONDS."""
+    with _sessions_lock:
+        _sessions[session_id] = time.monotonic()
+
+
+def _count_active_sessions() -> int:
+    cutoff = time.monotonic() - SESSION_IDLE_SECONDS
+    with _sessions_lock:
+        for session_id in [s for s, seen in _sessions.items() if seen < cutoff]:
+            del _sessions[session_id]
+        return len(_sessions)
+
+
+ACTIVE_SESSIONS.set_function(_count_active_sessions)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+class PageTimer:
+    """Times one page rerun: start_page() at the top of the script, stop() at the bottom.
+
+    Given the session's state it also does the per-rerun memory accounting
+    (size report, budget eviction, optional tracemalloc diff).
+    Also usable as a context manager. Reruns cut short by st.stop() are not recorded.
+    """
+
+    def __init__(
+        self,
+        page: str,
+        session_id: Optional[str] = None,
+        session_state: Optional[MutableMapping[str, Any]] = None
+    ):
+        self.page = page
+        self._session_id = session_id
+        self._session_state = session_state
+        self._trace = PageTrace(page)
+        self._start = time.perf_counter()
+
+    def stop(self) -> None:
+        PAGE_SECONDS.observe(time.perf_counter() - self._start, page=self.page)
+        self._trace.stop()
+        if self._session_id is not None and self._session_state is not None:
+            account_session(self._session_id, self._session_state, self.page)
+
+    def __enter__(self) -> "PageTimer":
+        return self
+
+    def __exit__(self, *exc: Any) -> bool:
+        self.stop()
+        return False
+
+
+def start_page(
+    page: str,
+    session_id: Optional[str] = None,
+    session_state: Optional[MutableMapping[str, Any]] = None
+) -> PageTimer:
+    if session_id is not None:
+        touch_session(session_id)
+    return PageTimer(page, session_id, session_state)
+
+
+# ---------------- Exporters -----------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # keep scrapes out of the app log
+        pass
+
+
+def write_textfile(path: str) -> None:
+    """Atomically write the current metrics to `path` (node_exporter textfile format)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(REGISTRY.render(), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+_exporter: Optional[str] = None
+_exporter_lock = threading.Lock()
+
+
+def start_exporter(
+    port: int, host: str = METRICS_HOST, textfile: Optional[str] = METRICS_TEXTFILE
+) -> Optional[str]:
+    """Start exposing metrics once per process (each app passes its own METRICS_PORT).
+
+    Serves http://host:port/metrics, or if `textfile` is set, rewrites that
+    file every TEXTFILE_INTERVAL seconds instead. Returns a description of
+    where metrics can be read, or None if the port was taken.
+    """
+    global _exporter
+    with _exporter_lock:
+        if _exporter is not None:
+            return _exporter
+        if textfile:
+            def loop() -> None:
+                while True:
+                    write_textfile(textfile)
+                    time.sleep(TEXTFILE_INTERVAL)
+            threading.Thread(target=loop, name="metrics-textfile", daemon=True).start()
+            _exporter = str(textfile)
+        else:
+            try:
+                server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError:
+                return None  # another process (e.g. a second app) already serves this port
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+            _exporter = f"http://{host}:{port}/metrics"
+        return _exporter
@@ -0,0 +1,319 @@
+import random
+import re
+import sqlite3
+import threading
+import zlib
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .writer import get_writer
+
+try:
+    import numpy as np
+except ImportError:  # same signatures in pure Python, just slower
+    np = None
+
+# ---------------- Constants -----------------
+NUM_PERM = 60
+BANDS = 20                 # 20 bands x 3 rows: pairs at 0.6 similarity collide ~99% of the time
+ROWS = NUM_PERM // BANDS
+DUPLICATE_THRESHOLD = 0.6  # estimated Jaccard similarity of the shingle sets
+SHINGLE = 3                # character shingles suit short one-line descriptions
+SYNC_BATCH = 500           # change-log entries clustered per write transaction
+
+_PRIME = (1 << 31) - 1  # a * x + b stays below 2**63, so NumPy can hash in uint64
+_rng = random.Random(20240601)  # fixed seed: stored signatures must stay comparable across runs
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+if np is not None:
+    _PERM_A = np.array([a for a, _ in _PERMS], dtype=np.uint64)[:, None]
+    _PERM_B = np.array([b for _, b in _PERMS], dtype=np.uint64)[:, None]
+_SPACE_RE = re.compile(r"[^a-z0-9]+")
+
+# near_dup_rows maps every row to its cluster; near_dup_clusters keeps one
+# signature per cluster; near_dup_log holds rows inserted but not clustered yet
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS near_dup_rows (
+        domain TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        cluster_id INTEGER NOT NULL,
+        PRIMARY KEY (domain, row_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_near_dup_rows_cluster ON near_dup_rows (domain, cluster_id)",
+    """
+    CREATE TABLE IF NOT EXISTS near_dup_clusters (
+        domain TEXT NOT NULL,
+        cluster_id INTEGER NOT NULL,
+        signature BLOB NOT NULL,
+        PRIMARY KEY (domain, cluster_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS near_dup_log (
+        seq INTEGER PRIMARY KEY,
+        domain TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        text TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_near_dup_log_domain ON near_dup_log (domain, seq)",
+)
+
+
+class DuplicateMatch(NamedTuple):
+    cluster_id: Optional[int]  # None when nothing is similar enough
+    similarity: float
+
+
+# ---------------- Signatures -----------------
+def shingles(text: Optional[str]) -> Set[int]:
+    """Hashes (below _PRIME) of the character shingles of `text`, normalised to lowercase words."""
+    normal = f" {_SPACE_RE.sub(' ', (text or '').lower()).strip()} "
+    if not normal.strip():
+        return set()
+    if len(normal) <= SHINGLE:
+        return {zlib.crc32(normal.encode("utf-8")) % _PRIME}
+    return {zlib.crc32(normal[i:i + SHINGLE].encode("utf-8")) % _PRIME for i in range(len(normal) - SHINGLE + 1)}
+
+
+def minhash(text: Optional[str]) -> Optional[array]:
+    """MinHash signature (NUM_PERM values) of `text`, or None for empty text."""
+    values = shingles(text)
+    if not values:
+        return None
+    if np is not None:
+        x = np.fromiter(values, dtype=np.uint64, count=len(values))[None, :]
+        return array("I", ((_PERM_A * x + _PERM_B) % _PRIME).min(axis=1).tolist())
+    listed = list(values)
+    return array("I", [min([(a * x + b) % _PRIME for x in listed]) for a, b in _PERMS])
+
+
+def similarity(a: array, b: array) -> float:
+    """Estimated Jaccard similarity: the share of positions where two signatures agree."""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def join_text(values: Iterable[object]) -> str:
+    """The text a row is compared by: its text columns joined with spaces."""
+    return " ".join(str(value or "") for value in values)
+
+
+# ---------------- Index -----------------
+class LshIndex:
+    """Banded LSH over one domain's cluster signatures.
+
+    Only the first row of a cluster (its representative) goes into the
+    bands, so an event reported a thousand times still occupies one bucket
+    entry and a check costs one signature plus BANDS dictionary lookups.
+    Safe to share between threads.
+    """
+
+    def __init__(self, domain: str) -> None:
+        self.domain = domain
+        self._lock = threading.Lock()
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+        self._signatures: Dict[int, array] = {}
+
+    def load(self, conn: sqlite3.Connection) -> "LshIndex":
+        """Read the stored cluster signatures; tables missing yet means no clusters."""
+        try:
+            rows = conn.execute(
+                "SELECT cluster_id, signature FROM near_dup_clusters WHERE domain = ?", (self.domain,)
+            ).fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        with self._lock:
+            for cluster_id, blob in rows:
+                signature = array("I")
+                signature.frombytes(blob)
+                self._insert(cluster_id, signature)
+        return self
+
+    @staticmethod
+    def _bands(signature: array) -> List[int]:
+        return [hash(tuple(signature[b * ROWS:(b + 1) * ROWS])) for b in range(BANDS)]
+
+    def _insert(self, cluster_id: int, signature: array) -> None:
+        self._signatures[cluster_id] = signature
+        for band, key in zip(self._buckets, self._bands(signature)):
+            band.setdefault(key, []).append(cluster_id)
+
+    def add(self, cluster_id: int, signature: array) -> None:
+        """Make a committed cluster matchable."""
+        with self._lock:
+            if cluster_id not in self._signatures:
+                self._insert(cluster_id, signature)
+
+    def _match(self, signature: array, staged: Dict[int, array]) -> DuplicateMatch:
+        candidates: Set[int] = set()
+        for band, key in zip(self._buckets, self._bands(signature)):
+            candidates.update(band.get(key, ()))
+        scored = [(cluster_id, self._signatures[cluster_id]) for cluster_id in candidates]
+        scored.extend(staged.items())  # a handful at most: this transaction's new clusters
+        best, best_score = None, 0.0
+        for cluster_id, other in scored:
+            score = similarity(signature, other)
+            if score > best_score:
+                best, best_score = cluster_id, score
+        return DuplicateMatch(best, best_score) if best_score >= DUPLICATE_THRESHOLD else DuplicateMatch(None, 0.0)
+
+    def check(self, text: str) -> DuplicateMatch:
+        """Closest existing cluster for `text`, without recording anything."""
+        signature = minhash(text)
+        if signature is None:
+            return DuplicateMatch(None, 0.0)
+        with self._lock:
+            return self._match(signature, {})
+
+    def assign(
+        self, row_id: int, signature: Optional[array], staged: "StagedClusters"
+    ) -> Tuple[DuplicateMatch, Optional[bytes]]:
+        """Cluster one row: (match, the signature to store if the row starts a new cluster).
+
+        A row unlike any other starts its own cluster (similarity 1.0). The
+        new cluster goes to `staged`, not the index: it joins the index when
+        the transaction storing it commits (staged.apply()).
+        """
+        with self._lock:
+            match = self._match(signature, staged.of(self)) if signature is not None else DuplicateMatch(None, 0.0)
+        if match.cluster_id is not None:
+            return match, None
+        if signature is None:
+            return DuplicateMatch(row_id, 1.0), None
+        staged.add(self, row_id, signature)
+        return DuplicateMatch(row_id, 1.0), signature.tobytes()
+
+    def record_writes(
+        self, row_id: int, text: str, staged: "StagedClusters"
+    ) -> Tuple[DuplicateMatch, List[Tuple[str, tuple]]]:
+        """Cluster a new row; returns the match and the (sql, params) that store it.
+
+        Call staged.apply() once those writes have committed.
+        """
+        match, blob = self.assign(row_id, minhash(text), staged)
+        writes = []
+        if blob is not None:
+            writes.append((
+                "INSERT OR REPLACE INTO near_dup_clusters (domain, cluster_id, signature) VALUES (?, ?, ?)",
+                (self.domain, row_id, blob),
+            ))
+        writes.append((
+            "INSERT OR REPLACE INTO near_dup_rows (domain, row_id, cluster_id) VALUES (?, ?, ?)",
+            (self.domain, row_id, match.cluster_id),
+        ))
+        return match, writes
+
+
+class StagedClusters:
+    """Clusters started by writes that haven't committed yet.
+
+    Rows later in the same transaction already match them; they join their
+    LshIndex only through apply(), after the commit, so a rolled-back
+    insert never leaves a cluster in memory that the database doesn't have.
+    """
+
+    def __init__(self) -> None:
+        self._clusters: List[Tuple[LshIndex, int, array]] = []
+
+    def add(self, index: LshIndex, cluster_id: int, signature: array) -> None:
+        self._clusters.append((index, cluster_id, signature))
+
+    def of(self, index: LshIndex) -> Dict[int, array]:
+        return {cluster_id: signature for owner, cluster_id, signature in self._clusters if owner is index}
+
+    def apply(self) -> None:
+        """Add the staged clusters to their indexes; call after the commit."""
+        clusters, self._clusters = self._clusters, []
+        for index, cluster_id, signature in clusters:
+            index.add(cluster_id, signature)
+
+
+# ---------------- Schema -----------------
+def create_tables(conn: sqlite3.Connection) -> None:
+    """Create the cluster and change-log tables on `conn` without committing."""
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+
+def install_change_log(
+    conn: sqlite3.Connection, domain: str, table: str, key: str, columns: Sequence[str]
+) -> int:
+    """Log every row inserted into `table` to near_dup_log, via a trigger.
+
+    Progress is tracked by draining the log rather than by a key high-water
+    mark, so tables whose keys are not increasing (ids from a CSV) are
+    covered too. When the trigger is new, existing rows that are not
+    clustered yet are logged; returns how many. Run inside the caller's
+    transaction, after create_tables().
+    """
+    trigger = f"near_dup_log_{table}"
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (trigger,)).fetchone():
+        return 0
+    text = " || ' ' || ".join(f"COALESCE(NEW.{c}, '')" for c in columns)
+    conn.execute(f"""
+        CREATE TRIGGER {trigger} AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO near_dup_log (domain, row_id, text) VALUES ('{domain}', NEW.{key}, {text});
+        END
+    """)
+    return backfill_change_log(conn, domain, table, key, columns)
+
+
+def backfill_change_log(
+    conn: sqlite3.Connection, domain: str, table: str, key: str, columns: Sequence[str], schema: str = "main"
+) -> int:
+    """Log rows of `schema`.`table` that are neither clustered nor logged; returns how many."""
+    text = " || ' ' || ".join(f"COALESCE(t.{c}, '')" for c in columns)
+    return conn.execute(f"""
+        INSERT INTO main.near_dup_log (domain, row_id, text)
+        SELECT ?, t.{key}, {text} FROM {schema}.{table} t
+        WHERE NOT EXISTS (SELECT 1 FROM main.near_dup_rows n WHERE n.domain = ? AND n.row_id = t.{key})
+          AND NOT EXISTS (SELECT 1 FROM main.near_dup_log l WHERE l.domain = ? AND l.row_id = t.{key})
+        ORDER BY t.{key}
+    """, (domain, domain, domain)).rowcount
+
+
+# ---------------- Sync -----------------
+def sync(db_path: str, index: LshIndex, batch: int = SYNC_BATCH) -> int:
+    """Cluster the rows waiting in near_dup_log for the index's domain; returns how many.
+
+    Signatures are computed on a read connection; each batch's clusters
+    are stored and its log entries deleted in one transaction on the
+    database's single writer. Rows clustered on insert since they were
+    logged are just dropped from the log.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    clustered = 0
+    try:
+        while True:
+            try:
+                pending = conn.execute("""
+                    SELECT l.seq, l.row_id, l.text, n.cluster_id IS NOT NULL
+                    FROM near_dup_log l
+                    LEFT JOIN near_dup_rows n ON n.domain = l.domain AND n.row_id = l.row_id
+                    WHERE l.domain = ?
+                    ORDER BY l.seq
+                    LIMIT ?
+                """, (index.domain, batch)).fetchall()
+            except sqlite3.OperationalError:  # tables not created yet
+                return clustered
+            if not pending:
+                return clustered
+            writes: List[Tuple[str, tuple]] = []
+            staged = StagedClusters()
+            for _, row_id, text, done in pending:
+                if not done:
+                    writes.extend(index.record_writes(row_id, text, staged)[1])
+                    clustered += 1
+            with get_writer(db_path).transaction() as write_conn:
+                for sql, params in writes:
+                    write_conn.execute(sql, params)
+                write_conn.execute(
+                    "DELETE FROM near_dup_log WHERE domain = ? AND seq <= ?", (index.domain, pending[-1][0])
+                )
+            staged.apply()
+            if len(pending) < batch:
+                return clustered
+    finally:
+        conn.close()
@@ -0,0 +1,258 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# ---------------- Constants -----------------
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "100"))
+SAMPLES_PER_QUERY = 1024   # latencies kept per fingerprint for the percentiles
+SLOW_LOG_SIZE = 200
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")
+
+
+def fingerprint(sql: str) -> str:
+    """Normalize a statement so the same query with different literals groups together."""
+    text = _COMMENT_RE.sub(" ", sql)
+    text = _STRING_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _IN_LIST_RE.sub("(?+)", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+# ---------------- Collector -----------------
+class QueryStat:
+    """Aggregates for one fingerprint."""
+
+    __slots__ = ("count", "total_ms", "max_ms", "rows", "samples", "plan", "full_scan")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.samples: Deque[float] = deque(maxlen=SAMPLES_PER_QUERY)
+        self.plan: Optional[List[str]] = None
+        self.full_scan = False
+
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+class QueryStatsCollector:
+    """In-memory per-fingerprint latency stats plus a bounded slow-query log."""
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self._stats: Dict[str, QueryStat] = {}
+        self._slow: Deque[Dict[str, Any]] = deque(maxlen=SLOW_LOG_SIZE)
+        self._lock = threading.Lock()
+
+    def record(
+        self, conn: sqlite3.Connection, sql: str, params: Any, elapsed_ms: float, rows: int
+    ) -> None:
+        key = fingerprint(sql)
+        with self._lock:
+            stat = self._stats.get(key)
+            if stat is None:
+                stat = self._stats[key] = QueryStat()
+            stat.count += 1
+            stat.total_ms += elapsed_ms
+            stat.max_ms = max(stat.max_ms, elapsed_ms)
+            stat.rows += max(rows, 0)
+            stat.samples.append(elapsed_ms)
+            needs_plan = elapsed_ms >= self.slow_ms and stat.plan is None
+        if elapsed_ms < self.slow_ms:
+            return
+
+        if needs_plan:
+            plan = explain(conn, sql, params)
+            with self._lock:
+                stat.plan = plan
+                stat.full_scan = any(is_full_scan(step) for step in plan)
+        with self._lock:
+            self._slow.append({
+                "at": time.time(),
+                "ms": round(elapsed_ms, 2),
+                "rows": rows,
+                "sql": key,
+                "plan": stat.plan,
+                "full_scan": stat.full_scan,
+            })
+        logger.warning(
+            "Slow query (%.1f ms%s): %s", elapsed_ms, ", FULL SCAN" if stat.full_scan else "", key
+        )
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return one dict per fingerprint, most total time first."""
+        with self._lock:
+            items = list(self._stats.items())
+        result = [
+            {
+                "sql": sql,
+                "count": stat.count,
+                "total_ms": round(stat.total_ms, 2),
+                "p50_ms": round(stat.percentile(50), 2),
+                "p95_ms": round(stat.percentile(95), 2),
+                "max_ms": round(stat.max_ms, 2),
+                "rows": stat.rows,
+                "full_scan": stat.full_scan,
+                "plan": stat.plan,
+            }
+            for sql, stat in items
+        ]
+        return sorted(result, key=lambda row: row["total_ms"], reverse=True)
+
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+
+    def dump(self, path: Path) -> Path:
+        """Write stats and the slow log as JSON to `path` (each app passes its STATS_FILE) and return it."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"generated_at": time.time(), "slow_ms": self.slow_ms,
+                   "queries": self.stats(), "slow_log": self.slow_queries()}
+        path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        return path
+
+
+COLLECTOR = QueryStatsCollector()
+
+
+def explain(conn: sqlite3.Connection, sql: str, params: Any = ()) -> List[str]:
+    """Return EXPLAIN QUERY PLAN detail lines for a statement ([] if it can't be explained)."""
+    if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+        return []
+    try:
+        return [row[3] for row in sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params)]
+    except sqlite3.Error:
+        return []
+
+
+def is_full_scan(step: str) -> bool:
+    """SCAN without an index is a full table scan (SEARCH / USING INDEX are fine)."""
+    return step.startswith("SCAN ") and "USING" not in step and "CONSTANT ROW" not in step
+
+
+# ---------------- Instrumented connection -----------------
+class TimedCursor(sqlite3.Cursor):
+    """Times execute() plus the fetches that follow it, and counts rows returned.
+
+    SQLite does most of a SELECT's work while rows are being stepped, so a
+    statement is only recorded once its rows are consumed (or the cursor is
+    reused or closed).
+    """
+
+    _pending: Optional[list] = None  # [sql, params, elapsed_ms, rows]
+
+    def _finish(self) -> None:
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, params, elapsed, rows = pending
+            if self.description is None and self.rowcount > 0:
+                rows = self.rowcount  # DML: rows changed
+            COLLECTOR.record(self.connection, sql, params, elapsed, rows)
+
+    def _timed(self, call: Callable[[], Any], sql: str, params: Any) -> Any:
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return call()
+        finally:
+            self._pending = [sql, params, (time.perf_counter() - start) * 1000, 0]
+            if self.description is None:
+                self._finish()
+
+    def execute(self, sql: str, params: Any = ()) -> "TimedCursor":
+        return self._timed(lambda: super(TimedCursor, self).execute(sql, params), sql, params)
+
+    def executemany(self, sql: str, seq_of_params: Iterable[Any]) -> "TimedCursor":
+        return self._timed(lambda: super(TimedCursor, self).executemany(sql, seq_of_params), sql, ())
+
+    def _fetch(self, call: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        rows = call()
+        if self._pending is not None:
+            self._pending[2] += (time.perf_counter() - start) * 1000
+        return rows
+
+    def fetchone(self) -> Any:
+        row = self._fetch(super().fetchone)
+        if self._pending is not None:
+            if row is None:
+                self._finish()
+            else:
+                self._pending[3] += 1
+        return row
+
+    def fetchmany(self, size: Optional[int] = None) -> List[Any]:
+        rows = self._fetch(lambda: super(TimedCursor, self).fetchmany(size or self.arraysize))
+        if self._pending is not None:
+            self._pending[3] += len(rows)
+            if len(rows) < (size or self.arraysize):
+                self._finish()
+        return rows
+
+    def fetchall(self) -> List[Any]:
+        rows = self._fetch(super().fetchall)
+        if self._pending is not None:
+            self._pending[3] += len(rows)
+            self._finish()
+        return rows
+
+    def __iter__(self) -> "TimedCursor":
+        return self
+
+    def __next__(self) -> Any:
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self) -> None:
+        self._finish()
+        super().close()
+
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection whose statements are all recorded in COLLECTOR.
+
+    Use as sqlite3.connect(path, factory=TimedConnection).
+    """
+
+    def cursor(self, factory: type = TimedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, params: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql: str, seq_of_params: Iterable[Any]) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+def connect(path: str, **kwargs: Any) -> sqlite3.Connection:
+    """sqlite3.connect() with query statistics enabled."""
+    return sqlite3.connect(path, factory=TimedConnection, **kwargs)
+
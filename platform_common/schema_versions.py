@@ -0,0 +1,25 @@
+import sqlite3
+
+
+def applied_version(conn: sqlite3.Connection, component: str) -> int:
+    """Version of `component` recorded by mark_applied(), or 0 if it never ran."""
+    try:
+        row = conn.execute("SELECT version FROM schema_versions WHERE component = ?", (component,)).fetchone()
+    except sqlite3.OperationalError:  # no migration has run yet
+        return 0
+    return row[0] if row else 0
+
+
+def mark_applied(conn: sqlite3.Connection, component: str, version: int) -> None:
+    """Record that `component` is migrated to `version`; run it in the migration's transaction."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_versions (
+            component TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    """)
+    conn.execute(
+        "INSERT INTO schema_versions (component, version) VALUES (?, ?) "
+        "ON CONFLICT(component) DO UPDATE SET version = excluded.version",
+        (component, version),
+    )
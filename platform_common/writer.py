@@ -0,0 +1,244 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .query_stats import TimedConnection
+
+
+class _WriteRequest:
+    """One queued write and the Future its caller is waiting on.
+
+    A lease (sql None) asks for the connection itself: its Future resolves
+    to the connection and the writer waits for `released` before going on.
+    """
+
+    __slots__ = ("sql", "params", "many", "future", "released")
+
+    def __init__(self, sql: Optional[str], params: Any, many: bool):
+        self.sql = sql
+        self.params = params
+        self.many = many
+        self.future: Future = Future()
+        self.released: Optional[threading.Event] = threading.Event() if sql is None else None
+
+
+class SingleWriter:
+    """One writer thread per database file with group commit.
+
+    Callers put write statements on a queue and get a Future back. The
+    writer takes whatever is pending (up to max_batch, waiting at most
+    max_latency seconds for more) and applies it in one transaction, so
+    concurrent sessions share a single fsync instead of fighting over the
+    write lock. Each statement runs in its own savepoint, so one failing
+    statement only fails its own Future.
+
+    Work that needs more than single statements (several statements in one
+    transaction, ATTACH, schema changes) borrows the writer's connection
+    with connection() or transaction(), so it still queues behind the
+    other writes instead of taking the write lock on a second connection.
+    If the writer cannot open the database, every pending and later
+    request fails with that error instead of waiting forever.
+    """
+
+    def __init__(self, db_path: str, max_batch: int = 256, max_latency: float = 0.005):
+        self._db_path = db_path
+        self._max_batch = max_batch
+        self._max_latency = max_latency
+        self._queue: "queue.Queue[Optional[_WriteRequest]]" = queue.Queue()
+        self._state_lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+        self._lent_to: Optional[int] = None  # thread holding the connection
+        self._held: Optional[_WriteRequest] = None  # lease that ended the batch being collected
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def failed(self) -> bool:
+        return self._error is not None
+
+    def _put(self, request: _WriteRequest) -> Future:
+        if self._lent_to == threading.get_ident():
+            raise RuntimeError("Queueing a write while holding the writer's connection would deadlock")
+        with self._state_lock:
+            if self._error is not None:
+                request.future.set_exception(self._error)
+            else:
+                self._queue.put(request)
+        return request.future
+
+    def submit(self, sql: str, params: Iterable[Any] = ()) -> Future:
+        """Queue one statement. The Future resolves to cursor.lastrowid after commit."""
+        return self._put(_WriteRequest(sql, tuple(params), many=False))
+
+    def submit_many(self, sql: str, seq_of_params: Iterable[Iterable[Any]]) -> Future:
+        """Queue an executemany. The Future resolves to the row count after commit."""
+        return self._put(_WriteRequest(sql, [tuple(p) for p in seq_of_params], many=True))
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow the writer's connection between two group commits.
+
+        The connection is in autocommit mode with no transaction open; the
+        block manages its own (BEGIN ... COMMIT) and may ATTACH databases.
+        Queued writes wait until the block ends. Don't call submit() from
+        inside the block: it would wait on the writer, which waits on you.
+        """
+        lease = _WriteRequest(None, None, many=False)
+        conn = self._put(lease).result()
+        self._lent_to = threading.get_ident()
+        try:
+            yield conn
+        finally:
+            self._lent_to = None
+            lease.released.set()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a block of statements as one transaction on the writer's connection.
+
+        Committed when the block ends, rolled back if it raises.
+        """
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    # ---- writer thread ----
+    def _collect(self, first: _WriteRequest) -> Tuple[List[_WriteRequest], bool]:
+        """Gather pending requests until max_batch, the latency bound or a lease is reached."""
+        batch = [first]
+        deadline = time.monotonic() + self._max_latency
+        while len(batch) < self._max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            if request.sql is None:
+                self._held = request  # lent out once this batch is committed
+                break
+            batch.append(request)
+        return batch, False
+
+    def _apply(self, conn: sqlite3.Connection, batch: List[_WriteRequest]) -> None:
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for request in batch:
+                conn.execute("SAVEPOINT write_request")
+                try:
+                    if request.many:
+                        cur = conn.executemany(request.sql, request.params)
+                        value = cur.rowcount
+                    else:
+                        cur = conn.execute(request.sql, request.params)
+                        value = cur.lastrowid
+                    conn.execute("RELEASE write_request")
+                    outcomes.append((request, value, None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_request")
+                    conn.execute("RELEASE write_request")
+                    outcomes.append((request, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        # Futures resolve only once the whole group is durable
+        for request, value, error in outcomes:
+            if error is None:
+                request.future.set_result(value)
+            else:
+                request.future.set_exception(error)
+
+    def _lend(self, conn: sqlite3.Connection, lease: _WriteRequest) -> None:
+        lease.future.set_result(conn)
+        lease.released.wait()
+        if conn.in_transaction:  # the borrower left a transaction open
+            conn.execute("ROLLBACK")
+
+    def _fail_pending(self, error: BaseException) -> None:
+        """Fail every queued request, and every later one, with `error`."""
+        with self._state_lock:
+            self._error = error
+            pending = [self._held] if self._held is not None else []
+            self._held = None
+            while True:
+                try:
+                    request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is not None:
+                    pending.append(request)
+        for request in pending:
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    def _run(self) -> None:
+        try:
+            conn = sqlite3.connect(
+                self._db_path, isolation_level=None, timeout=30, factory=TimedConnection, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")  # readers keep working while we write
+        except Exception as e:
+            self._fail_pending(e)
+            return
+        try:
+            stop = False
+            while not stop:
+                first = self._queue.get()
+                if first is None:
+                    break
+                if first.sql is None:
+                    self._lend(conn, first)
+                    continue
+                batch, stop = self._collect(first)
+                self._apply(conn, batch)
+                if self._held is not None:
+                    lease, self._held = self._held, None
+                    self._lend(conn, lease)
+        except BaseException as e:
+            self._fail_pending(e)
+            raise
+        finally:
+            self._fail_pending(RuntimeError("The database writer has stopped"))
+            conn.close()
+
+
+_writers: Dict[str, SingleWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path: str) -> SingleWriter:
+    """Return the process-wide writer for a database file, starting it if needed.
+
+    A writer that failed to open its database is replaced, so the next
+    caller retries instead of inheriting the old error forever.
+    """
+    key = os.path.abspath(db_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or writer.failed:
+            writer = SingleWriter(key)
+            _writers[key] = writer
+        return writer
@@ -3,13 +3,15 @@ import csv
 import sqlite3
 import bcrypt
 
+from app.data.query_stats import TimedConnection
+
 # ---------------- Constants -----------------
 DATA_FOLDER = "DATA"
 DB_FILE = "intelligence_platform.db"
 
 # ---------------- Database -----------------
 def connect_db():
-    return sqlite3.connect(DB_FILE)
+    return sqlite3.connect(DB_FILE, factory=TimedConnection)
 
 def create_tables():
     conn = connect_db()
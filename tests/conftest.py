@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# multi_domain_platform runs from its own directory (imports like `services.x`)
+_PLATFORM = str(Path(__file__).resolve().parents[1] / "multi_domain_platform")
+if _PLATFORM not in sys.path:
+    sys.path.append(_PLATFORM)
@@ -0,0 +1,46 @@
+import pytest
+
+from services.ai_assistant import AIAssistant
+from services.ai_backends import RuleBasedBackend
+from services.inference_gateway import GatewayOverloaded
+
+
+def test_shed_history_keeps_recent_turns_without_calling_the_backend():
+    assistant = AIAssistant(keep_recent_turns=1)
+    for i in range(4):
+        assistant.send_message(f"question {i}")
+    assert len(assistant.history) == 8
+
+    assistant.shed_history()
+    assert [m["content"] for m in assistant.history][0] == "question 3"
+    assert len(assistant.history) == 2
+    assert "6 earlier messages" in assistant.summary
+
+
+class _OverloadedBackend(RuleBasedBackend):
+    def stream(self, messages):
+        raise GatewayOverloaded()
+        yield  # a generator, like the gateway client's stream
+
+    def summarize(self, messages, max_tokens):
+        raise AssertionError("summarize() called")
+
+
+def test_refused_request_leaves_no_empty_reply():
+    assistant = AIAssistant()
+    assistant.send_message("How do I log in?")
+    assistant._backend = _OverloadedBackend()
+    with pytest.raises(GatewayOverloaded):
+        assistant.send_message("What about tickets?")
+    assert [m["role"] for m in assistant.history] == ["user", "assistant"]
+    assert all(m["content"] for m in assistant.history)
+
+
+def test_context_tokens_never_summarizes():
+    assistant = AIAssistant(backend=_OverloadedBackend(), max_context_tokens=120, reply_tokens=20, keep_recent_turns=1)
+    for i in range(6):  # turns that no longer fit; the next reply would fold them into the summary
+        assistant._history.append({"role": "user", "content": f"question {i} about incidents and tickets " * 3})
+        assistant._history.append({"role": "assistant", "content": f"answer {i} about the platform pages " * 3})
+    history = assistant.history
+    assert assistant.context_tokens() <= 120 - 20
+    assert assistant.history == history and assistant.summary == ""
@@ -0,0 +1,76 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+from app.data.archive import archive_all, archive_rows, get_archived_rows
+from app.data.lookups import encode_categorical_columns, label_rows
+from app.data.shards import ShardRouter
+from app.data.writer import get_writer
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the archive and shards live under ./DATA
+    conn = sqlite3.connect(str(tmp_path / "main.db"))
+    conn.execute("""
+        CREATE TABLE cyber_incidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, incident_type TEXT, severity TEXT,
+            status TEXT, description TEXT, reported_by TEXT
+        )
+    """)
+    encode_categorical_columns(conn)
+    conn.executemany(
+        "INSERT INTO cyber_incidents (date, incident_type, severity, status, description) VALUES (?, ?, ?, ?, ?)",
+        [
+            ("2023-12-10", "Phishing", "Critical", "Closed", "old, in a shard"),
+            ("2024-01-10", "Phishing", "high", "Closed", "old, in another shard"),
+            ("2024-02-10", "Malware", "Low", "Resolved", "old, in main"),
+            ("2024-02-11", "Malware", "Low", "Open", "still open"),
+        ],
+    )
+    conn.commit()
+    router = ShardRouter(conn)
+    router.migrate("cyber_incidents", before_month="2024-02")
+    router.detach_all()
+    yield conn
+    conn.close()
+
+
+def test_archive_moves_rows_from_main_and_shards(conn):
+    conn.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, 2)  # the archive plus one of the two shards
+    assert archive_rows(conn, "cyber_incidents", today=date(2024, 6, 1)) == 3
+    assert conn.execute("SELECT description FROM main.cyber_incidents").fetchall() == [("still open",)]
+    archived = get_archived_rows(conn, "cyber_incidents")
+    assert sorted(row["description"] for row in archived) == ["old, in a shard", "old, in another shard", "old, in main"]
+
+
+def test_archived_rows_get_the_live_labels(conn):
+    archive_rows(conn, "cyber_incidents", today=date(2024, 6, 1))
+    rows = label_rows(conn, "cyber_incidents", get_archived_rows(conn, "cyber_incidents"))
+    assert [row["severity"] for row in rows] == ["Critical", "High", "Low"]
+    assert not any(column.endswith("_code") for row in rows for column in row)
+
+
+def test_archive_all_runs_on_the_single_writer(conn, tmp_path):
+    conn.execute("""
+        CREATE TABLE it_tickets (
+            ticket_id INTEGER PRIMARY KEY, title TEXT, status TEXT, priority TEXT, assigned_to TEXT, created_on TEXT
+        )
+    """)
+    conn.commit()
+    writer = get_writer(str(tmp_path / "main.db"))
+    queued = writer.submit(
+        "INSERT INTO it_tickets (ticket_id, title, status, created_on) VALUES (?, ?, ?, ?)",
+        (7, "VPN down", "Closed", "2024-01-05"),
+    )
+    try:
+        archived = archive_all(db_path=str(tmp_path / "main.db"))
+        queued.result(timeout=5)
+        with writer.connection() as writer_conn:
+            attached = [row[1] for row in writer_conn.execute("PRAGMA database_list")]
+    finally:
+        writer.close()
+    assert archived["cyber_incidents"] == 3
+    assert archived["it_tickets"] in (0, 1)  # the queued ticket lands before or after its lease
+    assert attached == ["main"]  # the archive and shards are detached again
@@ -0,0 +1,38 @@
+import sqlite3
+import time
+
+import pytest
+
+from services.async_database_manager import AsyncDatabaseManager, QueryCancelled
+
+ENDLESS = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT COUNT(*) FROM n"
+
+
+@pytest.fixture
+def adb(tmp_path):
+    path = str(tmp_path / "platform.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE tickets (id INTEGER PRIMARY KEY, status TEXT)")
+    conn.executemany("INSERT INTO tickets (status) VALUES (?)", [("Open",), ("Closed",), ("Open",)])
+    conn.commit()
+    conn.close()
+    adb = AsyncDatabaseManager(path)
+    yield adb
+    adb.close()
+
+
+def test_load_runs_named_queries(adb):
+    summary = adb.load({
+        "total": ("SELECT COUNT(*) FROM tickets", ()),
+        "open": ("SELECT COUNT(*) FROM tickets WHERE status = ?", ("Open",)),
+    })
+    assert summary == {"total": [(3,)], "open": [(2,)]}
+
+
+def test_load_interrupts_queries_past_the_timeout(adb):
+    started = time.monotonic()
+    with pytest.raises(QueryCancelled):
+        adb.load({"slow": (ENDLESS, ()), "fast": ("SELECT 1", ())}, timeout=0.2)
+    assert time.monotonic() - started < 5
+    # The pool's connections still work afterwards
+    assert adb.load({"total": ("SELECT COUNT(*) FROM tickets", ())}) == {"total": [(3,)]}
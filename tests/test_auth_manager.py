@@ -0,0 +1,40 @@
+from platform_common.login_throttle import LoginThrottle
+from services.auth_manager import AuthManager
+from services.database_manager import DatabaseManager
+from services.metrics import LOGINS
+
+
+def _auth(tmp_path, throttle):
+    db = DatabaseManager(str(tmp_path / "auth.db"))
+    db.execute_query("CREATE TABLE users (username TEXT PRIMARY KEY, password_hash TEXT NOT NULL, role TEXT NOT NULL)")
+    auth = AuthManager(db, throttle)
+    auth.register_user("alice", "secret")
+    return auth
+
+
+def _throttled_count():
+    return LOGINS.value(outcome="throttled")
+
+
+def test_login_is_throttled_after_repeated_failures(tmp_path):
+    auth = _auth(tmp_path, LoginThrottle(max_failures=3, lockout_seconds=60))
+    for _ in range(3):
+        assert auth.login_user("alice", "wrong") is None
+    before = _throttled_count()
+    # Locked out even with the right password
+    assert auth.login_user("alice", "secret") is None
+    assert auth.is_throttled("alice")
+    assert _throttled_count() == before + 1
+
+
+def test_success_resets_failures_and_lockout_expires(tmp_path):
+    throttle = LoginThrottle(max_failures=2, lockout_seconds=60)
+    auth = _auth(tmp_path, throttle)
+    auth.login_user("alice", "wrong")
+    assert auth.login_user("alice", "secret") is not None
+    auth.login_user("alice", "wrong")
+    assert not auth.is_throttled("alice")
+
+    throttle.lockout_seconds = 0
+    auth.login_user("alice", "wrong")
+    assert auth.login_user("alice", "secret") is not None
@@ -0,0 +1,91 @@
+import io
+import os
+
+import pytest
+
+from services import blob_store
+from services.blob_store import BlobStore, content_defined_chunks
+from services.csv_index import CsvOffsetIndex
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Same algorithm, kilobyte-sized chunks instead of megabytes
+    monkeypatch.setattr(blob_store, "MIN_CHUNK", 1024)
+    monkeypatch.setattr(blob_store, "MAX_CHUNK", 8192)
+    monkeypatch.setattr(blob_store, "READ_SIZE", 1000)
+    monkeypatch.setattr(blob_store, "_BOUNDARY_MASK", 15)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(str(tmp_path / "blobs"))
+
+
+def _csv(rows, start=0):
+    return "".join(f"{i},event {i},{i * 7 % 13}\n" for i in range(start, start + rows)).encode()
+
+
+def test_chunks_end_on_line_boundaries_between_the_size_limits():
+    data = _csv(2000)
+    chunks = list(content_defined_chunks(io.BytesIO(data)))
+    assert b"".join(chunks) == data
+    assert all(1024 <= len(c) <= 8192 for c in chunks[:-1])
+    assert all(c.endswith(b"\n") for c in chunks)
+
+
+def test_no_chunk_exceeds_the_maximum():
+    data = _csv(200) + b"x" * 20000 + b"\n" + _csv(200)  # one line longer than MAX_CHUNK
+    chunks = list(content_defined_chunks(io.BytesIO(data)))
+    assert b"".join(chunks) == data
+    assert max(len(c) for c in chunks) == 8192
+
+
+def test_reads_return_the_stored_bytes(store):
+    data = _csv(3000)
+    ref = store.put(io.BytesIO(data))
+    assert (ref.size, ref.new_bytes) == (len(data), len(data))
+    with store.open(ref.manifest_path) as reader:
+        assert len(store.manifest(ref.manifest_path)["chunks"]) > 3
+        assert reader.read() == data
+        assert reader.read_range(5000, 9000) == data[5000:14000]  # spans several chunks
+        assert reader.read_range(len(data) - 3, 100) == data[-3:]
+        reader.seek(-10, io.SEEK_END)
+        assert reader.read() == data[-10:]
+
+
+def test_identical_upload_writes_nothing(store, tmp_path):
+    path = tmp_path / "events.csv"
+    path.write_bytes(_csv(3000))
+    first = store.put_file(str(path))
+    second = store.put(io.BytesIO(path.read_bytes()))
+    assert second.new_bytes == 0
+    assert second.manifest_path == first.manifest_path
+    assert store.stats()["files"] == 1
+
+
+def test_appended_rows_only_store_the_changed_chunks(store):
+    base = _csv(5000)
+    store.put(io.BytesIO(base))
+    grown = store.put(io.BytesIO(base + _csv(100, start=5000)))
+    assert 0 < grown.new_bytes < grown.size // 4
+    stats = store.stats()
+    assert stats["files"] == 2
+    assert stats["physical_bytes"] < stats["logical_bytes"] * 0.6
+
+
+def test_preview_drops_a_line_cut_by_the_byte_limit(store):
+    ref = store.put(io.BytesIO(b"id,name\n1,alpha\n2,beta\n"))
+    assert store.preview(ref.manifest_path) == ["id,name", "1,alpha", "2,beta"]
+    assert store.preview(ref.manifest_path, max_bytes=12) == ["id,name"]
+    assert store.preview(ref.manifest_path, max_lines=1) == ["id,name"]
+
+
+def test_blobs_can_be_row_indexed_in_place(store, tmp_path):
+    data = b"id,name,score\n" + _csv(3000)
+    ref = store.put(io.BytesIO(data))
+    index_path = str(tmp_path / "events.rowidx")
+    index = CsvOffsetIndex.for_stream(lambda: store.open(ref.manifest_path), index_path, ref.size, every=64)
+    assert index.rows == 3000
+    assert index.read_rows(2500, 2) == [["2500", "event 2500", str(2500 * 7 % 13)], ["2501", "event 2501", str(2501 * 7 % 13)]]
+    assert os.path.exists(index_path)
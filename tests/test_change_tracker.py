@@ -0,0 +1,19 @@
+from services.change_tracker import ChangeTracker
+from services.database_manager import DatabaseManager
+
+
+def test_install_once_then_versions_follow_writes(tmp_path, monkeypatch):
+    db = DatabaseManager(str(tmp_path / "platform.db"))
+    db.execute_query("CREATE TABLE tickets (id INTEGER PRIMARY KEY AUTOINCREMENT, subject TEXT)")
+    tracker = ChangeTracker(db, tables=("tickets", "incidents"))
+    tracker.install()
+
+    def no_write_lock():
+        raise AssertionError("install() took the write lock although nothing was missing")
+
+    monkeypatch.setattr(db, "transaction", no_write_lock)
+    tracker.install()
+
+    before = tracker.versions(["tickets"])["tickets"]
+    db.execute_query("INSERT INTO tickets (subject) VALUES ('x')")
+    assert tracker.versions(["tickets"])["tickets"] == before + 1
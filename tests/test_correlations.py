@@ -0,0 +1,135 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+from app.data.archive import archive_rows
+from app.data.correlations import Event, correlate, install_stream_counters, stream_versions, window_join
+from app.data.shards import ShardRouter
+
+
+def ev(hours, event_id, **fields):
+    return Event(hours, f"t+{hours}", event_id, fields)
+
+
+def join(anchors, targets, **kwargs):
+    closed = {}
+    pairs = [
+        (a.id, t.id)
+        for a, t in window_join(anchors, targets, on_close=lambda e, n: closed.__setitem__(e.id, n), **kwargs)
+    ]
+    return pairs, closed
+
+
+# ---------------- window_join -----------------
+def test_targets_pair_within_the_window_only():
+    pairs, closed = join([ev(0, "a")], [ev(-1, "t0"), ev(5, "t1"), ev(24, "t2"), ev(25, "t3")])
+    assert pairs == [("a", "t1"), ("a", "t2")]
+    assert closed == {"a": 2}
+
+
+def test_before_hours_opens_the_window_early():
+    pairs, _ = join([ev(10, "a")], [ev(7, "t0"), ev(8, "t1"), ev(10, "t2")], before_hours=2, after_hours=0)
+    assert pairs == [("a", "t1"), ("a", "t2")]
+
+
+def test_same_stream_never_pairs_an_event_with_itself():
+    events = [ev(0, 1), ev(1, 2), ev(30, 3)]
+    pairs, closed = join(events, events, after_hours=2, same_stream=True)
+    assert pairs == [(1, 2)]
+    assert closed == {1: 1, 2: 0, 3: 0}
+
+
+def test_keys_must_match_case_insensitively():
+    anchors = [ev(0, "a", person="Amy"), ev(0, "b", person=None)]
+    targets = [ev(1, "t0", owner="amy "), ev(2, "t1", owner="Bob")]
+    pairs, closed = join(anchors, targets, anchor_key="person", target_key="owner")
+    assert pairs == [("a", "t0")]
+    assert closed == {"a": 1, "b": 0}  # an anchor without a key value is closed empty
+
+
+def test_anchors_after_the_last_target_are_still_closed():
+    pairs, closed = join([ev(0, "a"), ev(100, "b"), ev(200, "c")], [ev(1, "t0")])
+    assert pairs == [("a", "t0")]
+    assert closed == {"a": 1, "b": 0, "c": 0}
+
+
+# ---------------- Streams -----------------
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # shards and the archive live under ./DATA
+    conn = sqlite3.connect(str(tmp_path / "main.db"))
+    conn.executescript("""
+        CREATE TABLE cyber_incidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, incident_type TEXT, severity TEXT,
+            status TEXT, description TEXT, reported_by TEXT
+        );
+        CREATE TABLE security_threats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, threat_name TEXT, severity TEXT, detected_on TEXT
+        );
+        CREATE TABLE it_tickets (
+            ticket_id INTEGER PRIMARY KEY, title TEXT, status TEXT, priority TEXT, assigned_to TEXT, created_on TEXT
+        );
+    """)
+    conn.executemany(
+        "INSERT INTO cyber_incidents (date, incident_type, severity, status, reported_by) VALUES (?, ?, ?, ?, ?)",
+        [
+            ("2024-01-10 09:00", "Phishing", "High", "Closed", "amy"),
+            ("2024-03-01 09:00", "Malware", "Low", "Open", "bob"),
+            ("2024-03-05 09:00", "Malware", "High", "Open", "amy"),
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO it_tickets (ticket_id, title, status, priority, assigned_to, created_on) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (1, "Mail", "Open", "High", "amy", "2024-01-10 12:00"),
+            (2, "VPN", "Open", "Low", "bob", "2024-03-01 10:00"),
+            (3, "Disk", "Open", "Low", "carl", "2024-03-04 10:00"),
+        ],
+    )
+    conn.commit()
+    router = ShardRouter(conn)
+    router.migrate("cyber_incidents", before_month="2024-02")  # January into a shard
+    router.detach_all()
+    install_stream_counters(conn)
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_correlate_pairs_across_main_and_shards(conn):
+    result = correlate(conn, "incidents", "tickets", after_hours=24, key="person")
+    assert (result["anchors"], result["targets"], result["pairs"]) == (3, 3, 2)
+    assert sorted((p["incidents_id"], p["tickets_id"]) for p in result["sample_pairs"]) == [(1, 1), (2, 2)]
+    assert result["breakdown"] == {"High": (1, 1), "Low": (1, 2)}
+
+
+def test_correlate_rejects_a_key_the_streams_lack(conn):
+    with pytest.raises(ValueError):
+        correlate(conn, "threats", "tickets", key="person")
+
+
+def test_stream_versions_move_on_updates_deletes_shards_and_archival(conn):
+    seen = [stream_versions(conn)]
+
+    def changed():
+        seen.append(stream_versions(conn))
+        return seen[-1] != seen[-2]
+
+    conn.execute("UPDATE it_tickets SET status = 'Closed' WHERE ticket_id = 3")
+    conn.commit()
+    assert changed()
+    conn.execute("DELETE FROM it_tickets WHERE ticket_id = 3")
+    conn.commit()
+    assert changed()
+    assert not changed()
+
+    router = ShardRouter(conn)
+    alias = router.attach("cyber_incidents", "2024-01")
+    conn.execute(f"UPDATE {alias}.cyber_incidents SET severity = 'Low'")
+    conn.commit()
+    router.detach_all()
+    assert changed()
+
+    assert archive_rows(conn, "cyber_incidents", today=date(2024, 6, 1)) == 1  # the shard's Closed row
+    assert changed()
@@ -0,0 +1,74 @@
+import csv
+
+import pytest
+
+from services.csv_index import INDEX_SUFFIX, CsvOffsetIndex
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "events.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "kind", "note"])
+        for i in range(100):
+            kind = "rare" if i in (17, 83) else "common"
+            note = f'line one\nline "two" of {i}' if i % 7 == 0 else f"note {i}"
+            writer.writerow([i, kind, note])
+    return str(path)
+
+
+def test_quoted_fields_spanning_lines_count_as_one_row(path):
+    index = CsvOffsetIndex.for_file(path, every=8)
+    assert index.rows == 100
+    assert index.header == ["id", "kind", "note"]
+    rows = index.read_rows(12, 4)
+    assert [row[0] for row in rows] == ["12", "13", "14", "15"]
+    assert rows[2][2] == 'line one\nline "two" of 14'
+
+
+def test_read_rows_is_clipped_to_the_file(path):
+    index = CsvOffsetIndex.for_file(path, every=8)
+    assert [row[0] for row in index.read_rows(97, 10)] == ["97", "98", "99"]
+    assert index.read_rows(100, 5) == []
+    assert index.read_rows(0, 0) == []
+
+
+def test_sidecar_index_is_reused_until_the_file_changes(path):
+    built = CsvOffsetIndex.for_file(path, every=8)
+    loaded = CsvOffsetIndex.load(lambda: open(path, "rb"), path + INDEX_SUFFIX, 0, 0)
+    assert loaded is None  # stale size/mtime
+    again = CsvOffsetIndex.for_file(path)
+    assert again.every == built.every == 8
+
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerow([100, "common", "late"])
+    assert CsvOffsetIndex.for_file(path, every=8).rows == 101
+
+
+def test_sample_is_distinct_rows_in_file_order(path):
+    index = CsvOffsetIndex.for_file(path, every=8)
+    ids = [int(row[0]) for row in index.sample(30, seed=1)]
+    assert len(ids) == 30
+    assert ids == sorted(set(ids))
+    assert index.sample(30, seed=1) == index.sample(30, seed=1)
+
+
+def test_stratified_sample_without_column_covers_every_slice(path):
+    index = CsvOffsetIndex.for_file(path, every=8)
+    ids = [int(row[0]) for row in index.stratified_sample(10, seed=3)]
+    assert [i // 10 for i in ids] == list(range(10))
+
+
+def test_stratified_sample_by_column_keeps_rare_values(path):
+    index = CsvOffsetIndex.for_file(path, every=8)
+    for seed in range(5):
+        kinds = {row[1] for row in index.stratified_sample(10, column="kind", seed=seed)}
+        # 10 * STRATIFY_OVERSAMPLE candidates is the whole file, so both values are seen
+        assert kinds == {"common", "rare"}
+
+
+def test_stratified_sample_by_unknown_column_raises(path):
+    index = CsvOffsetIndex.for_file(path, every=8)
+    with pytest.raises(ValueError, match="'severity' is not in the file's header"):
+        index.stratified_sample(5, column="severity")
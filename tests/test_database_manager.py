@@ -0,0 +1,56 @@
+import pytest
+
+from models.it_ticket import ITTicket
+from services.database_manager import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "platform.db"))
+    db.execute_query("CREATE TABLE tickets (id INTEGER PRIMARY KEY, subject TEXT, status TEXT)")
+    return db
+
+
+def test_execute_many_inserts_every_row_and_returns_the_count(db):
+    assert db.execute_many("INSERT INTO tickets (subject, status) VALUES (?, ?)",
+                           ((f"t{i}", "Open") for i in range(50))) == 50
+    assert db.fetch_one("SELECT COUNT(*) FROM tickets") == (50,)
+    assert db.execute_many("UPDATE tickets SET status = ? WHERE id = ?", [("Closed", 1), ("Closed", 2)]) == 2
+
+
+def test_transaction_commits_the_whole_block(db):
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO tickets (subject, status) VALUES ('a', 'Open')")
+        conn.executemany("INSERT INTO tickets (subject, status) VALUES (?, 'Open')", [("b",), ("c",)])
+    assert [row[0] for row in db.fetch_all("SELECT subject FROM tickets ORDER BY id")] == ["a", "b", "c"]
+
+
+def test_transaction_rolls_back_when_the_block_raises(db):
+    db.execute_query("INSERT INTO tickets (subject, status) VALUES ('kept', 'Open')")
+    with pytest.raises(RuntimeError):
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO tickets (subject, status) VALUES ('lost', 'Open')")
+            conn.execute("UPDATE tickets SET status = 'Closed'")
+            raise RuntimeError("boom")
+    assert db.fetch_all("SELECT subject, status FROM tickets") == [("kept", "Open")]
+    # The writer is still usable afterwards
+    db.execute_query("INSERT INTO tickets (subject, status) VALUES ('next', 'Open')")
+    assert db.fetch_one("SELECT COUNT(*) FROM tickets") == (2,)
+
+
+def test_iter_rows_streams_in_batches(db):
+    db.execute_many("INSERT INTO tickets (subject, status) VALUES (?, 'Open')", [(f"t{i}",) for i in range(25)])
+    rows = db.iter_rows("SELECT id FROM tickets ORDER BY id", batch_size=10)
+    assert next(rows) == (1,)  # lazy: a generator, not a list
+    assert [row[0] for row in rows] == list(range(2, 26))
+
+
+def test_iter_rows_and_fetch_models_map_through_a_row_factory(db):
+    db.execute_many("INSERT INTO tickets (subject, status) VALUES (?, ?)", [("vpn", "Open"), ("disk", "Closed")])
+    sql = "SELECT id, subject, status FROM tickets ORDER BY id"
+    streamed = list(db.iter_rows(sql, batch_size=1, row_factory=ITTicket.from_row))
+    fetched = db.fetch_models(ITTicket.from_row, sql)
+    assert [str(t) for t in streamed] == [str(t) for t in fetched] == [
+        "Ticket 1 - vpn (Open)", "Ticket 2 - disk (Closed)",
+    ]
+    assert db.fetch_models(ITTicket.from_row, sql + " LIMIT 0") == []
@@ -0,0 +1,112 @@
+import gzip
+import os
+
+import pytest
+
+from services.database_manager import DatabaseManager
+from services.dataset_profiler import (
+    HISTOGRAM_WARMUP, ColumnProfile, DatasetProfiler, HyperLogLog, StreamingHistogram, profile_file,
+)
+
+
+def test_hyperloglog_estimates_within_a_few_percent():
+    hll = HyperLogLog()
+    for i in range(50_000):
+        hll.add(f"user-{i % 20_000}")
+    assert abs(hll.estimate() - 20_000) / 20_000 < 0.05
+    assert len(hll.registers) == 4096
+
+
+def test_hyperloglog_is_near_exact_for_small_counts_and_merges():
+    left, right = HyperLogLog(), HyperLogLog()
+    for i in range(100):
+        (left if i % 2 else right).add(str(i))
+        left.add(str(i % 10))  # repeats don't count
+    assert abs(right.estimate() - 50) <= 1
+    left.merge(right)
+    assert abs(left.estimate() - 100) <= 2
+
+
+def test_histogram_keeps_exact_counts_while_its_range_grows():
+    histogram = StreamingHistogram(bins=10)
+    values = [float(i % 100) for i in range(HISTOGRAM_WARMUP)] + [-500.0, 2500.0, 7.0]
+    for value in values:
+        histogram.add(value)
+    bins = histogram.to_dict()
+    assert sum(b["count"] for b in bins) == len(values)
+    assert bins[0]["low"] <= -500 < bins[0]["high"]
+    assert bins[-1]["low"] <= 2500 < bins[-1]["high"]
+    widths = {round(b["high"] - b["low"], 6) for b in bins}
+    assert len(widths) == 1  # equal width throughout
+
+
+def test_histogram_with_fewer_values_than_the_warmup():
+    assert StreamingHistogram().to_dict() == []
+    histogram = StreamingHistogram(bins=4)
+    for value in (5.0, 5.0, 5.0):
+        histogram.add(value)
+    assert histogram.to_dict() == [{"low": 5.0, "high": 6.0, "count": 3}]
+
+
+def test_column_profile_infers_types_and_skips_nulls():
+    numbers, mixed = ColumnProfile("n"), ColumnProfile("m")
+    for raw in ("1", " 2 ", "3.5", "NA", ""):
+        numbers.add(raw)
+    for raw in ("2024-01-01", "yes", "12"):
+        mixed.add(raw)
+    n = numbers.to_dict()
+    assert (n["type"], n["count"], n["nulls"], n["min"], n["max"]) == ("float", 5, 2, 1.0, 3.5)
+    assert n["mean"] == pytest.approx(6.5 / 3)
+    assert n["distinct_estimate"] == 3
+    m = mixed.to_dict()
+    assert m["type"] == "string"
+    assert m["type_counts"] == {"integer": 1, "boolean": 1, "date": 1}
+    assert m["histogram"] == []
+
+
+def test_profile_file_sniffs_the_delimiter_and_reads_gzip(tmp_path):
+    lines = ["id;city;score"] + [f"{i};{['Leeds', 'York'][i % 2]};{i / 2}" for i in range(200)] + ["9;York"]
+    path = tmp_path / "scores.csv.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    profile = profile_file(str(path), chunk_rows=64)
+    assert (profile["rows"], profile["ragged_rows"], profile["delimiter"]) == (201, 1, ";")
+    by_name = {c["name"]: c for c in profile["columns"]}
+    assert by_name["id"]["type"] == "integer"
+    assert by_name["city"]["distinct_estimate"] == 2
+    assert (by_name["score"]["type"], by_name["score"]["max"]) == ("float", 99.5)
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    profiler = DatasetProfiler(DatabaseManager(str(tmp_path / "platform.db")))
+    profiler.install()
+    return profiler
+
+
+def _write(path, rows):
+    path.write_text("a,b\n" + "".join(f"{i},{i * 2}\n" for i in range(rows)), encoding="utf-8")
+    return str(path)
+
+
+def test_profiles_are_reused_until_the_file_changes(tmp_path, profiler):
+    path = _write(tmp_path / "data.csv", 10)
+    assert profiler.cached(path) is None
+    first = profiler.profile(path)
+    assert profiler.cached(path) == first
+    assert profiler.profile(path) == first
+
+    _write(tmp_path / "data.csv", 20)
+    os.utime(path, ns=(1, 1))  # a distinct mtime even on coarse clocks
+    assert profiler.cached(path) is None
+    assert profiler.profile(path)["rows"] == 20
+    # The stale profile of the same path was replaced, not kept alongside
+    assert profiler._db.fetch_one("SELECT COUNT(*) FROM dataset_profiles") == (1,)
+
+
+def test_profile_many_combines_cached_and_fresh_profiles(tmp_path, profiler):
+    paths = [_write(tmp_path / f"d{i}.csv", i + 1) for i in range(3)]
+    profiler.profile(paths[0])
+    results = profiler.profile_many(paths + [paths[0]], workers=1)
+    assert [results[p]["rows"] for p in paths] == [1, 2, 3]
+    assert all(profiler.cached(p) is not None for p in paths)
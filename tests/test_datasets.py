@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from database.datasets import dataset_file, resolve_dataset_path
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "datasets"
+    root.mkdir()
+    (root / "sales.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+    (tmp_path / "secret.txt").write_text("keep out", encoding="utf-8")
+    return str(root)
+
+
+def test_relative_and_absolute_paths_under_the_root_resolve(root):
+    expected = os.path.realpath(os.path.join(root, "sales.csv"))
+    assert resolve_dataset_path("sales.csv", root) == expected
+    assert resolve_dataset_path(expected, root) == expected
+    assert dataset_file("sales.csv", root) == expected
+
+
+@pytest.mark.parametrize("path", ["../secret.txt", "/etc/passwd", "sub/../../secret.txt"])
+def test_paths_outside_the_root_are_refused(root, path):
+    with pytest.raises(ValueError, match="must be under"):
+        resolve_dataset_path(path, root)
+    assert dataset_file(path, root) is None
+
+
+def test_symlinks_out_of_the_root_are_refused(root):
+    os.symlink(os.path.join(os.path.dirname(root), "secret.txt"), os.path.join(root, "link.csv"))
+    with pytest.raises(ValueError):
+        resolve_dataset_path("link.csv", root)
+
+
+def test_missing_files_are_not_dataset_files(root):
+    assert dataset_file("nope.csv", root) is None
+
+
+def test_init_db_installs_the_dataset_columns_indexes_and_profiles(tmp_path):
+    from database.setup import init_db
+    from services.database_manager import DatabaseManager
+
+    db = DatabaseManager(str(tmp_path / "platform.db"))
+    init_db(db)
+    init_db(db)  # a second process only finds everything in place
+    names = {row[0] for row in db.fetch_all("SELECT name FROM sqlite_master WHERE type IN ('table', 'index')")}
+    assert {"dataset_profiles", "idx_datasets_name", "idx_datasets_owner"} <= names
+    columns = {row[1] for row in db.fetch_all("PRAGMA table_info(datasets)")}
+    assert {"file_path", "blob_path", "blob_size"} <= columns
@@ -0,0 +1,89 @@
+import sqlite3
+
+import pytest
+
+from app.data import incidents
+from app.data.near_duplicates import StagedClusters, get_near_duplicate_index, row_text
+from app.data.shards import ShardRouter
+from platform_common.near_duplicates import create_tables
+
+
+def test_insert_with_a_connection_leaves_the_commit_to_the_caller(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # no DATA/shards here, so rows go to the main table
+    path = str(tmp_path / "incidents.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE cyber_incidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, incident_type TEXT, severity TEXT,
+            status TEXT, description TEXT, reported_by TEXT
+        )
+    """)
+    create_tables(conn)
+    conn.commit()
+
+    for i in range(3):
+        incidents.insert_incidents(conn, "2024-05-01", "Phishing", "High", "Open", f"Mail {i}")
+    assert conn.in_transaction
+
+    other = sqlite3.connect(path)
+    assert other.execute("SELECT COUNT(*) FROM cyber_incidents").fetchone()[0] == 0
+    conn.commit()
+    assert other.execute("SELECT COUNT(*) FROM cyber_incidents").fetchone()[0] == 3
+    assert other.execute("SELECT COUNT(*) FROM near_dup_rows WHERE domain = 'incidents'").fetchone()[0] == 3
+    other.close()
+    conn.close()
+
+
+def _shard_db(tmp_path):
+    path = str(tmp_path / "elsewhere.db")  # not DB_PATH: writes must follow the connection
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE cyber_incidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, incident_type TEXT, severity TEXT,
+            status TEXT, description TEXT, reported_by TEXT
+        )
+    """)
+    create_tables(conn)
+    conn.commit()
+    router = ShardRouter(conn)
+    router.attach("cyber_incidents", "2023-01", create=True)  # January 2023 is sharded
+    router.detach_all()
+    return conn
+
+
+def test_mixed_batch_commits_once_on_the_callers_connection(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    conn = _shard_db(tmp_path)
+    main_id = incidents.insert_incidents(conn, "2024-05-01", "Phishing", "High", "Open", "New mail")
+    shard_id = incidents.insert_incidents(conn, "2023-01-05", "Phishing", "High", "Open", "Old mail")
+    last_id = incidents.insert_incidents(conn, "2024-05-02", "Malware", "Low", "Open", "Laptop infected")
+    assert conn.in_transaction
+    assert len({main_id, shard_id, last_id}) == 3
+
+    shard_path = "DATA/shards/cyber_incidents_2023_01.db"
+    shard = sqlite3.connect(shard_path)
+    assert shard.execute("SELECT COUNT(*) FROM cyber_incidents").fetchone()[0] == 0
+    conn.commit()
+    assert shard.execute("SELECT id, description FROM cyber_incidents").fetchall() == [(shard_id, "Old mail")]
+    shard.close()
+    assert conn.execute("SELECT id FROM main.cyber_incidents ORDER BY id").fetchall() == [(main_id,), (last_id,)]
+    assert conn.execute("SELECT COUNT(*) FROM near_dup_rows").fetchone()[0] == 3
+    conn.close()
+
+
+def test_mixed_batch_rolls_back_together(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    conn = _shard_db(tmp_path)
+    staged = StagedClusters()
+    incidents.insert_incidents(conn, "2024-05-01", "Phishing", "High", "Open", "New mail", staged=staged)
+    incidents.insert_incidents(conn, "2023-01-05", "Phishing", "High", "Open", "Old mail", staged=staged)
+    conn.rollback()
+    # The rolled-back rows' clusters never reached the shared index
+    index = get_near_duplicate_index(conn, "incidents")
+    assert index.check(row_text("incidents", {"incident_type": "Phishing", "description": "New mail"})).cluster_id is None
+    router = ShardRouter(conn)
+    alias = router.attach("cyber_incidents", "2023-01")
+    assert conn.execute(f"SELECT COUNT(*) FROM {alias}.cyber_incidents").fetchone()[0] == 0
+    router.detach_all()
+    assert conn.execute("SELECT COUNT(*) FROM cyber_incidents").fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,129 @@
+import threading
+
+import pytest
+
+from services.ai_backends import ChatBackend
+from services.inference_gateway import GatewayOverloaded, InferenceGateway
+
+
+def _prompt(text):
+    return [{"role": "user", "content": text}]
+
+
+class _GatedBackend(ChatBackend):
+    """Records each batch and holds it until `release` is set."""
+
+    def __init__(self):
+        self.batches = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.error = None
+
+    def stream(self, messages):
+        yield "re: "
+        yield messages[-1]["content"]
+
+    def stream_batch(self, batch):
+        self.batches.append([messages[-1]["content"] for messages in batch])
+        self.entered.set()
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        yield from super().stream_batch(batch)
+
+
+@pytest.fixture
+def backend():
+    return _GatedBackend()
+
+
+@pytest.fixture
+def make_gateway(backend):
+    gateways = []
+
+    def make(**kwargs):
+        kwargs.setdefault("max_concurrency", 1)
+        gateway = InferenceGateway(backend, **kwargs)
+        gateways.append(gateway)
+        return gateway
+
+    yield make
+    backend.release.set()
+    for gateway in gateways:
+        gateway.close()
+
+
+def _occupy_worker(gateway, backend):
+    """Start a request the single worker holds on to until backend.release is set."""
+    stream = gateway.stream("blocker", _prompt("hold"))
+    assert backend.entered.wait(5)
+    return stream
+
+
+def test_identical_prompts_share_one_generation(make_gateway, backend):
+    gateway = make_gateway()
+    first = gateway.stream("alice", _prompt("status?"))
+    assert backend.entered.wait(5)
+    second = gateway.stream("bob", _prompt("status?"))  # joins the decoding request
+    backend.release.set()
+    assert "".join(first) == "".join(second) == "re: status?"
+    assert backend.batches == [["status?"]]
+    assert gateway.stats()["coalesced"] == 1
+    assert gateway.stats()["in_flight"] == 0
+
+
+def test_batches_are_filled_round_robin_across_users(make_gateway, backend):
+    gateway = make_gateway(max_batch=2)
+    blocker = _occupy_worker(gateway, backend)
+    streams = [gateway.stream("alice", _prompt(f"a{i}")) for i in range(3)]
+    streams.append(gateway.stream("bob", _prompt("b0")))
+    assert gateway.stats()["queued"] == 4
+
+    backend.release.set()
+    assert ["".join(s) for s in [blocker, *streams]] == ["re: hold", "re: a0", "re: a1", "re: a2", "re: b0"]
+    # bob's one request isn't stuck behind alice's burst
+    assert backend.batches == [["hold"], ["a0", "b0"], ["a1", "a2"]]
+
+
+def test_a_user_over_the_queue_limit_is_rejected_without_affecting_others(make_gateway, backend):
+    gateway = make_gateway(max_queued_per_user=2)
+    _occupy_worker(gateway, backend)
+    gateway.submit("alice", _prompt("a0"))
+    gateway.submit("alice", _prompt("a1"))
+    with pytest.raises(GatewayOverloaded):
+        gateway.submit("alice", _prompt("a2"))
+    gateway.submit("alice", _prompt("a1"))  # a duplicate coalesces instead of queueing
+    gateway.submit("bob", _prompt("b0"))
+    stats = gateway.stats()
+    assert (stats["rejected"], stats["coalesced"], stats["queued"]) == (1, 1, 3)
+
+
+def test_backend_failure_reaches_every_subscriber_and_is_not_cached(make_gateway, backend):
+    gateway = make_gateway()
+    backend.error = RuntimeError("model down")
+    first = gateway.stream("alice", _prompt("q"))
+    assert backend.entered.wait(5)
+    second = gateway.stream("bob", _prompt("q"))
+    backend.release.set()
+    for stream in (first, second):
+        with pytest.raises(RuntimeError, match="model down"):
+            list(stream)
+
+    backend.error = None
+    assert "".join(gateway.stream("alice", _prompt("q"))) == "re: q"
+    assert backend.batches == [["q"], ["q"]]
+
+
+def test_close_fails_queued_requests(backend):
+    gateway = InferenceGateway(backend, max_concurrency=1)
+    blocker = _occupy_worker(gateway, backend)
+    queued = gateway.stream("alice", _prompt("late"))
+    closer = threading.Thread(target=gateway.close)
+    closer.start()
+    with pytest.raises(RuntimeError, match="closed"):
+        list(queued)
+    backend.release.set()  # the decoding request still finishes
+    closer.join(5)
+    assert "".join(blocker) == "re: hold"
+    with pytest.raises(RuntimeError, match="closed"):
+        gateway.submit("alice", _prompt("after"))
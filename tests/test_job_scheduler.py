@@ -0,0 +1,69 @@
+import sqlite3
+import time
+from datetime import datetime
+
+import pytest
+
+from app.services import job_scheduler
+from app.services.job_scheduler import FAILED, QUEUED, RUNNING, SUCCEEDED, JobScheduler, cron_matches
+
+
+def test_cron_ors_day_of_month_and_weekday_when_both_are_restricted():
+    assert cron_matches("0 9 1 * 1", datetime(2024, 7, 1, 9, 0))    # the 1st, a Monday
+    assert cron_matches("0 9 1 * 1", datetime(2024, 7, 8, 9, 0))    # a Monday
+    assert cron_matches("0 9 1 * 1", datetime(2024, 8, 1, 9, 0))    # the 1st, a Thursday
+    assert not cron_matches("0 9 1 * 1", datetime(2024, 7, 9, 9, 0))
+    assert not cron_matches("0 9 * * 1", datetime(2024, 8, 1, 9, 0))
+    assert cron_matches("0 9 1 * *", datetime(2024, 8, 1, 9, 0))
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    scheduler = JobScheduler(str(tmp_path / "jobs.db"), workers=1, poll_interval=0.05)
+    yield scheduler
+    scheduler.stop()
+
+
+def _insert_running(scheduler, lease_until, attempts=1):
+    conn = sqlite3.connect(scheduler._db_path)
+    with conn:
+        job_id = conn.execute(
+            "INSERT INTO jobs (name, status, attempts, run_after, created_at, lease_until) VALUES (?, ?, ?, 0, 0, ?)",
+            ("noop", RUNNING, attempts, lease_until),
+        ).lastrowid
+    conn.close()
+    return job_id
+
+
+def _status(scheduler, job_id):
+    conn = sqlite3.connect(scheduler._db_path)
+    try:
+        return conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_only_jobs_with_a_lapsed_lease_are_requeued(scheduler):
+    live = _insert_running(scheduler, time.time() + 60)
+    dead = _insert_running(scheduler, time.time() - 1)
+    spent = _insert_running(scheduler, time.time() - 1, attempts=3)
+    assert scheduler.requeue_expired() == 2
+    assert _status(scheduler, live) == RUNNING
+    assert _status(scheduler, dead) == QUEUED
+    assert _status(scheduler, spent) == FAILED
+
+
+def test_heartbeat_keeps_a_long_job_leased(scheduler, monkeypatch):
+    monkeypatch.setattr(job_scheduler, "LEASE_SECONDS", 0.3)
+
+    monkeypatch.setitem(job_scheduler.JOB_FUNCTIONS, "test_slow", lambda: time.sleep(0.8))
+    job_id = scheduler.enqueue("test_slow")
+    scheduler.start()
+    deadline = time.time() + 5
+    while _status(scheduler, job_id) != RUNNING and time.time() < deadline:
+        time.sleep(0.02)
+    time.sleep(0.5)  # past the first lease
+    assert scheduler.requeue_expired() == 0
+    while _status(scheduler, job_id) != SUCCEEDED and time.time() < deadline:
+        time.sleep(0.02)
+    assert _status(scheduler, job_id) == SUCCEEDED
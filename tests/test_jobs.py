@@ -0,0 +1,56 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("bcrypt")  # app.services.jobs runs the migrations, which hash passwords
+
+from app.services import jobs
+from app.services.job_scheduler import JOB_FUNCTIONS
+from platform_common.near_duplicates import create_tables
+
+
+def test_jobs_module_registers_the_csv_import():
+    # Workers import app.services.jobs, not the Streamlit entry point
+    assert JOB_FUNCTIONS["load_all_csvs"] is jobs.load_all_csvs
+
+
+def test_load_all_csvs_skips_present_and_archived_rows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the archive and shards live under ./DATA
+    path = str(tmp_path / "main.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE cyber_incidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, incident_type TEXT, severity TEXT,
+            status TEXT, description TEXT, reported_by TEXT
+        );
+        CREATE TABLE security_threats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, threat_name TEXT, severity TEXT, detected_on TEXT
+        );
+        CREATE TABLE it_tickets (
+            ticket_id INTEGER PRIMARY KEY, title TEXT, status TEXT, priority TEXT, assigned_to TEXT, created_on TEXT
+        );
+        CREATE TABLE it_tickets_archived (
+            ticket_id INTEGER PRIMARY KEY, created_on TEXT, status TEXT, priority TEXT, assigned_to TEXT,
+            archived_on TEXT NOT NULL
+        );
+        INSERT INTO it_tickets_archived (ticket_id, archived_on) VALUES (3, '2024-06-01');
+    """)
+    create_tables(conn)
+    conn.commit()
+    (tmp_path / "it_tickets.csv").write_text(
+        "ticket_id,title,status,priority,assigned_to,created_on\n"
+        "1,VPN down,Open,High,amy,2024-05-01\n"
+        "2,Printer jam,Open,Low,bob,2024-05-02\n"
+        "3,Old ticket,Closed,Low,bob,2024-01-02\n",
+        encoding="utf-8",
+    )
+
+    first = jobs.load_all_csvs(db_path=path, folder=tmp_path)
+    again = jobs.load_all_csvs(db_path=path, folder=tmp_path)
+    jobs.get_writer(path).close()
+
+    assert first["it_tickets"] == 2 and again["it_tickets"] == 0
+    assert first["cyber_incidents"] == 0  # no file: skipped
+    assert [r[0] for r in conn.execute("SELECT ticket_id FROM it_tickets ORDER BY 1")] == [1, 2]
+    assert conn.execute("SELECT COUNT(*) FROM near_dup_rows WHERE domain = 'tickets'").fetchone()[0] == 2
+    conn.close()
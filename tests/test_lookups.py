@@ -0,0 +1,64 @@
+import sqlite3
+
+from app.data.lookups import encode_categorical_columns
+from database.lookups import install_lookups
+from services.database_manager import DatabaseManager
+
+
+def _columns(conn, relation):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({relation})")]
+
+
+def test_root_migration_runs_once_and_views_hide_ranks(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "root.db"))
+    conn.execute("CREATE TABLE it_tickets (ticket_id INTEGER PRIMARY KEY, title TEXT, status TEXT, priority TEXT)")
+    conn.execute("INSERT INTO it_tickets VALUES (1, 'Disk full', 'Open', 'High')")
+    encode_categorical_columns(conn)
+    conn.commit()
+    assert not [c for c in _columns(conn, "it_tickets_labeled") if c.endswith(("_rank", "_code"))]
+
+    # Already at LOOKUPS_VERSION: the backfill must not scan the table again
+    conn.execute("UPDATE it_tickets SET status_code = NULL")
+    encode_categorical_columns(conn)
+    assert conn.execute("SELECT status_code FROM it_tickets").fetchone()[0] is None
+    conn.close()
+
+
+def test_platform_sorts_by_rank_not_first_seen_code(tmp_path):
+    db = DatabaseManager(str(tmp_path / "platform.db"))
+    db.execute_query("""
+        CREATE TABLE incidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, incident_type TEXT, severity TEXT NOT NULL,
+            status TEXT NOT NULL, description TEXT
+        )
+    """)
+    db.execute_query("INSERT INTO incidents (severity, status) VALUES ('Low', 'Open')")
+    install_lookups(db)
+    # A label first seen after the seeds gets a higher code but rank 0
+    db.execute_query("INSERT INTO incidents (severity, status) VALUES ('Informational', 'Open')")
+    db.execute_query("INSERT INTO incidents (severity, status) VALUES ('Critical', 'Open')")
+
+    by_rank = [r[0] for r in db.fetch_all("SELECT severity FROM incidents ORDER BY severity_rank DESC, id DESC")]
+    assert by_rank == ["Critical", "Low", "Informational"]
+
+    db.execute_query("UPDATE severity_levels SET rank = 5 WHERE name = 'Informational'")
+    top = db.fetch_one("SELECT severity FROM incidents ORDER BY severity_rank DESC LIMIT 1")[0]
+    assert top == "Informational"
+
+    labeled = [row[1] for row in db.fetch_all("PRAGMA table_info(incidents_labeled)")]
+    assert "severity_rank" not in labeled and "severity_code" not in labeled
+    assert db.fetch_one("SELECT version FROM schema_versions WHERE component = 'lookups:incidents'")[0] == 2
+
+
+def test_root_migration_replaces_an_outdated_trigger(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "root.db"))
+    conn.execute("CREATE TABLE it_tickets (ticket_id INTEGER PRIMARY KEY, title TEXT, status TEXT, priority TEXT)")
+    encode_categorical_columns(conn)
+    # An older version's trigger that no longer sets the codes
+    conn.execute("DROP TRIGGER it_tickets_encode_insert")
+    conn.execute("CREATE TRIGGER it_tickets_encode_insert AFTER INSERT ON it_tickets BEGIN SELECT 1; END")
+    conn.execute("DELETE FROM schema_versions WHERE component = 'lookups:it_tickets'")
+    encode_categorical_columns(conn)
+    conn.execute("INSERT INTO it_tickets (ticket_id, title, status, priority) VALUES (2, 'Printer', 'Open', 'Low')")
+    assert conn.execute("SELECT status_code FROM it_tickets").fetchone()[0] is not None
+    conn.close()
@@ -0,0 +1,55 @@
+import pytest
+
+import platform_common.memory as memory
+from platform_common.memory import account_session, enforce_budget, measure_state, register_evictable
+
+
+@pytest.fixture(autouse=True)
+def clean_registry(monkeypatch):
+    monkeypatch.setattr(memory, "EVICTABLE_KEYS", {})
+    monkeypatch.setattr(memory, "SHRINKERS", {})
+    monkeypatch.setattr(memory, "_sessions", {})
+
+
+def test_unchanged_objects_reuse_their_size(monkeypatch):
+    state = {"rows": list(range(1000)), "name": "x"}
+    _, _, known = measure_state(state)
+    calls = []
+    real = memory.deep_sizeof
+    monkeypatch.setattr(memory, "deep_sizeof", lambda obj, seen=None: calls.append(obj) or real(obj, seen))
+
+    state["name"] = "y" * 10
+    measure_state(state, known)
+    assert calls == [state["name"]]  # only the replaced value was walked
+
+
+def test_account_session_remeasures_periodically(monkeypatch):
+    monkeypatch.setattr(memory, "REMEASURE_EVERY", 3)
+    state = {"rows": []}
+    for _ in range(2):
+        account_session("s1", state, "page")
+    state["rows"].extend(range(10_000))  # grown in place: same object
+    account_session("s1", state, "page")  # third rerun walks everything again
+    report = memory.session_report()[0]
+    assert report["keys"]["rows"] > 10_000
+    assert "_measured" not in report
+
+
+def test_enforce_budget_drops_or_shrinks_registered_keys():
+    class Chat:
+        def __init__(self):
+            self.turns = ["x" * 1000] * 10
+
+        def shed(self):
+            self.turns = self.turns[-2:]
+
+    register_evictable("cache", companions=["cache_version"])
+    register_evictable("chat", shrink=Chat.shed)
+    state = {"cache": "c" * 5000, "cache_version": 1, "chat": Chat(), "user": "u"}
+    _, sizes, _ = measure_state(state)
+
+    evicted = enforce_budget(state, sizes, budget=100)
+    assert set(evicted) == {"cache", "chat"}
+    assert "cache" not in state and "cache_version" not in state
+    assert len(state["chat"].turns) == 2
+    assert state["user"] == "u"  # never registered, never touched
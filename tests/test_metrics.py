@@ -0,0 +1,21 @@
+from platform_common.metrics import MetricsRegistry
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    logins = registry.counter("t_logins_total", "Logins.", ["outcome"])
+    seconds = registry.histogram("t_seconds", "Durations.", buckets=(0.1, 1.0))
+    logins.inc(outcome="success")
+    logins.inc(2, outcome="throttled")
+    seconds.observe(0.5)
+
+    text = registry.render()
+    assert 't_logins_total{outcome="throttled"} 2' in text
+    assert 't_seconds_bucket{le="0.1"} 0' in text
+    assert 't_seconds_bucket{le="1"} 1' in text or 't_seconds_bucket{le="1.0"} 1' in text
+    assert logins.value(outcome="success") == 1
+
+
+def test_registry_returns_the_same_metric_for_the_same_name():
+    registry = MetricsRegistry()
+    assert registry.counter("t_total", "x", ["a"]) is registry.counter("t_total", "x", ["a"])
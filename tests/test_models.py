@@ -0,0 +1,74 @@
+import pytest
+
+from models.columns import CategoricalColumn
+from models.dataset import Dataset, DatasetBatch
+from models.it_ticket import ITTicket, TicketBatch
+from models.security_incident import IncidentBatch, SecurityIncident
+from models.user import User
+
+INCIDENTS = [
+    (1, "phishing", "High", "open", "a"),
+    (2, "malware", "low", "closed", "b"),
+    (3, "phishing", "Critical", "open", "c"),
+    (4, "ddos", "unknown", "open", "d"),
+]
+
+
+@pytest.mark.parametrize("model", [
+    SecurityIncident(*INCIDENTS[0]),
+    ITTicket(1, "printer", "open"),
+    Dataset(1, "sales", "alice"),
+    User("alice", "hash", "admin"),
+])
+def test_models_are_slotted(model):
+    assert not hasattr(model, "__dict__")
+    with pytest.raises(AttributeError):
+        model.extra = 1
+
+
+def test_slotted_models_keep_their_private_state():
+    incident = SecurityIncident(*INCIDENTS[0])
+    incident.update_status("closed")
+    assert incident.get_status() == "closed"
+    assert incident.get_severity_level() == 3
+    assert str(incident) == "Incident 1 [HIGH] phishing - closed"
+
+
+def test_categorical_column_stores_each_label_once():
+    column = CategoricalColumn(["a", "b", "a", None, "a"])
+    assert column.labels == ["a", "b", None]
+    assert list(column.codes) == [0, 1, 0, 2, 0]
+    assert column.counts() == {"a": 3, "b": 1, None: 1}
+    assert column.positions_of("b", None, "missing") == [1, 3]
+    assert column[4] == "a"
+    assert column.take([1, 3]).to_list() == ["b", None]
+    assert column.take([1]).counts() == {"b": 1}  # labels without rows are left out
+
+
+def test_incident_batch_round_trips_rows():
+    batch = IncidentBatch.from_rows(INCIDENTS)
+    assert len(batch) == 4
+    assert [str(i) for i in batch] == [str(SecurityIncident.from_row(row)) for row in INCIDENTS]
+    assert list(batch.ids()) == [1, 2, 3, 4]
+    assert batch.to_columns()["severity"] == ["High", "low", "Critical", "unknown"]
+
+
+def test_incident_batch_counts_and_filters_without_objects():
+    batch = IncidentBatch.from_rows(INCIDENTS)
+    assert batch.count_by_type() == {"phishing": 2, "malware": 1, "ddos": 1}
+    assert list(batch.severity_levels()) == [3, 1, 4, 0]
+    assert list(batch.filter(status="open").ids()) == [1, 3, 4]
+    assert list(batch.filter(status="open", min_level=3).ids()) == [1, 3]
+    assert list(batch.filter(severity="low").ids()) == [2]
+    assert len(batch.filter(status="missing")) == 0
+
+
+def test_ticket_and_dataset_batches():
+    tickets = TicketBatch.from_rows([(1, "vpn", "open"), (2, "disk", "closed"), (3, "mail", "open")])
+    assert tickets.count_by_status() == {"open": 2, "closed": 1}
+    assert [t.get_subject() for t in tickets.take([2, 0])] == ["mail", "vpn"]
+
+    datasets = DatasetBatch.from_rows([(1, "sales", "alice"), (2, "hr", "bob"), (3, "ops", "alice")])
+    assert datasets.count_by_owner() == {"alice": 2, "bob": 1}
+    assert datasets.filter(owner="alice").to_columns() == {"id": [1, 3], "name": ["sales", "ops"], "owner": ["alice", "alice"]}
+    assert datasets.filter() is datasets
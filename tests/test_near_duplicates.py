@@ -0,0 +1,125 @@
+import sqlite3
+
+import pytest
+
+from platform_common.near_duplicates import (
+    LshIndex, StagedClusters, create_tables, install_change_log, minhash, similarity, sync,
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "nd.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE tickets (ticket_id INTEGER PRIMARY KEY, title TEXT)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _install(path):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("BEGIN")
+    create_tables(conn)
+    backfilled = install_change_log(conn, "tickets", "tickets", "ticket_id", ["title"])
+    conn.execute("COMMIT")
+    conn.close()
+    return backfilled
+
+
+def _clusters(path):
+    conn = sqlite3.connect(path)
+    try:
+        return dict(conn.execute("SELECT row_id, cluster_id FROM near_dup_rows WHERE domain = 'tickets'"))
+    finally:
+        conn.close()
+
+
+def test_similar_texts_have_similar_signatures():
+    a = minhash("VPN connection drops every hour")
+    b = minhash("VPN connection drops every hour!")
+    c = minhash("Printer out of toner on floor 3")
+    assert similarity(a, b) > 0.9
+    assert similarity(a, c) < 0.3
+    assert minhash("   ") is None
+
+
+def test_sync_clusters_rows_with_decreasing_keys(db_path):
+    _install(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO tickets VALUES (900, 'VPN connection drops every hour')")
+    conn.commit()
+    index = LshIndex("tickets")
+    assert sync(db_path, index) == 1
+
+    # Lower ids than anything seen so far, as CSV ticket ids can be
+    conn.execute("INSERT INTO tickets VALUES (5, 'VPN connection drops every hour!')")
+    conn.execute("INSERT INTO tickets VALUES (3, 'Printer out of toner on floor 3')")
+    conn.commit()
+    conn.close()
+    assert sync(db_path, index) == 2
+
+    clusters = _clusters(db_path)
+    assert clusters == {900: 900, 5: 900, 3: 3}
+    assert sync(db_path, index) == 0
+
+
+def test_install_backfills_existing_rows_once(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO tickets VALUES (?, ?)", [(1, "Disk full"), (2, "Password reset")])
+    conn.commit()
+    conn.close()
+    assert _install(db_path) == 2
+    assert _install(db_path) == 0
+    assert sync(db_path, LshIndex("tickets"), batch=1) == 2
+    assert set(_clusters(db_path)) == {1, 2}
+
+
+def test_rows_recorded_on_insert_are_not_clustered_twice(db_path):
+    _install(db_path)
+    index = LshIndex("tickets")
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO tickets VALUES (7, 'Disk full on build server')")
+    staged = StagedClusters()
+    _, writes = index.record_writes(7, "Disk full on build server", staged)
+    for sql, params in writes:
+        conn.execute(sql, params)
+    conn.commit()
+    staged.apply()
+    conn.close()
+    assert sync(db_path, index) == 0
+    check = sqlite3.connect(db_path)
+    assert check.execute("SELECT COUNT(*) FROM near_dup_log").fetchone()[0] == 0
+    check.close()
+
+
+def test_create_tables_leaves_the_callers_transaction_open(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO tickets VALUES (1, 'x')")
+    create_tables(conn)
+    assert conn.in_transaction
+    conn.rollback()
+    assert conn.execute("SELECT COUNT(*) FROM tickets").fetchone()[0] == 0
+    conn.close()
+
+
+def test_clusters_join_the_index_only_after_their_commit(db_path):
+    _install(db_path)
+    index = LshIndex("tickets")
+    conn = sqlite3.connect(db_path)
+    staged = StagedClusters()
+    first, writes = index.record_writes(1, "VPN connection drops every hour", staged)
+    # Later rows of the same transaction already match the staged cluster
+    second, _ = index.record_writes(2, "VPN connection drops every hour!", staged)
+    assert (first.cluster_id, second.cluster_id) == (1, 1)
+    for sql, params in writes:
+        conn.execute(sql, params)
+    conn.rollback()  # the insert failed: nothing may stay in memory
+    conn.close()
+    assert index.check("VPN connection drops every hour").cluster_id is None
+
+    staged = StagedClusters()
+    index.record_writes(3, "VPN connection drops every hour", staged)
+    assert index.check("VPN connection drops every hour").cluster_id is None
+    staged.apply()
+    assert index.check("VPN connection drops every hour").cluster_id == 3
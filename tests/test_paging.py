@@ -0,0 +1,50 @@
+import pytest
+
+from database.paging import fetch_page
+from services.database_manager import DatabaseManager
+
+# Many ties on the sort column, so pages have to break them by id
+ROWS = [(f"t{i}", ["Low", "High", "Medium"][i % 3]) for i in range(23)]
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "platform.db"))
+    db.execute_query("CREATE TABLE tickets (id INTEGER PRIMARY KEY, subject TEXT, priority TEXT)")
+    db.execute_many("INSERT INTO tickets (subject, priority) VALUES (?, ?)", ROWS)
+    return db
+
+
+def _walk(db, direction, page_size):
+    """Follow the cursors like the "Load more" button does; return the pages."""
+    pages, cursor = [], None
+    while True:
+        rows = fetch_page(db, "tickets", ["id", "subject"], "priority", direction, cursor, page_size)
+        page = rows[:page_size]
+        pages.append([row[1] for row in page])
+        if len(rows) <= page_size:
+            return pages
+        cursor = (page[-1][0], page[-1][1])
+
+
+@pytest.mark.parametrize("direction", ["ASC", "DESC"])
+def test_keyset_pages_cover_every_row_once_in_order(db, direction):
+    expected = [row[0] for row in db.fetch_all(f"SELECT id FROM tickets ORDER BY priority {direction}, id {direction}")]
+    pages = _walk(db, direction, page_size=5)
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert [i for page in pages for i in page] == expected
+
+
+def test_page_fetches_one_extra_row_to_detect_more(db):
+    assert len(fetch_page(db, "tickets", ["id"], "priority", "ASC", None, 23)) == 23
+    assert len(fetch_page(db, "tickets", ["id"], "priority", "ASC", None, 22)) == 23
+    assert fetch_page(db, "tickets", ["id"], "priority", "ASC", ("Medium", 10**6), 5) == []
+
+
+def test_rows_inserted_before_the_cursor_do_not_shift_later_pages(db):
+    first = fetch_page(db, "tickets", ["id"], "priority", "ASC", None, 5)[:5]
+    cursor = (first[-1][0], first[-1][1])
+    second = fetch_page(db, "tickets", ["id"], "priority", "ASC", cursor, 5)
+    # An OFFSET pager would repeat a row here; the keyset stays put
+    db.execute_query("INSERT INTO tickets (id, subject, priority) VALUES (0, 'early', 'High')")
+    assert fetch_page(db, "tickets", ["id"], "priority", "ASC", cursor, 5) == second
@@ -0,0 +1,37 @@
+import sqlite3
+
+from platform_common.query_stats import QueryStatsCollector, TimedConnection, fingerprint, is_full_scan
+import platform_common.query_stats as query_stats
+
+
+def test_fingerprint_groups_literals_and_in_lists():
+    a = fingerprint("SELECT * FROM t WHERE id = 5 AND name = 'x' AND k IN (?, ?, ?)")
+    b = fingerprint("select * from t   where id = 17 AND name = 'y''z' AND k IN (?, ?)")
+    assert a == "SELECT * FROM t WHERE id = ? AND name = ? AND k IN (?+)"
+    assert a.lower() == b.lower()
+
+
+def test_full_scan_detection():
+    assert is_full_scan("SCAN users")
+    assert not is_full_scan("SCAN users USING INDEX idx_users_name")
+    assert not is_full_scan("SEARCH users USING INTEGER PRIMARY KEY (rowid=?)")
+
+
+def test_timed_connection_records_rows_after_fetch(monkeypatch):
+    collector = QueryStatsCollector(slow_ms=10_000)
+    monkeypatch.setattr(query_stats, "COLLECTOR", collector)
+    conn = sqlite3.connect(":memory:", factory=TimedConnection)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+    conn.executemany("INSERT INTO t (id) VALUES (?)", [(i,) for i in range(10)])
+    assert len(conn.execute("SELECT id FROM t WHERE id > 3").fetchall()) == 6
+    conn.close()
+
+    stats = {row["sql"]: row for row in collector.stats()}
+    assert stats["SELECT id FROM t WHERE id > ?"]["rows"] == 6
+    assert stats["INSERT INTO t (id) VALUES (?)"]["count"] == 1
+
+
+def test_dump_writes_json(tmp_path):
+    collector = QueryStatsCollector()
+    path = collector.dump(tmp_path / "stats.json")
+    assert path.read_text(encoding="utf-8").startswith("{")
@@ -0,0 +1,76 @@
+import types
+
+import pytest
+
+from services import response_cache
+from services.response_cache import ResponseCache, cache_key, normalize_prompt, referenced_tables
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(response_cache, "time", types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_trivially_different_prompts_share_a_key():
+    assert normalize_prompt("  How many  INCIDENTS are open?? ") == "how many incidents are open"
+    assert cache_key("How many incidents?", "sys", {"incidents": 3}) == cache_key("how many   incidents", "sys", {"incidents": 3})
+    assert cache_key("How many incidents?", "sys", {"incidents": 3}) != cache_key("How many incidents?", "sys", {"incidents": 4})
+    assert referenced_tables("Which tickets and threats came in?") == ["incidents", "tickets"]
+
+
+def test_least_recently_used_entry_is_evicted_first(clock):
+    cache = ResponseCache(max_entries=2, db_path=None)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"  # "b" is now the oldest
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("1", "3")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_evicts_and_is_tracked(clock):
+    cache = ResponseCache(max_entries=100, max_bytes=30, db_path=None)
+    cache.put("k1", "x" * 10)  # 12 bytes with the key
+    cache.put("k2", "y" * 10)
+    assert cache.stats()["bytes"] == 24
+    cache.put("k3", "z" * 10)
+    assert cache.get("k1") is None
+    assert cache.stats()["bytes"] == 24
+    cache.put("k2", "short")  # replacing an entry doesn't count it twice
+    assert cache.stats()["bytes"] == 19
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = ResponseCache(ttl=60, db_path=None)
+    cache.put("a", "1")
+    clock.now += 60
+    assert cache.get("a") == "1"
+    clock.now += 1
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (0, 1, 1)
+
+
+def test_persisted_entries_survive_a_restart_until_they_expire(tmp_path, clock):
+    path = str(tmp_path / "ai_cache.db")
+    ResponseCache(ttl=60, db_path=path).put("a", "1")
+
+    restarted = ResponseCache(ttl=60, db_path=path)
+    assert restarted.stats()["entries"] == 0
+    assert restarted.get("a") == "1"
+    assert restarted.stats()["entries"] == 1  # read back into memory
+
+    clock.now += 61
+    assert ResponseCache(ttl=60, db_path=path).get("a") is None
+
+
+def test_clear_empties_memory_and_disk(tmp_path, clock):
+    path = str(tmp_path / "ai_cache.db")
+    cache = ResponseCache(db_path=path)
+    cache.put("a", "1")
+    cache.clear()
+    assert cache.get("a") is None
+    assert ResponseCache(db_path=path).get("a") is None
@@ -0,0 +1,31 @@
+from services.database_manager import DatabaseManager
+from services.search_index import SearchIndex
+
+
+def test_install_once_then_refresh_follows_writes(tmp_path, monkeypatch):
+    db = DatabaseManager(str(tmp_path / "platform.db"))
+    db.execute_query("CREATE TABLE tickets (id INTEGER PRIMARY KEY AUTOINCREMENT, subject TEXT)")
+    index = SearchIndex(db, sources={"tickets": ("subject",)}, embed=None)
+    index.install()
+
+    def no_write_lock():
+        raise AssertionError("install() took the write lock although nothing was missing")
+
+    monkeypatch.setattr(db, "transaction", no_write_lock)
+    SearchIndex(db, sources={"tickets": ("subject",)}, embed=None).install()
+    index.install()
+
+    index.refresh()
+    db.execute_query("INSERT INTO tickets (subject) VALUES ('VPN keeps dropping')")
+    assert index.refresh() == 1
+    assert [hit.row_id for hit in index.search("vpn")] == [1]
+
+
+def test_install_adds_triggers_for_a_table_created_later(tmp_path):
+    db = DatabaseManager(str(tmp_path / "platform.db"))
+    index = SearchIndex(db, sources={"tickets": ("subject",)}, embed=None)
+    index.install()
+    db.execute_query("CREATE TABLE tickets (id INTEGER PRIMARY KEY AUTOINCREMENT, subject TEXT)")
+    index.install()
+    triggers = {row[0] for row in db.fetch_all("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    assert {"tickets_search_insert", "tickets_search_update", "tickets_search_delete"} <= triggers
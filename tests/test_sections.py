@@ -0,0 +1,83 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.sections import load_sections
+
+
+@pytest.fixture
+def connect(tmp_path):
+    path = tmp_path / "sections.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(1,), (2,), (3,)])
+    conn.commit()
+    conn.close()
+    opened = []
+
+    def connect():
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        opened.append(conn)
+        return conn
+
+    connect.opened = opened
+    return connect
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+
+def test_sections_arrive_in_completion_order(executor, connect):
+    release_slow = threading.Event()
+
+    def slow(conn):
+        release_slow.wait(5)
+        return "slow"
+
+    def fast(conn):
+        return conn.execute("SELECT SUM(x) FROM t").fetchone()[0]
+
+    results = load_sections(executor, connect, {"slow": slow, "fast": fast})
+    assert next(results) == ("fast", 6, None)  # doesn't wait for the slow section
+    release_slow.set()
+    assert next(results) == ("slow", "slow", None)
+    assert list(results) == []
+
+
+def test_each_section_gets_its_own_connection_in_a_worker_thread(executor, connect):
+    barrier = threading.Barrier(3, timeout=5)
+
+    def load(conn):
+        barrier.wait()  # all three run at once
+        return id(conn), threading.current_thread().name
+
+    results = {key: result for key, result, _ in load_sections(executor, connect, dict.fromkeys("abc", load))}
+    assert len({conn_id for conn_id, _ in results.values()}) == 3
+    assert threading.current_thread().name not in {name for _, name in results.values()}
+
+    assert len(connect.opened) == 3
+    for conn in connect.opened:  # closed once the loader returned
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+def test_a_failing_section_is_reported_without_stopping_the_others(executor, connect):
+    def broken(conn):
+        return conn.execute("SELECT * FROM missing").fetchall()
+
+    def ok(conn):
+        return conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+
+    results = {key: (result, error) for key, result, error in load_sections(executor, connect, {"broken": broken, "ok": ok})}
+    assert results["ok"] == (3, None)
+    result, error = results["broken"]
+    assert result is None
+    assert isinstance(error, sqlite3.OperationalError)
+    for conn in connect.opened:  # closed even when the loader raised
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
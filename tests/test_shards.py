@@ -0,0 +1,97 @@
+import sqlite3
+
+import pytest
+
+from app.data.lookups import encode_categorical_columns, labeled_select
+from app.data.shards import ShardRouter
+
+MONTHS = ["2024-01", "2024-02", "2024-03", "2024-04", "2024-05"]
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "main.db"))
+    conn.execute("""
+        CREATE TABLE cyber_incidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, incident_type TEXT, severity TEXT,
+            status TEXT, description TEXT, reported_by TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO cyber_incidents (date, incident_type, severity, status, description) VALUES (?, ?, ?, ?, ?)",
+        [(f"{month}-10", "Phishing", "High", "Open", month) for month in MONTHS],
+    )
+    encode_categorical_columns(conn)
+    router = ShardRouter(conn, tmp_path / "shards")
+    router.migrate("cyber_incidents")
+    router.detach_all()
+    conn.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, 2)  # fewer than the shards
+    yield conn
+    conn.close()
+
+
+def test_query_reads_more_shards_than_the_attach_limit(conn, tmp_path):
+    router = ShardRouter(conn, tmp_path / "shards")
+    assert router.months("cyber_incidents") == MONTHS
+    with pytest.raises(RuntimeError):
+        router.create_union_view("cyber_incidents")
+    rows = list(router.query("cyber_incidents", "description"))
+    router.detach_all()
+    assert sorted(r[0] for r in rows) == MONTHS
+
+
+def test_query_prunes_and_filters_by_date(conn, tmp_path):
+    router = ShardRouter(conn, tmp_path / "shards")
+    rows = list(router.query("cyber_incidents", "description", start="2024-02-15", end="2024-04-15"))
+    router.detach_all()
+    assert sorted(r[0] for r in rows) == ["2024-03", "2024-04"]
+
+
+def test_labeled_select_over_each_shard(conn, tmp_path):
+    router = ShardRouter(conn, tmp_path / "shards")
+    labels = []
+    for source in router.sources("cyber_incidents"):
+        schema = source.split(".")[0]
+        cursor = conn.execute(labeled_select(conn, "cyber_incidents", source=source, schema=schema))
+        columns = [d[0] for d in cursor.description]
+        labels += [dict(zip(columns, row))["severity"] for row in cursor]
+    router.detach_all()
+    assert labels == ["High"] * len(MONTHS)
+
+
+@pytest.fixture
+def empty(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "empty.db"))
+    conn.execute("""
+        CREATE TABLE cyber_incidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, incident_type TEXT, severity TEXT,
+            status TEXT, description TEXT NOT NULL, reported_by TEXT
+        )
+    """)
+    encode_categorical_columns(conn)
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_shard_keys_never_collide_with_main_on_an_empty_table(empty, tmp_path):
+    router = ShardRouter(empty, tmp_path / "shards")
+    shard_id = router.insert("cyber_incidents", {"date": "2023-01-05", "severity": "High", "description": "old"})
+    router.detach_all()
+    main_id = empty.execute(
+        "INSERT INTO cyber_incidents (date, severity, description) VALUES ('2024-05-01', 'Low', 'new')"
+    ).lastrowid
+    empty.commit()
+    assert main_id != shard_id
+
+
+def test_failed_shard_insert_rolls_back_key_and_labels(empty, tmp_path):
+    router = ShardRouter(empty, tmp_path / "shards")
+    router.insert("cyber_incidents", {"date": "2023-01-05", "severity": "High", "description": "old"})
+    sequence = empty.execute("SELECT seq FROM sqlite_sequence WHERE name = 'cyber_incidents'").fetchone()
+    with pytest.raises(sqlite3.IntegrityError):
+        router.insert("cyber_incidents", {"date": "2023-01-06", "incident_type": "Brand new type"})
+    router.detach_all()
+    assert not empty.in_transaction
+    assert empty.execute("SELECT seq FROM sqlite_sequence WHERE name = 'cyber_incidents'").fetchone() == sequence
+    assert empty.execute("SELECT 1 FROM incident_types WHERE name = 'Brand new type'").fetchone() is None
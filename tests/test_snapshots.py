@@ -0,0 +1,67 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from app.data import snapshots
+from app.data.shards import ShardRouter
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # shards live under ./DATA
+    monkeypatch.setattr(snapshots, "SNAPSHOT_DIR", tmp_path / "DATA" / "snapshots")
+    monkeypatch.setattr(snapshots, "BATCH_SIZE", 2)
+    conn = sqlite3.connect(str(tmp_path / "main.db"))
+    conn.execute("""
+        CREATE TABLE cyber_incidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, incident_type TEXT, severity TEXT,
+            status TEXT, description TEXT, reported_by TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO cyber_incidents (date, incident_type, severity, status, description) VALUES (?, ?, ?, ?, ?)",
+        [(date, "Phishing", "High", "Open", date) for date in ("2024-01-10", "2024-01-20", "2024-02-10", "n/a")],
+    )
+    conn.commit()
+    router = ShardRouter(conn)
+    router.migrate("cyber_incidents", before_month="2024-02")  # January into a shard, the rest stays in main
+    router.detach_all()
+    yield conn
+    conn.close()
+
+
+def test_snapshot_covers_main_and_shards(conn):
+    assert snapshots.build_table_snapshot(conn, "cyber_incidents") == 4
+    table = snapshots.read_snapshot("cyber_incidents", columns=["description", "severity"])
+    assert sorted(table.column("description").to_pylist()) == ["2024-01-10", "2024-01-20", "2024-02-10", "n/a"]
+    assert str(table.schema.field("severity").type).startswith("dictionary")
+
+
+def test_month_filters_skip_undated_rows(conn):
+    snapshots.build_table_snapshot(conn, "cyber_incidents")
+    assert snapshots.read_snapshot("cyber_incidents", ["description"], start_month="2024-02").num_rows == 1
+    assert snapshots.read_snapshot("cyber_incidents", ["description"], end_month="2024-01").num_rows == 2
+    assert snapshots.read_snapshot("cyber_incidents", ["description"]).num_rows == 4
+
+
+def test_snapshot_dir_does_not_follow_the_working_directory():
+    assert snapshots.SNAPSHOT_DIR == Path(__file__).resolve().parents[1] / "DATA" / "snapshots"
+
+
+def test_concurrent_builds_do_not_clobber_each_other(conn, tmp_path):
+    def build(_):
+        worker = sqlite3.connect(str(tmp_path / "main.db"))
+        try:
+            return snapshots.build_table_snapshot(worker, "cyber_incidents")
+        finally:
+            worker.close()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert list(pool.map(build, range(4))) == [4, 4, 4, 4]
+    assert snapshots.snapshot_info("cyber_incidents")["rows"] == 4
+    assert snapshots.read_snapshot("cyber_incidents", ["description"]).num_rows == 4
+    assert sorted(p.name for p in snapshots.SNAPSHOT_DIR.iterdir()) == ["cyber_incidents", "manifest.json"]
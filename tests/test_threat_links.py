@@ -0,0 +1,89 @@
+import sqlite3
+
+import pytest
+
+from app.data.threat_links import (
+    incidents_for_threat, keywords, match_score, rebuild_threat_links, refresh_threat_links, threat_match_counts,
+)
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # no DATA/shards here: incidents are all in main
+    conn = sqlite3.connect(str(tmp_path / "main.db"), isolation_level=None)  # like the writer's connection
+    conn.execute("CREATE TABLE security_threats (id INTEGER PRIMARY KEY, threat_name TEXT, severity TEXT, detected_on TEXT)")
+    conn.execute("CREATE TABLE cyber_incidents (id INTEGER PRIMARY KEY, incident_type TEXT, description TEXT)")
+    yield conn
+    conn.close()
+
+
+def _threat(conn, name):
+    return conn.execute("INSERT INTO security_threats (threat_name) VALUES (?)", (name,)).lastrowid
+
+
+def _incident(conn, incident_type, description):
+    return conn.execute(
+        "INSERT INTO cyber_incidents (incident_type, description) VALUES (?, ?)", (incident_type, description)
+    ).lastrowid
+
+
+def _links(conn):
+    return sorted(conn.execute("SELECT threat_id, incident_id, score FROM threat_incident_links"))
+
+
+def test_keywords_drop_generic_words_and_fuzzy_words_still_match():
+    assert keywords("Ransomware attack DETECTED on the file server") == ["ransomware", "file", "server"]
+    assert match_score(["ransomware"], ["ransomeware", "server"]) > 0.5
+    assert match_score(["ransomware"], ["phishing", "email"]) == 0.0
+    assert match_score([], ["anything"]) == 0.0
+
+
+def test_threats_link_to_incidents_with_similar_wording(conn):
+    ransomware = _threat(conn, "LockBit ransomware campaign")
+    phishing = _threat(conn, "Credential phishing")
+    hit = _incident(conn, "Malware", "Lockbit ransomeware found on file server")
+    miss = _incident(conn, "Hardware", "Disk failure on backup server")
+    phish = _incident(conn, "Phishing", "Credential harvesting email reported")
+
+    counts = refresh_threat_links(conn)
+    assert counts == {"threats": 2, "incidents": 3, "links": 2}
+    linked = {(t, i) for t, i, _ in _links(conn)}
+    assert linked == {(ransomware, hit), (phishing, phish)}
+    assert miss not in {i for _, i in linked}
+    assert not conn.in_transaction
+
+
+def test_incidents_with_the_same_text_are_scored_once(conn):
+    threat = _threat(conn, "Credential phishing")
+    ids = [_incident(conn, "Phishing", "Credential phishing email") for _ in range(5)]
+    counts = refresh_threat_links(conn)
+    assert counts["links"] == 1  # one text link...
+    assert conn.execute("SELECT COUNT(*) FROM match_texts").fetchone() == (1,)
+    assert [row[0] for row in incidents_for_threat(conn, threat)] == ids  # ...expanded to every incident
+
+
+def test_refresh_only_processes_new_rows_and_matches_a_rebuild(conn):
+    threat = _threat(conn, "SQL injection")
+    _incident(conn, "Web", "SQL injection against login form")
+    refresh_threat_links(conn)
+    assert refresh_threat_links(conn) == {"threats": 0, "incidents": 0, "links": 0}
+
+    later_incident = _incident(conn, "Web", "sql injections in search page")
+    later_threat = _threat(conn, "Login form brute force")
+    counts = refresh_threat_links(conn)
+    assert (counts["threats"], counts["incidents"]) == (1, 1)
+    assert (threat, later_incident) in {(t, i) for t, i, _ in _links(conn)}
+    assert later_threat in {t for t, _, _ in _links(conn)}  # matched against the text seen before it
+
+    incremental = _links(conn)
+    rebuild_threat_links(conn)
+    assert _links(conn) == incremental
+
+
+def test_threat_match_counts_lists_every_threat_most_linked_first(conn):
+    lonely = _threat(conn, "Quantum supremacy exploit")
+    busy = _threat(conn, "Credential phishing")
+    for _ in range(3):
+        _incident(conn, "Phishing", "Credential phishing email")
+    refresh_threat_links(conn)
+    assert threat_match_counts(conn) == [(busy, "Credential phishing", 3), (lonely, "Quantum supremacy exploit", 0)]
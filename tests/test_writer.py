@@ -0,0 +1,99 @@
+import sqlite3
+import threading
+
+import pytest
+
+from platform_common.writer import SingleWriter, get_writer
+
+
+@pytest.fixture
+def writer(tmp_path):
+    path = str(tmp_path / "w.db")
+    writer = SingleWriter(path)
+    writer.submit("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT UNIQUE)").result(timeout=5)
+    yield writer
+    writer.close()
+
+
+def _count(writer):
+    conn = sqlite3.connect(writer._db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_concurrent_submits_all_commit(writer):
+    futures = []
+    lock = threading.Lock()
+
+    def submit(start):
+        for i in range(start, start + 50):
+            future = writer.submit("INSERT INTO t (name) VALUES (?)", (f"n{i}",))
+            with lock:
+                futures.append(future)
+
+    threads = [threading.Thread(target=submit, args=(i * 50,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(isinstance(f.result(timeout=5), int) for f in futures)
+    assert _count(writer) == 200
+
+
+def test_failing_statement_only_fails_its_own_future(writer):
+    ok = writer.submit("INSERT INTO t (name) VALUES (?)", ("a",))
+    dup = writer.submit("INSERT INTO t (name) VALUES (?)", ("a",))
+    assert ok.result(timeout=5)
+    with pytest.raises(sqlite3.IntegrityError):
+        dup.result(timeout=5)
+    assert _count(writer) == 1
+
+
+def test_transaction_commits_and_rolls_back(writer):
+    with writer.transaction() as conn:
+        conn.execute("INSERT INTO t (name) VALUES ('x')")
+        conn.execute("INSERT INTO t (name) VALUES ('y')")
+    with pytest.raises(ValueError):
+        with writer.transaction() as conn:
+            conn.execute("INSERT INTO t (name) VALUES ('z')")
+            raise ValueError("boom")
+    assert _count(writer) == 2
+    # the writer is still usable after a failed block
+    assert writer.submit("INSERT INTO t (name) VALUES ('w')").result(timeout=5)
+
+
+def test_connection_allows_attach(writer, tmp_path):
+    with writer.connection() as conn:
+        conn.execute("ATTACH DATABASE ? AS other", (str(tmp_path / "other.db"),))
+        conn.execute("CREATE TABLE other.o (id INTEGER)")
+        conn.execute("DETACH DATABASE other")
+
+
+def test_submit_while_holding_connection_raises(writer):
+    with writer.connection():
+        with pytest.raises(RuntimeError):
+            writer.submit("INSERT INTO t (name) VALUES ('deadlock')")
+
+
+def test_connect_failure_fails_futures_instead_of_hanging(tmp_path):
+    writer = SingleWriter(str(tmp_path / "missing" / "dir" / "w.db"))
+    with pytest.raises(sqlite3.OperationalError):
+        writer.submit("SELECT 1").result(timeout=5)
+    # later requests fail immediately too
+    with pytest.raises(sqlite3.OperationalError):
+        writer.submit("SELECT 1").result(timeout=5)
+    assert writer.failed
+
+
+def test_get_writer_replaces_a_failed_writer(tmp_path):
+    missing = tmp_path / "later"
+    path = str(missing / "w.db")
+    first = get_writer(path)
+    with pytest.raises(sqlite3.OperationalError):
+        first.submit("SELECT 1").result(timeout=5)
+    missing.mkdir()
+    second = get_writer(path)
+    assert second is not first
+    assert second.submit("CREATE TABLE ok (id INTEGER)").result(timeout=5) is not None